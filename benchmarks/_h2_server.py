@@ -0,0 +1,178 @@
+"""
+Local HTTP/2 over TLS server for the benchmarks.
+
+A small h2 implementation (ALPN "h2", TLS 1.2) built on ja3requests' own
+frame and HPACK modules. It enforces flow control like a compliant server:
+response DATA is only sent within the client's windows, and uploads are
+acknowledged with WINDOW_UPDATE as they are read.
+
+``GET /<n>`` returns n bytes; any request with a body is answered with the
+number of body bytes received.
+"""
+
+import os
+import socket
+import socketserver
+import ssl
+import struct
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from _tls_server import server_context
+
+from ja3requests.protocol.h2.frame import (
+    CONNECTION_PREFACE,
+    DEFAULT_WINDOW_SIZE,
+    FLAG_END_STREAM,
+    FRAME_DATA,
+    FRAME_HEADERS,
+    FRAME_SETTINGS,
+    FRAME_WINDOW_UPDATE,
+    H2Frame,
+    SETTINGS_INITIAL_WINDOW_SIZE,
+    SETTINGS_MAX_CONCURRENT_STREAMS,
+    build_data_frame,
+    build_headers_frame,
+    build_settings_frame,
+    build_window_update_frame,
+    parse_settings_payload,
+)
+from ja3requests.protocol.h2.hpack import HPACKDecoder, HPACKEncoder
+
+MAX_FRAME_SIZE = 16384
+
+
+class _H2Handler(socketserver.BaseRequestHandler):
+    """Serve one HTTP/2 connection."""
+
+    def setup(self):
+        # Response HEADERS and DATA are separate writes; don't let Nagle hold the second
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.decoder = HPACKDecoder()
+        self.encoder = HPACKEncoder()
+        self.client_window = DEFAULT_WINDOW_SIZE
+        self.client_initial_window = DEFAULT_WINDOW_SIZE
+        self.stream_windows = {}
+        self.outgoing = {}  # stream_id -> memoryview of response body
+        self.uploads = {}  # stream_id -> bytes received
+
+    def _write(self, *frames):
+        self.request.sendall(b"".join(frame.serialize() for frame in frames))
+
+    def _respond(self, stream_id, body):
+        block = self.encoder.encode_headers(
+            [(":status", "200"), ("content-type", "application/octet-stream")]
+        )
+        self._write(build_headers_frame(stream_id, block, end_stream=not body))
+        if body:
+            self.stream_windows[stream_id] = self.client_initial_window
+            self.outgoing[stream_id] = memoryview(body)
+
+    def _flush(self):
+        """Send response DATA within the client's connection and stream windows."""
+        frames = []
+        for stream_id in list(self.outgoing):
+            body = self.outgoing[stream_id]
+            while body:
+                size = min(len(body), MAX_FRAME_SIZE, self.client_window, self.stream_windows[stream_id])
+                if size <= 0:
+                    break
+                frames.append(build_data_frame(stream_id, body[:size].tobytes(), end_stream=size == len(body)))
+                self.client_window -= size
+                self.stream_windows[stream_id] -= size
+                body = body[size:]
+            if body:
+                self.outgoing[stream_id] = body
+            else:
+                del self.outgoing[stream_id]
+                del self.stream_windows[stream_id]
+        if frames:
+            self._write(*frames)
+
+    def _handle_frame(self, frame):
+        if frame.type == FRAME_SETTINGS and not frame.flags:
+            settings = parse_settings_payload(frame.payload)
+            if SETTINGS_INITIAL_WINDOW_SIZE in settings:
+                delta = settings[SETTINGS_INITIAL_WINDOW_SIZE] - self.client_initial_window
+                self.client_initial_window = settings[SETTINGS_INITIAL_WINDOW_SIZE]
+                for stream_id in self.stream_windows:
+                    self.stream_windows[stream_id] += delta
+            self._write(build_settings_frame(ack=True))
+        elif frame.type == FRAME_WINDOW_UPDATE:
+            increment = struct.unpack("!I", frame.payload)[0] & 0x7FFFFFFF
+            if frame.stream_id == 0:
+                self.client_window += increment
+            elif frame.stream_id in self.stream_windows:
+                self.stream_windows[frame.stream_id] += increment
+        elif frame.type == FRAME_HEADERS:
+            headers = dict(self.decoder.decode_headers(frame.payload))
+            if frame.flags & FLAG_END_STREAM:
+                size = headers[":path"].rsplit("/", 1)[-1]
+                self._respond(frame.stream_id, b"x" * int(size) if size.isdigit() else b"ok")
+            else:
+                self.uploads[frame.stream_id] = 0
+        elif frame.type == FRAME_DATA:
+            size = len(frame.payload)
+            self.uploads[frame.stream_id] += size
+            updates = [build_window_update_frame(0, size)] if size else []
+            if frame.flags & FLAG_END_STREAM:
+                self._respond(frame.stream_id, str(self.uploads.pop(frame.stream_id)).encode())
+            elif size:
+                updates.append(build_window_update_frame(frame.stream_id, size))
+            if updates:
+                self._write(*updates)
+
+    def handle(self):
+        self._write(build_settings_frame({
+            SETTINGS_MAX_CONCURRENT_STREAMS: 100,
+            SETTINGS_INITIAL_WINDOW_SIZE: DEFAULT_WINDOW_SIZE,
+        }))
+        buf = b""
+        preface_seen = False
+        try:
+            while True:
+                data = self.request.recv(65536)
+                if not data:
+                    return
+                buf += data
+                if not preface_seen:
+                    if len(buf) < len(CONNECTION_PREFACE):
+                        continue
+                    buf = buf[len(CONNECTION_PREFACE):]
+                    preface_seen = True
+                frames, buf = H2Frame.parse_all(buf)
+                for frame in frames:
+                    self._handle_frame(frame)
+                self._flush()
+        except (OSError, ssl.SSLError):
+            pass
+
+
+class _H2Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(self, address, ssl_context):
+        super().__init__(address, _H2Handler)
+        self.ssl_context = ssl_context
+
+    def finish_request(self, request, client_address):
+        # Handshake in the per-connection thread, not in the accept loop
+        with self.ssl_context.wrap_socket(request, server_side=True) as tls_sock:
+            super().finish_request(tls_sock, client_address)
+
+
+def start_h2_server():
+    """
+    Start a local h2 server on an ephemeral port (TLS 1.2, where the client
+    reads the ALPN result from the ServerHello).
+    :return: (server, port); call server.shutdown() when done
+    """
+    ctx = server_context(ssl.TLSVersion.TLSv1_2, alpn_protocols=["h2"])
+    server = _H2Server(("127.0.0.1", 0), ctx)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_address[1]
@@ -0,0 +1,147 @@
+"""
+Local TLS test server shared by the benchmarks.
+
+Generates a throwaway self-signed certificate and serves keep-alive
+HTTP/1.1 over TLS from a thread, so benchmarks measure the client rather
+than the network.
+"""
+
+import datetime
+import http.server
+import os
+import ssl
+import sys
+import tempfile
+import threading
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+#: Signature algorithms accepted by the local OpenSSL server
+SIGNATURE_ALGORITHMS = [0x0403, 0x0804, 0x0401, 0x0503, 0x0805, 0x0501, 0x0806, 0x0601]
+
+
+def _write_self_signed(directory):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.DNSName("localhost")]), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = os.path.join(directory, "cert.pem")
+    key_path = os.path.join(directory, "key.pem")
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(
+            key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.TraditionalOpenSSL,
+                serialization.NoEncryption(),
+            )
+        )
+    return cert_path, key_path
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    body = b"ok"
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Serve the configured body with Content-Length for keep-alive."""
+        size = self.path.rsplit("/", 1)[-1]
+        body = b"x" * int(size) if size.isdigit() else self.body
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Read the body (Content-Length or chunked) and answer with its size."""
+        received = 0
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            while True:
+                size = int(self.rfile.readline().split(b";")[0], 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                while size:
+                    received += len(self.rfile.read(min(size, 65536)))
+                    size -= min(size, 65536)
+                self.rfile.readline()
+        else:
+            length = int(self.headers.get("Content-Length", 0))
+            while received < length:
+                received += len(self.rfile.read(min(length - received, 65536)))
+        body = str(received).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+class _Server(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, ssl_context):
+        super().__init__(address, _Handler)
+        self.ssl_context = ssl_context
+
+    def finish_request(self, request, client_address):
+        # Handshake in the per-connection thread, not in the accept loop
+        with self.ssl_context.wrap_socket(request, server_side=True) as tls_sock:
+            super().finish_request(tls_sock, client_address)
+
+
+def server_context(max_version=ssl.TLSVersion.TLSv1_3, alpn_protocols=None):
+    """
+    Build a server SSLContext with a throwaway self-signed certificate.
+    :param max_version: Highest TLS version the server negotiates
+    :param alpn_protocols: Protocols offered through ALPN, if any
+    :return: ssl.SSLContext
+    """
+    directory = tempfile.mkdtemp(prefix="ja3bench")
+    cert_path, key_path = _write_self_signed(directory)
+
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    ctx.load_cert_chain(cert_path, key_path)
+    ctx.maximum_version = max_version
+    ctx.set_ciphers("ALL:@SECLEVEL=0")
+    if alpn_protocols:
+        ctx.set_alpn_protocols(alpn_protocols)
+    return ctx
+
+
+def start_server(max_version=ssl.TLSVersion.TLSv1_3):
+    """
+    Start a local TLS server on an ephemeral port.
+    :param max_version: Highest TLS version the server negotiates
+    :return: (server, port); call server.shutdown() when done
+    """
+    server = _Server(("127.0.0.1", 0), server_context(max_version))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_address[1]
+
+
+def percentile(samples, pct):
+    """Return the pct-th percentile of samples (nearest rank)."""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
@@ -0,0 +1,82 @@
+"""
+ClientHello construction rate for one browser fingerprint.
+
+Builds N ClientHellos for the Chrome 100 preset, as a client does for
+every new connection, and serializes each to its record bytes. The
+preset is TLS 1.2, so no key_share generation hides the difference.
+"rebuild" constructs the ClientHello from the config each time,
+serializing every cipher suite and extension again; "template" fills the
+per-connection fields (random, GREASE, SNI) into the fingerprint's
+compiled template. "set_payload" is the full TLS.set_payload path, which
+uses the template.
+
+Usage:
+    python benchmarks/bench_client_hello.py [-n 50000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from ja3requests import TlsConfig
+from ja3requests.protocol.tls import TLS
+from ja3requests.protocol.tls.layers.client_hello import ClientHello, client_hello_template
+
+
+def rebuild(config):
+    """Construct the ClientHello from the config, as before templates."""
+    return ClientHello(
+        b"\x03\x03",
+        cipher_suites=config.cipher_suites,
+        server_name=config.server_name,
+        supported_groups=config.supported_groups,
+        signature_algorithms=config.signature_algorithms,
+        alpn_protocols=config.alpn_protocols,
+        use_grease=config.use_grease,
+        _extensions=list(config.extensions),
+    ).message
+
+
+def template(config):
+    """Fill this connection's fields into the compiled template."""
+    return client_hello_template(
+        b"\x03\x03",
+        config.cipher_suites,
+        supported_groups=config.supported_groups,
+        signature_algorithms=config.signature_algorithms,
+        alpn_protocols=config.alpn_protocols,
+        use_grease=config.use_grease,
+        extensions=config.extensions,
+    ).build(server_name=config.server_name).message
+
+
+def set_payload(config):
+    """The full per-connection path used by the HTTPS sockets."""
+    tls = TLS(None)
+    tls.set_payload(tls_config=config)
+    return tls.body.message
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("-n", "--hellos", type=int, default=50000)
+    args = parser.parse_args()
+
+    config = TlsConfig.from_browser("chrome", 100, server_name="www.example.com")
+    assert len(rebuild(config)) == len(template(config)) == len(set_payload(config))
+
+    print(f"{args.hellos} ClientHellos, Chrome 100 preset")
+    for label, build in (("rebuild", rebuild), ("template", template), ("set_payload", set_payload)):
+        start = time.perf_counter()
+        for _ in range(args.hellos):
+            build(config)
+        elapsed = time.perf_counter() - start
+        print(f"  {label:12s} {args.hellos / elapsed:10,.0f} hellos/s  {elapsed / args.hellos * 1e6:6.2f} us each")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+HTTP/2 download and upload throughput against a local h2 server.
+
+The server enforces flow control, so without WINDOW_UPDATE frames from
+the client a download stalls after the initial 64 KB window, and an
+upload sent as one oversized DATA frame is rejected. Both now run at
+full speed.
+
+Usage:
+    python benchmarks/bench_h2_throughput.py [--mb 16] [--upload]
+"""
+
+import argparse
+import time
+
+from _h2_server import start_h2_server
+
+from ja3requests import Session, TlsConfig
+from ja3requests.pool import ConnectionPool
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--mb", type=int, default=16, help="transfer size in MB")
+    parser.add_argument("--upload", action="store_true", help="POST the body instead of downloading it")
+    args = parser.parse_args()
+
+    server, port = start_h2_server()
+    config = TlsConfig()
+    config.alpn_protocols = ["h2"]
+    size = args.mb * 1024 * 1024
+
+    with Session(tls_config=config, pool=ConnectionPool()) as session:
+        session.get(f"https://127.0.0.1:{port}/0")  # Handshake outside the timing
+        start = time.perf_counter()
+        if args.upload:
+            response = session.post(f"https://127.0.0.1:{port}/upload", data=b"u" * size)
+            assert int(response.content) == size, response.content
+        else:
+            response = session.get(f"https://127.0.0.1:{port}/{size}")
+            assert len(response.content) == size, len(response.content)
+        elapsed = time.perf_counter() - start
+
+    server.shutdown()
+    direction = "upload" if args.upload else "download"
+    print(f"h2 {direction} of {args.mb} MB: {elapsed:.3f} s, {size / elapsed / 1e6:.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
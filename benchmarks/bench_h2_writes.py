@@ -0,0 +1,84 @@
+"""
+Send syscalls and TLS records per HTTP/2 request.
+
+Sends small POST requests over one h2 connection to the local server and
+counts the client's send syscalls (sendall and sendmsg on its socket) and
+the TLS records they carried. Frames are queued in H2Connection and handed
+to TLS in one piece per flush point, so a request's HEADERS and DATA share
+a record, and several records leave with one sendmsg call.
+
+Usage:
+    python benchmarks/bench_h2_writes.py [-n 200] [--body 1024]
+"""
+
+import argparse
+import socket
+import time
+
+from _h2_server import start_h2_server
+
+from ja3requests import Session, TlsConfig
+from ja3requests.pool import ConnectionPool
+from ja3requests.protocol.tls import TLS
+
+
+class _Counters:  # pylint: disable=too-few-public-methods
+    sends = 0
+    records = 0
+
+
+def instrument():
+    """Count send syscalls on plain sockets and the records encrypted for them."""
+    counters = _Counters()
+    sendall, sendmsg, encrypt_records = socket.socket.sendall, socket.socket.sendmsg, TLS.encrypt_application_records
+
+    def counted_sendall(self, *args, **kwargs):
+        counters.sends += 1
+        return sendall(self, *args, **kwargs)
+
+    def counted_sendmsg(self, *args, **kwargs):
+        counters.sends += 1
+        return sendmsg(self, *args, **kwargs)
+
+    def counted_encrypt_records(self, data):
+        records = encrypt_records(self, data)
+        counters.records += len(records)
+        return records
+
+    socket.socket.sendall = counted_sendall
+    socket.socket.sendmsg = counted_sendmsg
+    TLS.encrypt_application_records = counted_encrypt_records
+    return counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("-n", "--requests", type=int, default=200, help="requests to send")
+    parser.add_argument("--body", type=int, default=1024, help="request body size in bytes")
+    args = parser.parse_args()
+
+    server, port = start_h2_server()
+    config = TlsConfig()
+    config.alpn_protocols = ["h2"]
+    body = b"b" * args.body
+
+    with Session(tls_config=config, pool=ConnectionPool()) as session:
+        counters = instrument()
+        session.get(f"https://127.0.0.1:{port}/0")
+        print(f"connection setup + first request: {counters.sends} sends, {counters.records} records")
+
+        counters.sends = counters.records = 0
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            response = session.post(f"https://127.0.0.1:{port}/upload", data=body)
+            assert int(response.content) == args.body, response.content
+        elapsed = time.perf_counter() - start
+
+    server.shutdown()
+    print(f"{args.requests} POSTs of {args.body} bytes: {elapsed:.3f} s, {args.requests / elapsed:.0f} requests/s")
+    print(f"  sends / request:   {counters.sends / args.requests:6.2f}")
+    print(f"  records / request: {counters.records / args.requests:6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+HPACK Huffman codec throughput on realistic header values.
+
+Compares the nibble-at-a-time state-machine decoder with the previous
+bit-at-a-time walk of a dict trie (kept here as the reference), and the
+single-integer encoder with the previous byte-by-byte one, on a mix of
+request and response header values.
+
+Usage:
+    python benchmarks/bench_huffman.py [-n 2000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from ja3requests.protocol.h2.huffman import HUFFMAN_TABLE, huffman_decode, huffman_encode
+
+HEADER_VALUES = [
+    b"Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+    b"Chrome/124.0.0.0 Safari/537.36",
+    b"text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
+    b"gzip, deflate, br, zstd",
+    b"en-US,en;q=0.9",
+    b"text/html; charset=utf-8",
+    b"Tue, 20 Oct 2026 10:00:00 GMT",
+    b"max-age=31536000; includeSubDomains; preload",
+    b"cloudflare",
+    b"private, no-cache, no-store, must-revalidate",
+    b"W/\"5e15153d-120f\"",
+    b"session_id=7d1f0c2a9b8e4f6a; Path=/; Secure; HttpOnly; SameSite=Lax",
+    b"https://www.example.com/assets/app.3f9c1b.js",
+    b"accept-encoding, origin",
+    b"8da3c1e2b4f5a6d7-LHR",
+]
+
+
+def _reference_tree():
+    tree = {}
+    for byte_val, (code, bit_len) in enumerate(HUFFMAN_TABLE[:256]):
+        node = tree
+        for i in range(bit_len - 1, -1, -1):
+            node = node.setdefault((code >> i) & 1, {})
+        node["value"] = byte_val
+    return tree
+
+
+_TREE = _reference_tree()
+
+
+def reference_decode(data):
+    """Previous decoder: walk the trie one bit at a time."""
+    result = bytearray()
+    node = _TREE
+    for byte in data:
+        for i in range(7, -1, -1):
+            bit = (byte >> i) & 1
+            if bit in node:
+                node = node[bit]
+                if "value" in node:
+                    result.append(node["value"])
+                    node = _TREE
+            else:
+                node = _TREE
+    return bytes(result)
+
+
+def reference_encode(data):
+    """Previous encoder: flush a byte whenever 8 bits are pending."""
+    bits = 0
+    bits_left = 0
+    result = bytearray()
+    for byte in data:
+        code, bit_len = HUFFMAN_TABLE[byte]
+        bits = (bits << bit_len) | code
+        bits_left += bit_len
+        while bits_left >= 8:
+            bits_left -= 8
+            result.append((bits >> bits_left) & 0xFF)
+    if bits_left > 0:
+        bits = (bits << (8 - bits_left)) | ((1 << (8 - bits_left)) - 1)
+        result.append(bits & 0xFF)
+    return bytes(result)
+
+
+def _time(func, inputs):
+    start = time.perf_counter()
+    for item in inputs:
+        func(item)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("-n", "--rounds", type=int, default=2000, help="passes over the header set")
+    args = parser.parse_args()
+
+    plain = HEADER_VALUES * args.rounds
+    encoded = [huffman_encode(value) for value in plain]
+    assert all(huffman_decode(e) == reference_decode(e) for e in encoded[: len(HEADER_VALUES)])
+    assert all(huffman_encode(v) == reference_encode(v) for v in HEADER_VALUES)
+    total = sum(len(value) for value in plain) / 1e6
+
+    print(f"{len(plain)} header values, {total:.1f} MB decoded")
+    for label, func, inputs in (
+        ("decode (bit trie)", reference_decode, encoded),
+        ("decode (nibble table)", huffman_decode, encoded),
+        ("encode (per byte)", reference_encode, plain),
+        ("encode (one integer)", huffman_encode, plain),
+    ):
+        elapsed = _time(func, inputs)
+        print(f"  {label:24s} {elapsed:7.3f} s  {total / elapsed:7.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
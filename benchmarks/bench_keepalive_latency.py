@@ -0,0 +1,59 @@
+"""
+Keep-alive request latency over TLS against a local server.
+
+Opens one pooled connection, then times N sequential GETs that reuse it.
+Before the readiness-driven send path each request paid a fixed 300 ms
+sleep; now p50 should be well under a millisecond.
+
+Usage:
+    python benchmarks/bench_keepalive_latency.py [-n 200] [--tls13]
+"""
+
+import argparse
+import ssl
+import time
+
+from _tls_server import SIGNATURE_ALGORITHMS, percentile, start_server
+
+from ja3requests import Session, TlsConfig
+from ja3requests.pool import ConnectionPool
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("-n", "--requests", type=int, default=200)
+    parser.add_argument("--tls13", action="store_true", help="negotiate TLS 1.3")
+    args = parser.parse_args()
+
+    server, port = start_server(
+        ssl.TLSVersion.TLSv1_3 if args.tls13 else ssl.TLSVersion.TLSv1_2
+    )
+    config = TlsConfig()
+    if args.tls13:
+        config.tls_version = 0x0304
+        config.cipher_suites = [0x1301, 0x1302, 0x1303]
+        config.supported_groups = [29]
+        config.signature_algorithms = SIGNATURE_ALGORITHMS
+
+    url = f"https://127.0.0.1:{port}/"
+    with Session(tls_config=config, pool=ConnectionPool()) as session:
+        start = time.perf_counter()
+        session.get(url)
+        first = time.perf_counter() - start
+
+        samples = []
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            response = session.get(url)
+            samples.append(time.perf_counter() - start)
+            assert response.status_code == 200
+
+    server.shutdown()
+    print(f"first request (handshake): {first * 1000:8.3f} ms")
+    print(f"keep-alive requests:       {len(samples)}")
+    for pct in (50, 90, 99):
+        print(f"  p{pct}: {percentile(samples, pct) * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+TLS 1.3 ClientHello latency under bursty connection churn, with and
+without a KeySharePool.
+
+Opens bursts of B connections' worth of ClientHellos with an idle pause
+between bursts, as a crawler reconnecting to many hosts does. Inline,
+every ClientHello waits for an x25519 key pair to be generated. With the
+pool, key pairs generated during the pause are taken from its queue, and
+only a burst larger than the pool falls back to inline generation.
+
+Usage:
+    python benchmarks/bench_key_share_pool.py [-b 32] [-r 50] [--pause 0.05]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from _tls_server import percentile  # pylint: disable=wrong-import-position
+
+# pylint: disable=wrong-import-position
+from ja3requests import TlsConfig
+from ja3requests.protocol.tls import TLS
+from ja3requests.protocol.tls.key_pool import KeySharePool
+
+
+def run(config, bursts, burst_size, pause):
+    """Time every ClientHello of every burst; returns the samples in seconds."""
+    samples = []
+    for _ in range(bursts):
+        time.sleep(pause)
+        for _ in range(burst_size):
+            start = time.perf_counter()
+            tls = TLS(None)
+            tls.set_payload(tls_config=config)
+            tls.body.message  # pylint: disable=pointless-statement
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("-b", "--burst", type=int, default=32, help="ClientHellos per burst")
+    parser.add_argument("-r", "--bursts", type=int, default=50)
+    parser.add_argument("--pause", type=float, default=0.05, help="seconds between bursts")
+    args = parser.parse_args()
+
+    config = TlsConfig.from_browser("chrome", server_name="www.example.com")
+    config.tls_version = 0x0304
+
+    print(f"{args.bursts} bursts of {args.burst} TLS 1.3 ClientHellos")
+    pool = None
+    for label in ("inline keygen", "key share pool"):
+        if label == "key share pool":
+            pool = KeySharePool(groups=(29,), size=args.burst)
+            config.key_share_pool = pool
+        samples = run(config, args.bursts, args.burst, args.pause)
+        print(
+            f"  {label:15s} p50 {percentile(samples, 50) * 1e6:7.1f} us"
+            f"  p99 {percentile(samples, 99) * 1e6:7.1f} us"
+        )
+    stats = pool.get_stats()
+    print(f"  pool hits {stats['hits']}, generated inline {stats['misses']}")
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
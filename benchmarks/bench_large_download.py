@@ -0,0 +1,89 @@
+"""
+Syscalls and throughput of a large download over TLS.
+
+Downloads one large body from a local server and counts the recv_into
+calls made by the connection's ReceiveBuffer (one syscall each) and the
+TLS records they carried, handshake included. With buffered record
+reading, one recv brings in several records, and every complete record
+is decrypted before the socket is read again.
+
+Usage:
+    python benchmarks/bench_large_download.py [--mb 64] [--tls13]
+"""
+
+import argparse
+import ssl
+import time
+
+from _tls_server import SIGNATURE_ALGORITHMS, start_server
+
+from ja3requests import Session, TlsConfig
+from ja3requests.protocol.tls import TLS
+from ja3requests.protocol.tls.record_layer import ReceiveBuffer
+from ja3requests.sockets.https import TLSRecordStream
+
+
+class _Counters:  # pylint: disable=too-few-public-methods
+    recv_calls = 0
+    received = 0
+    records = 0
+
+
+def instrument():
+    """Count recv_into syscalls and records by wrapping the reading methods."""
+    counters = _Counters()
+    fill, read_record, recv_record = ReceiveBuffer.fill, TLSRecordStream.read_record, TLS._recv_record  # pylint: disable=protected-access
+
+    def counted_fill(self, sock, size=65536):
+        received = fill(self, sock, size)
+        counters.recv_calls += 1
+        counters.received += received
+        return received
+
+    def counted_read_record(self):
+        record = read_record(self)
+        counters.records += record is not None
+        return record
+
+    def counted_recv_record(self):
+        record = recv_record(self)
+        counters.records += record is not None
+        return record
+
+    ReceiveBuffer.fill = counted_fill
+    TLSRecordStream.read_record = counted_read_record
+    TLS._recv_record = counted_recv_record  # pylint: disable=protected-access
+    return counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--mb", type=int, default=64, help="body size in MB")
+    parser.add_argument("--tls13", action="store_true", help="negotiate TLS 1.3")
+    args = parser.parse_args()
+
+    server, port = start_server(ssl.TLSVersion.TLSv1_3 if args.tls13 else ssl.TLSVersion.TLSv1_2)
+    config = TlsConfig()
+    if args.tls13:
+        config.tls_version = 0x0304
+        config.cipher_suites = [0x1301, 0x1302, 0x1303]
+        config.supported_groups = [29]
+        config.signature_algorithms = SIGNATURE_ALGORITHMS
+
+    size = args.mb * 1024 * 1024
+    counters = instrument()
+    with Session(tls_config=config) as session:
+        start = time.perf_counter()
+        response = session.get(f"https://127.0.0.1:{port}/{size}")
+        elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    assert response.status_code == 200 and len(response.content) == size, len(response.content)
+    print(f"{args.mb} MB over TLS {'1.3' if args.tls13 else '1.2'}: {elapsed:.3f} s, {size / elapsed / 1e6:.1f} MB/s")
+    print(f"  recv_into calls:  {counters.recv_calls:8d} ({counters.received / counters.recv_calls / 1024:.1f} KB each)")
+    print(f"  TLS records:      {counters.records:8d} ({counters.records / counters.recv_calls:.2f} per recv)")
+    print(f"  recv calls / MB:  {counters.recv_calls / args.mb:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
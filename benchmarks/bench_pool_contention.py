@@ -0,0 +1,89 @@
+"""
+Connection pool checkout/return throughput under many threads.
+
+200 worker threads each check a connection out of one of 50 origins and
+return it, over real socketpairs so the liveness probe is a syscall. The
+reference run serializes every pool call on one lock, as the pool did
+before it was split into per-origin sub-pools.
+
+Usage:
+    python benchmarks/bench_pool_contention.py [--threads 200] [--origins 50] [-n 200]
+"""
+
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ja3requests.pool import ConnectionPool  # pylint: disable=wrong-import-position
+
+
+class GlobalLockPool(ConnectionPool):
+    """Reference: every checkout and return holds one pool-wide lock."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._global = threading.RLock()
+
+    def get_connection(self, *args, **kwargs):
+        with self._global:
+            return super().get_connection(*args, **kwargs)
+
+    def put_connection(self, *args, **kwargs):
+        with self._global:
+            return super().put_connection(*args, **kwargs)
+
+
+def run(pool_class, threads, origins, rounds):
+    """Time threads x rounds checkout/return pairs; returns operations per second."""
+    pool = pool_class(max_connections_per_host=threads, max_pool_size=threads * origins)
+    peers = []
+    for origin in range(origins):
+        for _ in range(threads // origins + 1):
+            client, server = socket.socketpair()
+            peers.extend((client, server))
+            pool.put_connection(f"origin{origin}.test", 443, "https", client)
+
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(index):
+        host = f"origin{index % origins}.test"
+        barrier.wait()
+        for _ in range(rounds):
+            pooled = pool.get_connection(host, 443, "https")
+            pool.put_connection(host, 443, "https", pooled.conn, pooled_conn=pooled)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    pool.close_all()
+    for sock in peers:
+        sock.close()
+    return threads * rounds / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--threads", type=int, default=200)
+    parser.add_argument("--origins", type=int, default=50)
+    parser.add_argument("-n", "--rounds", type=int, default=200, help="checkouts per thread")
+    args = parser.parse_args()
+
+    print(f"{args.threads} threads, {args.origins} origins, {args.rounds} checkouts each")
+    for label, pool_class in (("one global lock", GlobalLockPool), ("per-origin locks", ConnectionPool)):
+        rate = run(pool_class, args.threads, args.origins, args.rounds)
+        print(f"  {label:18s} {rate:10,.0f} checkouts/s")
+
+
+if __name__ == "__main__":
+    main()
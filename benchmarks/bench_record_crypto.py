@@ -0,0 +1,106 @@
+"""
+Record protection throughput per cipher suite.
+
+Encrypts and decrypts full-size records (16 KB of plaintext by default)
+through the per-direction cipher states every transport uses, once
+returning new bytes and once writing into a reused buffer, and reports
+records/s and MB/s of plaintext for each TLS 1.2 and TLS 1.3 suite.
+
+Usage:
+    python benchmarks/bench_record_crypto.py [-n 5000] [--size 16384] [--suite C02F]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from ja3requests.protocol.tls.cipher_state import tls12_cipher_states
+from ja3requests.protocol.tls.crypto import get_cipher_info
+from ja3requests.protocol.tls.tls13 import TLS13RecordProtection
+
+TLS13_SUITES = {
+    0x1301: ("TLS_AES_128_GCM_SHA256", 16, "aes-gcm"),
+    0x1302: ("TLS_AES_256_GCM_SHA384", 32, "aes-gcm"),
+    0x1303: ("TLS_CHACHA20_POLY1305_SHA256", 32, "chacha20-poly1305"),
+}
+TLS12_SUITES = (0xC02F, 0xC030, 0xC013, 0xC027)
+
+
+def state_pair(suite):
+    """(name, sender, receiver) sharing one key set."""
+    if suite in TLS13_SUITES:
+        name, key_size, cipher = TLS13_SUITES[suite]
+        key, iv = os.urandom(key_size), os.urandom(12)
+        return name, TLS13RecordProtection(key, iv, cipher), TLS13RecordProtection(key, iv, cipher)
+
+    info = get_cipher_info(suite)
+    key = os.urandom(info["key_size"])
+    iv = os.urandom(4 if info["is_aead"] else 16)
+    mac_key = b"" if info["is_aead"] else os.urandom(info["mac_size"])
+    sender, receiver = tls12_cipher_states(
+        suite, client_key=key, server_key=key, client_iv=iv, server_iv=iv,
+        client_mac_key=mac_key, server_mac_key=mac_key,
+    )
+    return info["name"], sender, receiver
+
+
+def run(suite, count, size):
+    """Time the four record operations for one suite."""
+    name, sender, receiver = state_pair(suite)
+    data = os.urandom(size)
+    results = {}
+
+    start = time.perf_counter()
+    records = [sender.encrypt(0x17, data) for _ in range(count)]
+    results["encrypt"] = time.perf_counter() - start
+
+    buf = bytearray(sender.buffer_size(size))
+    start = time.perf_counter()
+    for _ in range(count):
+        sender.encrypt_into(0x17, data, buf)
+    results["encrypt_into"] = time.perf_counter() - start
+
+    headers = [(record[:5], memoryview(record)[5:]) for record in records]
+    start = time.perf_counter()
+    for header, payload in headers:
+        receiver.decrypt(payload, header)
+    results["decrypt"] = time.perf_counter() - start
+
+    _, check, into_receiver = state_pair(suite)
+    records = [check.encrypt(0x17, data) for _ in range(count)]
+    headers = [(record[:5], memoryview(record)[5:]) for record in records]
+    buf = bytearray(len(records[0]))
+    start = time.perf_counter()
+    for header, payload in headers:
+        _, plaintext = into_receiver.decrypt_into(payload, header, buf)
+    results["decrypt_into"] = time.perf_counter() - start
+    assert plaintext == data
+
+    return name, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("-n", "--records", type=int, default=5000, help="records per operation")
+    parser.add_argument("--size", type=int, default=16384, help="plaintext bytes per record")
+    parser.add_argument("--suite", action="append", help="cipher suite id in hex, e.g. C02F (default: all)")
+    args = parser.parse_args()
+
+    suites = [int(s, 16) for s in args.suite] if args.suite else list(TLS12_SUITES) + list(TLS13_SUITES)
+    print(f"{args.records} records of {args.size} bytes")
+    for suite in suites:
+        name, results = run(suite, args.records, args.size)
+        print(f"0x{suite:04X} {name}")
+        for operation, elapsed in results.items():
+            print(
+                f"  {operation:13} {args.records / elapsed:12,.0f} records/s"
+                f" {args.records * args.size / elapsed / 1e6:9,.1f} MB/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Throughput of reading decrypted data through TLSSocketFile.
+
+Pre-encrypts a body into TLS records (AES-CBC + HMAC-SHA1, 16 KB each),
+streams them over a socketpair and times TLSSocketFile.read until the
+whole body has been read. With the bytearray/memoryview receive buffer,
+the time grows linearly with the body size.
+
+Usage:
+    python benchmarks/bench_record_read.py [--mb 100] [--read-size 65536] [--plain]
+"""
+
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ja3requests.protocol.tls.record_layer import TLSRecordLayer, TLSSocket  # pylint: disable=wrong-import-position
+
+RECORD_SIZE = 16384
+
+
+class _Keys:  # pylint: disable=too-few-public-methods
+    """Session keys as TLSSocket reads them from a TLS context."""
+
+    def __init__(self):
+        self._client_write_key = os.urandom(16)
+        self._server_write_key = os.urandom(16)
+        self._client_write_mac_key = os.urandom(20)
+        self._server_write_mac_key = os.urandom(20)
+        self._client_write_iv = os.urandom(16)
+        self._server_write_iv = os.urandom(16)
+        self._selected_cipher_suite = 0x002F
+
+
+class _PlainRecordLayer:
+    """Record layer that leaves payloads unencrypted, to isolate buffering."""
+
+    @staticmethod
+    def encrypt_application_data(data):
+        return bytes([23, 3, 3]) + len(data).to_bytes(2, "big") + data
+
+    @staticmethod
+    def decrypt_application_data(record):
+        return bytes(record[5:]), record[0]
+
+    @staticmethod
+    def decrypt_application_data_into(record, buf):
+        size = len(record) - 5
+        buf[:size] = record[5:]
+        return memoryview(buf)[:size], record[0]
+
+
+def build_records(keys, total, plain):
+    """Encrypt ``total`` bytes as the server would send them."""
+    if plain:
+        server = _PlainRecordLayer()
+    else:
+        server = TLSRecordLayer()
+        server.set_keys(
+            keys._server_write_key,  # pylint: disable=protected-access
+            keys._client_write_key,  # pylint: disable=protected-access
+            client_write_mac_key=keys._server_write_mac_key,  # pylint: disable=protected-access
+            server_write_mac_key=keys._client_write_mac_key,  # pylint: disable=protected-access
+            client_write_iv=keys._server_write_iv,  # pylint: disable=protected-access
+            server_write_iv=keys._client_write_iv,  # pylint: disable=protected-access
+            cipher_suite=0x002F,
+        )
+    chunk = os.urandom(RECORD_SIZE)
+    return b"".join(
+        server.encrypt_application_data(chunk[: min(RECORD_SIZE, total - offset)])
+        for offset in range(0, total, RECORD_SIZE)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--mb", type=int, default=100, help="body size in MB")
+    parser.add_argument("--read-size", type=int, default=65536, help="bytes per read() call, -1 for one read")
+    parser.add_argument("--plain", action="store_true", help="skip encryption to measure buffering only")
+    args = parser.parse_args()
+
+    total = args.mb * 1024 * 1024
+    keys = _Keys()
+    wire = build_records(keys, total, args.plain)
+
+    client, server = socket.socketpair()
+    writer = threading.Thread(target=lambda: (server.sendall(wire), server.close()), daemon=True)
+
+    tls_socket = TLSSocket(client, keys)
+    if args.plain:
+        tls_socket.record_layer = _PlainRecordLayer()
+    fp = tls_socket.makefile("rb")
+
+    start = time.perf_counter()
+    writer.start()
+    received = 0
+    while True:
+        data = fp.read(args.read_size)
+        received += len(data)
+        if not data or args.read_size < 0:
+            break
+    elapsed = time.perf_counter() - start
+    client.close()
+
+    assert received == total, (received, total)
+    mode = "plain" if args.plain else "AES-128-CBC/HMAC-SHA1"
+    print(f"{args.mb} MB via TLSSocketFile.read({args.read_size}), {mode}")
+    print(f"  {elapsed:.3f} s, {total / elapsed / 1e6:.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+TLS 1.2 reconnect latency with and without the abbreviated handshake.
+
+Opens N fresh TCP connections to a local TLS 1.2 server that issues
+RFC 5077 session tickets and times the handshake on each. With
+resumption the cached ticket is offered, the server echoes our session
+ID, and both sides finish in one round trip from the cached master
+secret without a Certificate or key exchange. The session cache's
+per-host hit rate is printed for each run.
+
+Usage:
+    python benchmarks/bench_tls12_resumption.py [-n 200]
+"""
+
+import argparse
+import socket
+import ssl
+import time
+
+from _tls_server import SIGNATURE_ALGORITHMS, percentile, start_server
+
+from ja3requests import TlsConfig
+from ja3requests.protocol.tls import TLS
+from ja3requests.protocol.tls.extensions import SessionTicketExtension
+from ja3requests.protocol.tls.session_cache import TLSSessionCache
+
+
+def connect(port, config, cache):
+    """Handshake on a new connection; returns the handshake time in seconds."""
+    sock = socket.create_connection(("127.0.0.1", port))
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    try:
+        start = time.perf_counter()
+        tls = TLS(sock, session_cache=cache, server_host="127.0.0.1", server_port=port)
+        tls.set_payload(tls_config=config)
+        assert tls.handshake(), "handshake failed"
+        return time.perf_counter() - start
+    finally:
+        sock.close()
+
+
+def run(port, config, connections, resume):
+    """Time ``connections`` handshakes; returns (samples, cache stats for the host)."""
+    cache = TLSSessionCache()
+    connect(port, config, cache)  # Warm up and cache the first session
+
+    samples = []
+    for _ in range(connections):
+        if not resume:
+            cache.clear()
+        samples.append(connect(port, config, cache))
+    return samples, cache.get_stats()["hosts"][f"127.0.0.1:{port}"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("-n", "--connections", type=int, default=200)
+    args = parser.parse_args()
+
+    server, port = start_server(ssl.TLSVersion.TLSv1_2)
+    config = TlsConfig()
+    config.tls_version = 0x0303
+    config.cipher_suites = [0xC02F, 0xC013]
+    config.supported_groups = [29, 23]
+    config.signature_algorithms = SIGNATURE_ALGORITHMS
+    config.extensions = [SessionTicketExtension()]
+
+    print(f"{args.connections} TLS 1.2 reconnects")
+    for label, resume in (("full handshake", False), ("abbreviated", True)):
+        samples, stats = run(port, config, args.connections, resume)
+        print(
+            f"  {label:15s} p50 {percentile(samples, 50) * 1000:7.3f} ms"
+            f"  p99 {percentile(samples, 99) * 1000:7.3f} ms"
+            f"  hit rate {stats['hit_rate']:6.1%} ({stats['resumed']}/{stats['handshakes']})"
+        )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
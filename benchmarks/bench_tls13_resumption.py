@@ -0,0 +1,106 @@
+"""
+TLS 1.3 reconnect latency with and without session-ticket resumption.
+
+Opens N fresh TCP connections to a local TLS 1.3 server and times the
+handshake on each. Every connection sends one request, so the server's
+NewSessionTicket messages are read and cached. With resumption the next
+ClientHello offers a cached ticket as a pre_shared_key, and the server
+skips its Certificate and CertificateVerify messages.
+
+Usage:
+    python benchmarks/bench_tls13_resumption.py [-n 200]
+"""
+
+import argparse
+import socket
+import ssl
+import struct
+import time
+
+from _tls_server import SIGNATURE_ALGORITHMS, percentile, start_server
+
+from ja3requests import TlsConfig
+from ja3requests.protocol.tls import TLS
+from ja3requests.protocol.tls.session_cache import TLSSessionCache
+
+CERTIFICATE_MESSAGES = {11, 15}  # Certificate, CertificateVerify
+
+
+def _recv_exact(sock, length):
+    data = b""
+    while len(data) < length:
+        chunk = sock.recv(length - len(data))
+        if not chunk:
+            raise ConnectionError("server closed the connection")
+        data += chunk
+    return data
+
+
+def connect(port, config, cache):
+    """Handshake on a new connection and read one response; returns (seconds, tls)."""
+    sock = socket.create_connection(("127.0.0.1", port))
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    try:
+        start = time.perf_counter()
+        tls = TLS(sock, session_cache=cache, server_host="127.0.0.1", server_port=port)
+        tls.set_payload(tls_config=config)
+        assert tls.handshake(), "handshake failed"
+        elapsed = time.perf_counter() - start
+
+        sock.sendall(tls.encrypt_application_data(
+            b"GET / HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n"
+        ))
+        response = b""
+        while b"\r\n\r\nok" not in response:
+            header = _recv_exact(sock, 5)
+            payload = _recv_exact(sock, struct.unpack("!H", header[3:5])[0])
+            content_type, plaintext = tls.decrypt_record(header[0], header, payload)
+            if content_type == 0x17:
+                response += plaintext
+        return elapsed, tls
+    finally:
+        sock.close()
+
+
+def run(port, config, connections, resume):
+    """Time ``connections`` handshakes; returns (samples, resumed count, certificate messages)."""
+    cache = TLSSessionCache()
+    connect(port, config, cache)  # Warm up and collect the first tickets
+
+    samples, resumed, certificates = [], 0, 0
+    for _ in range(connections):
+        if not resume:
+            cache.clear()
+        elapsed, tls = connect(port, config, cache)
+        samples.append(elapsed)
+        resumed += tls.resumed
+        certificates += sum(t in CERTIFICATE_MESSAGES for t in tls.server_handshake_types)
+    return samples, resumed, certificates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("-n", "--connections", type=int, default=200)
+    args = parser.parse_args()
+
+    server, port = start_server(ssl.TLSVersion.TLSv1_3)
+    config = TlsConfig()
+    config.tls_version = 0x0304
+    config.cipher_suites = [0x1301, 0x1302, 0x1303]
+    config.supported_groups = [29]
+    config.signature_algorithms = SIGNATURE_ALGORITHMS
+    config.server_name = "localhost"
+
+    print(f"{args.connections} TLS 1.3 reconnects")
+    for label, resume in (("full handshake", False), ("ticket resumption", True)):
+        samples, resumed, certificates = run(port, config, args.connections, resume)
+        print(
+            f"  {label:18s} p50 {percentile(samples, 50) * 1000:7.3f} ms"
+            f"  p99 {percentile(samples, 99) * 1000:7.3f} ms"
+            f"  resumed {resumed:4d}  Certificate/CertificateVerify messages {certificates:4d}"
+        )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 
 from ja3requests import Session, TlsConfig
 from ja3requests.protocol.tls.session_cache import TLSSessionCache
+from ja3requests.protocol.tls.sqlite_session_cache import SQLiteSessionCache
 
 # Sessions auto-create a TLSSessionCache
 session = Session(use_pooling=False)
@@ -26,3 +27,9 @@ print(f"Cache entries: {len(cache)}")
 # cache.clear()  # Clear all
 
 # Server may also send NewSessionTicket → automatically cached
+print(f"Resumption hit rate per host: {cache.get_stats()['hosts']}")
+
+# Share sessions between worker processes and keep them across restarts
+config = TlsConfig()
+config.session_cache = SQLiteSessionCache("/tmp/ja3requests-sessions.db", ttl=1800)
+session = Session(tls_config=config)
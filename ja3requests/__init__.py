@@ -6,6 +6,7 @@ Ja3Request
 """
 
 from .sessions import Session
+from .async_sessions import AsyncSession
 from .protocol.tls.config import TlsConfig
 from .response import Response
 from .retry import HTTPRetry
@@ -14,6 +15,7 @@ from .exceptions import (
     HTTPError,
     ConnectionException,
     Timeout,
+    PoolTimeout,
     NotAllowedRequestMethod,
     MissingScheme,
     NotAllowedScheme,
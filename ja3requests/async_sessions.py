@@ -0,0 +1,433 @@
+"""
+Ja3Requests.async_sessions
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module provides an asyncio Session object, so many JA3-fingerprinted
+connections can be multiplexed on one event loop instead of one thread each.
+"""
+
+import copy
+from io import IOBase
+from http.cookiejar import CookieJar
+from typing import AnyStr, Any, Dict, Union, List, Tuple, Optional
+from urllib.parse import urljoin, urlparse
+from ja3requests.base import BaseSession, BaseRequest
+from ja3requests.response import Response, HTTPResponse, HTTPSResponse
+from ja3requests.const import DEFAULT_REDIRECT_LIMIT
+from ja3requests.requests.request import Request
+from ja3requests.exceptions import MaxRetriedException
+from ja3requests.protocol.tls.config import TlsConfig
+from ja3requests.protocol.tls.debug import debug
+from ja3requests.cookies import Ja3RequestsCookieJar, merge_cookies
+from ja3requests.protocol.tls.session_cache import TLSSessionCache
+from ja3requests.retry import HTTPRetry
+from ja3requests.utils import is_stream_body, stream_body_position, without_body_headers
+from ja3requests.sockets.async_sockets import AsyncHttpSocket, AsyncHttpsSocket
+
+
+class AsyncSession(BaseSession):
+    """An asyncio Ja3Request session.
+
+    Provides cookie persistence, keep-alive connection reuse, hooks and retry
+    like :class:`Session`, with every request method a coroutine::
+
+        async with AsyncSession() as session:
+            response = await session.get("https://example.com")
+    """
+
+    def __init__(
+        self,
+        tls_config: TlsConfig = None,
+        hooks: Dict = None,
+        retry: HTTPRetry = None,
+        max_connections_per_host: int = 10,
+    ):
+        super().__init__()
+        self._tls_config = tls_config or TlsConfig()
+        # Enable session resumption by default
+        if self._tls_config.session_cache is None:
+            self._tls_config.session_cache = TLSSessionCache()
+        self.hooks = {
+            "before_request": [],
+            "after_request": [],
+        }
+        if hooks:
+            for event, callbacks in hooks.items():
+                if event in self.hooks:
+                    self.hooks[event].extend(callbacks)
+        self._retry = retry
+        self._max_connections_per_host = max_connections_per_host
+        self._idle = {}  # (scheme, host, port, proxy, proxy auth) -> [AsyncHttpSocket]
+
+    @property
+    def tls_config(self) -> TlsConfig:
+        """Get TLS configuration"""
+        return self._tls_config
+
+    @tls_config.setter
+    def tls_config(self, config: TlsConfig):
+        """Set TLS configuration"""
+        self._tls_config = config
+
+    async def close(self):  # pylint: disable=invalid-overridden-method
+        """Close the session and all idle connections"""
+        idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                await conn.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+        return False
+
+    async def request(  # pylint: disable=too-many-locals,invalid-overridden-method
+        self,
+        method: AnyStr,
+        url: AnyStr,
+        *,
+        params: Union[Dict[AnyStr, Any], bytes] = None,
+        data: Union[
+            Dict[Any, Any], List[Tuple[Any, Any]], Tuple[Tuple[Any, Any]], AnyStr
+        ] = None,
+        headers: Dict[AnyStr, AnyStr] = None,
+        cookies: Union[Dict[AnyStr, AnyStr], CookieJar, AnyStr] = None,
+        files: Dict[AnyStr, Union[List[Union[AnyStr, IOBase]], IOBase, AnyStr]] = None,
+        auth: Tuple = None,
+        proxies: Dict[AnyStr, AnyStr] = None,
+        json: Union[Dict[AnyStr, AnyStr], AnyStr] = None,
+        timeout: Optional[float] = None,
+        verify: bool = False,
+        tls_config: TlsConfig = None,
+        **kwargs
+    ):
+        """
+        Instantiating a request class<Request> and ready request<ReadyRequest> to send.
+        :param method:
+        :param url:
+        :param params:
+        :param data:
+        :param headers:
+        :param cookies:
+        :param files:
+        :param auth: Tuple of (username, password) for Basic Auth.
+        :param proxies: HTTP proxies by URL scheme, e.g. {"https": "user:pass@host:port"};
+            requests are tunnelled with CONNECT. SOCKS proxies raise NotImplementedError.
+        :param json:
+        :param timeout: Timeout in seconds for connect and read.
+        :param verify: Whether to verify TLS certificates. Default False.
+        :param tls_config: TLS configuration for this request only.
+        :return:
+        """
+        if isinstance(proxies, dict) and any(
+            str(proxy).lower().startswith(("socks4://", "socks5://")) for proxy in proxies.values()
+        ):
+            raise NotImplementedError("AsyncSession does not support SOCKS proxies; use Session.")
+
+        # Apply verify to TLS config (deep copy to avoid mutating session config)
+        tls_config = tls_config or self._tls_config
+        if verify != tls_config.verify_cert:
+            tls_config = copy.deepcopy(tls_config)
+            tls_config.verify_cert = verify
+
+        # Merge session-level cookies with per-request cookies
+        merged_cookies = Ja3RequestsCookieJar()
+        if len(self._cookies) > 0:
+            merge_cookies(merged_cookies, self._cookies)
+        if cookies is not None:
+            merge_cookies(merged_cookies, cookies)
+
+        req = Request(
+            method=method,
+            url=url,
+            params=params,
+            data=data,
+            headers=headers,
+            cookies=merged_cookies if len(merged_cookies) > 0 else None,
+            files=files,
+            auth=auth,
+            proxies=proxies,
+            json=json,
+            timeout=timeout,
+            tls_config=tls_config,
+        )
+        # Kept for parity with Session; send() never reads it back, since
+        # concurrent requests share this session
+        self.Request = req
+
+        kwargs.setdefault("allow_redirects", True)
+
+        return await self.send(req.request(), proxies=proxies, **kwargs)
+
+    async def get(self, url, params=None, headers=None, **kwargs):  # pylint: disable=invalid-overridden-method
+        """
+        Send a GET request.
+        :param url:
+        :param params:
+        :param headers:
+        :param kwargs:
+        :return:
+        """
+        return await self.request("GET", url, params=params, headers=headers, **kwargs)
+
+    async def options(self, url, **kwargs):  # pylint: disable=invalid-overridden-method
+        """
+        Send a OPTIONS request.
+        :param url:
+        :param kwargs:
+        :return:
+        """
+
+        return await self.request("OPTIONS", url, **kwargs)
+
+    async def head(self, url, **kwargs):  # pylint: disable=invalid-overridden-method
+        """
+        Send a HEAD request.
+        :param url:
+        :param kwargs:
+        :return:
+        """
+
+        kwargs.setdefault("allow_redirects", False)
+        return await self.request("HEAD", url, **kwargs)
+
+    async def post(self, url, *, data=None, json=None, files=None, headers=None, **kwargs):  # pylint: disable=invalid-overridden-method
+        """
+        Send a POST request.
+        :param url:
+        :param data:
+        :param json:
+        :param files:
+        :param headers:
+        :param kwargs:
+        :return:
+        """
+
+        return await self.request(
+            "POST", url, data=data, json=json, files=files, headers=headers, **kwargs
+        )
+
+    async def put(self, url, **kwargs):  # pylint: disable=invalid-overridden-method
+        """
+        Send a PUT request.
+        :param url:
+        :param kwargs:
+        :return:
+        """
+
+        return await self.request("PUT", url, **kwargs)
+
+    async def patch(self, url, **kwargs):  # pylint: disable=invalid-overridden-method
+        """
+        Send a PATCH request.
+        :param url:
+        :param kwargs:
+        :return:
+        """
+
+        return await self.request("PATCH", url, **kwargs)
+
+    async def delete(self, url, **kwargs):  # pylint: disable=invalid-overridden-method
+        """
+        Send a DELETE request.
+        :param url:
+        :param kwargs:
+        :return:
+        """
+
+        return await self.request("DELETE", url, **kwargs)
+
+    def _dispatch_hooks(self, event, hook_data, per_request_hooks=None):
+        """
+        Call all registered hooks for a given event.
+        :param event: Hook event name (e.g., 'before_request', 'after_request')
+        :param hook_data: The object passed to each hook callback.
+        :param per_request_hooks: Optional per-request hooks dict.
+        :return: The hook_data (possibly modified by callbacks).
+        """
+        callbacks = list(self.hooks.get(event, []))
+        if per_request_hooks and event in per_request_hooks:
+            callbacks.extend(per_request_hooks[event])
+        for callback in callbacks:
+            result = callback(hook_data)
+            if result is not None:
+                hook_data = result
+        return hook_data
+
+    async def send(self, request: BaseRequest, **kwargs):  # pylint: disable=invalid-overridden-method,too-many-branches
+        """
+        Send request with optional HTTP-level retry.
+        :return:
+        """
+
+        if not isinstance(request, BaseRequest):
+            raise ValueError("You can only send HttpRequest/HttpsRequest.")
+
+        per_request_hooks = kwargs.pop("hooks", None)
+
+        # Dispatch before_request hooks
+        request = self._dispatch_hooks("before_request", request, per_request_hooks)
+
+        stream = kwargs.pop("stream", False)
+        allow_redirects = kwargs.get("allow_redirects", True)
+        retry = self._retry
+        method = request.method or 'GET'
+        max_attempts = 1 + (retry.total if retry and retry.is_retryable_method(method) else 0)
+        # A streamed body is used up by the first attempt: rewind a seekable
+        # file before each retry, and never retry a generator or a pipe
+        body = request.data
+        body_position = None
+        if is_stream_body(body):
+            body_position = stream_body_position(body)
+            if body_position is None:
+                max_attempts = 1
+
+        last_response = None
+        last_error = None
+
+        for attempt in range(max_attempts):
+            if attempt and body_position is not None:
+                body.seek(body_position)
+            try:
+                rep = await self._send_request(request)
+                response = Response(request, rep, stream=stream)
+
+                # Persist response cookies into the session cookie jar
+                if response.cookies:
+                    merge_cookies(self._cookies, response.cookies)
+
+                # Check if we should retry based on status code
+                if (retry and attempt < max_attempts - 1
+                        and retry.is_retryable_method(method)
+                        and retry.is_retryable_status(response.status_code)):
+                    await retry.async_sleep_for_retry(response, attempt + 1)
+                    last_response = response
+                    continue
+
+                if allow_redirects and response.is_redirected:
+                    response = await self.resolve_redirects(request, response.location, **kwargs)
+
+                # Dispatch after_request hooks
+                response = self._dispatch_hooks("after_request", response, per_request_hooks)
+
+                self.response = response
+                return response
+
+            except (ConnectionError, OSError) as err:
+                last_error = err
+                if retry and attempt < max_attempts - 1 and retry.is_retryable_method(method):
+                    await retry.async_sleep_for_retry(None, attempt + 1)
+                    continue
+                raise
+
+        # All retries exhausted
+        if last_response is not None:
+            # Return the last response even if status was retryable
+            if allow_redirects and last_response.is_redirected:
+                last_response = await self.resolve_redirects(request, last_response.location, **kwargs)
+            last_response = self._dispatch_hooks("after_request", last_response, per_request_hooks)
+            self.response = last_response
+            if retry and retry.raise_on_status:
+                raise MaxRetriedException(
+                    f"Max retries ({retry.total}) exceeded, last status: {last_response.status_code}"
+                )
+            return last_response
+
+        if last_error is not None:
+            raise MaxRetriedException(
+                f"Max retries ({retry.total}) exceeded"
+            ) from last_error
+
+        raise MaxRetriedException("Max retries exceeded")
+
+    async def resolve_redirects(self, request, url, **kwargs):
+        """
+        Handle response redirects
+        :param request: The request that was redirected.
+        :param url:
+        :param kwargs: Options the request was sent with, including its proxies.
+        :return:
+        """
+        # Get the original URL to resolve relative redirects
+        original_url = request.url
+
+        for _ in range(DEFAULT_REDIRECT_LIMIT):
+            # Handle relative URLs by joining with the original URL
+            if not urlparse(url).scheme:
+                url = urljoin(original_url, url)
+
+            req = Request(
+                method="GET",
+                url=url,
+                # Redirects are followed with a bodiless GET
+                headers=without_body_headers(request.headers),
+                cookies=self._cookies,
+                proxies=kwargs.get("proxies"),
+                tls_config=getattr(request, 'tls_config', None) or self._tls_config,
+            ).request()
+
+            response = await self.send(req, **dict(kwargs, allow_redirects=False))
+            if 400 <= response.status_code or response.status_code < 300:
+                break
+
+            # Update URL for next redirect and original_url for relative resolution
+            if response.is_redirected and response.location:
+                original_url = url
+                url = response.location
+        else:
+            raise MaxRetriedException("Too many redirects")
+
+        return response
+
+    async def _send_request(self, request):
+        """
+        Send one request on a pooled or new connection.
+        :return: HTTPResponse
+        """
+        context = request.create_context()
+        conn = await self._get_connection(request, context)
+        try:
+            rep_sock = await conn.send(context)
+            response_class = HTTPSResponse if conn.scheme == "https" else HTTPResponse
+            rep = response_class(rep_sock, method=context.method)
+            rep.handle()
+        except BaseException:
+            await conn.close()
+            raise
+
+        connection = rep.raw_headers and any(
+            value.lower() == "close"
+            for header in rep.raw_headers
+            for name, value in header.items()
+            if name.lower() == "connection"
+        )
+        if connection or not self._release_connection(conn):
+            await conn.close()
+        return rep
+
+    async def _get_connection(self, request, context):
+        """Pop a reusable idle connection for the origin or open a new one."""
+        socket_class = AsyncHttpsSocket if request.is_https() else AsyncHttpSocket
+        key = socket_class.pool_key(context)
+
+        idle = self._idle.get(key)
+        while idle:
+            conn = idle.pop()
+            if conn.is_reusable():
+                debug(f"Reusing idle asyncio connection to {key[1]}:{key[2]}")
+                return conn
+            await conn.close()
+
+        return await socket_class(context).new_conn()
+
+    def _release_connection(self, conn):
+        """Keep a connection for reuse; False if it should be closed."""
+        if not conn.is_reusable():
+            return False
+        idle = self._idle.setdefault(conn.key, [])
+        if len(idle) >= self._max_connections_per_host:
+            return False
+        idle.append(conn)
+        return True
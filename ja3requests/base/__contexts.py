@@ -11,6 +11,8 @@ from typing import AnyStr, Dict
 from json import dumps
 import mimetypes
 
+from ja3requests.utils import is_stream_body, iter_stream_body, stream_body_length
+
 
 PROTOCOL_VERSION_HTTP_1 = "HTTP/1.1"
 PROTOCOL_VERSION_HTTP_2 = "HTTP/2.0"  # h2
@@ -35,6 +37,7 @@ class BaseContext(ABC):
         self._start_line = None
         self._message = None
         self._source_address = None
+        self._resolver = None
         self._timeout = None
         self._proxy = None
         self._cookies = None
@@ -178,7 +181,9 @@ class BaseContext(ABC):
 
             if self.method in ["POST", "PUT"]:
                 if not headers.get("Content-Type", None):
-                    if self.data:
+                    if self.streaming:
+                        headers.update({"Content-Type": "application/octet-stream"})
+                    elif self.data:
                         headers.update(
                             {"Content-Type": "application/x-www-form-urlencoded"}
                         )
@@ -224,9 +229,18 @@ class BaseContext(ABC):
             data = urlencode(data)
         elif isinstance(data, bytes):
             data = data.decode()
+        # File objects and iterables are kept as they are and read while sending
 
         self._data = data
 
+    @property
+    def streaming(self) -> bool:
+        """
+        Whether the body is a file object or iterable sent after message as it is read
+        :return:
+        """
+        return is_stream_body(self._data)
+
     @property
     def json(self) -> AnyStr:
         """
@@ -320,13 +334,47 @@ class BaseContext(ABC):
 
         self._body = body
 
+    def _set_stream_body(self, stream):
+        """
+        Keep a streamed body as it is and announce its framing: Content-Length
+        when the size is known up front, chunked transfer-coding otherwise.
+        :param stream:
+        :return:
+        """
+        framing = {k.lower() for k in self.headers}
+        if "content-length" not in framing and "transfer-encoding" not in framing:
+            length = stream_body_length(stream)
+            if length is None:
+                self.headers.update({"Transfer-Encoding": "chunked"})
+            else:
+                self.headers.update({"Content-Length": length})
+
+        self._body = stream
+
+    def iter_body_pieces(self):
+        """
+        A streamed body as it goes on the wire after message, in pieces of
+        at most one TLS record (chunk-framed under Transfer-Encoding: chunked).
+        Other bodies are part of message, so nothing is yielded for them.
+        :return:
+        """
+        if not self.streaming:
+            return
+        chunked = any(
+            k.lower() == "transfer-encoding" and "chunked" in str(v).lower()
+            for k, v in self.headers.items()
+        )
+        yield from iter_stream_body(self._body, chunked=chunked)
+
     @property
     def message(self) -> AnyStr:
         """
-        Message
+        Message; for a streamed body only the head, see iter_body_pieces
         :return:
         """
-        if self.data:
+        if self.streaming:
+            self._set_stream_body(self.data)
+        elif self.data:
             data = self.data
             if isinstance(data, str):
                 data = data.encode()
@@ -349,7 +397,7 @@ class BaseContext(ABC):
 
             message += b"\r\n\r\n"
 
-            if self.body:
+            if self.body and not self.streaming:
                 message += self.body
 
         self._message = message
@@ -382,6 +430,23 @@ class BaseContext(ABC):
         """
         self._source_address = attr
 
+    @property
+    def resolver(self):
+        """
+        Context property resolver
+        :return:
+        """
+        return self._resolver
+
+    @resolver.setter
+    def resolver(self, attr):
+        """
+        Context property resolver setter
+        :param attr: Resolver for the host names this request connects to
+        :return:
+        """
+        self._resolver = attr
+
     @property
     def timeout(self):
         """
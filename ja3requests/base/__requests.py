@@ -10,13 +10,14 @@ from io import IOBase
 from abc import ABC, abstractmethod
 from http.cookiejar import CookieJar
 from urllib.parse import urlparse, urlencode
-from typing import Any, AnyStr, List, Dict, Tuple, Union
+from typing import Any, AnyStr, IO, Iterator, List, Dict, Tuple, Union
 from ja3requests.const import DEFAULT_HTTP_SCHEME, DEFAULT_HTTP_PORT
 from ja3requests.exceptions import InvalidParams, InvalidData
 from ja3requests.utils import (
     default_headers,
     dict_from_cookie_string,
     dict_from_cookiejar,
+    is_stream_body,
 )
 
 
@@ -179,15 +180,18 @@ class BaseRequest(ABC):
             List[Tuple[AnyStr, Any]],
             Tuple[Tuple[AnyStr, Any]],
             AnyStr,
+            IO,
+            Iterator[AnyStr],
         ],
     ):
         """
         Request property data set
-        :param attr:
+        :param attr: Form data, or a file object or iterable streamed as the body
         :return:
         """
         self._data = attr
-        if self._data:
+        # File objects and iterables are left to the context, which reads them while sending
+        if self._data and not is_stream_body(self._data):
             if isinstance(self._data, str):
                 self._data = self._data
             elif isinstance(self._data, bytes):
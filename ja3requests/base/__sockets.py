@@ -9,12 +9,16 @@ import socket
 from abc import ABC, abstractmethod
 from ja3requests.base.__contexts import BaseContext
 from ja3requests.protocol.sockets import create_connection
+from ja3requests.protocol.tls.record_layer import send_buffers
 from ja3requests.protocol.exceptions import (
     SocketTimeout,
     ConnectTimeoutError,
 )
 from ja3requests.utils import Retry
 
+#: Encrypted bytes of a streamed body gathered into one vectored send
+STREAM_SEND_SIZE = 65536
+
 
 class BaseSocket(ABC):
     """
@@ -59,6 +63,7 @@ class BaseSocket(ABC):
                 (dest_address, port),
                 self.context.connect_timeout,
                 self.context.source_address,
+                resolver=self.context.resolver,
             )
         except SocketTimeout as err:
             raise ConnectTimeoutError(
@@ -66,3 +71,27 @@ class BaseSocket(ABC):
             ) from err
 
         return conn
+
+    def _send_body_stream(self, encrypt=None):
+        """
+        Send a streamed request body after the message, as it is read.
+
+        Pieces of at most one record are taken from the context one at a
+        time, so the body is never held in memory; over TLS each piece is
+        encrypted on its own and a few records go out per vectored send.
+        :param encrypt: Callable returning the TLS records for a piece, None for plain TCP
+        :return:
+        """
+        batch, size = [], 0
+        for piece in self.context.iter_body_pieces():
+            if encrypt is None:
+                self.conn.sendall(piece)
+                continue
+            for record in encrypt(piece):
+                batch.append(record)
+                size += len(record)
+            if size >= STREAM_SEND_SIZE:
+                send_buffers(self.conn, batch)
+                batch, size = [], 0
+        if batch:
+            send_buffers(self.conn, batch)
@@ -8,6 +8,7 @@ A constant module.
 MAX_LINE = 65536
 MAX_HEADERS = 100
 DEFAULT_CHUNKED_SIZE = 2048
+DEFAULT_UPLOAD_CHUNK_SIZE = 16384  # streamed request bodies are read one TLS record at a time
 DEFAULT_HTTP_SCHEME = "http"
 DEFAULT_HTTPS_SCHEME = "https"
 DEFAULT_HTTP_PORT = 80
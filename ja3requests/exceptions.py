@@ -95,6 +95,10 @@ class Timeout(RequestException):
     """The request timed out."""
 
 
+class PoolTimeout(Timeout):
+    """No pooled connection became available within the checkout timeout."""
+
+
 class TLSError(RequestException):
     """Base exception for all TLS-related errors."""
 
@@ -6,12 +6,15 @@ Thread-safe connection pooling for HTTP/HTTPS connections.
 Supports HTTP/1.1 serial reuse and HTTP/2 stream multiplexing.
 """
 
+import selectors
 import socket
 import threading
 import time
+import weakref
 from collections import deque
 from typing import Dict, Optional, Tuple, Any
 
+from ja3requests.exceptions import PoolTimeout
 from ja3requests.protocol.tls.debug import debug
 
 
@@ -35,6 +38,10 @@ class PooledConnection:
         self.last_used_at = self.created_at
         self.tls = None  # TLS context for HTTPS connections
         self.negotiated_protocol: Optional[str] = None  # ALPN result ('h2', 'http/1.1', None)
+        # Set when the idle socket was seen readable but still open (e.g. a
+        # TLS ticket or alert is waiting): by the reaper, which leaves it to
+        # checkout to probe, and by that probe, for the caller to read it
+        self.pending_data = False
 
     def __repr__(self) -> str:
         return f"<PooledConnection {self.scheme}://{self.host}:{self.port} alive={self.is_alive()}>"
@@ -45,25 +52,35 @@ class PooledConnection:
 
     def is_alive(self) -> bool:
         """Check if underlying socket is still connected"""
+        return self.poll() is not None
+
+    def poll(self) -> Optional[bool]:
+        """
+        Peek at the socket without blocking.
+
+        Returns:
+            None if the connection is closed, True if bytes are waiting
+            to be read, False if it is open and quiet
+        """
         try:
             if self.conn is None:
-                return False
+                return None
             self.conn.setblocking(False)
             try:
                 data = self.conn.recv(1, socket.MSG_PEEK)
                 if data == b'':
-                    return False
+                    return None
             except BlockingIOError:
-                pass
+                return False
             except (OSError, ConnectionError) as e:
                 debug(f"Connection check failed: {e}", level=2)
-                return False
+                return None
             finally:
                 self.conn.setblocking(True)
             return True
         except (OSError, AttributeError, TypeError) as e:
             debug(f"Connection alive check error: {e}", level=2)
-            return False
+            return None
 
     def touch(self):
         """Update last used timestamp"""
@@ -141,6 +158,21 @@ class PooledH2Connection(PooledConnection):
         with self._stream_lock:
             return self._active_streams == 0
 
+    def is_alive(self) -> bool:
+        """
+        Check if the connection can still carry streams.
+
+        The socket is only probed while no stream is active: another thread
+        may be blocked reading frames from it, and holding the stream lock
+        keeps a new stream from starting during the probe.
+        """
+        if self.h2_connection is not None and self.h2_connection.closed:
+            return False
+        with self._stream_lock:
+            if self._active_streams:
+                return self.conn is not None
+            return super().is_alive()
+
     def __repr__(self) -> str:
         return (
             f"<PooledH2Connection {self.scheme}://{self.host}:{self.port} "
@@ -149,6 +181,151 @@ class PooledH2Connection(PooledConnection):
         )
 
 
+class _PoolReaper:
+    """
+    Background health checker for the idle sockets of one ConnectionPool.
+
+    A single thread keeps every idle socket registered with a selector and
+    hands readable ones to the pool, which evicts those the peer closed.
+    Idle expiry is swept on the same timer, so checkout no longer needs a
+    non-blocking peek per connection. Only a weak reference to the pool is
+    held; the thread exits once the pool is closed or collected.
+    """
+
+    def __init__(self, pool: "ConnectionPool", interval: float):
+        self._pool_ref = weakref.ref(pool)
+        self._interval = interval
+        self._selector = selectors.DefaultSelector()
+        self._registered: Dict[int, PooledConnection] = {}
+        self._wakeup_recv, self._wakeup_send = socket.socketpair()
+        self._wakeup_recv.setblocking(False)
+        self._selector.register(self._wakeup_recv, selectors.EVENT_READ)
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="ja3requests-pool-reaper", daemon=True)
+        self._thread.start()
+
+    @property
+    def running(self) -> bool:
+        """True until stop() is called or the thread exits."""
+        return not self._stopped and self._thread.is_alive()
+
+    def stop(self):
+        """Ask the thread to exit and wake it if it is waiting in select()."""
+        self._stopped = True
+        try:
+            self._wakeup_send.send(b"\0")
+        except OSError:
+            pass
+
+    def join(self, timeout: Optional[float] = None):
+        """Wait for the thread to exit."""
+        self._thread.join(timeout)
+
+    def _sync(self, idle: list):
+        """Register the currently idle sockets and drop the rest."""
+        wanted = {}
+        for pooled in idle:
+            try:
+                fd = pooled.conn.fileno()
+            except (OSError, AttributeError):
+                continue
+            if isinstance(fd, int) and fd >= 0:
+                wanted[fd] = pooled
+
+        for fd in list(self._registered):
+            if wanted.get(fd) is not self._registered[fd]:
+                # Also covers an fd number reused by a newer connection
+                self._unregister(fd)
+        for fd, pooled in wanted.items():
+            if fd not in self._registered:
+                try:
+                    self._selector.register(fd, selectors.EVENT_READ, pooled)
+                except (OSError, ValueError, KeyError) as e:
+                    debug(f"Reaper could not watch fd {fd}: {e}", level=2)
+                    continue
+                self._registered[fd] = pooled
+
+    def _unregister(self, fd: int):
+        del self._registered[fd]
+        try:
+            self._selector.unregister(fd)
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def _run(self):
+        try:
+            while not self._stopped:
+                pool = self._pool_ref()
+                if pool is None:
+                    break
+                self._sync(pool.idle_connections())
+                del pool
+
+                events = self._selector.select(self._interval)
+                readable = []
+                for key, _ in events:
+                    if key.data is None:
+                        try:
+                            self._wakeup_recv.recv(64)
+                        except OSError:
+                            pass
+                    else:
+                        readable.append(key.data)
+
+                pool = self._pool_ref()
+                if pool is None or self._stopped:
+                    break
+                pool.reap(readable)
+                del pool
+        except Exception as e:  # pylint: disable=broad-except
+            debug(f"Pool reaper stopped: {e}", level=2)
+        finally:
+            self._stopped = True
+            self._selector.close()
+            self._wakeup_recv.close()
+            self._wakeup_send.close()
+
+
+class _OriginPool:
+    """
+    Connections to one (host, port, scheme) and the lock that guards them.
+
+    Each origin has its own lock, so threads talking to different hosts do
+    not contend. ``available`` is notified whenever a connection comes back
+    or a slot under max_connections_per_host frees up.
+    """
+
+    def __init__(self, key: Tuple[str, int, str]):
+        self.key = key
+        self.lock = threading.Lock()
+        self.available = threading.Condition(self.lock)
+        self.idle: deque = deque()  # HTTP/1.1 connections ready for checkout
+        self.h2: list = []  # HTTP/2 connections, shared and never popped
+        self.open = 0  # HTTP/1.1 connections idle, checked out or reserved
+        self.waiters: deque = deque()  # Tickets of blocked get_connection() calls, FIFO
+        # ALPN result last seen, and the lock that lets concurrent requests
+        # to an h2 origin wait for one handshake instead of racing
+        self.protocol: Optional[str] = None
+        self.connect_lock = threading.Lock()
+
+    def close_idle(self) -> int:
+        """Close every idle HTTP/1.1 connection. Caller holds the lock."""
+        closed = len(self.idle)
+        for pooled_conn in self.idle:
+            pooled_conn.close()
+        self.idle.clear()
+        self.open = max(0, self.open - closed)
+        return closed
+
+    def close_h2(self) -> int:
+        """Close every HTTP/2 connection. Caller holds the lock."""
+        closed = len(self.h2)
+        for c in self.h2:
+            c.close()
+        self.h2 = []
+        return closed
+
+
 class ConnectionPool:
     """
     Thread-safe connection pool for HTTP/HTTPS connections.
@@ -158,6 +335,18 @@ class ConnectionPool:
     - HTTP/1.1 serial reuse (one request per connection at a time)
     - HTTP/2 stream multiplexing (multiple concurrent requests per connection)
     - Connection reuse, idle timeout, maximum connections per host
+
+    Every origin has its own lock, and the total for ``max_pool_size`` is
+    a separate counter, so requests to different hosts never wait on each
+    other and socket probes run outside any lock. ``get_connection()`` can
+    block, first come first served, until a connection or a slot under
+    ``max_connections_per_host`` frees up; ``checkout_timeout`` makes the
+    sockets use that mode.
+
+    With ``reaper_interval`` set, a background thread watches all idle
+    sockets with a selector and evicts those the peer closed or that sat
+    idle past ``idle_timeout``; checkout then skips the per-connection
+    socket probe and is a plain pop.
     """
 
     def __init__(
@@ -165,6 +354,8 @@ class ConnectionPool:
         max_connections_per_host: int = 10,
         idle_timeout: float = 60.0,
         max_pool_size: int = 100,
+        reaper_interval: Optional[float] = None,
+        checkout_timeout: Optional[float] = None,
     ):
         """
         Initialize connection pool.
@@ -173,23 +364,154 @@ class ConnectionPool:
             max_connections_per_host: Maximum connections per (host, port, scheme)
             idle_timeout: Seconds before idle connection is closed
             max_pool_size: Maximum total connections across all hosts
+            reaper_interval: Seconds between background sweeps of idle
+                connections; None probes each connection at checkout instead
+            checkout_timeout: Seconds a request waits for a connection once
+                max_connections_per_host are open; None opens another one
         """
-        self._pools: Dict[Tuple[str, int, str], deque] = {}
-        # H2 connections kept separately (not popped on checkout)
-        self._h2_pools: Dict[Tuple[str, int, str], list] = {}
+        self._origins: Dict[Tuple[str, int, str], _OriginPool] = {}
+        # Guards the origin registry and the reaper, never a connection
         self._lock = threading.RLock()
         self._max_per_host = max_connections_per_host
         self._idle_timeout = idle_timeout
         self._max_pool_size = max_pool_size
-        self._total_connections = 0
+        self.checkout_timeout = checkout_timeout
+        self._count_lock = threading.Lock()
+        self._total = 0
+        # Started with the first pooled connection when reaper_interval is set
+        self._reaper_interval = reaper_interval
+        self._reaper: Optional[_PoolReaper] = None
+        self._evicted_by_reaper = 0
+        self._evicted_at_checkout = 0
 
     def __repr__(self) -> str:
-        return f"<ConnectionPool connections={self._total_connections} pools={len(self._pools)}>"
+        return f"<ConnectionPool connections={self._total} pools={len(self._pools)}>"
+
+    @property
+    def _total_connections(self) -> int:
+        """Connections counted against max_pool_size."""
+        return self._total
+
+    @property
+    def _pools(self) -> Dict[Tuple[str, int, str], deque]:
+        """Idle HTTP/1.1 connections of each origin that has any open."""
+        return {key: o.idle for key, o in list(self._origins.items()) if o.idle or o.open}
+
+    @property
+    def _h2_pools(self) -> Dict[Tuple[str, int, str], list]:
+        """HTTP/2 connections of each origin that has any."""
+        return {key: o.h2 for key, o in list(self._origins.items()) if o.h2}
 
     def _get_pool_key(self, host: str, port: int, scheme: str) -> Tuple[str, int, str]:
         """Generate pool key from connection parameters"""
         return (host.lower(), port, scheme.lower())
 
+    def _origin(self, host: str, port: int, scheme: str) -> _OriginPool:
+        """Sub-pool for an origin, created on first use."""
+        key = self._get_pool_key(host, port, scheme)
+        origin = self._origins.get(key)
+        if origin is None:
+            with self._lock:
+                origin = self._origins.get(key)
+                if origin is None:
+                    origin = self._origins[key] = _OriginPool(key)
+        return origin
+
+    def _reserve_slot(self) -> bool:
+        """Count one more connection unless max_pool_size is reached."""
+        with self._count_lock:
+            if self._total >= self._max_pool_size:
+                return False
+            self._total += 1
+            return True
+
+    def _release_slots(self, count: int = 1, *, evicted_at_checkout: int = 0, evicted_by_reaper: int = 0):
+        """Stop counting closed connections, recording why they were evicted."""
+        with self._count_lock:
+            self._total = max(0, self._total - count)
+            self._evicted_at_checkout += evicted_at_checkout
+            self._evicted_by_reaper += evicted_by_reaper
+
+    def _ensure_reaper(self):
+        """Start the reaper thread if one is configured and not running."""
+        if self._reaper_interval is None:
+            return
+        with self._lock:
+            if self._reaper is None or not self._reaper.running:
+                self._reaper = _PoolReaper(self, self._reaper_interval)
+
+    def _checkout_alive(self, pooled_conn: PooledConnection) -> bool:
+        """
+        Liveness check at checkout. While the reaper watches idle sockets
+        only connections it flagged with unread data are probed.
+
+        An HTTP/1.1 connection found with bytes waiting keeps pending_data
+        set until it is returned, so the caller knows to read them first;
+        one that is quiet can be used without another probe.
+        """
+        if self._reaper is None or pooled_conn.pending_data:
+            if isinstance(pooled_conn, PooledH2Connection):
+                # The h2 reader consumes whatever arrives itself
+                pooled_conn.pending_data = False
+                return pooled_conn.is_alive()
+            state = pooled_conn.poll()
+            pooled_conn.pending_data = bool(state)
+            return state is not None
+        h2_connection = getattr(pooled_conn, "h2_connection", None)
+        if h2_connection is not None and h2_connection.closed:
+            return False
+        return pooled_conn.conn is not None
+
+    def idle_connections(self) -> list:
+        """Pooled connections not in use whose sockets the reaper should watch."""
+        idle = []
+        for origin in list(self._origins.values()):
+            with origin.lock:
+                idle.extend(c for c in origin.idle if not c.pending_data)
+                idle.extend(c for c in origin.h2 if not c.pending_data and c.is_idle())
+        return idle
+
+    def reap(self, readable: list) -> int:
+        """
+        Evict idle connections whose sockets became readable because the
+        peer closed them, then those past the idle timeout. Called by the
+        reaper thread.
+
+        Returns:
+            Number of connections evicted
+        """
+        closed = sum(1 for pooled_conn in readable if self._evict_if_closed(pooled_conn))
+        self._release_slots(closed, evicted_by_reaper=closed)
+        expired = self._close_expired()
+        self._release_slots(expired, evicted_by_reaper=expired)
+        return closed + expired
+
+    def _evict_if_closed(self, pooled_conn: PooledConnection) -> bool:
+        """Close a readable idle connection if its peer hung up."""
+        origin = self._origin(pooled_conn.host, pooled_conn.port, pooled_conn.scheme)
+        with origin.lock:
+            if isinstance(pooled_conn, PooledH2Connection):
+                # An active stream owns the socket; its reader will see the close
+                if pooled_conn not in origin.h2 or not pooled_conn.is_idle():
+                    return False
+            elif pooled_conn not in origin.idle:
+                return False  # Checked out since the select
+
+            if pooled_conn.is_alive():
+                # Bytes are waiting but the socket is open; leave them for checkout
+                pooled_conn.pending_data = True
+                return False
+
+            if isinstance(pooled_conn, PooledH2Connection):
+                origin.h2.remove(pooled_conn)
+            else:
+                origin.idle.remove(pooled_conn)
+                origin.open -= 1
+                origin.available.notify_all()
+            pooled_conn.close()
+        debug(f"Reaper evicted closed connection to {pooled_conn.host}:{pooled_conn.port}", level=2)
+        return True
+
     def get_h2_connection(
         self, host: str, port: int, scheme: str = "https"
     ) -> Optional[PooledH2Connection]:
@@ -201,26 +523,35 @@ class ConnectionPool:
 
         Returns None if no H2 connection has capacity.
         """
-        key = self._get_pool_key(host, port, scheme)
-
-        with self._lock:
-            conns = self._h2_pools.get(key, [])
-            # Prune dead/expired connections
-            valid = []
-            for c in conns:
-                if c.is_expired(self._idle_timeout) or not c.is_alive():
-                    c.close()
-                    self._total_connections -= 1
-                    continue
-                valid.append(c)
-            self._h2_pools[key] = valid
-
-            # Find connection with stream capacity
-            for c in valid:
-                if c.acquire_stream():
-                    return c
+        origin = self._origin(host, port, scheme)
+        with origin.lock:
+            conns = list(origin.h2)
+        if not conns:
             return None
 
+        # Prune dead/expired connections; probes run outside the origin lock
+        dead = []
+        for c in conns:
+            retired = c.is_idle() and (
+                c.is_expired(self._idle_timeout) or not c.can_allocate_stream()
+            )
+            if retired or not self._checkout_alive(c):
+                dead.append(c)
+        if dead:
+            with origin.lock:
+                # Leave a connection that picked up a stream meanwhile to its reader
+                removed = [c for c in dead if c in origin.h2 and (c.is_idle() or not c.is_alive())]
+                origin.h2 = [c for c in origin.h2 if c not in removed]
+            for c in removed:
+                c.close()
+            self._release_slots(len(removed), evicted_at_checkout=len(removed))
+
+        # Find connection with stream capacity
+        for c in conns:
+            if c not in dead and c.acquire_stream():
+                return c
+        return None
+
     def put_h2_connection(
         self, host: str, port: int, scheme: str, conn: Any, *, tls: Any = None,
         h2_connection: Any = None,
@@ -231,59 +562,123 @@ class ConnectionPool:
         Returns the PooledH2Connection wrapper, or None if pool is full.
         The caller should call `acquire_stream()` before using.
         """
-        key = self._get_pool_key(host, port, scheme)
-
-        with self._lock:
-            if self._total_connections >= self._max_pool_size:
-                debug(f"Pool full ({self._total_connections}/{self._max_pool_size})")
-                return None
-
-            if key not in self._h2_pools:
-                self._h2_pools[key] = []
+        if not self._reserve_slot():
+            debug(f"Pool full ({self._total}/{self._max_pool_size})")
+            return None
 
-            pooled = PooledH2Connection(conn, scheme, host, port)
-            pooled.tls = tls
-            pooled.h2_connection = h2_connection
-            self._h2_pools[key].append(pooled)
-            self._total_connections += 1
-            return pooled
+        pooled = PooledH2Connection(conn, scheme, host, port)
+        pooled.tls = tls
+        pooled.h2_connection = h2_connection
+        origin = self._origin(host, port, scheme)
+        with origin.lock:
+            origin.h2.append(pooled)
+        self._ensure_reaper()
+        return pooled
 
     def release_h2_stream(self, pooled_conn: PooledH2Connection):
         """Release a stream on an H2 connection. Connection stays in pool."""
         pooled_conn.release_stream()
 
+    def get_origin_protocol(self, host: str, port: int, scheme: str = "https") -> Optional[str]:
+        """Protocol negotiated by the last new connection to an origin, or None if unknown."""
+        return self._origin(host, port, scheme).protocol
+
+    def set_origin_protocol(self, host: str, port: int, scheme: str, protocol: str):
+        """Remember the protocol an origin negotiated (e.g. 'h2' or 'http/1.1')."""
+        self._origin(host, port, scheme).protocol = protocol
+
+    def connect_lock(self, host: str, port: int, scheme: str = "https") -> threading.Lock:
+        """
+        Per-origin lock held while opening a connection that may be shared.
+
+        Requests to an h2 origin (or one not seen yet) take it, re-check
+        get_h2_connection() and only then connect, so a burst of requests
+        shares the first connection instead of each doing a handshake.
+        It is let go as soon as ALPN shows http/1.1, which is not shared.
+        """
+        return self._origin(host, port, scheme).connect_lock
+
     def get_connection(
-        self, host: str, port: int, scheme: str = "https"
+        self, host: str, port: int, scheme: str = "https", timeout: Optional[float] = None
     ) -> Optional[PooledConnection]:
         """
         Get an HTTP/1.1 connection from the pool if available.
         Removes the connection (serial reuse).
-        """
-        key = self._get_pool_key(host, port, scheme)
 
-        with self._lock:
-            if key not in self._pools:
-                return None
-
-            pool = self._pools[key]
-
-            while pool:
-                pooled_conn = pool.popleft()
-
-                if pooled_conn.is_expired(self._idle_timeout):
-                    pooled_conn.close()
-                    self._total_connections -= 1
-                    continue
+        With a timeout the call waits its turn, first come first served per
+        origin, for an idle connection or for a free slot under
+        max_connections_per_host. A free slot comes back as a reserved
+        PooledConnection whose ``conn`` is None: open the socket and return
+        it with put_connection(..., pooled_conn=reserved), or hand the
+        reservation to discard_connection() if connecting fails.
 
-                if not pooled_conn.is_alive():
-                    pooled_conn.close()
-                    self._total_connections -= 1
-                    continue
-
-                pooled_conn.touch()
+        Raises:
+            PoolTimeout: neither became available within timeout seconds
+        """
+        origin = self._origin(host, port, scheme)
+        if timeout is None:
+            while True:
+                with origin.lock:
+                    if not origin.idle:
+                        return None
+                    pooled_conn = origin.idle.popleft()
+                if self._usable(origin, pooled_conn):
+                    return pooled_conn
+
+        deadline = time.monotonic() + timeout
+        retry = False
+        while True:
+            pooled_conn = self._wait_turn(origin, host, port, scheme, deadline, retry)
+            if pooled_conn.conn is None or self._usable(origin, pooled_conn):
                 return pooled_conn
+            retry = True  # Keep our place at the head of the queue
+
+    def _usable(self, origin: _OriginPool, pooled_conn: PooledConnection) -> bool:
+        """Check a connection just popped from the idle queue; evict it if it is stale."""
+        if pooled_conn.is_expired(self._idle_timeout) or not self._checkout_alive(pooled_conn):
+            pooled_conn.close()
+            with origin.lock:
+                origin.open = max(0, origin.open - 1)
+                origin.available.notify_all()
+            self._release_slots(evicted_at_checkout=1)
+            return False
+        pooled_conn.touch()
+        return True
 
-            return None
+    def _wait_turn(
+        self, origin: _OriginPool, host: str, port: int, scheme: str, deadline: float, front: bool
+    ) -> PooledConnection:
+        """
+        Block until this caller is first in the origin's queue and either an
+        idle connection or a connection slot is available.
+        """
+        ticket = object()
+        with origin.available:
+            if front:
+                origin.waiters.appendleft(ticket)
+            else:
+                origin.waiters.append(ticket)
+            try:
+                while True:
+                    pool_full = False
+                    if origin.waiters[0] is ticket:
+                        if origin.idle:
+                            return origin.idle.popleft()
+                        if origin.open < self._max_per_host:
+                            if self._reserve_slot():
+                                origin.open += 1
+                                return PooledConnection(None, scheme, host, port)
+                            pool_full = True
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeout(
+                            f"No connection to {scheme}://{host}:{port} became available"
+                        )
+                    # Slots freed by other origins are not signalled here; poll for them
+                    origin.available.wait(min(remaining, 0.05) if pool_full else remaining)
+            finally:
+                origin.waiters.remove(ticket)
+                origin.available.notify_all()
 
     def put_connection(
         self,
@@ -301,129 +696,169 @@ class ConnectionPool:
         Returns:
             True if connection was pooled, False if pool is full
         """
-        key = self._get_pool_key(host, port, scheme)
-
-        with self._lock:
-            if key not in self._pools:
-                self._pools[key] = deque()
-
-            pool = self._pools[key]
-
-            if pooled_conn is not None:
-                pooled_conn.touch()
-                pool.append(pooled_conn)
-                return True
+        origin = self._origin(host, port, scheme)
+
+        if pooled_conn is not None:
+            if pooled_conn.conn is None:
+                # Fill a reservation from get_connection(timeout=...)
+                pooled_conn.conn = conn
+                pooled_conn.tls = tls
+            pooled_conn.touch()
+            pooled_conn.pending_data = False
+            with origin.lock:
+                origin.idle.append(pooled_conn)
+                origin.available.notify_all()
+            self._ensure_reaper()
+            return True
 
-            if self._total_connections >= self._max_pool_size:
+        with origin.lock:
+            if len(origin.idle) >= self._max_per_host:
                 debug(
-                    f"Pool full ({self._total_connections}/{self._max_pool_size}), rejecting connection"
+                    f"Host pool full ({len(origin.idle)}/{self._max_per_host}), rejecting connection"
                 )
                 return False
 
-            if len(pool) >= self._max_per_host:
-                debug(
-                    f"Host pool full ({len(pool)}/{self._max_per_host}), rejecting connection"
-                )
+            if not self._reserve_slot():
+                debug(f"Pool full ({self._total}/{self._max_pool_size}), rejecting connection")
                 return False
 
             new_pooled_conn = PooledConnection(conn, scheme, host, port)
             new_pooled_conn.tls = tls
             new_pooled_conn.touch()
 
-            pool.append(new_pooled_conn)
-            self._total_connections += 1
+            origin.idle.append(new_pooled_conn)
+            origin.open += 1
+            origin.available.notify_all()
 
-            return True
+        self._ensure_reaper()
+        return True
 
-    def close_idle_connections(self):
-        """Close all connections that have exceeded idle timeout"""
-        with self._lock:
-            for key, pool in list(self._pools.items()):
-                active_conns = deque()
+    def discard_connection(self, pooled_conn: PooledConnection):
+        """Close a checked-out (or reserved) connection that will not be returned to the pool."""
+        pooled_conn.close()
+        origin = self._origin(pooled_conn.host, pooled_conn.port, pooled_conn.scheme)
+        with origin.lock:
+            origin.open = max(0, origin.open - 1)
+            origin.available.notify_all()
+        self._release_slots()
 
-                while pool:
-                    pooled_conn = pool.popleft()
+    def close_idle_connections(self) -> int:
+        """
+        Close all connections that have exceeded idle timeout
 
-                    if pooled_conn.is_expired(self._idle_timeout):
-                        pooled_conn.close()
-                        self._total_connections -= 1
-                    else:
-                        active_conns.append(pooled_conn)
-
-                if active_conns:
-                    self._pools[key] = active_conns
-                else:
-                    del self._pools[key]
-
-            # Also close idle H2 connections (only if no active streams)
-            for key, conns in list(self._h2_pools.items()):
-                kept = []
-                for c in conns:
-                    if c.is_expired(self._idle_timeout) and c.is_idle():
-                        c.close()
-                        self._total_connections -= 1
-                    else:
-                        kept.append(c)
-                if kept:
-                    self._h2_pools[key] = kept
-                else:
-                    del self._h2_pools[key]
+        Returns:
+            Number of connections closed
+        """
+        closed = self._close_expired()
+        self._release_slots(closed)
+        return closed
+
+    def _close_expired(self) -> int:
+        """Close expired idle connections of every origin; the caller releases their slots."""
+        closed = 0
+        for origin in list(self._origins.values()):
+            with origin.lock:
+                expired = [c for c in origin.idle if c.is_expired(self._idle_timeout)]
+                if expired:
+                    origin.idle = deque(c for c in origin.idle if c not in expired)
+                    origin.open = max(0, origin.open - len(expired))
+                    origin.available.notify_all()
+
+                # Also close idle H2 connections (only if no active streams)
+                expired_h2 = [c for c in origin.h2 if c.is_expired(self._idle_timeout) and c.is_idle()]
+                if expired_h2:
+                    origin.h2 = [c for c in origin.h2 if c not in expired_h2]
+
+            for c in expired + expired_h2:
+                c.close()
+            closed += len(expired) + len(expired_h2)
+        return closed
 
     def close_host_connections(self, host: str, port: int, scheme: str):
         """Close all connections to a specific host"""
-        key = self._get_pool_key(host, port, scheme)
+        origin = self._origin(host, port, scheme)
+        with origin.lock:
+            closed = origin.close_idle() + origin.close_h2()
+            origin.available.notify_all()
+        self._release_slots(closed)
 
-        with self._lock:
-            if key in self._pools:
-                pool = self._pools.pop(key)
-                for pooled_conn in pool:
-                    pooled_conn.close()
-                    self._total_connections -= 1
-            if key in self._h2_pools:
-                conns = self._h2_pools.pop(key)
-                for c in conns:
-                    c.close()
-                    self._total_connections -= 1
+    def prewarm(
+        self,
+        origins,
+        connections: int = 1,
+        *,
+        tls_config: Any = None,
+        timeout: Optional[float] = None,
+        resolver: Any = None,
+    ):
+        """
+        Open connections to origins in the background and keep them idle here.
+
+        HTTPS connections complete the TLS handshake and ALPN, then join the
+        HTTP/2 list or the HTTP/1.1 queue of their origin.
+
+        Args:
+            origins: Origin URLs, e.g. ["https://example.com"]
+            connections: Connections to open per origin
+            tls_config: TlsConfig for the handshakes
+            timeout: Connect and handshake timeout per connection
+            resolver: Resolver for the host names
+
+        Returns:
+            Prewarm handle with per-origin readiness; see ja3requests.prewarm
+        """
+        from ja3requests.prewarm import prewarm  # pylint: disable=import-outside-toplevel
+
+        return prewarm(
+            self, origins, connections, tls_config=tls_config, timeout=timeout, resolver=resolver
+        )
 
     def close_all(self):
-        """Close all pooled connections"""
+        """Close all pooled connections and stop the reaper (restarted by the next put)"""
         with self._lock:
-            for pool in self._pools.values():
-                for pooled_conn in pool:
-                    pooled_conn.close()
-            for conns in self._h2_pools.values():
-                for c in conns:
-                    c.close()
-
-            self._pools.clear()
-            self._h2_pools.clear()
-            self._total_connections = 0
+            if self._reaper is not None:
+                self._reaper.stop()
+                self._reaper = None
+            origins = list(self._origins.values())
+
+        for origin in origins:
+            with origin.lock:
+                origin.close_idle()
+                origin.close_h2()
+                origin.open = 0
+                origin.available.notify_all()
+        with self._count_lock:
+            self._total = 0
 
     def get_stats(self) -> Dict:
         """Get pool statistics"""
-        with self._lock:
-            stats = {
-                "total_connections": self._total_connections,
-                "pools": len(self._pools),
-                "h2_pools": len(self._h2_pools),
-                "max_per_host": self._max_per_host,
-                "idle_timeout": self._idle_timeout,
-                "hosts": {},
-                "h2_hosts": {},
+        pools = self._pools
+        h2_pools = self._h2_pools
+        stats = {
+            "total_connections": self._total,
+            "pools": len(pools),
+            "h2_pools": len(h2_pools),
+            "max_per_host": self._max_per_host,
+            "idle_timeout": self._idle_timeout,
+            "reaper_running": self._reaper is not None and self._reaper.running,
+            "evicted_by_reaper": self._evicted_by_reaper,
+            "evicted_at_checkout": self._evicted_at_checkout,
+            "hosts": {},
+            "h2_hosts": {},
+        }
+
+        for key, pool in pools.items():
+            host, port, scheme = key
+            stats["hosts"][f"{scheme}://{host}:{port}"] = len(pool)
+
+        for key, conns in h2_pools.items():
+            host, port, scheme = key
+            stats["h2_hosts"][f"{scheme}://{host}:{port}"] = {
+                "connections": len(conns),
+                "active_streams": sum(c.active_streams for c in conns),
             }
 
-            for key, pool in self._pools.items():
-                host, port, scheme = key
-                stats["hosts"][f"{scheme}://{host}:{port}"] = len(pool)
-
-            for key, conns in self._h2_pools.items():
-                host, port, scheme = key
-                stats["h2_hosts"][f"{scheme}://{host}:{port}"] = {
-                    "connections": len(conns),
-                    "active_streams": sum(c.active_streams for c in conns),
-                }
-
-            return stats
+        return stats
 
     def __enter__(self):
         return self
@@ -0,0 +1,223 @@
+"""
+Ja3Requests.prewarm
+~~~~~~~~~~~~~~~~~~~
+
+Opening pooled connections ahead of traffic.
+
+A worker that knows its origins at startup can resolve, connect and
+handshake with each of them in the background, so the first requests
+after a deploy find idle connections in the pool instead of paying for
+DNS, TCP and a full JA3 handshake one after another.
+"""
+
+import copy
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+from ja3requests.const import DEFAULT_HTTP_PORT, DEFAULT_HTTPS_PORT
+from ja3requests.contexts.context import HTTPContext, HTTPSContext
+from ja3requests.exceptions import NotAllowedScheme
+from ja3requests.protocol.tls.config import TlsConfig
+from ja3requests.protocol.tls.debug import debug
+
+#: Most connections opened at the same time by one prewarm
+MAX_WORKERS = 16
+
+
+class OriginWarmup:
+    """Progress of the connections being opened to one origin."""
+
+    def __init__(self, origin: str, scheme: str, host: str, port: int, requested: int):
+        self.origin = origin
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.requested = requested
+        self.ready = 0  # Connections handshaken and left in the pool
+        self.failed = 0
+        self.protocol: Optional[str] = None  # 'h2' or 'http/1.1' once one connection is up
+        self.errors: List[BaseException] = []
+
+    @property
+    def done(self) -> bool:
+        """True once every connection attempt has finished."""
+        return self.ready + self.failed >= self.requested
+
+    def __repr__(self):
+        return (
+            f"<OriginWarmup {self.origin} ready={self.ready}/{self.requested} "
+            f"failed={self.failed} protocol={self.protocol}>"
+        )
+
+
+class Prewarm:
+    """
+    Handle for connections being opened in the background.
+
+    Usage::
+
+        warmup = session.prewarm(["https://api.example.com"], connections=4)
+        warmup.wait(10)
+        warmup.is_ready("https://api.example.com")
+    """
+
+    def __init__(self, origins: Dict[str, OriginWarmup]):
+        self.origins = origins
+        self._lock = threading.Lock()
+        self._futures = []
+
+    def _record(self, warmup: OriginWarmup, protocol: str = None, error: BaseException = None):
+        with self._lock:
+            if error is None:
+                warmup.ready += 1
+                warmup.protocol = protocol
+            else:
+                warmup.failed += 1
+                warmup.errors.append(error)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every connection attempt has finished.
+        :param timeout: Seconds to wait at most, None for no limit
+        :return: True if all attempts finished in time
+        """
+        _, not_done = wait_futures(self._futures, timeout=timeout)
+        return not not_done
+
+    @property
+    def done(self) -> bool:
+        """True once every connection attempt has finished."""
+        return all(future.done() for future in self._futures)
+
+    def is_ready(self, origin: str) -> bool:
+        """True once at least one connection to origin is waiting in the pool."""
+        return self.origins[_origin_key(origin)[0]].ready > 0
+
+    def status(self) -> Dict[str, Dict]:
+        """
+        Per-origin progress.
+        :return: Dict of origin to {"requested", "ready", "failed", "protocol", "done"}
+        """
+        with self._lock:
+            return {
+                origin: {
+                    "requested": w.requested,
+                    "ready": w.ready,
+                    "failed": w.failed,
+                    "protocol": w.protocol,
+                    "done": w.done,
+                }
+                for origin, w in self.origins.items()
+            }
+
+    def __repr__(self):
+        return f"<Prewarm origins={list(self.origins)} done={self.done}>"
+
+
+def prewarm(
+    pool,
+    origins: Iterable[str],
+    connections: int = 1,
+    *,
+    tls_config: TlsConfig = None,
+    timeout: Optional[float] = None,
+    resolver=None,
+    max_workers: int = MAX_WORKERS,
+) -> Prewarm:
+    """
+    Open connections to origins in background threads and leave them idle in pool.
+
+    HTTPS connections complete the TLS handshake and ALPN; those that
+    negotiate h2 go to the pool's HTTP/2 list, the others to its HTTP/1.1
+    queue, exactly as a finished request would leave them.
+
+    :param pool: ConnectionPool to fill
+    :param origins: URLs such as "https://example.com" or "http://example.com:8080";
+        a bare host means https
+    :param connections: Connections to open per origin
+    :param tls_config: TlsConfig for the handshakes (default: TlsConfig())
+    :param timeout: Connect and handshake timeout per connection
+    :param resolver: Resolver for the host names
+    :param max_workers: Most connections opened at the same time
+    :return: Prewarm handle reporting per-origin readiness
+    """
+    warmups = {}
+    for origin in origins:
+        key, scheme, host, port = _origin_key(origin)
+        if key not in warmups:
+            warmups[key] = OriginWarmup(key, scheme, host, port, connections)
+
+    handle = Prewarm(warmups)
+    jobs = [w for w in warmups.values() for _ in range(connections)]
+    if not jobs:
+        return handle
+
+    tls_configs = {
+        key: _origin_tls_config(tls_config, w.host) for key, w in warmups.items() if w.scheme == "https"
+    }
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(jobs))), thread_name_prefix="ja3requests-prewarm"
+    )
+    handle._futures = [  # pylint: disable=protected-access
+        executor.submit(_warm, handle, pool, w, tls_configs.get(w.origin), timeout, resolver) for w in jobs
+    ]
+    # Threads exit once the queue is drained; nothing waits for them here
+    executor.shutdown(wait=False)
+    return handle
+
+
+def _warm(handle, pool, warmup, tls_config, timeout, resolver):
+    """Open one connection and put it into the pool."""
+    # pylint: disable=import-outside-toplevel
+    from ja3requests.sockets.http import HttpSocket
+    from ja3requests.sockets.https import HttpsSocket
+
+    if warmup.scheme == "https":
+        context = HTTPSContext()
+        context.tls_config = tls_config
+        socket_class = HttpsSocket
+    else:
+        context = HTTPContext()
+        socket_class = HttpSocket
+    context.destination_address = warmup.host
+    context.port = warmup.port
+    context.timeout = timeout
+    context.resolver = resolver
+
+    try:
+        protocol = socket_class(context, pool=pool).warm()
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        debug(f"Prewarming {warmup.origin} failed: {e}")
+        handle._record(warmup, error=e)  # pylint: disable=protected-access
+    else:
+        debug(f"Prewarmed {protocol} connection to {warmup.origin}")
+        handle._record(warmup, protocol=protocol)  # pylint: disable=protected-access
+
+
+def _origin_key(origin: str):
+    """
+    Normalise an origin URL.
+    :return: ("scheme://host:port", scheme, host, port)
+    """
+    parts = urlsplit(origin if "://" in origin else f"https://{origin}")
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https"):
+        raise NotAllowedScheme(f"Schema: {scheme} not allowed.")
+    host = parts.hostname
+    port = parts.port or (DEFAULT_HTTPS_PORT if scheme == "https" else DEFAULT_HTTP_PORT)
+    return f"{scheme}://{host}:{port}", scheme, host, port
+
+
+def _origin_tls_config(tls_config, host):
+    """
+    A copy of tls_config with SNI set to host, so origins prewarmed together
+    do not share the first one's server_name. Session caches, key pools and
+    other shared objects are kept, not copied.
+    """
+    config = copy.copy(tls_config) if tls_config is not None else TlsConfig()
+    if not config.server_name:
+        config.server_name = host
+    return config
@@ -4,8 +4,14 @@ ja3requests.protocol.h2.connection
 
 HTTP/2 connection management.
 Handles connection preface, settings exchange, and request/response flow.
+A single connection can be shared by several threads, each waiting on
+its own stream while one of them reads and routes frames for all.
 """
 
+import socket
+import threading
+from collections import deque
+
 from ja3requests.protocol.h2.frame import (
     H2Frame,
     CONNECTION_PREFACE,
@@ -16,19 +22,163 @@ from ja3requests.protocol.h2.frame import (
     FRAME_GOAWAY,
     FRAME_PING,
     FRAME_RST_STREAM,
+    FRAME_PRIORITY,
+    FRAME_CONTINUATION,
     FLAG_END_STREAM,
     FLAG_END_HEADERS,
     FLAG_ACK,
+    FLAG_PADDED,
+    FLAG_PRIORITY,
+    SETTINGS_HEADER_TABLE_SIZE,
+    SETTINGS_MAX_CONCURRENT_STREAMS,
+    SETTINGS_INITIAL_WINDOW_SIZE,
+    SETTINGS_MAX_FRAME_SIZE,
+    DEFAULT_WINDOW_SIZE,
+    ERROR_CANCEL,
+    ERROR_PROTOCOL,
     build_settings_frame,
     build_window_update_frame,
     build_headers_frame,
     build_data_frame,
     build_ping_frame,
+    build_rst_stream_frame,
     parse_settings_payload,
     DEFAULT_SETTINGS,
 )
 from ja3requests.protocol.h2.hpack import HPACKEncoder, HPACKDecoder
 from ja3requests.protocol.tls.debug import debug
+from ja3requests.utils import is_stream_body, iter_stream_body
+
+#: Queued bytes (one full TLS record) that are sent without waiting for the next flush point
+OUTBOUND_FLUSH_SIZE = 16384
+
+#: Bytes of a streamed request body kept read ahead of the flow-control
+#: windows, so a WINDOW_UPDATE finds data ready to send
+STREAM_READ_AHEAD = 65536
+
+
+def _frame_content(frame):
+    """Payload of a DATA or HEADERS frame without padding and priority fields."""
+    payload = frame.payload
+    if frame.type in (FRAME_DATA, FRAME_HEADERS) and frame.flags & FLAG_PADDED:
+        pad_length = payload[0]
+        payload = payload[1:len(payload) - pad_length]
+    if frame.type == FRAME_HEADERS and frame.flags & FLAG_PRIORITY:
+        payload = payload[5:]
+    return payload
+
+
+class _PendingBody:
+    """
+    Request body not yet sent on a stream.
+
+    A bytes body is sent from one memoryview. A streamed body (file object
+    or iterator) is read into a small buffer by the thread that sent the
+    request, while it holds none of the connection's locks; DATA frames are
+    cut only from what is already buffered, so a slow file or a generator
+    doing I/O never holds up the frames of other streams.
+    """
+
+    def __init__(self, body):
+        self._lock = threading.Lock()  # Guards the buffer between fill() and take()
+        self._buffer = deque()
+        if is_stream_body(body):
+            self._view = memoryview(b"")
+            self._chunks = iter_stream_body(body)
+        else:
+            self._view = memoryview(body)
+            self._chunks = None
+        self._buffered = len(self._view)
+        self._exhausted = self._chunks is None
+        self._ended = False
+
+    @property
+    def drained(self):
+        """Whether the whole body has been read and taken."""
+        return self._exhausted and not self._buffered
+
+    @property
+    def ended(self):
+        """Whether the frame ending the stream has been taken."""
+        return self._ended
+
+    def fill(self, target):
+        """
+        Read a streamed body until ``target`` bytes are buffered or it ends.
+        Called without the connection's locks held.
+        :return: Whether anything was read or the end of the body was reached
+        """
+        progress = False
+        while not self._exhausted and self._buffered < target:
+            chunk = next(self._chunks, None)
+            with self._lock:
+                if chunk is None:
+                    self._exhausted = True
+                else:
+                    self._buffer.append(chunk)
+                    self._buffered += len(chunk)
+            progress = True
+        return progress
+
+    def take(self, size):
+        """
+        Up to ``size`` buffered bytes, across chunk boundaries, so frame
+        sizes follow the windows rather than how the body was chunked.
+        :return: (bytes, whether they end the body)
+        """
+        with self._lock:
+            parts = []
+            while size > 0:
+                if not self._view:
+                    if not self._buffer:
+                        break
+                    self._view = memoryview(self._buffer.popleft())
+                part = self._view[:size]
+                parts.append(part)
+                size -= len(part)
+                self._view = self._view[len(part):]
+            data = parts[0].tobytes() if len(parts) == 1 else b"".join(parts)
+            self._buffered -= len(data)
+            self._ended = self._exhausted and not self._buffered
+            return data, self._ended
+
+
+class H2StreamState:
+    """Response state accumulated for a single stream."""
+
+    def __init__(self):
+        self.headers = []
+        self.header_block = b""
+        self.data = deque()  # DATA payloads in arrival order
+        self.ended = False
+        self.recv_unacked = 0  # DATA bytes not yet returned with WINDOW_UPDATE
+        self.streaming = False  # Body handed out by read_data(), acknowledged as it is read
+
+    @property
+    def body(self):
+        """Response body received so far."""
+        return b"".join(self.data)
+
+
+def _stream_complete(state):
+    """Whether a stream's response has ended."""
+    return state is not None and state.ended and not state.header_block
+
+
+def _headers_ready(state):
+    """Whether a stream has its final response headers, or will get none."""
+    if state is None:
+        return True
+    if state.header_block:
+        return False
+    if state.ended:
+        return True
+    return bool(state.headers) and not dict(state.headers).get(":status", "").startswith("1")
+
+
+def _data_ready(state):
+    """Whether a streamed body has data to hand out or has ended."""
+    return state is None or bool(state.data) or state.ended
 
 
 class H2Connection:
@@ -40,6 +190,36 @@ class H2Connection:
     2. Exchange SETTINGS ACK
     3. Send HEADERS + DATA frames for requests
     4. Receive and assemble response HEADERS + DATA
+
+    Requests may be issued from several threads at once. Sends are
+    serialized by a write lock; on the receiving side the first waiting
+    thread becomes the reader and routes every frame to its stream's
+    state, while the others wait until their own stream has ended.
+    Frames for a stream that is over (ended, reset or timed out) are
+    ignored, and one on a stream not opened yet fails the connection with
+    PROTOCOL_ERROR (RFC 9113 Section 5.1).
+
+    Flow control (RFC 7540 Section 6.9) is applied in both directions.
+    Request bodies are queued and sent as DATA frames no larger than the
+    peer's SETTINGS_MAX_FRAME_SIZE and its connection and stream windows;
+    the rest goes out as WINDOW_UPDATE frames arrive. A file object or
+    iterator body is read at most STREAM_READ_AHEAD bytes ahead of what
+    has been sent, by the thread that sent the request (in send_request(),
+    while waiting for the response, or in receive_data() when driven
+    sans-IO) and outside the connection's locks; a thread handling a
+    WINDOW_UPDATE sends from what has been read ahead. Received DATA is
+    acknowledged with a WINDOW_UPDATE once half of a window has been used;
+    for a response read with receive_headers() and read_data(), the stream
+    window is only reopened as the body is read.
+    The receive windows follow the local SETTINGS_INITIAL_WINDOW_SIZE and
+    the connection-level increment passed to initiate().
+
+    Frames are queued and handed to send_func together at flush points:
+    the end of initiate(), of send_request(), of a control frame reply and
+    of the body data released by a WINDOW_UPDATE. Over TLS one send_func
+    call becomes one record per 2^14 bytes, so the preface, SETTINGS and
+    WINDOW_UPDATE share a record, as do a request's HEADERS and a small
+    body. Frames keep the order they were queued in.
     """
 
     def __init__(self, send_func, recv_func, settings=None):
@@ -50,14 +230,78 @@ class H2Connection:
         """
         self._send = send_func
         self._recv = recv_func
-        self._encoder = HPACKEncoder()
-        self._decoder = HPACKDecoder()
         self._next_stream_id = 1  # Client streams are odd-numbered
         self._local_settings = dict(DEFAULT_SETTINGS)
         if settings:
             self._local_settings.update(settings)
+        self._encoder = HPACKEncoder()
+        self._decoder = HPACKDecoder(self._local_settings[SETTINGS_HEADER_TABLE_SIZE])
         self._peer_settings = dict(DEFAULT_SETTINGS)
         self._recv_buffer = b""
+        self._streams = {}  # stream_id -> H2StreamState
+        self._dropped_header_block = b""  # Header block arriving on a closed stream
+        self._write_lock = threading.Lock()
+        self._outbound = []  # Serialized frames not yet sent, guarded by _write_lock
+        self._outbound_size = 0
+        self._state = threading.Condition()  # Guards _streams and _reading
+        self._reading = False  # Whether a thread is reading frames
+        self._closed = False
+        self._goaway_last_stream_id = None
+        # Send side flow control, guarded by _write_lock
+        self._send_window = DEFAULT_WINDOW_SIZE
+        self._stream_send_windows = {}  # stream_id -> window
+        self._send_queue = {}  # stream_id -> _PendingBody
+        # Receive side flow control, guarded by _state
+        self._recv_window = DEFAULT_WINDOW_SIZE
+        self._recv_unacked = 0
+
+    @property
+    def closed(self):
+        """Whether the connection can no longer carry streams."""
+        return self._closed
+
+    @property
+    def goaway_received(self):
+        """Whether the peer sent GOAWAY (no new streams may be opened)."""
+        return self._goaway_last_stream_id is not None
+
+    @property
+    def max_concurrent_streams(self):
+        """Peer's SETTINGS_MAX_CONCURRENT_STREAMS."""
+        return self._peer_settings.get(SETTINGS_MAX_CONCURRENT_STREAMS)
+
+    def _queue(self, data):
+        """
+        Queue serialized frames behind those not yet sent.
+
+        Caller holds the write lock. The queue is sent early once it holds
+        OUTBOUND_FLUSH_SIZE bytes, so a large body streams out frame by frame
+        while the peer reads it and returns WINDOW_UPDATEs.
+        """
+        self._outbound.append(data)
+        self._outbound_size += len(data)
+        if self._outbound_size >= OUTBOUND_FLUSH_SIZE:
+            self._flush_outbound()
+
+    def _flush_outbound(self):
+        """Send all queued frames with one send_func call (caller holds the write lock)."""
+        if not self._outbound:
+            return
+        data = self._outbound[0] if len(self._outbound) == 1 else b"".join(self._outbound)
+        self._outbound = []
+        self._outbound_size = 0
+        self._send(data)
+
+    def flush(self):
+        """Send any frames still queued."""
+        with self._write_lock:
+            self._flush_outbound()
+
+    def _write(self, data):
+        """Send bytes after any queued frames; frames from different threads never interleave."""
+        with self._write_lock:
+            self._queue(data)
+            self._flush_outbound()
 
     def initiate(self, window_update_increment=None):
         """
@@ -66,18 +310,25 @@ class H2Connection:
         :param window_update_increment: Optional initial WINDOW_UPDATE value
             for H2 fingerprint customization.
         """
-        # Send connection preface magic
-        self._send(CONNECTION_PREFACE)
-
-        # Send SETTINGS frame
-        settings_frame = build_settings_frame(self._local_settings)
-        self._send(settings_frame.serialize())
+        with self._write_lock:
+            # Connection preface magic
+            self._queue(CONNECTION_PREFACE)
+
+            # SETTINGS frame
+            settings_frame = build_settings_frame(self._local_settings)
+            self._queue(settings_frame.serialize())
+
+            # WINDOW_UPDATE if specified (for H2 fingerprinting)
+            if window_update_increment:
+                with self._state:
+                    self._recv_window = DEFAULT_WINDOW_SIZE + window_update_increment
+                wu_frame = build_window_update_frame(0, window_update_increment)
+                self._queue(wu_frame.serialize())
+
+            # The whole client preface goes out in one write
+            self._flush_outbound()
         debug(f"H2: Sent SETTINGS: {self._local_settings}")
-
-        # Send WINDOW_UPDATE if specified (for H2 fingerprinting)
         if window_update_increment:
-            wu_frame = build_window_update_frame(0, window_update_increment)
-            self._send(wu_frame.serialize())
             debug(f"H2: Sent WINDOW_UPDATE increment={window_update_increment}")
 
     def send_request(self, method, authority, path, headers=None, body=None, scheme="https"):
@@ -88,13 +339,11 @@ class H2Connection:
         :param authority: Host header value
         :param path: Request path
         :param headers: Additional headers as list of (name, value) tuples
-        :param body: Request body bytes
+        :param body: Request body bytes, or a file object or iterator of
+            bytes read as the flow-control windows allow
         :param scheme: URL scheme
         :return: Stream ID used for this request
         """
-        stream_id = self._next_stream_id
-        self._next_stream_id += 2
-
         # Build pseudo-headers + regular headers
         h2_headers = [
             (":method", method),
@@ -110,72 +359,429 @@ class H2Connection:
                     continue
                 h2_headers.append((lower_name, value))
 
-        # Encode headers with HPACK
-        header_block = self._encoder.encode_headers(h2_headers)
-
-        # Send HEADERS frame
-        end_stream = body is None or len(body) == 0
-        headers_frame = build_headers_frame(stream_id, header_block, end_stream=end_stream)
-        self._send(headers_frame.serialize())
+        pending = None
+        if body is not None:
+            pending = _PendingBody(body)
+            # The start of a streamed body is read before taking the write lock
+            pending.fill(STREAM_READ_AHEAD)
+        end_stream = pending is None or pending.drained
+
+        # Stream IDs must reach the peer in increasing order and the HPACK
+        # encoder state must match the order header blocks are sent in
+        with self._write_lock:
+            if self._closed or self.goaway_received:
+                raise ConnectionError("HTTP/2 connection is not accepting new streams")
+
+            stream_id = self._next_stream_id
+            self._next_stream_id += 2
+            with self._state:
+                self._streams[stream_id] = H2StreamState()
+
+            # Encode headers with HPACK and queue the HEADERS frame
+            header_block = self._encoder.encode_headers(h2_headers)
+            headers_frame = build_headers_frame(stream_id, header_block, end_stream=end_stream)
+            self._queue(headers_frame.serialize())
+
+            # Queue as much of the body as the peer's windows allow
+            if not end_stream:
+                self._stream_send_windows[stream_id] = self._peer_settings[SETTINGS_INITIAL_WINDOW_SIZE]
+                self._send_queue[stream_id] = pending
+                self._flush_send_queue()
+
+            # HEADERS leave together with the DATA frames still queued
+            self._flush_outbound()
         debug(f"H2: Sent HEADERS on stream {stream_id}")
 
-        # Send DATA frame if body present
-        if body:
-            data_frame = build_data_frame(stream_id, body, end_stream=True)
-            self._send(data_frame.serialize())
-            debug(f"H2: Sent DATA on stream {stream_id}: {len(body)} bytes")
-
+        if not end_stream:
+            self._pump_body(stream_id)
         return stream_id
 
+    def _pump_body(self, stream_id):
+        """
+        Keep STREAM_READ_AHEAD bytes of a streamed body buffered, whatever
+        the windows, and send what they allow.
+
+        Runs in the thread that sent the request. The body is read with no
+        lock held; the write lock is only taken to queue its frames.
+        :return: Whether any of the body was read
+        """
+        progress = False
+        while True:
+            pending = self._send_queue.get(stream_id)
+            if pending is None or not pending.fill(STREAM_READ_AHEAD):
+                return progress
+            progress = True
+            with self._write_lock:
+                self._flush_send_queue()
+                self._flush_outbound()
+
+    def _flush_send_queue(self):
+        """
+        Queue request body DATA frames as far as the flow-control windows allow.
+
+        Only body data already read is sent; streamed bodies are read by
+        _pump_body(). Caller holds the write lock and flushes the outbound queue.
+        """
+        max_frame_size = self._peer_settings[SETTINGS_MAX_FRAME_SIZE]
+        for stream_id in list(self._send_queue):
+            pending = self._send_queue[stream_id]
+            while not pending.ended:
+                size = min(
+                    max_frame_size,
+                    self._send_window,
+                    self._stream_send_windows[stream_id],
+                )
+                # An empty DATA frame can still end the stream on a closed window
+                if size <= 0 and not pending.drained:
+                    break
+                data, end_stream = pending.take(max(size, 0))
+                if not data and not end_stream:
+                    break  # The rest of the body has not been read yet
+                data_frame = build_data_frame(stream_id, data, end_stream=end_stream)
+                self._queue(data_frame.serialize())
+                self._send_window -= len(data)
+                self._stream_send_windows[stream_id] -= len(data)
+
+            if pending.ended:
+                debug(f"H2: Sent request body on stream {stream_id}")
+                del self._send_queue[stream_id]
+                del self._stream_send_windows[stream_id]
+            if self._send_window <= 0:
+                debug("H2: Connection send window exhausted, waiting for WINDOW_UPDATE")
+                break
+
+    def _discard_send_queue(self, stream_ids):
+        """Drop queued body data for streams that can no longer take it."""
+        with self._write_lock:
+            for stream_id in stream_ids:
+                self._send_queue.pop(stream_id, None)
+                self._stream_send_windows.pop(stream_id, None)
+
+    def _handle_window_update(self, frame):
+        """Widen a send window and send queued body data that now fits."""
+        increment = int.from_bytes(frame.payload[:4], "big") & 0x7FFFFFFF
+        debug(f"H2: Received WINDOW_UPDATE: stream={frame.stream_id} increment={increment}")
+        with self._write_lock:
+            if frame.stream_id == 0:
+                self._send_window += increment
+            elif frame.stream_id in self._stream_send_windows:
+                self._stream_send_windows[frame.stream_id] += increment
+            else:
+                return
+            self._flush_send_queue()
+            self._flush_outbound()
+
+    def _acknowledge_data(self, stream_id, size, stream_size, stream_ended):
+        """
+        Account received DATA against the receive windows.
+
+        WINDOW_UPDATE frames are batched: a window is replenished only once
+        half of it has been consumed, instead of once per DATA frame.
+
+        :param size: Bytes to return to the connection window
+        :param stream_size: Bytes to return to the stream window
+        """
+        if not size and not stream_size:
+            return
+        frames = []
+        with self._state:
+            self._recv_unacked += size
+            if size and self._recv_unacked >= self._recv_window // 2:
+                frames.append(build_window_update_frame(0, self._recv_unacked))
+                self._recv_unacked = 0
+
+            state = self._streams.get(stream_id)
+            if state is not None and stream_size and not stream_ended:
+                state.recv_unacked += stream_size
+                if state.recv_unacked >= self._local_settings[SETTINGS_INITIAL_WINDOW_SIZE] // 2:
+                    frames.append(build_window_update_frame(stream_id, state.recv_unacked))
+                    state.recv_unacked = 0
+
+        if frames:
+            self._write(b"".join(frame.serialize() for frame in frames))
+
     def receive_response(self, stream_id):
         """
         Receive and assemble an HTTP/2 response for the given stream.
 
+        Safe to call from several threads for different streams: one of
+        them reads frames and routes them to their streams, the others
+        wait until the reader has made progress.
+
         :param stream_id: Stream ID to receive response for
         :return: (headers_list, body_bytes)
         """
-        response_headers = []
-        response_body = b""
-        header_block = b""
-        headers_complete = False
-        end_stream = False
+        self._await(stream_id, _stream_complete)
+        return self.pop_response(stream_id)
+
+    def receive_headers(self, stream_id):
+        """
+        Receive the response headers on a stream; its body is then read
+        with read_data().
+
+        The body's stream window is only reopened as read_data() hands the
+        body out, so a slow reader keeps at most one window of it buffered.
+
+        :param stream_id: Stream ID to receive response headers for
+        :return: headers_list, empty if the stream was reset first
+        """
+        with self._state:
+            state = self._streams.get(stream_id)
+            if state is not None:
+                state.streaming = True
+        self._await(stream_id, _headers_ready)
+        with self._state:
+            state = self._streams.get(stream_id)
+            return list(state.headers) if state is not None else []
+
+    def read_data(self, stream_id):
+        """
+        Next piece of a response body streamed after receive_headers().
 
-        while not end_stream:
-            frames = self._read_frames()
+        The stream is forgotten once its body has ended.
+
+        :param stream_id: Stream ID to read from
+        :return: (body bytes, whether the body has ended)
+        """
+        self._await(stream_id, _data_ready)
+        with self._state:
+            state = self._streams.get(stream_id)
+            if state is None:
+                return b"", True
+            data = state.data.popleft() if state.data else b""
+            ended = state.ended and not state.data
+            if ended:
+                del self._streams[stream_id]
+
+        if ended:
+            self._discard_send_queue([stream_id])
+        elif data:
+            self._acknowledge_data(stream_id, 0, len(data), False)
+        return data, ended
+
+    def reset_stream(self, stream_id):
+        """
+        Give up on a stream's response: its state is dropped and, unless it
+        already ended, the peer is told to stop with RST_STREAM (CANCEL).
+
+        :param stream_id: Stream ID to reset
+        """
+        with self._state:
+            state = self._streams.pop(stream_id, None)
+        self._discard_send_queue([stream_id])
+        if state is None or state.ended or self._closed:
+            return
+        debug(f"H2: Cancelling stream {stream_id}")
+        try:
+            self._write(build_rst_stream_frame(stream_id, ERROR_CANCEL).serialize())
+        except OSError:
+            pass
+
+    def _await(self, stream_id, ready):
+        """
+        Wait until ``ready(state)`` holds for a stream. A stream whose read
+        times out is reset, so its state and late frames are not kept.
+        """
+        try:
+            with self._state:
+                self._wait_for(stream_id, ready)
+        except socket.timeout:
+            self.reset_stream(stream_id)
+            raise
+
+    def _wait_for(self, stream_id, ready):
+        """
+        Read frames until ``ready(state)`` holds for a stream (caller holds the state lock).
+
+        The first waiting thread reads and routes frames for every stream;
+        the others wait until it has made progress.
+        """
+        while not ready(self._streams.get(stream_id)):
+            if self._closed:
+                self._streams.pop(stream_id, None)
+                raise ConnectionError(
+                    f"HTTP/2 connection closed before stream {stream_id} completed"
+                )
+            if stream_id in self._send_queue:
+                # Read more of this stream's body as the windows opened
+                self._state.release()
+                try:
+                    pumped = self._pump_body(stream_id)
+                finally:
+                    self._state.acquire()
+                if pumped:
+                    continue
+            if self._reading:
+                self._state.wait()
+                continue
+
+            self._reading = True
+            try:
+                self._read_and_dispatch()
+            finally:
+                self._reading = False
+                self._state.notify_all()
+
+    def _read_and_dispatch(self):
+        """
+        Read the next batch of frames and route them (called by the reader).
+
+        The state lock is released while blocked on the connection so that
+        other threads can open streams and collect finished responses.
+        """
+        self._state.release()
+        try:
+            try:
+                frames = self._read_frames()
+            except socket.timeout:
+                raise
+            except Exception:
+                self._closed = True
+                raise
             for frame in frames:
                 if frame.stream_id == 0:
                     # Connection-level frame
                     self._handle_connection_frame(frame)
-                    continue
+                else:
+                    self._handle_stream_frame(frame)
+        finally:
+            self._state.acquire()
 
-                if frame.stream_id != stream_id:
-                    continue
+    def receive_data(self, data):
+        """
+        Feed bytes received from the peer (sans-IO counterpart of receive_response).
+
+        :param data: Decrypted bytes read from the connection
+        :return: List of stream IDs whose response is now complete
+        """
+        self._recv_buffer += data
+        frames, self._recv_buffer = H2Frame.parse_all(self._recv_buffer)
 
-                if frame.type == FRAME_HEADERS:
-                    header_block += frame.payload
-                    if frame.flags & FLAG_END_HEADERS:
-                        response_headers = self._decoder.decode_headers(header_block)
-                        headers_complete = True
-                    if frame.flags & FLAG_END_STREAM:
-                        end_stream = True
+        completed = []
+        for frame in frames:
+            if frame.stream_id == 0:
+                self._handle_connection_frame(frame)
+            elif self._handle_stream_frame(frame):
+                completed.append(frame.stream_id)
+        # The caller sent the requests, so it reads their bodies on
+        for stream_id in list(self._send_queue):
+            self._pump_body(stream_id)
+        return completed
+
+    def stream_complete(self, stream_id):
+        """Whether the response on ``stream_id`` has ended."""
+        with self._state:
+            return _stream_complete(self._streams.get(stream_id))
+
+    def pop_response(self, stream_id):
+        """
+        Remove and return the assembled response for a stream.
 
-                elif frame.type == FRAME_DATA:
-                    response_body += frame.payload
-                    if frame.flags & FLAG_END_STREAM:
-                        end_stream = True
+        :return: (headers_list, body_bytes)
+        """
+        with self._state:
+            state = self._streams.pop(stream_id, None) or H2StreamState()
+        # A response may end before the request body was fully sent
+        self._discard_send_queue([stream_id])
+        return state.headers, state.body
 
-                elif frame.type == FRAME_RST_STREAM:
-                    debug(f"H2: RST_STREAM on stream {stream_id}")
-                    end_stream = True
+    def _handle_stream_frame(self, frame):
+        """
+        Accumulate a stream frame into its stream state.
 
-        return response_headers, response_body
+        :return: True if this frame ended the stream
+        """
+        if frame.type == FRAME_WINDOW_UPDATE:
+            self._handle_window_update(frame)
+            return False
+
+        with self._state:
+            state = self._streams.get(frame.stream_id)
+            # Odd ids not handed out yet are idle streams the peer cannot use
+            idle = frame.stream_id % 2 == 1 and frame.stream_id >= self._next_stream_id
+            if state is not None:
+                held = self._apply_frame(state, frame)
+                ended = state.ended
+            elif not idle:
+                self._drop_frame(frame)
+
+        if state is None:
+            if idle and frame.type != FRAME_PRIORITY:
+                # A connection error (RFC 9113 Section 5.1)
+                debug(f"H2: frame type {frame.type} on idle stream {frame.stream_id}")
+                self.close(ERROR_PROTOCOL)
+            elif frame.type == FRAME_DATA:
+                # DATA on a closed stream still counts against the connection window
+                self._acknowledge_data(frame.stream_id, len(frame.payload), 0, True)
+            return False
+
+        if frame.type == FRAME_DATA:
+            # Padding counts against flow control too
+            self._acknowledge_data(frame.stream_id, len(frame.payload), len(frame.payload) - held, ended)
+        elif frame.type == FRAME_RST_STREAM:
+            self._discard_send_queue([frame.stream_id])
+        return ended
+
+    def _apply_frame(self, state, frame):
+        """
+        Accumulate a frame into its stream's state (caller holds the state lock).
+
+        :return: DATA bytes whose stream window is returned only once read
+        """
+        held = 0
+        if frame.type in (FRAME_HEADERS, FRAME_CONTINUATION):
+            state.header_block += _frame_content(frame)
+            if frame.flags & FLAG_END_HEADERS:
+                # Only the reader decodes, so header blocks keep wire order
+                state.headers = self._decoder.decode_headers(state.header_block)
+                state.header_block = b""
+            if frame.type == FRAME_HEADERS and frame.flags & FLAG_END_STREAM:
+                state.ended = True
+
+        elif frame.type == FRAME_DATA:
+            content = _frame_content(frame)
+            state.data.append(content)
+            # A streamed body returns its window as it is read
+            if state.streaming:
+                held = len(content)
+            if frame.flags & FLAG_END_STREAM:
+                state.ended = True
+
+        elif frame.type == FRAME_RST_STREAM:
+            debug(f"H2: RST_STREAM on stream {frame.stream_id}")
+            state.ended = True
+        return held
+
+    def _drop_frame(self, frame):
+        """
+        Ignore a frame for a closed (ended, reset or timed out) stream.
+
+        Caller holds the state lock. Header blocks are still decoded, so the
+        HPACK table stays in step with the peer's encoder.
+        """
+        if frame.type in (FRAME_HEADERS, FRAME_CONTINUATION):
+            self._dropped_header_block += _frame_content(frame)
+            if frame.flags & FLAG_END_HEADERS:
+                self._decoder.decode_headers(self._dropped_header_block)
+                self._dropped_header_block = b""
 
     def _read_frames(self):
-        """Read and parse frames from the connection."""
+        """
+        Read and parse frames from the connection.
+
+        Frames already buffered are returned without reading; an empty read
+        with nothing buffered means the peer closed the connection.
+        """
+        frames, self._recv_buffer = H2Frame.parse_all(self._recv_buffer)
+        if frames:
+            return frames
+
         data = self._recv(65535)
-        if data:
-            self._recv_buffer += data
+        if not data:
+            self._closed = True
+            return []
 
+        self._recv_buffer += data
         frames, self._recv_buffer = H2Frame.parse_all(self._recv_buffer)
         return frames
 
@@ -186,29 +792,53 @@ class H2Connection:
                 debug("H2: Received SETTINGS ACK")
             else:
                 # Parse and store peer settings
-                self._peer_settings.update(parse_settings_payload(frame.payload))
+                settings = parse_settings_payload(frame.payload)
+                with self._write_lock:
+                    if SETTINGS_INITIAL_WINDOW_SIZE in settings:
+                        # Applies to the windows of all open streams
+                        delta = settings[SETTINGS_INITIAL_WINDOW_SIZE] - self._peer_settings[SETTINGS_INITIAL_WINDOW_SIZE]
+                        for stream_id in self._stream_send_windows:
+                            self._stream_send_windows[stream_id] += delta
+                    if SETTINGS_HEADER_TABLE_SIZE in settings:
+                        # Header blocks are encoded under the write lock too
+                        self._encoder.set_max_table_size(settings[SETTINGS_HEADER_TABLE_SIZE])
+                    self._peer_settings.update(settings)
+                    self._flush_send_queue()
+                    # SETTINGS ACK goes out behind any DATA the new settings released
+                    self._queue(build_settings_frame(ack=True).serialize())
+                    self._flush_outbound()
                 debug(f"H2: Received peer SETTINGS: {self._peer_settings}")
-                # Send SETTINGS ACK
-                ack = build_settings_frame(ack=True)
-                self._send(ack.serialize())
 
         elif frame.type == FRAME_PING:
             if not (frame.flags & FLAG_ACK):
                 # Respond to PING with ACK
                 pong = build_ping_frame(frame.payload, ack=True)
-                self._send(pong.serialize())
+                self._write(pong.serialize())
 
         elif frame.type == FRAME_GOAWAY:
             debug(f"H2: Received GOAWAY: {frame.payload.hex()}")
+            last_stream_id = int.from_bytes(frame.payload[:4], "big") & 0x7FFFFFFF
+            self._goaway_last_stream_id = last_stream_id
+            # Streams above last_stream_id were not processed and never will be
+            with self._state:
+                unprocessed = [stream_id for stream_id in self._streams if stream_id > last_stream_id]
+                for stream_id in unprocessed:
+                    self._streams[stream_id].ended = True
+            self._discard_send_queue(unprocessed)
 
         elif frame.type == FRAME_WINDOW_UPDATE:
-            debug(f"H2: Received WINDOW_UPDATE: stream={frame.stream_id}")
+            self._handle_window_update(frame)
 
-    def close(self):
-        """Send GOAWAY and close connection."""
+    def close(self, error_code=0):
+        """
+        Send GOAWAY and close connection.
+
+        :param error_code: Error code carried by the GOAWAY frame
+        """
         from ja3requests.protocol.h2.frame import build_goaway_frame
-        goaway = build_goaway_frame(0)
+        goaway = build_goaway_frame(0, error_code)
         try:
-            self._send(goaway.serialize())
+            self._write(goaway.serialize())
         except OSError:
             pass
+        self._closed = True
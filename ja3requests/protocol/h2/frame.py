@@ -59,6 +59,13 @@ SETTINGS_INITIAL_WINDOW_SIZE = 0x04
 SETTINGS_MAX_FRAME_SIZE = 0x05
 SETTINGS_MAX_HEADER_LIST_SIZE = 0x06
 
+# Initial flow-control window for connections and streams (RFC 7540 Section 6.9.2)
+DEFAULT_WINDOW_SIZE = 65535
+
+# Error codes (RFC 7540 Section 7)
+ERROR_PROTOCOL = 0x01
+ERROR_CANCEL = 0x08
+
 # HTTP/2 connection preface
 CONNECTION_PREFACE = b"PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n"
 
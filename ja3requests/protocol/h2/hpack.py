@@ -2,12 +2,19 @@
 ja3requests.protocol.h2.hpack
 ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
-Simplified HPACK header compression (RFC 7541).
-Supports static table lookups and literal header encoding.
+HPACK header compression (RFC 7541).
+Supports static table lookups, a size-bounded dynamic table and literal
+header encoding.
 """
 
 import struct
 
+from ja3requests.protocol.h2.huffman import (
+    huffman_decode,
+    huffman_encode,
+    huffman_encoded_length,
+)
+
 
 # HPACK Static Table (RFC 7541 Appendix A) — first 61 entries
 STATIC_TABLE = [
@@ -136,15 +143,20 @@ def decode_integer(data, offset, prefix_bits):
     return value, offset
 
 
-def encode_string(s):
+def encode_string(s, huffman=False):
     """
-    Encode a string using HPACK string literal (without Huffman).
+    Encode a string using HPACK string literal.
 
     :param s: String or bytes to encode
+    :param huffman: Huffman-encode the string when that makes it shorter
     :return: Encoded bytes
     """
     if isinstance(s, str):
         s = s.encode("utf-8")
+    if huffman:
+        encoded_length = huffman_encoded_length(s)
+        if encoded_length < len(s):
+            return encode_integer(encoded_length, 7, 0x80) + huffman_encode(s)
     # No Huffman encoding (H=0)
     return encode_integer(len(s), 7, 0) + s
 
@@ -161,23 +173,154 @@ def decode_string(data, offset):
     offset += length
 
     if huffman:
-        from ja3requests.protocol.h2.huffman import huffman_decode  # pylint: disable=import-outside-toplevel
         string_bytes = huffman_decode(string_bytes)
 
     return string_bytes, offset
 
 
+#: Default SETTINGS_HEADER_TABLE_SIZE (RFC 7540 Section 6.5.2)
+DEFAULT_TABLE_SIZE = 4096
+
+#: Per-entry overhead counted towards the table size (RFC 7541 Section 4.1)
+ENTRY_OVERHEAD = 32
+
+
+class DynamicTable:
+    """
+    HPACK dynamic table (RFC 7541 Section 2.3.2) with O(1) operations.
+
+    Entries live in a ring buffer addressed by their insertion number, so
+    adding and evicting never shift the other entries. Dicts map
+    (name, value) and name to the insertion number of the newest matching
+    entry, which turns encoder lookups into a single dict access.
+    Index 0 is the newest entry, matching HPACK's numbering after the
+    static table.
+    """
+
+    def __init__(self, max_size=DEFAULT_TABLE_SIZE):
+        self._max_size = max_size
+        self._ring = [None] * max(1, max_size // ENTRY_OVERHEAD)
+        self._inserted = 0  # Insertion number of the next entry
+        self._count = 0
+        self._size = 0
+        self._pair_index = {}  # (name, value) -> insertion number
+        self._name_index = {}  # name -> insertion number
+
+    @property
+    def size(self):
+        """Current table size in HPACK octets."""
+        return self._size
+
+    @property
+    def max_size(self):
+        """Maximum table size in HPACK octets."""
+        return self._max_size
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        entry = self.get(index)
+        if entry is None:
+            raise IndexError(index)
+        return entry
+
+    def get(self, index):
+        """Return the entry at dynamic index ``index`` (0 = newest), or None."""
+        if not 0 <= index < self._count:
+            return None
+        return self._ring[(self._inserted - 1 - index) % len(self._ring)]
+
+    def find(self, name, value):
+        """
+        Look up a header in the table.
+
+        :return: (exact_index, name_index), dynamic indexes or None
+        """
+        exact = self._pair_index.get((name, value))
+        if exact is not None:
+            index = self._inserted - 1 - exact
+            return index, index
+        by_name = self._name_index.get(name)
+        return None, (None if by_name is None else self._inserted - 1 - by_name)
+
+    def add(self, name, value):
+        """
+        Insert an entry, evicting the oldest ones to make room.
+
+        An entry larger than the whole table empties it and is not added.
+        """
+        entry_size = len(name) + len(value) + ENTRY_OVERHEAD
+        self._evict(self._max_size - entry_size)
+        if entry_size > self._max_size:
+            return
+
+        number = self._inserted
+        self._ring[number % len(self._ring)] = (name, value)
+        self._inserted += 1
+        self._count += 1
+        self._size += entry_size
+        self._pair_index[(name, value)] = number
+        self._name_index[name] = number
+
+    def resize(self, max_size):
+        """Apply a new maximum size, evicting entries that no longer fit."""
+        self._evict(max_size)
+        entries = [self.get(i) for i in range(self._count - 1, -1, -1)]  # Oldest first
+        self._max_size = max_size
+        self._ring = [None] * max(1, max_size // ENTRY_OVERHEAD)
+        first = self._inserted - len(entries)
+        for number, entry in enumerate(entries, first):
+            self._ring[number % len(self._ring)] = entry
+
+    def _evict(self, limit):
+        """Drop the oldest entries until the table size is at most ``limit``."""
+        while self._count and self._size > limit:
+            number = self._inserted - self._count
+            slot = number % len(self._ring)
+            name, value = self._ring[slot]
+            self._ring[slot] = None
+            self._count -= 1
+            self._size -= len(name) + len(value) + ENTRY_OVERHEAD
+            # Only drop index entries that still point at the evicted entry
+            if self._pair_index.get((name, value)) == number:
+                del self._pair_index[(name, value)]
+            if self._name_index.get(name) == number:
+                del self._name_index[name]
+
+
 class HPACKEncoder:
     """
     HPACK encoder with static and dynamic table support.
     Uses incremental indexing for repeated headers to improve compression.
     """
 
-    MAX_DYNAMIC_TABLE_SIZE = 4096
+    MAX_DYNAMIC_TABLE_SIZE = DEFAULT_TABLE_SIZE
 
-    def __init__(self):
-        self.dynamic_table = []  # List of (name, value) tuples, newest first
-        self._dynamic_table_size = 0
+    def __init__(self, huffman=True):
+        """
+        :param huffman: Huffman-encode string literals that get shorter,
+            as browsers do
+        """
+        self.dynamic_table = DynamicTable(self.MAX_DYNAMIC_TABLE_SIZE)
+        self._pending_size_update = None
+        self._huffman = huffman
+
+    @property
+    def _dynamic_table_size(self):
+        return self.dynamic_table.size
+
+    def set_max_table_size(self, size):
+        """
+        Apply the peer's SETTINGS_HEADER_TABLE_SIZE.
+
+        The table never grows beyond MAX_DYNAMIC_TABLE_SIZE; any change is
+        signalled to the peer at the start of the next header block.
+        """
+        size = min(size, self.MAX_DYNAMIC_TABLE_SIZE)
+        if size != self.dynamic_table.max_size:
+            self.dynamic_table.resize(size)
+            self._pending_size_update = size
 
     def encode_headers(self, headers):
         """
@@ -186,35 +329,14 @@ class HPACKEncoder:
         :param headers: List of (name, value) tuples
         :return: Encoded header block bytes
         """
-        result = b""
+        parts = []
+        if self._pending_size_update is not None:
+            # Dynamic table size update (Section 6.3)
+            parts.append(encode_integer(self._pending_size_update, 5, 0x20))
+            self._pending_size_update = None
         for name, value in headers:
-            result += self._encode_header(name, value)
-        return result
-
-    def _find_in_dynamic_table(self, name, value):
-        """Search dynamic table for exact match or name match.
-        Returns (exact_index, name_index) where index is 1-based from static table end.
-        """
-        name_match = None
-        for i, (n, v) in enumerate(self.dynamic_table):
-            idx = len(STATIC_TABLE) + i
-            if n == name and v == value:
-                return idx, idx  # exact match
-            if n == name and name_match is None:
-                name_match = idx
-        return None, name_match
-
-    def _add_to_dynamic_table(self, name, value):
-        """Add a header to the dynamic table."""
-        entry_size = len(name) + len(value) + 32  # per RFC 7541 Section 4.1
-        # Evict entries if table would exceed max size
-        while self._dynamic_table_size + entry_size > self.MAX_DYNAMIC_TABLE_SIZE and self.dynamic_table:
-            evicted = self.dynamic_table.pop()
-            self._dynamic_table_size -= len(evicted[0]) + len(evicted[1]) + 32
-
-        if entry_size <= self.MAX_DYNAMIC_TABLE_SIZE:
-            self.dynamic_table.insert(0, (name, value))
-            self._dynamic_table_size += entry_size
+            parts.append(self._encode_header(name, value))
+        return b"".join(parts)
 
     def _encode_header(self, name, value):
         """Encode a single header field."""
@@ -227,9 +349,9 @@ class HPACKEncoder:
             return encode_integer(idx, 7, 0x80)
 
         # Check dynamic table for exact match → indexed
-        exact_idx, name_idx = self._find_in_dynamic_table(name_lower, value)
+        exact_idx, name_idx = self.dynamic_table.find(name_lower, value)
         if exact_idx is not None:
-            return encode_integer(exact_idx, 7, 0x80)
+            return encode_integer(len(STATIC_TABLE) + exact_idx, 7, 0x80)
 
         # Sensitive headers: literal without indexing (never indexed)
         if name_lower in ("authorization", "proxy-authorization", "cookie", "set-cookie"):
@@ -238,35 +360,60 @@ class HPACKEncoder:
                 result = encode_integer(idx, 4, 0x10)  # Never indexed
             else:
                 result = b"\x10"
-                result += encode_string(name_lower)
-            result += encode_string(value)
+                result += encode_string(name_lower, self._huffman)
+            result += encode_string(value, self._huffman)
             return result
 
         # Non-sensitive headers: literal with incremental indexing → adds to dynamic table
         if name_lower in _STATIC_NAME_INDEX:
             idx = _STATIC_NAME_INDEX[name_lower]
             result = encode_integer(idx, 6, 0x40)
-            result += encode_string(value)
+            result += encode_string(value, self._huffman)
         elif name_idx is not None:
-            result = encode_integer(name_idx, 6, 0x40)
-            result += encode_string(value)
+            result = encode_integer(len(STATIC_TABLE) + name_idx, 6, 0x40)
+            result += encode_string(value, self._huffman)
         else:
             result = b"\x40"  # 0100 0000, new name
-            result += encode_string(name_lower)
-            result += encode_string(value)
+            result += encode_string(name_lower, self._huffman)
+            result += encode_string(value, self._huffman)
 
-        self._add_to_dynamic_table(name_lower, value)
+        self.dynamic_table.add(name_lower, value)
         return result
 
 
 class HPACKDecoder:
     """
-    Simplified HPACK decoder.
-    Handles indexed headers and literal headers from static table.
+    HPACK decoder.
+    Handles indexed and literal header fields, dynamic table insertion and
+    eviction, and dynamic table size updates.
     """
 
-    def __init__(self):
-        self.dynamic_table = []
+    def __init__(self, max_table_size=DEFAULT_TABLE_SIZE):
+        """
+        :param max_table_size: SETTINGS_HEADER_TABLE_SIZE advertised to the
+            peer; size updates above it are rejected.
+        """
+        self.max_table_size = max_table_size
+        self.dynamic_table = DynamicTable(max_table_size)
+
+    def _lookup(self, index):
+        """Return the (name, value) at an HPACK index, or None if out of range."""
+        if 1 <= index < len(STATIC_TABLE):
+            return STATIC_TABLE[index]
+        return self.dynamic_table.get(index - len(STATIC_TABLE))
+
+    def _decode_literal(self, data, offset, prefix_bits):
+        """Decode a literal header field; returns ((name, value), new_offset)."""
+        index, offset = decode_integer(data, offset, prefix_bits)
+        entry = self._lookup(index) if index > 0 else None
+        if entry is not None:
+            name = entry[0]
+        else:
+            name, offset = decode_string(data, offset)
+            name = name.decode("utf-8") if isinstance(name, bytes) else name
+        value, offset = decode_string(data, offset)
+        value = value.decode("utf-8") if isinstance(value, bytes) else value
+        return (name, value), offset
 
     def decode_headers(self, data):
         """
@@ -284,42 +431,30 @@ class HPACKDecoder:
             if byte & 0x80:
                 # Indexed header field (Section 6.1)
                 index, offset = decode_integer(data, offset, 7)
-                if 1 <= index < len(STATIC_TABLE):
-                    name, value = STATIC_TABLE[index]
-                    headers.append((name, value))
-                elif index - len(STATIC_TABLE) < len(self.dynamic_table):
-                    headers.append(self.dynamic_table[index - len(STATIC_TABLE)])
+                entry = self._lookup(index)
+                if entry is not None:
+                    headers.append(entry)
                 else:
                     offset += 1  # skip invalid
 
             elif byte & 0x40:
                 # Literal with incremental indexing (Section 6.2.1)
-                index, offset = decode_integer(data, offset, 6)
-                if index > 0 and index < len(STATIC_TABLE):
-                    name = STATIC_TABLE[index][0]
-                else:
-                    name, offset = decode_string(data, offset)
-                    name = name.decode("utf-8") if isinstance(name, bytes) else name
-                value, offset = decode_string(data, offset)
-                value = value.decode("utf-8") if isinstance(value, bytes) else value
-                headers.append((name, value))
-                self.dynamic_table.insert(0, (name, value))
+                header, offset = self._decode_literal(data, offset, 6)
+                headers.append(header)
+                self.dynamic_table.add(*header)
 
             elif byte & 0x20:
                 # Dynamic table size update (Section 6.3)
-                _, offset = decode_integer(data, offset, 5)
+                size, offset = decode_integer(data, offset, 5)
+                if size > self.max_table_size:
+                    raise ValueError(
+                        f"HPACK table size update {size} exceeds the advertised {self.max_table_size}"
+                    )
+                self.dynamic_table.resize(size)
 
             else:
                 # Literal without indexing (Section 6.2.2) or never indexed (6.2.3)
-                prefix = 4 if (byte & 0xF0) == 0x00 else 4
-                index, offset = decode_integer(data, offset, prefix)
-                if index > 0 and index < len(STATIC_TABLE):
-                    name = STATIC_TABLE[index][0]
-                else:
-                    name, offset = decode_string(data, offset)
-                    name = name.decode("utf-8") if isinstance(name, bytes) else name
-                value, offset = decode_string(data, offset)
-                value = value.decode("utf-8") if isinstance(value, bytes) else value
-                headers.append((name, value))
+                header, offset = self._decode_literal(data, offset, 4)
+                headers.append(header)
 
         return headers
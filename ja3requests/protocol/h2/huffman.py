@@ -75,23 +75,73 @@ HUFFMAN_TABLE = [
     (0x3fffffff, 30),  # EOS
 ]
 
-# Build decode tree
-_DECODE_TREE = {}
+EOS = 256
 
+# Encoded length in bits of each symbol, for sizing without encoding
+_CODE_LENGTHS = [bit_len for _, bit_len in HUFFMAN_TABLE[:256]]
 
-def _build_decode_tree():
-    """Build a binary trie for Huffman decoding."""
-    for byte_val, (code, bit_len) in enumerate(HUFFMAN_TABLE[:256]):
-        node = _DECODE_TREE
-        for i in range(bit_len - 1, -1, -1):
-            bit = (code >> i) & 1
-            if bit not in node:
-                node[bit] = {}
-            node = node[bit]
-        node['value'] = byte_val
 
+def _build_decode_table():
+    """
+    Build the nibble-at-a-time decoding state machine.
+
+    States are the internal nodes of the Huffman code tree (state 0 is the
+    root). Feeding 4 bits to a state walks at most one complete code,
+    since the shortest code is 5 bits long, so each transition is
+    (next_state, symbol) with symbol -1 when none completed.
 
-_build_decode_tree()
+    :return: (transitions indexed by state << 4 | nibble, accepting states)
+    """
+    # children[node] = [child for bit 0, child for bit 1]; leaves are ~symbol
+    children = [[None, None]]
+    for symbol, (code, bit_len) in enumerate(HUFFMAN_TABLE):
+        node = 0
+        for shift in range(bit_len - 1, 0, -1):
+            bit = (code >> shift) & 1
+            if children[node][bit] is None:
+                children.append([None, None])
+                children[node][bit] = len(children) - 1
+            node = children[node][bit]
+        children[node][code & 1] = ~symbol
+
+    transitions = []
+    for state in range(len(children)):
+        for nibble in range(16):
+            node = state
+            symbol = -1
+            for shift in (3, 2, 1, 0):
+                child = children[node][(nibble >> shift) & 1]
+                if child < 0:
+                    symbol = ~child
+                    node = 0
+                else:
+                    node = child
+            transitions.append((node, symbol))
+
+    # Padding must be a prefix of EOS (all ones) shorter than 8 bits, so a
+    # string may end at the root or up to 7 one-bits below it
+    accepting = {0}
+    node = 0
+    for _ in range(7):
+        node = children[node][1]
+        accepting.add(node)
+
+    return tuple(transitions), frozenset(accepting)
+
+
+_DECODE_TRANSITIONS, _ACCEPTING_STATES = _build_decode_table()
+
+
+def huffman_encoded_length(data):
+    """
+    Length in bytes that ``data`` takes once Huffman-encoded.
+
+    :param data: bytes or str
+    :return: int
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return (sum(map(_CODE_LENGTHS.__getitem__, data)) + 7) >> 3
 
 
 def huffman_encode(data):
@@ -105,46 +155,44 @@ def huffman_encode(data):
         data = data.encode('utf-8')
 
     bits = 0
-    bits_left = 0
-    result = bytearray()
-
+    bit_count = 0
     for byte in data:
         code, bit_len = HUFFMAN_TABLE[byte]
         bits = (bits << bit_len) | code
-        bits_left += bit_len
-
-        while bits_left >= 8:
-            bits_left -= 8
-            result.append((bits >> bits_left) & 0xFF)
+        bit_count += bit_len
 
     # Pad with EOS prefix (all 1s)
-    if bits_left > 0:
-        bits = (bits << (8 - bits_left)) | ((1 << (8 - bits_left)) - 1)
-        result.append(bits & 0xFF)
-
-    return bytes(result)
+    padding = -bit_count % 8
+    bits = (bits << padding) | ((1 << padding) - 1)
+    return bits.to_bytes((bit_count + padding) >> 3, 'big')
 
 
 def huffman_decode(data):
     """
-    Decode Huffman-encoded bytes.
+    Decode Huffman-encoded bytes (RFC 7541 Section 5.2).
 
     :param data: Huffman-encoded bytes
     :return: Decoded bytes
+    :raises ValueError: on an EOS symbol, or padding that is longer than
+        7 bits or not all ones
     """
     result = bytearray()
-    node = _DECODE_TREE
+    append = result.append
+    transitions = _DECODE_TRANSITIONS
+    state = 0
 
     for byte in data:
-        for i in range(7, -1, -1):
-            bit = (byte >> i) & 1
-            if bit in node:
-                node = node[bit]
-                if 'value' in node:
-                    result.append(node['value'])
-                    node = _DECODE_TREE
-            else:
-                # Invalid Huffman sequence, likely padding
-                node = _DECODE_TREE
-
+        state, symbol = transitions[(state << 4) | (byte >> 4)]
+        if symbol >= 0:
+            if symbol == EOS:
+                raise ValueError("Huffman string contains EOS")
+            append(symbol)
+        state, symbol = transitions[(state << 4) | (byte & 0x0F)]
+        if symbol >= 0:
+            if symbol == EOS:
+                raise ValueError("Huffman string contains EOS")
+            append(symbol)
+
+    if state not in _ACCEPTING_STATES:
+        raise ValueError("Invalid Huffman padding")
     return bytes(result)
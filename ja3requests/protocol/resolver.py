@@ -0,0 +1,279 @@
+"""
+Ja3Requests.protocol.resolver
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Host name resolution for new connections.
+
+A Resolver turns a host and port into getaddrinfo() results. The
+CachingResolver wraps another resolver with an in-process cache of both
+answers and failures, collapses concurrent lookups of the same host into
+one, and can pin hosts to fixed addresses, so that opening a connection
+rarely waits on the system resolver.
+
+Caching is opt-in: a session looks every new connection's host up with
+the uncached SystemResolver unless it is given a CachingResolver, or one
+is installed for all sessions with set_default_resolver().
+"""
+
+import ipaddress
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+#: Seconds an answer is cached when the resolver gives no TTL
+DEFAULT_TTL = 10.0
+
+#: Seconds a failed lookup is cached
+DEFAULT_NEGATIVE_TTL = 2.0
+
+
+class Resolver(ABC):
+    """
+    Interface for host name resolvers.
+
+    Implement :meth:`resolve` to plug in another source of addresses, e.g.
+    a DNS-over-HTTPS client, and pass the resolver to ``Session(resolver=...)``.
+    """
+
+    @abstractmethod
+    def resolve(
+        self, host: str, port: int, family: int = socket.AF_UNSPEC, socktype: int = socket.SOCK_STREAM
+    ) -> Tuple[List[tuple], Optional[float]]:
+        """
+        Resolve host to addresses.
+        :param host: Host name
+        :param port: Port to put in each socket address
+        :param family: Address family, AF_UNSPEC for both
+        :param socktype: Socket type
+        :return: (getaddrinfo-style 5-tuples, TTL in seconds or None if unknown)
+        :raises socket.gaierror: If the name does not resolve
+        """
+        raise NotImplementedError("resolve method must be implemented by subclass.")
+
+    def getaddrinfo(self, host, port, family=socket.AF_UNSPEC, socktype=socket.SOCK_STREAM):
+        """
+        Resolve like socket.getaddrinfo().
+        :return: List of (family, type, proto, canonname, sockaddr)
+        """
+        return self.resolve(host, port, family, socktype)[0]
+
+
+class SystemResolver(Resolver):
+    """Resolver that calls socket.getaddrinfo(), which gives no TTL."""
+
+    def resolve(self, host, port, family=socket.AF_UNSPEC, socktype=socket.SOCK_STREAM):
+        return socket.getaddrinfo(host, port, family, socktype), None
+
+
+class _Lookup:
+    """One in-flight lookup that concurrent callers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.addresses = None
+        self.ttl = None
+        self.error = None
+
+
+class CachingResolver(Resolver):
+    """
+    Resolver with a TTL cache, single-flight lookups and a hosts map.
+
+    Usage::
+
+        resolver = CachingResolver(hosts={"api.internal": ["10.0.0.5"]})
+        session = Session(resolver=resolver)
+
+    Answers are cached for the TTL the wrapped resolver reports, clamped to
+    [min_ttl, max_ttl], or for ttl (DEFAULT_TTL, 10 seconds) when it reports
+    none, as socket.getaddrinfo() never does. Failures are cached
+    for negative_ttl. While a host is being looked up, other threads asking
+    for it wait for that lookup instead of starting their own. IP literals
+    and hosts in the hosts map never reach the wrapped resolver.
+    """
+
+    def __init__(
+        self,
+        resolver: Resolver = None,
+        ttl: float = DEFAULT_TTL,
+        negative_ttl: float = DEFAULT_NEGATIVE_TTL,
+        min_ttl: float = 0.0,
+        max_ttl: float = 3600.0,
+        hosts: Dict[str, Union[str, Iterable[str]]] = None,
+        max_size: int = 1024,
+    ):
+        """
+        :param resolver: Resolver to ask on a cache miss (default: SystemResolver)
+        :param ttl: Seconds to cache an answer that came without a TTL
+        :param negative_ttl: Seconds to cache a failed lookup; 0 disables negative caching
+        :param min_ttl: Lower bound for TTLs reported by the resolver
+        :param max_ttl: Upper bound for TTLs reported by the resolver
+        :param hosts: Static map of host name to an IP address or list of them
+        :param max_size: Maximum number of cached lookups
+        """
+        self.resolver = resolver if resolver is not None else SystemResolver()
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.max_size = max_size
+        self._hosts: Dict[str, List[str]] = {}
+        for host, addresses in (hosts or {}).items():
+            self.add_host(host, addresses)
+
+        self._cache = OrderedDict()  # key -> (expires, addresses, error)
+        self._inflight: Dict[tuple, _Lookup] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def add_host(self, host: str, addresses: Union[str, Iterable[str]]):
+        """
+        Pin host to fixed IP addresses, like an /etc/hosts entry.
+        :param host: Host name
+        :param addresses: An IP address or a list of them, tried in order
+        """
+        if isinstance(addresses, str):
+            addresses = [addresses]
+        addresses = list(addresses)
+        for address in addresses:
+            ipaddress.ip_address(address)  # ValueError for anything but an IP
+        self._hosts[host.lower()] = addresses
+
+    def remove_host(self, host: str):
+        """Remove a hosts map entry."""
+        self._hosts.pop(host.lower(), None)
+
+    def resolve(self, host, port, family=socket.AF_UNSPEC, socktype=socket.SOCK_STREAM):
+        name = host.lower().rstrip(".")
+        if name in self._hosts:
+            return _static_addresses(self._hosts[name], port, family, socktype), None
+        if _is_ip(host):
+            return socket.getaddrinfo(host, port, family, socktype, 0, socket.AI_NUMERICHOST), None
+
+        key = (name, port, family, socktype)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                expires, addresses, error = entry
+                if time.monotonic() < expires:
+                    self._cache.move_to_end(key)
+                    self._hits += 1
+                    if error is not None:
+                        raise error
+                    return list(addresses), max(0.0, expires - time.monotonic())
+                del self._cache[key]
+
+            lookup = self._inflight.get(key)
+            leader = lookup is None
+            if leader:
+                lookup = self._inflight[key] = _Lookup()
+                self._misses += 1
+            else:
+                self._hits += 1
+
+        if not leader:
+            lookup.done.wait()
+            if lookup.error is not None:
+                raise lookup.error
+            return list(lookup.addresses), lookup.ttl
+
+        try:
+            addresses, ttl = self.resolver.resolve(host, port, family, socktype)
+            lookup.addresses = addresses
+            lookup.ttl = self._clamp(ttl)
+            self._store(key, addresses, None, lookup.ttl)
+            return list(addresses), lookup.ttl
+        except socket.gaierror as e:
+            lookup.error = e
+            self._store(key, None, e, self.negative_ttl)
+            raise
+        except BaseException as e:
+            # Not a resolution failure (e.g. a timeout); waiters see it but it is not cached
+            lookup.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            lookup.done.set()
+
+    def _clamp(self, ttl):
+        if ttl is None:
+            return self.ttl
+        return min(max(ttl, self.min_ttl), self.max_ttl)
+
+    def _store(self, key, addresses, error, ttl):
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._cache[key] = (time.monotonic() + ttl, addresses, error)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached answer and failure."""
+        with self._lock:
+            self._cache.clear()
+
+    def get_stats(self) -> Dict:
+        """
+        Cache statistics.
+        :return: Dict with "size", "hits" (including callers that joined an
+            in-flight lookup) and "misses"
+        """
+        with self._lock:
+            return {"size": len(self._cache), "hits": self._hits, "misses": self._misses}
+
+    def __len__(self):
+        return len(self._cache)
+
+
+def _is_ip(host) -> bool:
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+def _static_addresses(addresses, port, family, socktype):
+    infos = []
+    for address in addresses:
+        if ipaddress.ip_address(address).version == 6:
+            if family not in (socket.AF_UNSPEC, socket.AF_INET6):
+                continue
+            infos.append((socket.AF_INET6, socktype, socket.IPPROTO_TCP, "", (address, port, 0, 0)))
+        elif family in (socket.AF_UNSPEC, socket.AF_INET):
+            infos.append((socket.AF_INET, socktype, socket.IPPROTO_TCP, "", (address, port)))
+    if not infos:
+        raise socket.gaierror(socket.EAI_NONAME, "No address of the requested family in the hosts map")
+    return infos
+
+
+_default_resolver: Optional[Resolver] = None
+_resolver_lock = threading.Lock()
+
+
+def get_default_resolver() -> Resolver:
+    """
+    Get the resolver sessions use when none is given: an uncached
+    SystemResolver, unless set_default_resolver() installed another
+    """
+    global _default_resolver  # pylint: disable=global-statement
+
+    with _resolver_lock:
+        if _default_resolver is None:
+            _default_resolver = SystemResolver()
+        return _default_resolver
+
+
+def set_default_resolver(resolver: Resolver):
+    """Set the resolver sessions use when none is given, e.g. a shared CachingResolver"""
+    global _default_resolver  # pylint: disable=global-statement
+
+    with _resolver_lock:
+        _default_resolver = resolver
@@ -6,8 +6,26 @@ Ja3Requests.protocol.sockets
 This module contains socket dependencies.
 """
 
+import os
+import selectors
 import socket
+import threading
+import time
+from collections import OrderedDict, deque
 from .exceptions import LocationParseError
+from .resolver import SystemResolver
+
+#: Seconds to wait for a connection attempt before racing the next address
+#: (the RFC 8305 "Connection Attempt Delay")
+CONNECTION_ATTEMPT_DELAY = 0.25
+
+#: Number of hosts whose last successful address family is remembered
+MAX_REMEMBERED_FAMILIES = 1024
+
+_system_resolver = SystemResolver()
+
+_families = OrderedDict()
+_families_lock = threading.Lock()
 
 
 def create_connection(
@@ -15,19 +33,28 @@ def create_connection(
     timeout=socket._GLOBAL_DEFAULT_TIMEOUT,
     source_address=None,
     socket_options=None,
+    attempt_delay=None,
+    resolver=None,
 ):
     """
-    Create a socket connection.
-    :param address:
+    Create a socket connection, racing the host's addresses (RFC 8305).
+
+    The getaddrinfo results are interleaved by address family, starting with
+    the family that last worked for this host. A new attempt starts every
+    attempt_delay seconds, or as soon as the previous one fails, while the
+    earlier ones keep running; the first to connect wins and the others are
+    closed. timeout applies to each attempt.
+    :param address: (host, port)
     :param timeout:
     :param source_address:
     :param socket_options:
+    :param attempt_delay: Seconds between attempts (default: CONNECTION_ATTEMPT_DELAY)
+    :param resolver: Resolver for host (default: socket.getaddrinfo, uncached)
     :return:
     """
     if socket_options is None:
         socket_options = [(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)]
 
-    err = None
     host, port = address
 
     family = allowed_gai_family()
@@ -37,31 +64,145 @@ def create_connection(
     except UnicodeError:
         raise LocationParseError(f"{host!r}, label empty or too long")
 
-    for res in socket.getaddrinfo(host, port, family, socket.SOCK_STREAM):
-        _family, _type, _proto, _canonname, _addr = res
-        sock = None
-        try:
-            sock = socket.socket(_family, _type, _proto)
+    if resolver is None:
+        resolver = _system_resolver
+    addresses = resolver.getaddrinfo(host, port, family, socket.SOCK_STREAM)
+    if not addresses:
+        raise socket.error("getaddrinfo returns an empty list")
+
+    if timeout is socket._GLOBAL_DEFAULT_TIMEOUT:
+        timeout = socket.getdefaulttimeout()
+    if attempt_delay is None:
+        attempt_delay = CONNECTION_ATTEMPT_DELAY
+
+    sock = _race(
+        _interleave(addresses, _remembered_family(host)),
+        timeout,
+        source_address,
+        socket_options,
+        attempt_delay,
+    )
+    _remember_family(host, sock.family)
+    return sock
+
+
+def _interleave(addresses, first_family=None):
+    """
+    Order getaddrinfo results by alternating address family, keeping the
+    resolver's order within each family. The first family is first_family
+    if present, else that of the first result.
+    """
+    by_family = OrderedDict()
+    for res in addresses:
+        by_family.setdefault(res[0], deque()).append(res)
+    if first_family in by_family:
+        by_family.move_to_end(first_family, last=False)
+
+    ordered = []
+    queues = list(by_family.values())
+    while queues:
+        for queue in queues:
+            ordered.append(queue.popleft())
+        queues = [queue for queue in queues if queue]
+    return ordered
+
+
+def _remembered_family(host):
+    with _families_lock:
+        return _families.get(host)
 
-            # If provided, set socket level options before connecting.
-            _set_socket_options(sock, socket_options)
 
-            if timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
-                sock.settimeout(timeout)
-            if source_address:
-                sock.bind(source_address)
+def _remember_family(host, family):
+    with _families_lock:
+        _families[host] = family
+        _families.move_to_end(host)
+        while len(_families) > MAX_REMEMBERED_FAMILIES:
+            _families.popitem(last=False)
+
+
+def _start_attempt(res, source_address, socket_options):
+    """
+    Start a non-blocking connect.
+    :return: (sock, connected); raises socket.error if the attempt failed at once
+    """
+    _family, _type, _proto, _canonname, _addr = res
+    sock = socket.socket(_family, _type, _proto)
+    try:
+        # If provided, set socket level options before connecting.
+        _set_socket_options(sock, socket_options)
+
+        if source_address:
+            sock.bind(source_address)
+        sock.setblocking(False)
+        try:
             sock.connect(_addr)
-            return sock
+        except BlockingIOError:
+            return sock, False
+        return sock, True
+    except socket.error:
+        sock.close()
+        raise
 
-        except socket.error as e:
-            err = e
-            if sock is not None:
+
+def _race(addresses, timeout, source_address, socket_options, attempt_delay):
+    """Connect to the first address that accepts, staggering the attempts."""
+    err = None
+    pending = deque(addresses)
+    attempts = {}  # sock -> deadline
+    selector = selectors.DefaultSelector()
+    next_start = time.monotonic()
+
+    try:
+        while pending or attempts:
+            now = time.monotonic()
+            if pending and now >= next_start:
+                try:
+                    sock, connected = _start_attempt(pending.popleft(), source_address, socket_options)
+                except socket.error as e:
+                    err = e
+                    continue
+                if connected:
+                    return _won(sock, timeout)
+                selector.register(sock, selectors.EVENT_WRITE)
+                attempts[sock] = None if timeout is None else now + timeout
+                next_start = now + attempt_delay
+                continue
+
+            wake = [deadline for deadline in attempts.values() if deadline is not None]
+            if pending:
+                wake.append(next_start)
+            wait = max(0.0, min(wake) - now) if wake else None
+
+            for key, _ in selector.select(wait):
+                sock = key.fileobj
+                selector.unregister(sock)
+                del attempts[sock]
+                error = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if error == 0:
+                    return _won(sock, timeout)
+                err = OSError(error, os.strerror(error))
                 sock.close()
+                # A failed attempt starts the next one right away
+                next_start = time.monotonic()
+
+            now = time.monotonic()
+            for sock, deadline in list(attempts.items()):
+                if deadline is not None and now >= deadline:
+                    selector.unregister(sock)
+                    del attempts[sock]
+                    sock.close()
+                    err = socket.timeout("timed out")
+    finally:
+        for sock in attempts:
+            sock.close()
+        selector.close()
+
+    raise err
 
-    if err is not None:
-        raise err
 
-    raise socket.error("getaddrinfo returns an empty list")
+def _won(sock, timeout):
+    sock.settimeout(timeout)
+    return sock
 
 
 def _set_socket_options(sock, options):
@@ -4,22 +4,24 @@
 This module provides a custom TLS 1.2/1.3 handshake implementation that supports
 both RSA and ECDHE key exchange, allowing JA3 fingerprint configuration.
 """
-import hashlib
 import hmac
 import os
 import struct
-import time
 import traceback
 
 from cryptography import x509
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 
-from ja3requests.exceptions import TLSEncryptionError, TLSHandshakeError, TLSKeyError
+from ja3requests.exceptions import (
+    TLSDecryptionError,
+    TLSEncryptionError,
+    TLSHandshakeError,
+    TLSKeyError,
+)
 from ja3requests.protocol.tls.layers import HandShake
 from ja3requests.protocol.tls.debug import debug, debug_hex
-from ja3requests.protocol.tls.layers.client_hello import ClientHello
+from ja3requests.protocol.tls.layers.client_hello import ClientHello, client_hello_template
 from ja3requests.protocol.tls.layers.server_hello import ServerHello
 from ja3requests.protocol.tls.layers.certificate import Certificate
 from ja3requests.protocol.tls.layers.server_key_exchange import ServerKeyExchange
@@ -32,11 +34,17 @@ from .crypto import (
     TLSCrypto,
     RSAKeyExchange,
     ECDHEKeyExchange,
-    AESCipher,
     get_cipher_info,
     is_gcm_cipher_suite,
 )
-from .certificate_verify import CertificateVerifier
+from .certificate_verify import (
+    CertificateVerificationError,
+    CertificateVerifier,
+    default_verification_cache,
+    verify_handshake_signature,
+)
+from .cipher_state import MAX_FRAGMENT_LENGTH, RECORD_HEADER, TLS12_VERSION, tls12_cipher_states
+from .record_layer import ReceiveBuffer
 
 # ECDHE Cipher Suite Constants
 # These cipher suites use Elliptic Curve Diffie-Hellman Ephemeral key exchange
@@ -55,6 +63,10 @@ ECDHE_CIPHER_SUITES = frozenset(
     }
 )
 
+# Operations yielded by the sans-IO handshake generator (TLS.handshake_steps)
+HANDSHAKE_SEND = "send"
+HANDSHAKE_RECV = "recv"
+
 
 class TLS:
     """TLS 1.2 handshake handler with support for custom JA3 fingerprints."""
@@ -73,18 +85,37 @@ class TLS:
         self._cipher_suites = None
         self._handshake_timeout = handshake_timeout
         self._session_cache = session_cache
+        self._key_share_pool = None  # KeySharePool from the TlsConfig
+        self._ca_certs = None  # CA bundle for certificate verification, None for the system one
+        self._verify_cert = False  # Abort the handshake unless the server's certificate is trusted
+        self._cert_verified = False
+        self._cert_error = None
         self._server_host = server_host
         self._server_port = server_port
         self._server_session_id = None  # session ID from ServerHello
+        self._resumption_entry = None  # cached TLS 1.2 session offered in the ClientHello
+        self._offered_session_id = None
+        self._session_ticket = None  # RFC 5077 ticket received in this handshake
+        self._resumed = False
         self._is_tls13 = False
         self._tls13_private_key = None
         self._tls13_key_share_group = None
+        self._tls13_psk = None  # PSK derived from the session ticket we offer
+        self._tls13_resumption_secret = None
+        self._tls13_cipher_suite = None
+        self._post_handshake_pending = b""  # Partial NewSessionTicket messages
+        self._server_handshake_types = []
         self._negotiated_protocol = None  # ALPN result (e.g., "h2", "http/1.1")
+        self._server_selected_version = None  # supported_versions from ServerHello
+        self._server_hello_done_received = False
+        # Raw bytes received after the handshake, shared by every reader of
+        # this connection so read-ahead survives across responses
+        self.receive_buffer = ReceiveBuffer()
 
-        # Sequence numbers for record layer encryption/decryption
-        # These are reset to 0 after ChangeCipherSpec
-        self._client_seq_num = 0  # For encrypting client -> server messages
-        self._server_seq_num = 0  # For decrypting server -> client messages
+        # TLS 1.2 record protection, one state per direction, created with
+        # the session keys; each holds its keyed cipher and sequence number
+        self._client_cipher_state = None  # Encrypts client -> server records
+        self._server_cipher_state = None  # Decrypts server -> client records
 
     @property
     def tls_version(self) -> bytes:
@@ -151,6 +182,9 @@ class TLS:
             else:
                 self._verify_cert = False  # Default to False for backward compatibility
 
+            self._key_share_pool = getattr(tls_config, 'key_share_pool', None)
+            self._ca_certs = getattr(tls_config, 'ca_certs', None)
+
             # Load client certificate if configured
             if getattr(tls_config, 'client_cert', None):
                 self._client_cert_pem = self._load_cert_data(tls_config.client_cert)
@@ -167,230 +201,448 @@ class TLS:
                 # TLS 1.3: ClientHello version must be 0x0303 (TLS 1.2) for compatibility
                 client_hello_version = b'\x03\x03'
 
-            # Merge TLS 1.3 extensions into custom extensions
-            extensions = list(getattr(tls_config, 'extensions', None) or [])
-            if is_tls13:
-                self._setup_tls13_extensions(extensions, tls_config)
-
-            self._body = ClientHello(
+            # Fixed parts of the ClientHello are compiled once per fingerprint
+            template = client_hello_template(
                 client_hello_version,
-                cipher_suites=self._cipher_suites,
-                client_random=self._client_random,
-                server_name=self._server_name,
+                self._cipher_suites,
                 supported_groups=self._supported_groups,
                 signature_algorithms=self._signature_algorithms,
                 alpn_protocols=getattr(tls_config, 'alpn_protocols', None),
                 use_grease=getattr(tls_config, 'use_grease', True),
-                _extensions=extensions,
+                extensions=getattr(tls_config, 'extensions', None),
+                tls13=is_tls13,
+            )
+            key_share = self._generate_tls13_key_share() if template.needs_key_share else None
+            session_ticket = self._offer_tls12_session(template.has_session_ticket)
+
+            self._body = template.build(
+                self._client_random,
+                self._offered_session_id,
+                server_name=self._server_name,
+                key_share=key_share,
+                session_ticket=session_ticket,
             )
 
             self._is_tls13 = is_tls13
 
-            # Set cached session ID for resumption
-            if self._session_cache is not None and self._server_host:
-                cached = self._session_cache.get(self._server_host, self._server_port or 443)
-                if cached:
-                    debug(f"Using cached session ID for {self._server_host}")
-                    self._body.session_id = cached.session_id
+            # Offer a TLS 1.3 session ticket last: its binder covers the whole ClientHello
+            if is_tls13:
+                self._offer_tls13_ticket()
+
+    @property
+    def resumed(self):
+        """True if the server resumed a cached session (no Certificate was sent)."""
+        return self._resumed
+
+    @property
+    def server_handshake_types(self):
+        """Types of the server's encrypted TLS 1.3 handshake messages, in order."""
+        return tuple(self._server_handshake_types)
+
+    def _offer_tls12_session(self, accepts_ticket):
+        """
+        Pick a cached TLS 1.2 session to offer in the ClientHello.
+
+        An RFC 5077 ticket goes into the session_ticket extension, if the
+        fingerprint has one, together with a fresh session ID which the
+        server echoes when it accepts the ticket (RFC 5077 Section 3.4).
+        Otherwise the cached session ID itself is offered.
+
+        :param accepts_ticket: Whether the ClientHello has a session_ticket extension
+        :return: The ticket to offer, or None
+        """
+        if self._session_cache is None or not self._server_host:
+            return None
+        cached = self._session_cache.get(self._server_host, self._server_port or 443)
+        if cached is None:
+            return None
+
+        if cached.ticket and accepts_ticket:
+            self._resumption_entry = cached
+            self._offered_session_id = os.urandom(32)
+            debug(f"Offering cached session ticket for {self._server_host}")
+            return cached.ticket
+
+        if cached.session_id:
+            self._resumption_entry = cached
+            self._offered_session_id = cached.session_id
+            debug(f"Using cached session ID for {self._server_host}")
+        return None
+
+    def _offer_tls13_ticket(self):
+        """
+        Add a pre_shared_key extension offering a cached TLS 1.3 session ticket.
+
+        The PSK is derived from the ticket's resumption master secret and
+        nonce, and its binder is an HMAC over the ClientHello truncated
+        before the binders list (RFC 8446 Section 4.2.11.2).
+        """
+        from ja3requests.protocol.tls.extensions import PreSharedKeyExtension  # pylint: disable=import-outside-toplevel
+        from ja3requests.protocol.tls.tls13 import (  # pylint: disable=import-outside-toplevel
+            TLS13_CIPHER_PARAMS,
+            TLS13KeySchedule,
+        )
+
+        if self._session_cache is None or not self._server_host:
+            return
+        ticket = self._session_cache.get_ticket(self._server_host, self._server_port or 443)
+        if ticket is None:
+            return
+        offered = {getattr(suite, 'value', suite) for suite in self._cipher_suites or [0x1301]}
+        if ticket.cipher_suite not in offered or ticket.cipher_suite not in TLS13_CIPHER_PARAMS:
+            return
+
+        schedule = TLS13KeySchedule(TLS13_CIPHER_PARAMS[ticket.cipher_suite][1])
+        psk = schedule.compute_resumption_psk(ticket.resumption_master_secret, ticket.nonce)
+        schedule.compute_early_secret(psk)
+
+        extension = PreSharedKeyExtension(
+            [(ticket.ticket, ticket.obfuscated_age())], [b"\x00" * schedule.hash_len]
+        )
+        self._body.set_pre_shared_key(extension)
+        truncated = self._body.handshake_message[:-extension.binders_length]
+        extension.binders = [schedule.compute_psk_binder(truncated)]
+        self._body.set_pre_shared_key(extension)
+
+        self._tls13_psk = psk
+        debug(f"TLS 1.3: Offering session ticket for {self._server_host}")
 
     def handshake(self):
         """
         Complete TLS handshake process.
         Automatically selects TLS 1.2 or 1.3 based on configuration.
+
+        Blocking driver for :meth:`handshake_steps` over ``self.conn``.
+
+        :return: True if the handshake completed, False if it failed
+        :raises TLSHandshakeError: If the server's handshake was rejected,
+            e.g. its certificate is not trusted
         """
         try:
-            # Initialize handshake message tracking
-            self._handshake_messages = b''
+            self.conn.settimeout(self._handshake_timeout if self._handshake_timeout is not None else 5.0)
+            steps = self.handshake_steps()
+            result = None
+            while True:
+                op, data = steps.send(result)
+                if op == HANDSHAKE_SEND:
+                    self.conn.sendall(data)
+                    result = None
+                else:
+                    result = self._recv_record()
 
-            # Step 1: Send Client Hello
-            client_hello = self.body
-            self._client_random = client_hello.random
-            debug("Sending Client Hello...")
-            self.conn.sendall(client_hello.message)
+        except StopIteration as stop:
+            return bool(stop.value)
+        except TLSHandshakeError:
+            raise
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            debug(f"TLS Handshake failed: {e}")
+            return False
+        finally:
+            self.conn.settimeout(None)
 
-            # Add Client Hello to handshake messages (without TLS record header)
-            self._handshake_messages += client_hello.handshake_message
+    def handshake_steps(self):
+        """
+        Sans-IO handshake state machine.
+
+        A generator that yields ``(HANDSHAKE_SEND, data)`` when ``data`` must be
+        written to the peer and ``(HANDSHAKE_RECV, None)`` when it needs the next
+        TLS record, which the driver sends back as a
+        ``(record_type, header, payload)`` tuple (or None on EOF).
+        The generator returns True once the handshake completed; protocol
+        errors are raised.
+        """
+        # Initialize handshake message tracking
+        self._handshake_messages = b''
 
-            if self._is_tls13:
-                return self._handshake_tls13()
+        # Step 1: Send Client Hello
+        client_hello = self.body
+        self._client_random = client_hello.random
+        debug("Sending Client Hello...")
+        yield HANDSHAKE_SEND, client_hello.message
 
-            return self._handshake_tls12()
+        # Add Client Hello to handshake messages (without TLS record header)
+        self._handshake_messages += client_hello.handshake_message
 
-        except Exception as e:  # pylint: disable=broad-exception-caught
-            debug(f"TLS Handshake failed: {e}")
-            return False
+        if self._is_tls13:
+            completed = yield from self._handshake_tls13()
+        else:
+            completed = yield from self._handshake_tls12()
 
-    def _handshake_tls13(self):
+        if completed and self._session_cache is not None and self._server_host:
+            self._session_cache.record_handshake(
+                self._server_host,
+                self._server_port or 443,
+                self._resumption_entry is not None or self._tls13_psk is not None,
+                self._resumed,
+            )
+        return completed
+
+    def _recv_record(self):
+        """
+        Read one complete TLS record from ``self.conn``.
+
+        Reads go through ``self.receive_buffer``, so one recv_into can bring
+        in several records; those not yet needed, including any that arrive
+        right after the handshake, stay buffered for the next reader.
+        """
+        buffer = self.receive_buffer
+        while True:
+            buffered = len(buffer)
+            if buffered >= 5:
+                with buffer.view(5) as view:
+                    header = view.tobytes()
+                length = int.from_bytes(header[3:5], 'big')
+                if buffered >= 5 + length:
+                    break
+            if not buffer.fill(self.conn):
+                return None
+        buffer.consume(5)
+        return header[0], header, buffer.read(length)
+
+    @staticmethod
+    def _raise_for_alert(record_data):
+        """Raise ConnectionError for a fatal plaintext alert record."""
+        if len(record_data) >= 2:
+            alert_level = record_data[0]
+            alert_description = record_data[1]
+            debug(f"Received TLS Alert: level={alert_level}, description={alert_description}")
+            if alert_level == 2:  # Fatal alert
+                raise ConnectionError(f"TLS Fatal Alert: {alert_description}")
+
+    def _handshake_tls13(self):  # pylint: disable=too-many-branches
         """
         TLS 1.3 handshake flow after ClientHello is sent.
         Uses TLS13Handshake to manage key derivation and encrypted messages.
         """
         from ja3requests.protocol.tls.tls13 import TLS13Handshake  # pylint: disable=import-outside-toplevel
 
-        try:
-            # Receive ServerHello (unencrypted)
-            self.conn.settimeout(self._handshake_timeout if self._handshake_timeout is not None else 5.0)
-            buffer = b""
-            server_hello_msg = None
+        # Receive ServerHello (unencrypted)
+        record = yield HANDSHAKE_RECV, None
+        if record is None:
+            debug("TLS 1.3: No ServerHello received")
+            return False
 
-            # Read until we get a complete ServerHello
-            while True:
-                data = self.conn.recv(4096)
-                if not data:
-                    break
-                buffer += data
-
-                # Parse TLS records
-                if len(buffer) >= 5:
-                    record_type = buffer[0]
-                    record_length = struct.unpack("!H", buffer[3:5])[0]
-                    if len(buffer) >= 5 + record_length:
-                        if record_type == 22:  # Handshake
-                            record_data = buffer[5:5 + record_length]
-                            if record_data[0] == 2:  # ServerHello
-                                msg_len = struct.unpack("!I", b"\x00" + record_data[1:4])[0]
-                                server_hello_msg = record_data[4:4 + msg_len]
-                                # Also parse with our existing method for cipher suite etc.
-                                self._parse_server_hello(server_hello_msg)
-                                self._handshake_messages += record_data
-                        break
-
-            if server_hello_msg is None:
-                debug("TLS 1.3: No ServerHello received")
-                return False
+        record_type, _, record_data = record
+        if record_type == 21:  # Alert
+            self._raise_for_alert(record_data)
+        if record_type != 22 or len(record_data) < 4 or record_data[0] != 2:
+            debug("TLS 1.3: No ServerHello received")
+            return False
 
-            # Initialize TLS 1.3 handshake handler
-            hs = TLS13Handshake(
-                self.conn,
-                self._tls13_private_key,
-                self._tls13_key_share_group,
-                self._handshake_messages,
-            )
+        msg_len = struct.unpack("!I", b"\x00" + record_data[1:4])[0]
+        server_hello = record_data[:4 + msg_len]
+        self._parse_server_hello(server_hello[4:])
+
+        if self._server_selected_version != 0x0304:
+            # Server chose TLS 1.2: continue with the TLS 1.2 flow on the same record
+            debug("TLS 1.3: Server negotiated TLS 1.2, falling back")
+            self._is_tls13 = False
+            return (yield from self._handshake_tls12(record_data))
+
+        # Initialize TLS 1.3 handshake handler
+        hs = TLS13Handshake(
+            None,
+            self._tls13_private_key,
+            self._tls13_key_share_group,
+            self._handshake_messages,
+            psk=self._tls13_psk,
+        )
 
-            if not hs.process_server_hello(server_hello_msg):
-                debug("TLS 1.3: Failed to process ServerHello")
+        if not hs.process_server_hello(server_hello):
+            debug("TLS 1.3: Failed to process ServerHello")
+            return False
+        self._handshake_messages += server_hello
+        self._resumed = hs.psk_accepted
+
+        # Read and decrypt encrypted handshake messages
+        # (EncryptedExtensions, Certificate, CertificateVerify, Finished)
+        pending = b""
+        server_finished_received = False
+        # A resumed session was authenticated by the handshake that issued its ticket
+        authenticated = hs.psk_accepted
+        while not server_finished_received:
+            record = yield HANDSHAKE_RECV, None
+            if record is None:
+                debug("TLS 1.3: Server Finished not received")
                 return False
 
-            # Read and decrypt encrypted handshake messages
-            # (EncryptedExtensions, Certificate, CertificateVerify, Finished)
-            server_finished_received = False
-            while not server_finished_received:
-                data = self.conn.recv(4096)
-                if not data:
+            record_type, record_header, ciphertext = record
+            if record_type == 20:  # ChangeCipherSpec (compatibility)
+                continue
+            if record_type == 21:
+                self._raise_for_alert(ciphertext)
+                continue
+            if record_type != 0x17:  # Application data (encrypted handshake)
+                continue
+
+            content_type, plaintext = hs.decrypt_handshake_record(ciphertext, record_header)
+            if content_type == 0x15:
+                self._raise_for_alert(plaintext)
+            if content_type != 0x16:  # Handshake
+                continue
+
+            # Handshake messages may span records
+            pending += plaintext
+            offset = 0
+            while offset + 4 <= len(pending):
+                msg_type = pending[offset]
+                msg_len = struct.unpack("!I", b"\x00" + pending[offset + 1:offset + 4])[0]
+                if offset + 4 + msg_len > len(pending):
                     break
-                buffer = data
-
-                # Parse TLS records from buffer
-                offset = 0
-                while offset + 5 <= len(buffer):
-                    rec_type = buffer[offset]
-                    rec_len = struct.unpack("!H", buffer[offset + 3:offset + 5])[0]
-                    if offset + 5 + rec_len > len(buffer):
-                        break
-
-                    record_header = buffer[offset:offset + 5]
-                    ciphertext = buffer[offset + 5:offset + 5 + rec_len]
-                    offset += 5 + rec_len
-
-                    if rec_type == 20:  # ChangeCipherSpec (compatibility)
-                        continue
-
-                    if rec_type == 0x17:  # Application data (encrypted handshake)
-                        content_type, plaintext = hs.decrypt_handshake_record(
-                            ciphertext, record_header
-                        )
-                        if content_type == 0x16:  # Handshake
-                            messages = hs.parse_encrypted_handshake(plaintext)
-                            for msg_type, msg_data in messages:
-                                if msg_type == 20:  # Finished
-                                    server_finished_received = True
-
-            if not server_finished_received:
-                debug("TLS 1.3: Server Finished not received")
-                return False
+                debug(f"TLS 1.3: Parsed handshake message type={msg_type} len={msg_len}")
+                self._server_handshake_types.append(msg_type)
+                body = pending[offset + 4:offset + 4 + msg_len]
+                # The transcript ends with pending, so this message starts trailing bytes before its end
+                trailing = len(pending) - offset
+                offset += 4 + msg_len
+                if msg_type == 11:  # Certificate
+                    self._certificate_data = hs.certificate_list(body)
+                    if self._verify_cert:
+                        self._verify_server_certificate(self._certificate_data)
+                elif msg_type == 15 and self._verify_cert:  # CertificateVerify
+                    self._verify_certificate_verify(hs, body, trailing)
+                    authenticated = True
+                elif msg_type == 20:  # Finished
+                    if not hs.verify_server_finished(body, trailing):
+                        raise TLSHandshakeError("TLS 1.3: Server Finished verification failed")
+                    if self._verify_cert and not authenticated:
+                        raise TLSHandshakeError("TLS 1.3: Server did not prove it holds a trusted certificate")
+                    server_finished_received = True
+            pending = pending[offset:]
+
+        # Send client Finished
+        yield HANDSHAKE_SEND, hs.build_client_finished()
+
+        # Derive application traffic keys
+        client_rp, server_rp = hs.derive_application_keys()
+
+        # Store for use by HttpsSocket
+        self._tls13_client_rp = client_rp
+        self._tls13_server_rp = server_rp
+        self._tls13_handshake = hs
+        self._tls13_cipher_suite = hs.cipher_suite
+        self._tls13_resumption_secret = hs.resumption_master_secret()
+
+        debug("✅ TLS 1.3 handshake completed successfully!")
+        self._save_session_to_cache()
+        return True
+
+    def _verify_certificate_verify(self, hs, body, trailing):
+        """
+        Check the TLS 1.3 CertificateVerify signature with the verified certificate's key.
 
-            # Send client Finished
-            finished_record = hs.build_client_finished()
-            self.conn.sendall(finished_record)
+        :param hs: TLS13Handshake of this connection
+        :param body: CertificateVerify body: SignatureScheme and signature
+        :param trailing: Transcript bytes from the start of CertificateVerify on
+        :raises TLSHandshakeError: If no certificate was verified or the signature does not verify
+        """
+        if not self._cert_verified or len(body) < 4:
+            raise TLSHandshakeError("TLS 1.3: CertificateVerify without a verified certificate")
+        scheme, signature_length = struct.unpack("!HH", body[:4])
+        try:
+            verify_handshake_signature(
+                self._leaf_certificate(),
+                scheme,
+                body[4:4 + signature_length],
+                hs.certificate_verify_content(trailing),
+                tls13=True,
+            )
+        except CertificateVerificationError as e:
+            raise TLSHandshakeError(f"TLS 1.3: CertificateVerify failed: {e}") from e
 
-            # Derive application traffic keys
-            client_rp, server_rp = hs.derive_application_keys()
+    def _handshake_tls12(self, first_record=None):
+        """TLS 1.2 handshake flow after ClientHello is sent."""
+        # Step 2-6: Receive server handshake messages
+        pending = yield from self._parse_server_handshake_messages(first_record)
+        if self._resumed:
+            return (yield from self._handshake_tls12_abbreviated(pending))
 
-            # Store for use by HttpsSocket
-            self._tls13_client_rp = client_rp
-            self._tls13_server_rp = server_rp
-            self._tls13_handshake = hs
+        # Step 7-9: Send client finishing messages
+        yield from self._send_client_finishing_messages()
 
-            debug("✅ TLS 1.3 handshake completed successfully!")
-            self._save_session_to_cache()
-            self.conn.settimeout(None)
-            return True
+        # Step 10: Wait for server's response to our Finished message
+        success = yield from self._wait_for_server_handshake_completion()
+        if not success:
+            raise TLSHandshakeError("Server did not complete handshake")
 
-        except Exception as e:  # pylint: disable=broad-exception-caught
-            debug(f"TLS 1.3 handshake failed: {e}")
-            traceback.print_exc()
-            return False
-        finally:
-            self.conn.settimeout(None)
+        debug("✅ Full TLS 1.2 handshake completed successfully!")
+        self._save_session_to_cache()
+        return True
 
-    def _handshake_tls12(self):
-        """TLS 1.2 handshake flow after ClientHello is sent."""
-        try:
-            # Step 2-6: Receive server handshake messages
-            self._parse_server_handshake_messages()
-
-            # Step 7-9: Send client finishing messages
-            self._send_client_finishing_messages()
-
-            # Step 10: Wait for server's response to our Finished message
-            try:
-                time.sleep(0.3)
-                self.conn.settimeout(self._handshake_timeout if self._handshake_timeout is not None else 5.0)
-                success = self._wait_for_server_handshake_completion()
-                if success:
-                    debug("✅ Full TLS 1.2 handshake completed successfully!")
-                    self._save_session_to_cache()
-                    self.conn.settimeout(None)
-                    return True
-                raise TLSHandshakeError("Server did not complete handshake")
-            finally:
-                self.conn.settimeout(None)
+    def _handshake_tls12_abbreviated(self, pending):
+        """
+        Abbreviated TLS 1.2 handshake (RFC 5246 Section 7.3, RFC 5077 Section 3.1).
 
-        except Exception as e:  # pylint: disable=broad-exception-caught
-            debug(f"TLS 1.2 Handshake failed: {e}")
-            return False
+        The server echoed our session ID, so keys come from the cached master
+        secret: it sends [NewSessionTicket], ChangeCipherSpec and Finished
+        right after its ServerHello, and the client answers with its own
+        ChangeCipherSpec and Finished. No certificate or key exchange is sent.
+
+        :param pending: Handshake bytes that followed the ServerHello in its record
+        """
+        self._master_secret = self._resumption_entry.master_secret
+        self._generate_session_keys()
+
+        received_change_cipher_spec = False
+        while True:
+            # Handshake messages before the server's ChangeCipherSpec (NewSessionTicket)
+            while len(pending) >= 4:
+                msg_len = struct.unpack("!I", b"\x00" + pending[1:4])[0]
+                if 4 + msg_len > len(pending):
+                    break
+                msg, pending = pending[:4 + msg_len], pending[4 + msg_len:]
+                self._handshake_messages += msg
+                if msg[0] == 4:
+                    self._parse_new_session_ticket(msg[4:])
+
+            record = yield HANDSHAKE_RECV, None
+            if record is None:
+                raise TLSHandshakeError("Connection closed during abbreviated handshake")
+
+            record_type, record_header, record_data = record
+            if record_type == 21:
+                self._raise_for_alert(record_data)
+            elif record_type == 20:
+                received_change_cipher_spec = True
+            elif record_type == 22 and not received_change_cipher_spec:
+                pending += record_data
+            elif record_type == 22:
+                _, finished = self.decrypt_record(record_type, record_header, record_data)
+                break
 
-    def _setup_tls13_extensions(self, extensions, tls_config):
-        """Add TLS 1.3-specific extensions and generate key_share."""
-        from ja3requests.protocol.tls.extensions import (  # pylint: disable=import-outside-toplevel
-            SupportedVersionsExtension,
-            KeyShareExtension,
-            PSKKeyExchangeModesExtension,
+        expected = TLSCrypto.compute_verify_data(
+            self._master_secret, self._handshake_messages, is_client=False
         )
-        from ja3requests.protocol.tls.tls13 import TLS13KeyExchange  # pylint: disable=import-outside-toplevel
+        if finished[:1] != b"\x14" or not hmac.compare_digest(finished[4:], expected):
+            raise TLSHandshakeError("Server Finished verification failed on resumption")
+        self._handshake_messages += finished
+
+        # The client's ChangeCipherSpec and Finished complete the handshake
+        yield HANDSHAKE_SEND, b'\x14\x03\x03\x00\x01\x01' + self._build_finished_message()
 
-        existing_types = {ext.extension_type for ext in extensions if hasattr(ext, 'extension_type')}
+        debug("✅ Abbreviated TLS 1.2 handshake completed successfully!")
+        return True
 
-        # supported_versions: advertise TLS 1.3 + 1.2
-        if SupportedVersionsExtension.extension_type not in existing_types:
-            extensions.append(SupportedVersionsExtension([0x0304, 0x0303]))
+    def _generate_tls13_key_share(self):
+        """Generate this connection's ECDHE key pair and return its key_share extension."""
+        from ja3requests.protocol.tls.extensions import KeyShareExtension  # pylint: disable=import-outside-toplevel
 
-        # key_share: generate ECDHE key pair and include public key
-        if KeyShareExtension.extension_type not in existing_types:
-            # Default to x25519 (most widely supported for TLS 1.3)
-            private_key, public_bytes = TLS13KeyExchange.generate_x25519_keypair()
-            self._tls13_private_key = private_key
-            self._tls13_key_share_group = 0x001D  # x25519
-            extensions.append(KeyShareExtension([(0x001D, public_bytes)]))
+        # Default to x25519 (most widely supported for TLS 1.3)
+        private_key, public_bytes = self._generate_keypair(0x001D)
+        self._tls13_private_key = private_key
+        self._tls13_key_share_group = 0x001D  # x25519
+        return KeyShareExtension([(0x001D, public_bytes)])
 
-        # psk_key_exchange_modes (required even without PSK for some servers)
-        if PSKKeyExchangeModesExtension.extension_type not in existing_types:
-            extensions.append(PSKKeyExchangeModesExtension([1]))  # psk_dhe_ke
+    def _generate_keypair(self, group):
+        """Ephemeral ECDHE key pair for a named group, from the key share pool if one is set."""
+        if self._key_share_pool is not None:
+            return self._key_share_pool.take(group)
+        return ECDHEKeyExchange.generate_keypair(group)
 
     def _save_session_to_cache(self):
         """Save the current session to the session cache for future resumption."""
         if (self._session_cache is not None and self._server_host
-                and self._server_session_id and self._master_secret):
+                and (self._server_session_id or self._session_ticket) and self._master_secret):
             cipher = getattr(self, '_selected_cipher_suite', 0)
             self._session_cache.put(
                 self._server_host,
@@ -399,6 +651,7 @@ class TLS:
                 self._master_secret,
                 cipher,
                 tls_version=self._tls_version,
+                ticket=self._session_ticket,
             )
             debug(f"Saved TLS session for {self._server_host}:{self._server_port}")
 
@@ -415,112 +668,108 @@ class TLS:
             return
         ticket = data[6:6 + ticket_len]
         debug(f"Received NewSessionTicket: lifetime={lifetime}s, ticket_len={ticket_len}")
+        if not ticket:
+            return  # The server will not resume this session after all
+        self._session_ticket = ticket
 
-        # Store ticket as session ID for resumption
         if self._session_cache is not None and self._server_host and self._master_secret:
             cipher = getattr(self, '_selected_cipher_suite', 0)
             self._session_cache.put(
                 self._server_host,
                 self._server_port or 443,
-                ticket,  # Use ticket as session ID
+                self._server_session_id,
                 self._master_secret,
                 cipher,
                 tls_version=self._tls_version,
+                ticket=ticket,
             )
             debug(f"Cached session ticket for {self._server_host}")
 
-    def _parse_server_handshake_messages(
-        self,
-    ):  # pylint: disable=too-many-branches,too-many-statements,too-many-nested-blocks
+    def _process_post_handshake(self, plaintext):
         """
-        Parse incoming server handshake messages with improved error handling
+        Handle TLS 1.3 post-handshake messages, caching NewSessionTickets.
+
+        struct {
+            uint32 ticket_lifetime;
+            uint32 ticket_age_add;
+            opaque ticket_nonce<0..255>;
+            opaque ticket<1..2^16-1>;
+            Extension extensions<0..2^16-2>;
+        } NewSessionTicket;
         """
-        buffer = b""
-        _received_messages = set()
-        timeout_count = 0
-        max_timeout = 10
+        from ja3requests.protocol.tls.session_cache import TLS13Ticket  # pylint: disable=import-outside-toplevel
 
-        # Set socket timeout for receiving
-        recv_timeout = min(self._handshake_timeout, 5.0) if self._handshake_timeout is not None else 1.0
-        self.conn.settimeout(recv_timeout)
+        data = self._post_handshake_pending + plaintext
+        offset = 0
+        while offset + 4 <= len(data):
+            msg_type = data[offset]
+            msg_len = struct.unpack("!I", b"\x00" + data[offset + 1:offset + 4])[0]
+            if offset + 4 + msg_len > len(data):
+                break
+            body = data[offset + 4:offset + 4 + msg_len]
+            offset += 4 + msg_len
+            if msg_type != 4 or len(body) < 9:
+                continue  # KeyUpdate and friends are not supported
+
+            lifetime, age_add = struct.unpack("!II", body[:8])
+            nonce_end = 9 + body[8]
+            nonce = body[9:nonce_end]
+            if nonce_end + 2 > len(body):
+                continue
+            ticket_len = struct.unpack("!H", body[nonce_end:nonce_end + 2])[0]
+            ticket = body[nonce_end + 2:nonce_end + 2 + ticket_len]
+            debug(f"TLS 1.3: NewSessionTicket lifetime={lifetime}s, ticket_len={ticket_len}")
+
+            if (self._session_cache is not None and self._server_host
+                    and self._tls13_resumption_secret and len(ticket) == ticket_len):
+                self._session_cache.put_ticket(
+                    self._server_host,
+                    self._server_port or 443,
+                    TLS13Ticket(
+                        ticket, nonce, lifetime, age_add,
+                        self._tls13_resumption_secret, self._tls13_cipher_suite,
+                    ),
+                )
+        self._post_handshake_pending = data[offset:]
 
-        while True:
-            try:
-                # Receive data
-                data = self.conn.recv(4096)
-                if not data:
-                    timeout_count += 1
-                    if timeout_count >= max_timeout:
-                        debug("Timeout waiting for server handshake messages")
-                        break
-                    continue
-
-                timeout_count = 0  # Reset timeout counter
-                buffer += data
-                debug(f"Received {len(data)} bytes from server")
-                debug(f"Buffer now has {len(buffer)} bytes: {buffer[:50].hex()}...")
-
-                # Parse TLS records from buffer
-                while len(buffer) >= 5:  # Minimum TLS record header size
-                    record_type = buffer[0]
-                    _tls_version = buffer[1:3]
-
-                    # Ensure we have enough bytes for length
-                    if len(buffer) < 5:
-                        break
-
-                    record_length = struct.unpack("!H", buffer[3:5])[0]
-
-                    if len(buffer) < 5 + record_length:
-                        # Need more data
-                        break
-
-                    record_data = buffer[5 : 5 + record_length]
-                    buffer = buffer[5 + record_length :]
-
-                    debug(
-                        f"Processing TLS record: type={record_type}, length={record_length}"
-                    )
+    def _parse_server_handshake_messages(self, first_record=None):
+        """
+        Receive server handshake records until ServerHelloDone.
 
-                    if record_type == 22:  # Handshake message
-                        self._process_handshake_record(record_data)
-                    elif record_type == 21:  # Alert
-                        if len(record_data) >= 2:
-                            alert_level = record_data[0]
-                            alert_description = record_data[1]
-                            debug(
-                                f"Received TLS Alert: level={alert_level}, description={alert_description}"
-                            )
-                            if alert_level == 2:  # Fatal alert
-                                raise ConnectionError(
-                                    f"TLS Fatal Alert: {alert_description}"
-                                )
-
-                    # Check if we've received all expected messages
-                    if (
-                        hasattr(self, '_server_hello_done_received')
-                        and self._server_hello_done_received
-                    ):
-                        debug("Received ServerHelloDone, handshake messages complete")
-                        self.conn.settimeout(None)  # Reset timeout
-                        return
-
-            except Exception as e:  # pylint: disable=broad-exception-caught
-                if "timed out" in str(e):
-                    timeout_count += 1
-                    if timeout_count >= max_timeout:
-                        debug("Timeout waiting for server handshake messages")
-                        break
-                    continue
-                debug(f"Error parsing server messages: {e}")
-                self.conn.settimeout(None)  # Reset timeout
-                raise
-
-        self.conn.settimeout(None)  # Reset timeout
+        Handshake messages may be fragmented across records, so any incomplete
+        trailing message is carried over into the next record.
+
+        :param first_record: Handshake record payload already read by the caller
+        """
+        self._server_hello_done_received = False
+        pending = b""
+        if first_record is not None:
+            pending = self._process_handshake_record(first_record)
+
+        while not self._server_hello_done_received and not self._resumed:
+            record = yield HANDSHAKE_RECV, None
+            if record is None:
+                raise TLSHandshakeError("Connection closed while waiting for server handshake messages")
+
+            record_type, _, record_data = record
+            debug(f"Processing TLS record: type={record_type}, length={len(record_data)}")
+
+            if record_type == 22:  # Handshake message
+                pending = self._process_handshake_record(pending + record_data)
+            elif record_type == 21:  # Alert
+                self._raise_for_alert(record_data)
+
+        if self._resumed:
+            debug("Server resumed the cached session")
+            return pending
+        debug("Received ServerHelloDone, handshake messages complete")
+        return b""
 
     def _process_handshake_record(self, record_data):
         """
-        Process handshake messages within a TLS record
+        Process handshake messages within a TLS record.
+
+        :return: Trailing bytes of an incomplete message, to be prefixed to the next record
         """
         offset = 0
         while offset < len(record_data):
@@ -552,6 +801,8 @@ class TLS:
             if msg_type == 2:  # ServerHello
                 self._parse_server_hello(msg_data)
                 debug("Received Server Hello")
+                if self._resumed:
+                    return record_data[offset + 4 + msg_length:]
             elif msg_type == 11:  # Certificate
                 self._parse_certificate(msg_data)
                 debug("Received Certificate")
@@ -565,10 +816,12 @@ class TLS:
                 self._parse_server_hello_done(msg_data)
                 debug("Received Server Hello Done")
                 self._server_hello_done_received = True
-                return
+                return record_data[offset + 4 + msg_length:]
 
             offset += 4 + msg_length
 
+        return record_data[offset:]
+
     def _parse_server_hello(self, data):
         """Parse ServerHello message"""
         if len(data) < 38:  # Minimum size for ServerHello
@@ -626,6 +879,10 @@ class TLS:
                 ext_data = data[offset:offset + ext_len]
                 offset += ext_len
 
+                # supported_versions (0x002B): TLS 1.3 negotiation
+                if ext_type == 0x002B and len(ext_data) == 2:
+                    self._server_selected_version = struct.unpack("!H", ext_data)[0]
+
                 # ALPN (0x0010): extract negotiated protocol
                 if ext_type == 0x0010 and len(ext_data) >= 4:
                     proto_list_len = struct.unpack("!H", ext_data[:2])[0]
@@ -634,16 +891,24 @@ class TLS:
                         self._negotiated_protocol = ext_data[3:3 + proto_len].decode("ascii")
                         debug(f"ALPN negotiated: {self._negotiated_protocol}")
 
+        # TLS 1.2: an echoed session ID means the offered session is resumed
+        # (TLS 1.3 servers always echo legacy_session_id)
+        if (self._offered_session_id and self._server_session_id == self._offered_session_id
+                and self._server_selected_version != 0x0304):
+            if getattr(self, '_selected_cipher_suite', None) != self._resumption_entry.cipher_suite:
+                raise TLSHandshakeError("Server resumed a session with a different cipher suite")
+            self._resumed = True
+
     def _parse_certificate(self, data):
         """Parse Certificate message, verify certificate, and extract server public key"""
-        try:
-            # Store raw certificate data for verification
-            self._certificate_data = data
+        # Store raw certificate data for verification
+        self._certificate_data = data
 
-            # Verify certificate if verification is enabled
-            if getattr(self, '_verify_cert', True):
-                self._verify_server_certificate(data)
+        # Verify certificate if verification is enabled; failure aborts the handshake
+        if self._verify_cert:
+            self._verify_server_certificate(data)
 
+        try:
             # Extract server's public key from certificate
             self._server_public_key = self._extract_server_public_key(data)
 
@@ -668,6 +933,8 @@ class TLS:
             ecdhe_params = ECDHEKeyExchange.parse_server_ecdhe_params(data)
 
             if ecdhe_params:
+                if self._verify_cert:
+                    self._verify_server_key_exchange(data)
                 self._ecdhe_curve_id = ecdhe_params['curve_id']
                 self._ecdhe_server_pubkey = ecdhe_params['public_key']
                 debug(f"ECDHE key exchange: curve_id={self._ecdhe_curve_id}")
@@ -681,6 +948,24 @@ class TLS:
             self._key_exchange_type = 'RSA'
             debug(f"RSA key exchange for cipher suite 0x{cipher_suite:04X}")
 
+    def _verify_server_key_exchange(self, data):
+        """
+        Check that the ECDHE parameters were signed with the verified certificate's key.
+
+        :param data: ServerKeyExchange body: the parameters, then SignatureScheme and signature
+        :raises TLSHandshakeError: If the signature is missing or does not verify
+        """
+        params_length = 4 + data[3]
+        if len(data) < params_length + 4 or not self._cert_verified:
+            raise TLSHandshakeError("ServerKeyExchange is not signed by a verified certificate")
+        scheme, signature_length = struct.unpack("!HH", data[params_length:params_length + 4])
+        signature = data[params_length + 4:params_length + 4 + signature_length]
+        content = self._client_random + self._server_random + data[:params_length]
+        try:
+            verify_handshake_signature(self._leaf_certificate(), scheme, signature, content)
+        except CertificateVerificationError as e:
+            raise TLSHandshakeError(f"ServerKeyExchange signature verification failed: {e}") from e
+
     def _parse_certificate_request(self, data):
         """
         Parse CertificateRequest message.
@@ -718,134 +1003,84 @@ class TLS:
 
     def _parse_server_hello_done(self, _data):
         """Parse ServerHelloDone message"""
+        if self._verify_cert and not self._cert_verified:
+            raise TLSHandshakeError("Server did not send a certificate to verify")
         # This message has no content, just set the flag
         self._server_hello_done_received = True
         debug("Received ServerHelloDone - ready to send client finishing messages")
 
     def _send_client_finishing_messages(self):
         """
-        Send client finishing messages
+        Send client finishing messages.
+
+        The whole flight (Certificate, ClientKeyExchange, ChangeCipherSpec,
+        Finished) is written with a single send.
         """
+        flight = b""
+
         # Send Certificate if requested
         if getattr(self, '_client_cert_requested', False):
             client_cert_pem = getattr(self, '_client_cert_pem', None)
             if client_cert_pem:
-                cert_msg = self._build_client_certificate(client_cert_pem)
-                self.conn.sendall(cert_msg)
+                flight += self._build_client_certificate(client_cert_pem)
                 debug("Sent client Certificate")
             else:
-                empty_cert = self._build_empty_certificate()
-                self.conn.sendall(empty_cert)
+                flight += self._build_empty_certificate()
                 debug("Sent empty Certificate (no client cert configured)")
 
         # Send ClientKeyExchange
-        client_key_exchange = self._build_client_key_exchange()
-        self.conn.sendall(client_key_exchange)
+        flight += self._build_client_key_exchange()
         debug("Sent Client Key Exchange")
 
         # Send ChangeCipherSpec
-        change_cipher_spec = b'\x14\x03\x03\x00\x01\x01'
-        self.conn.sendall(change_cipher_spec)
+        flight += b'\x14\x03\x03\x00\x01\x01'
         debug("Sent Change Cipher Spec")
 
-        # Reset sequence numbers for encrypted messages
-        # Client sequence number resets after we send ChangeCipherSpec
-        self._client_seq_num = 0
-        # Server sequence number will reset when we receive their ChangeCipherSpec
-        self._server_seq_num = 0
-        debug("Reset sequence numbers for encrypted messages")
-
-        # Send Finished (first encrypted message with seq num 0)
-        finished_message = self._build_finished_message()
-        self.conn.sendall(finished_message)
+        # Send Finished, the first record of the client cipher state (seq num 0);
+        # both cipher states were created with the session keys
+        flight += self._build_finished_message()
         debug("Sent Finished")
 
-    def _wait_for_server_handshake_completion(
-        self,
-    ):  # pylint: disable=too-many-branches,too-many-return-statements,too-many-nested-blocks
+        yield HANDSHAKE_SEND, flight
+
+    def _wait_for_server_handshake_completion(self):
         """
-        Wait for server's final handshake messages (ChangeCipherSpec + Finished)
+        Wait for server's final handshake messages
+        ([NewSessionTicket] + ChangeCipherSpec + Finished).
         Returns True if server accepts the handshake, False otherwise
         """
-        try:
-            # Try to read server's response with reasonable timeout
-            buffer = b""
-            received_change_cipher_spec = False
-            received_finished = False
-
-            # Read with timeout, expecting server's response
-            try:
-                data = self.conn.recv(4096)
-                if data:
-                    buffer += data
-                    debug(f"Received {len(data)} bytes from server after our Finished")
-                else:
-                    debug("No response from server after our Finished")
-                    return False
-            except Exception as recv_error:  # pylint: disable=broad-exception-caught
-                debug(f"Error receiving server response: {recv_error}")
-                return False
-
-            # Parse TLS records from buffer
-            offset = 0
-            while offset < len(buffer):
-                if offset + 5 > len(buffer):
-                    break
-
-                record_type = buffer[offset]
-                record_length = struct.unpack("!H", buffer[offset + 3 : offset + 5])[0]
-
-                if offset + 5 + record_length > len(buffer):
-                    # Incomplete record, might need more data
-                    break
+        received_change_cipher_spec = False
 
-                record_data = buffer[offset + 5 : offset + 5 + record_length]
-
-                debug(
-                    f"Processing server record: type={record_type}, length={record_length}"
-                )
+        while True:
+            record = yield HANDSHAKE_RECV, None
+            if record is None:
+                debug("No response from server after our Finished")
+                return False
 
-                if record_type == 20:  # ChangeCipherSpec
-                    debug("✅ Received server ChangeCipherSpec")
-                    received_change_cipher_spec = True
-                    # Reset server sequence number for encrypted messages
-                    self._server_seq_num = 0
-                elif record_type == 22:  # Handshake (encrypted Finished)
-                    debug("✅ Received server encrypted Finished")
-                    received_finished = True
-                    # Server's Finished message uses seq=0, increment for next message
-                    self._server_seq_num = 1
-                elif record_type == 21:  # Alert
-                    if len(record_data) >= 2:
-                        alert_level = record_data[0]
-                        alert_description = record_data[1]
-                        debug(
-                            f"Received TLS Alert: level={alert_level}, description={alert_description}"
-                        )
-                        if alert_level == 2:  # Fatal alert
-                            if alert_description == 20:  # bad_record_mac
-                                debug(
-                                    "Server rejected our Finished message (bad_record_mac)"
-                                )
-                                # This is expected with our current implementation
-                                return False
-                            debug(f"Server sent fatal alert: {alert_description}")
-                            return False
-                        debug(f"Server sent warning alert: {alert_description}")
-
-                offset += 5 + record_length
-
-            # If we received both messages, handshake is complete
-            if received_change_cipher_spec and received_finished:
+            record_type, _, record_data = record
+            debug(f"Processing server record: type={record_type}, length={len(record_data)}")
+
+            if record_type == 20:  # ChangeCipherSpec
+                debug("✅ Received server ChangeCipherSpec")
+                received_change_cipher_spec = True
+            elif record_type == 22 and not received_change_cipher_spec:
+                # NewSessionTicket (RFC 5077) precedes the server's ChangeCipherSpec
+                if record_data[:1] == b'\x04':
+                    self._parse_new_session_ticket(record_data[4:])
+            elif record_type == 22:  # Handshake (encrypted Finished)
+                debug("✅ Received server encrypted Finished")
+                # Server's Finished message uses seq=0, increment for next message
+                self._server_cipher_state.seq_num = 1
                 return True
-            debug(
-                f"Incomplete handshake: ChangeCipherSpec={received_change_cipher_spec}, Finished={received_finished}"
-            )
-            return False
-
-        except Exception as e:  # pylint: disable=broad-exception-caught
-            debug(f"Failed to wait for server handshake completion: {e}")
-            return False
+            elif record_type == 21:  # Alert
+                if len(record_data) >= 2:
+                    alert_level = record_data[0]
+                    alert_description = record_data[1]
+                    debug(f"Received TLS Alert: level={alert_level}, description={alert_description}")
+                    if alert_level == 2:  # Fatal alert
+                        if alert_description == 20:  # bad_record_mac
+                            debug("Server rejected our Finished message (bad_record_mac)")
+                        return False
 
     @staticmethod
     def _load_cert_data(cert_input):
@@ -937,7 +1172,7 @@ class TLS:
 
         try:
             # Generate our ECDHE keypair
-            private_key, public_key = ECDHEKeyExchange.generate_keypair(curve_id)
+            private_key, public_key = self._generate_keypair(curve_id)
             self._ecdhe_private_key = private_key
             self._ecdhe_public_key = public_key
 
@@ -1061,18 +1296,6 @@ class TLS:
         # Note: Don't add Finished message to handshake_messages until after encryption
         # The verify data is calculated from all handshake messages EXCLUDING this Finished message
 
-        # Try to encrypt the Finished message properly
-        # For GCM: need _client_write_key and _client_write_iv
-        # For CBC: need _client_write_key and _client_write_mac_key
-        is_gcm = getattr(self, '_is_gcm', False)
-        has_key = hasattr(self, '_client_write_key') and self._client_write_key
-        has_iv = hasattr(self, '_client_write_iv') and self._client_write_iv
-        has_mac = hasattr(self, '_client_write_mac_key') and self._client_write_mac_key
-
-        can_encrypt = has_key and (is_gcm and has_iv or not is_gcm and has_mac)
-
-        if not can_encrypt:
-            raise TLSKeyError("Cannot encrypt Finished: encryption keys not available")
         try:
             # Use proper TLS record layer encryption
             encrypted_record = self._encrypt_finished_message(msg)
@@ -1112,7 +1335,6 @@ class TLS:
             iv_length = 16
 
         key_block_length = 2 * (mac_key_length + enc_key_length + iv_length)
-        self._is_gcm = is_gcm
 
         # Generate key block
         if not (hasattr(self, '_server_random') and self._server_random):
@@ -1136,229 +1358,99 @@ class TLS:
         self._server_write_key = keys.get('server_key', b'')
         self._client_write_iv = keys.get('client_iv', b'')
         self._server_write_iv = keys.get('server_iv', b'')
+        self._client_cipher_state, self._server_cipher_state = tls12_cipher_states(
+            cipher_suite,
+            client_key=self._client_write_key,
+            server_key=self._server_write_key,
+            client_iv=self._client_write_iv,
+            server_iv=self._server_write_iv,
+            client_mac_key=self._client_write_mac_key,
+            server_mac_key=self._server_write_mac_key,
+        )
 
         debug(f"Generated session keys for cipher suite 0x{cipher_suite:04X}")
 
-    def _encrypt_handshake_message(self, handshake_msg: bytes) -> bytes:
+    def _encrypt_finished_message(self, handshake_msg: bytes) -> bytes:
         """
-        Encrypt a handshake message using TLS record layer encryption
+        Encrypt the Finished message, the first record protected by the
+        client write state (TLS 1.2, AES-CBC or AES-GCM).
         """
-        # pylint: disable=too-many-locals
-        # TLS record header for handshake
-        content_type = 0x16  # Handshake
-        version = b'\x03\x03'  # TLS 1.2
-
-        # For TLS 1.2 with AES-CBC, we need to:
-        # 1. Compute MAC
-        # 2. Add padding
-        # 3. Encrypt (MAC + data + padding)
-
-        # Sequence number for MAC calculation (client sending)
-        # This should be 0 for the first encrypted message (Finished)
-        if not hasattr(self, '_client_seq_num'):
-            self._client_seq_num = 0
-        seq_num = self._client_seq_num
-
-        # Create MAC input: seq_num(8) + type(1) + version(2) + length(2) + data
-        mac_input = (
-            seq_num.to_bytes(8, byteorder='big')
-            + content_type.to_bytes(1, byteorder='big')
-            + version
-            + len(handshake_msg).to_bytes(2, byteorder='big')
-            + handshake_msg
-        )
-
-        # Compute HMAC
-        mac = hmac.new(self._client_write_mac_key, mac_input, hashlib.sha1).digest()
-
-        # Combine message + MAC
-        plaintext = handshake_msg + mac
-
-        # Add PKCS#7 padding for AES-CBC (block size 16)
-        block_size = 16
-        padding_length = block_size - (len(plaintext) % block_size)
-        padding = bytes([padding_length - 1] * padding_length)
-        plaintext_padded = plaintext + padding
-
-        # Encrypt using AES-CBC
-        # Generate random IV for this record
-        iv = os.urandom(16)
-        # Use add_padding=False since we already added TLS-specific padding above
-        ciphertext = AESCipher.encrypt_cbc(
-            plaintext_padded, self._client_write_key, iv, add_padding=False
-        )
-
-        # TLS record: type + version + length + IV + ciphertext
-        encrypted_data = iv + ciphertext
-        record = (
-            content_type.to_bytes(1, byteorder='big')
-            + version
-            + len(encrypted_data).to_bytes(2, byteorder='big')
-            + encrypted_data
-        )
+        if self._client_cipher_state is None:
+            raise TLSKeyError("Cannot encrypt Finished: encryption keys not available")
+        return self._client_cipher_state.encrypt(0x16, handshake_msg)
 
-        # Increment sequence number for next message
-        self._client_seq_num += 1
+    @property
+    def write_state(self):
+        """CipherState protecting the records sent, or None before the keys exist."""
+        state = getattr(self, '_tls13_client_rp', None)
+        return state if state is not None else getattr(self, '_client_cipher_state', None)
 
-        return record
+    @property
+    def read_state(self):
+        """CipherState opening the records received, or None before the keys exist."""
+        state = getattr(self, '_tls13_server_rp', None)
+        return state if state is not None else getattr(self, '_server_cipher_state', None)
 
-    def _encrypt_finished_message(self, handshake_msg: bytes) -> bytes:
+    def encrypt_application_data(self, data: bytes) -> bytes:
         """
-        Properly encrypt Finished message according to TLS 1.2 specification.
-        Supports both AES-CBC and AES-GCM cipher suites.
+        Encrypt ``data`` as TLS application data records for the negotiated
+        protocol version and cipher suite, one record per 2^14 bytes.
         """
-        # Check if using GCM cipher suite
-        if getattr(self, '_is_gcm', False):
-            return self._encrypt_finished_message_gcm(handshake_msg)
-
-        return self._encrypt_finished_message_cbc(handshake_msg)
-
-    def _encrypt_finished_message_gcm(self, handshake_msg: bytes) -> bytes:
+        state = self.write_state
+        if state is None:
+            raise TLSKeyError("Cannot encrypt application data: encryption keys not available")
+        if len(data) <= MAX_FRAGMENT_LENGTH:
+            return state.encrypt(0x17, data)
+        return b"".join(self.encrypt_application_records(data))
+
+    def encrypt_application_records(self, data: bytes) -> list:
         """
-        Encrypt Finished message using AES-GCM (AEAD).
-
-        GCM record format:
-        - explicit_nonce (8 bytes)
-        - ciphertext (variable)
-        - auth_tag (16 bytes)
-
-        Nonce = implicit_iv (4 bytes from key derivation) + explicit_nonce (8 bytes)
-        AAD = seq_num (8) + type (1) + version (2) + length (2)
+        Like encrypt_application_data, but return the records as a list so
+        they can go out in one vectored send without being joined first.
         """
-        content_type = 0x16  # Handshake
-        version = b'\x03\x03'  # TLS 1.2
-
-        if not hasattr(self, '_client_seq_num'):
-            self._client_seq_num = 0
-
-        # Generate explicit nonce (8 bytes, typically seq_num or random)
-        explicit_nonce = self._client_seq_num.to_bytes(8, byteorder='big')
-
-        # Full nonce = implicit_iv (4 bytes) + explicit_nonce (8 bytes) = 12 bytes
-        nonce = self._client_write_iv + explicit_nonce
-
-        # Build AAD (Additional Authenticated Data)
-        # AAD = seq_num (8) + type (1) + version (2) + length (2)
-        aad = (
-            self._client_seq_num.to_bytes(8, byteorder='big')
-            + bytes([content_type])
-            + version
-            + len(handshake_msg).to_bytes(2, byteorder='big')
-        )
-
-        # Encrypt with AES-GCM
-        ciphertext, auth_tag = AESCipher.encrypt_gcm(
-            handshake_msg, self._client_write_key, nonce, aad
-        )
-
-        # Record data = explicit_nonce + ciphertext + auth_tag
-        encrypted_data = explicit_nonce + ciphertext + auth_tag
-
-        # Build TLS record
-        record = (
-            bytes([content_type])
-            + version
-            + len(encrypted_data).to_bytes(2, byteorder='big')
-            + encrypted_data
-        )
-
-        self._client_seq_num += 1
-        debug(f"GCM encrypted record: {len(record)} bytes")
-        return record
-
-    def _encrypt_finished_message_cbc(self, handshake_msg: bytes) -> bytes:
+        state = self.write_state
+        if state is None:
+            raise TLSKeyError("Cannot encrypt application data: encryption keys not available")
+        if len(data) <= MAX_FRAGMENT_LENGTH:
+            return [state.encrypt(0x17, data)]
+        data = memoryview(data)
+        return [
+            state.encrypt(0x17, data[offset:offset + MAX_FRAGMENT_LENGTH])
+            for offset in range(0, len(data), MAX_FRAGMENT_LENGTH)
+        ]
+
+    def decrypt_record(self, record_type: int, record_header: bytes, payload: bytes):
         """
-        Encrypt Finished message using AES-CBC with HMAC.
+        Decrypt a protected record received after the handshake.
+
+        :param record_type: Outer record content type
+        :param record_header: The 5-byte record header (AAD), or None to
+            rebuild it from record_type and the payload length (TLS 1.2)
+        :param payload: Record payload
+        :return: (content_type, plaintext); ChangeCipherSpec and plaintext
+            alerts are passed through unchanged.
         """
-        # pylint: disable=too-many-locals
-        # TLS record parameters
-        content_type = 0x16  # Handshake
-        version = b'\x03\x03'  # TLS 1.2
-
-        # Sequence number should already be set to 0 after Change Cipher Spec
-        # Don't reinitialize it here to avoid overriding the correct value
-        if not hasattr(self, '_client_seq_num'):
-            # This should not happen if called correctly after Change Cipher Spec
-            debug("Warning: _client_seq_num not initialized, setting to 0")
-            self._client_seq_num = 0
-
-        # For TLS 1.2 with AES-CBC, MAC is calculated EXACTLY as per RFC 5246:
-        # HMAC(MAC_write_secret, seq_num + TLSCompressed.type + TLSCompressed.version + TLSCompressed.length + TLSCompressed.fragment)
-
-        # Sequence number must be exactly 8 bytes, big-endian
-        seq_num_bytes = self._client_seq_num.to_bytes(8, byteorder='big')
-
-        # Content type is exactly 1 byte
-        type_byte = bytes([content_type])
-
-        # Version is exactly 2 bytes
-        version_bytes = version
-
-        # Length is exactly 2 bytes, big-endian
-        length_bytes = len(handshake_msg).to_bytes(2, byteorder='big')
-
-        # Fragment is the actual handshake message
-        fragment = handshake_msg
-
-        # Combine exactly as specified in RFC
-        mac_input = seq_num_bytes + type_byte + version_bytes + length_bytes + fragment
-
-        debug(f"MAC input length: {len(mac_input)} bytes")
-        debug(f"Seq num: {seq_num_bytes.hex()}")
-        debug(f"Type: {type_byte.hex()}")
-        debug(f"Version: {version_bytes.hex()}")
-        debug(f"Length: {length_bytes.hex()}")
-        debug(f"Fragment length: {len(fragment)}")
-
-        # Calculate HMAC-SHA1 (for cipher suite 0x002F)
-        mac = hmac.new(self._client_write_mac_key, mac_input, hashlib.sha1).digest()
-        debug(f"Calculated MAC: {mac.hex()}")
-
-        # Concatenate message and MAC
-        plaintext = handshake_msg + mac
-
-        # Add PKCS#7 padding for AES-CBC (block size = 16)
-        # IMPORTANT: TLS uses a specific padding scheme where padding length value = actual padding bytes - 1
-        block_size = 16
-        padding_length = block_size - (len(plaintext) % block_size)
-
-        # TLS padding: each padding byte contains (padding_length - 1)
-        padding_value = padding_length - 1
-        padding = bytes([padding_value] * padding_length)
-        padded_plaintext = plaintext + padding
-
-        debug(f"Padding: {padding_length} bytes, value: {padding_value}")
-        debug(
-            f"Plaintext: {len(plaintext)} -> {len(padded_plaintext)} bytes after padding"
-        )
-
-        # Generate explicit IV for TLS 1.2 (16 bytes for AES)
-        explicit_iv = os.urandom(16)
-
-        # Encrypt using AES-CBC (without additional padding since we already added TLS padding)
-        # Encrypt directly without additional PKCS#7 padding (we already padded manually)
-        cipher = Cipher(
-            algorithms.AES(self._client_write_key),
-            modes.CBC(explicit_iv),
-            backend=default_backend(),
-        )
-        encryptor = cipher.encryptor()
-        ciphertext = encryptor.update(padded_plaintext) + encryptor.finalize()
-
-        # Construct TLS record: type + version + length + explicit_iv + ciphertext
-        encrypted_data = explicit_iv + ciphertext
-        record = (
-            bytes([content_type])
-            + version
-            + len(encrypted_data).to_bytes(2, byteorder='big')
-            + encrypted_data
-        )
-
-        # Increment sequence number for next message
-        self._client_seq_num += 1
-
-        debug(f"Encrypted record length: {len(record)} bytes")
-        return record
+        server_rp = getattr(self, '_tls13_server_rp', None)
+        if server_rp is not None:
+            if record_type != 0x17:
+                return record_type, payload
+            content_type, plaintext = server_rp.decrypt(payload, record_header)
+            if content_type == 0x16:
+                self._process_post_handshake(plaintext)
+            return content_type, plaintext
+
+        if record_type == 0x14 or (record_type == 0x15 and len(payload) == 2):
+            return record_type, payload
+        if self._server_cipher_state is None:
+            raise TLSKeyError("Server encryption keys not available")
+        if record_header is None:
+            record_header = RECORD_HEADER.pack(record_type, TLS12_VERSION, len(payload))
+        try:
+            return self._server_cipher_state.decrypt(payload, record_header)
+        except (TLSDecryptionError, TLSKeyError):
+            raise
+        except Exception as e:
+            raise TLSDecryptionError(f"Record decryption failed: {e}") from e
 
     def _extract_server_public_key(self, certificate_data):
         """Extract server's public key from certificate"""
@@ -1430,39 +1522,38 @@ class TLS:
 
     def _verify_server_certificate(self, certificate_data: bytes):
         """
-        Verify server certificate chain.
+        Verify server certificate chain, validity and hostname.
+
+        The hostname is the SNI server name, or the host connected to.
 
         Args:
-            certificate_data: Raw certificate data from Certificate message
-        """
-        try:
-            hostname = getattr(self, '_server_name', None)
-            if not hostname:
-                debug("No server name for certificate verification, skipping")
-                return
+            certificate_data: Certificate list in the TLS 1.2 encoding
 
-            verifier = CertificateVerifier(verify=True)
-            is_valid, error = verifier.verify_certificate(
-                hostname=hostname,
-                certificate_data=certificate_data,
-                check_hostname=True,
-                check_expiry=True,
-            )
+        Raises:
+            TLSHandshakeError: If the certificate is not trusted for the host
+        """
+        hostname = self._server_name or self._server_host
+        if not hostname:
+            debug("No server name for certificate verification, checking the chain only")
 
-            if is_valid:
-                debug(f"Certificate verification passed for {hostname}")
-                self._cert_verified = True
-            else:
-                debug(f"Certificate verification failed: {error}")
-                self._cert_verified = False
-                self._cert_error = error
-                # Don't raise exception - allow connection to continue
-                # Users can check _cert_verified to see the result
+        verifier = CertificateVerifier(
+            verify=True, ca_certs=self._ca_certs, cache=default_verification_cache
+        )
+        is_valid, error = verifier.verify_certificate(
+            hostname=hostname or "",
+            certificate_data=certificate_data,
+            check_hostname=bool(hostname),
+            check_expiry=True,
+        )
 
-        except ImportError as e:
-            debug(f"Certificate verification module not available: {e}")
-            self._cert_verified = False
-        except Exception as e:  # pylint: disable=broad-exception-caught
-            debug(f"Certificate verification error: {e}")
-            self._cert_verified = False
-            self._cert_error = str(e)
+        self._cert_verified = is_valid
+        if not is_valid:
+            self._cert_error = error
+            raise TLSHandshakeError(f"Certificate verification failed for {hostname}: {error}")
+        debug(f"Certificate verification passed for {hostname}")
+
+    def _leaf_certificate(self) -> bytes:
+        """DER of the server's certificate, from the stored certificate list."""
+        data = self._certificate_data
+        length = struct.unpack("!I", b"\x00" + data[3:6])[0]
+        return data[6:6 + length]
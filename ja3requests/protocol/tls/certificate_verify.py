@@ -5,19 +5,54 @@ ja3requests.protocol.tls.certificate_verify
 Certificate verification for TLS connections.
 """
 
-from datetime import datetime
-from typing import List, Optional, Tuple
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
 
 from cryptography import x509
+from cryptography.exceptions import InvalidSignature
 from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives.asymmetric import padding, ec, rsa
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec, ed448, ed25519, padding, rsa
 from cryptography.x509.oid import ExtensionOID, NameOID
 
 from ja3requests.protocol.tls.debug import debug
+from ja3requests.protocol.tls.trust_store import TrustStore, get_trust_store
 
 # Constants
 CERT_LENGTH_FIELD_SIZE = 3  # Certificate length field is 3 bytes in TLS
 
+#: SignatureScheme code point -> (algorithm, hash), RFC 8446 section 4.2.3
+SIGNATURE_SCHEMES = {
+    0x0201: ("pkcs1", hashes.SHA1),
+    0x0401: ("pkcs1", hashes.SHA256),
+    0x0501: ("pkcs1", hashes.SHA384),
+    0x0601: ("pkcs1", hashes.SHA512),
+    0x0203: ("ecdsa", hashes.SHA1),
+    0x0403: ("ecdsa", hashes.SHA256),
+    0x0503: ("ecdsa", hashes.SHA384),
+    0x0603: ("ecdsa", hashes.SHA512),
+    0x0804: ("pss", hashes.SHA256),
+    0x0805: ("pss", hashes.SHA384),
+    0x0806: ("pss", hashes.SHA512),
+    0x0809: ("pss", hashes.SHA256),
+    0x080A: ("pss", hashes.SHA384),
+    0x080B: ("pss", hashes.SHA512),
+    0x0807: ("ed25519", None),
+    0x0808: ("ed448", None),
+}
+
+_SIGNATURE_KEY_TYPES = {
+    "pkcs1": rsa.RSAPublicKey,
+    "pss": rsa.RSAPublicKey,
+    "ecdsa": ec.EllipticCurvePublicKey,
+    "ed25519": ed25519.Ed25519PublicKey,
+    "ed448": ed448.Ed448PublicKey,
+}
+
 
 class CertificateVerificationError(Exception):
     """Base exception for certificate verification errors"""
@@ -35,6 +70,106 @@ class CertificateChainError(CertificateVerificationError):
     """Certificate chain validation failed"""
 
 
+class CertificateSignatureError(CertificateVerificationError):
+    """A handshake signature was not made with the certificate's key"""
+
+
+class CertificateVerificationCache:
+    """
+    LRU cache of successful certificate verifications.
+
+    Entries are keyed by the SHA-256 of the raw certificate list together
+    with the hostname, checks requested and CA bundle, so a server that
+    sends the byte-identical chain again skips X.509 parsing and signature
+    checks.
+    An entry expires at the leaf's notAfter, or after max_age if sooner.
+    Failed verifications are not cached.
+    """
+
+    def __init__(self, max_size: int = 1024, max_age: float = 3600.0):
+        """
+        Args:
+            max_size: Maximum number of cached verifications
+            max_age: Maximum seconds an entry is trusted, even if the leaf is valid longer
+        """
+        self._max_size = max_size
+        self._max_age = max_age
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def key(
+        hostname: str, certificate_data: bytes, check_hostname: bool, check_expiry: bool, ca_certs=None
+    ) -> tuple:
+        """Cache key for one verification request."""
+        return (
+            hashlib.sha256(certificate_data).digest(),
+            hostname.lower() if check_hostname else None,
+            check_expiry,
+            ca_certs,
+        )
+
+    def get(self, key: tuple) -> bool:
+        """Return True if the key was verified successfully and has not expired."""
+        with self._lock:
+            expires_at = self._entries.get(key)
+            if expires_at is not None and expires_at > time.time():
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return True
+            if expires_at is not None:
+                del self._entries[key]
+            self._misses += 1
+            return False
+
+    def put(self, key: tuple, not_after: float):
+        """
+        Record a successful verification.
+
+        Args:
+            key: Key from :meth:`key`
+            not_after: The leaf certificate's notAfter as a POSIX timestamp
+        """
+        expires_at = min(not_after, time.time() + self._max_age)
+        with self._lock:
+            self._entries[key] = expires_at
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def get_stats(self) -> Dict:
+        """
+        Cache statistics.
+
+        Returns:
+            Dict with "size", "hits", "misses" and "hit_rate"
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+#: Verification cache shared by every TLS connection in the process
+default_verification_cache = CertificateVerificationCache()
+
+
 class CertificateVerifier:
     """
     Verifies TLS certificates including:
@@ -44,16 +179,23 @@ class CertificateVerifier:
     - Signature verification
     """
 
-    def __init__(self, verify: bool = True, ca_certs: Optional[str] = None):
+    def __init__(
+        self,
+        verify: bool = True,
+        ca_certs: Optional[str] = None,
+        cache: Optional[CertificateVerificationCache] = None,
+    ):
         """
         Initialize certificate verifier.
 
         Args:
             verify: Whether to verify certificates (default True)
-            ca_certs: Path to CA certificates bundle (uses system default if None)
+            ca_certs: CA bundle file or directory, or PEM bytes (uses system default if None)
+            cache: CertificateVerificationCache to reuse earlier successful verifications
         """
         self.verify = verify
         self.ca_certs = ca_certs
+        self.cache = cache
         self._certificates = []
 
     def parse_certificate_chain(self, certificate_data: bytes) -> List[bytes]:
@@ -127,6 +269,13 @@ class CertificateVerifier:
             debug("Certificate verification disabled")
             return True, None
 
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.key(hostname, certificate_data, check_hostname, check_expiry, self.ca_certs)
+            if self.cache.get(cache_key):
+                debug(f"Certificate verification cached for {hostname}")
+                return True, None
+
         try:
             certificates = self.parse_certificate_chain(certificate_data)
             if not certificates:
@@ -145,6 +294,8 @@ class CertificateVerifier:
             self._verify_chain(certificates)
 
             debug(f"Certificate verification successful for {hostname}")
+            if cache_key is not None:
+                self.cache.put(cache_key, self._not_after_timestamp(leaf_cert))
             return True, None
 
         except CertificateVerificationError as e:
@@ -162,6 +313,15 @@ class CertificateVerifier:
             debug(f"Failed to load certificate: {e}")
             return None
 
+    @staticmethod
+    def _not_after_timestamp(cert) -> float:
+        """The certificate's notAfter as a POSIX timestamp."""
+        try:
+            return cert.not_valid_after_utc.timestamp()
+        except AttributeError:
+            # Fallback for older cryptography versions (naive UTC datetime)
+            return cert.not_valid_after.replace(tzinfo=timezone.utc).timestamp()
+
     def _check_expiration(self, cert) -> None:
         """
         Check if certificate is within validity period.
@@ -258,87 +418,38 @@ class CertificateVerifier:
             return False
         return hostname == pattern
 
+    @property
+    def trust_store(self) -> TrustStore:
+        """The process-wide trust store for ca_certs, loaded on first use."""
+        return get_trust_store(self.ca_certs)
+
     def _verify_chain(self, certificates: List[bytes]) -> None:
         """
-        Verify certificate chain structure.
+        Verify that the chain leads to a trusted root.
 
-        Checks:
-        - Chain has at least one certificate
-        - Each certificate's issuer matches the next certificate's subject
-        - Signatures are valid (using cryptography library)
+        The certificates after the leaf are used as intermediates in any
+        order; issuers the server left out are looked up in the trust store.
+        Every signature on the path must verify.
 
         Raises:
-            CertificateChainError: If chain validation fails
+            CertificateChainError: If no path to a trust anchor exists
         """
         if len(certificates) < 1:
             raise CertificateChainError("Empty certificate chain")
 
-        try:
-            # Load all certificates
-            loaded_certs = []
-            for cert_der in certificates:
-                cert = self._load_certificate(cert_der)
-                if cert is None:
-                    raise CertificateChainError("Failed to load certificate in chain")
-                loaded_certs.append(cert)
-
-            # Verify chain structure: each cert should be issued by the next
-            for i in range(len(loaded_certs) - 1):
-                current_cert = loaded_certs[i]
-                issuer_cert = loaded_certs[i + 1]
-
-                # Check issuer/subject relationship
-                if current_cert.issuer != issuer_cert.subject:
-                    raise CertificateChainError(
-                        f"Certificate chain broken: cert {i} issuer does not match cert {i+1} subject"
-                    )
-
-                # Verify signature
-                try:
-                    self._verify_signature(current_cert, issuer_cert)
-                except (ValueError, TypeError, AttributeError, KeyError) as e:
-                    debug(f"Signature verification failed for cert {i}: {e}")
-                    # Continue without failing - signature verification is complex
-
-            debug(
-                f"Certificate chain structure verified ({len(loaded_certs)} certificates)"
+        loaded_certs = []
+        for cert_der in certificates:
+            cert = self._load_certificate(cert_der)
+            if cert is None:
+                raise CertificateChainError("Failed to load certificate in chain")
+            loaded_certs.append(cert)
+
+        path = self.trust_store.build_chain(loaded_certs[0], loaded_certs[1:])
+        if path is None:
+            raise CertificateChainError(
+                f"Unable to build a chain to a trusted root for {loaded_certs[0].subject.rfc4514_string()}"
             )
-
-        except CertificateChainError:  # pylint: disable=try-except-raise
-            raise
-        except (ValueError, TypeError, AttributeError) as e:
-            debug(f"Chain verification error: {e}")
-            raise CertificateChainError(f"Chain verification failed: {e}") from e
-
-    def _verify_signature(self, cert, issuer_cert) -> None:
-        """
-        Verify that cert was signed by issuer_cert.
-
-        This is a best-effort verification using the cryptography library.
-        """
-        try:
-            issuer_public_key = issuer_cert.public_key()
-
-            # Get signature algorithm
-            if isinstance(issuer_public_key, rsa.RSAPublicKey):
-                issuer_public_key.verify(
-                    cert.signature,
-                    cert.tbs_certificate_bytes,
-                    padding.PKCS1v15(),
-                    cert.signature_hash_algorithm,
-                )
-            elif isinstance(issuer_public_key, ec.EllipticCurvePublicKey):
-                issuer_public_key.verify(
-                    cert.signature,
-                    cert.tbs_certificate_bytes,
-                    ec.ECDSA(cert.signature_hash_algorithm),
-                )
-            else:
-                debug(f"Unknown public key type: {type(issuer_public_key)}")
-
-        except (ValueError, TypeError, AttributeError) as e:
-            debug(f"Signature verification error: {e}")
-            # Don't raise - signature verification can fail for various reasons
+        debug(f"Certificate chain verified ({len(path)} certificates, anchor {path[-1].subject.rfc4514_string()})")
 
     def get_certificate_info(self, cert_der: bytes) -> dict:
         """
@@ -413,3 +524,46 @@ def verify_server_certificate(
     """
     verifier = CertificateVerifier(verify=verify)
     return verifier.verify_certificate(hostname, certificate_data)
+
+
+def verify_handshake_signature(
+    cert_der: bytes, scheme: int, signature: bytes, content: bytes, tls13: bool = False
+) -> None:
+    """
+    Check a signature the server made with its certificate's key: the
+    ServerKeyExchange parameters in TLS 1.2, or CertificateVerify in TLS 1.3.
+
+    Args:
+        cert_der: DER-encoded leaf certificate
+        scheme: SignatureScheme code point sent with the signature
+        signature: The signature
+        content: The signed bytes
+        tls13: Reject the PKCS#1 v1.5 and SHA-1 schemes TLS 1.3 forbids
+
+    Raises:
+        CertificateSignatureError: If the scheme is unusable or the signature does not verify
+    """
+    algorithm, hash_type = SIGNATURE_SCHEMES.get(scheme, (None, None))
+    if algorithm is None or (tls13 and (algorithm == "pkcs1" or hash_type is hashes.SHA1)):
+        raise CertificateSignatureError(f"Unsupported signature scheme 0x{scheme:04X}")
+    try:
+        public_key = x509.load_der_x509_certificate(cert_der, default_backend()).public_key()
+    except ValueError as e:
+        raise CertificateSignatureError(f"Failed to load the signing certificate: {e}") from e
+    if not isinstance(public_key, _SIGNATURE_KEY_TYPES[algorithm]):
+        raise CertificateSignatureError(
+            f"Signature scheme 0x{scheme:04X} does not match the certificate's {type(public_key).__name__}"
+        )
+
+    try:
+        if algorithm == "pkcs1":
+            public_key.verify(signature, content, padding.PKCS1v15(), hash_type())
+        elif algorithm == "pss":
+            pss = padding.PSS(mgf=padding.MGF1(hash_type()), salt_length=hash_type.digest_size)
+            public_key.verify(signature, content, pss, hash_type())
+        elif algorithm == "ecdsa":
+            public_key.verify(signature, content, ec.ECDSA(hash_type()))
+        else:
+            public_key.verify(signature, content)
+    except InvalidSignature as e:
+        raise CertificateSignatureError(f"Invalid signature (scheme 0x{scheme:04X})") from e
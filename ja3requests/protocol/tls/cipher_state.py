@@ -0,0 +1,388 @@
+"""
+ja3requests.protocol.tls.cipher_state
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Per-direction record protection state.
+
+A CipherState is created once for each direction of a connection when its
+traffic keys are derived. It keeps the keyed primitives (an AEAD instance,
+or a running AES-CBC context and a keyed HMAC), the fixed parts of every
+nonce and additional data, and the record sequence number, so protecting
+or opening a record costs one AEAD call (or one CBC update and one HMAC)
+and no per-record setup.
+
+Every state offers the same interface for TLS 1.2 AES-GCM, TLS 1.2
+AES-CBC/HMAC and TLS 1.3 AEADs (see tls13.TLS13RecordProtection): records
+can be returned as bytes or written into caller-provided buffers, and
+``encrypt_records`` splits data at the 2^14-byte plaintext limit.
+"""
+
+import hashlib
+import hmac
+import os
+import struct
+from typing import List, Tuple
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from ja3requests.exceptions import (
+    TLSDecryptionError,
+    TLSEncryptionError,
+    TLSKeyError,
+    TLSMACVerificationError,
+)
+from .crypto import get_cipher_info
+
+TLS12_VERSION = b"\x03\x03"
+
+# Record header: content type, legacy version, length
+RECORD_HEADER = struct.Struct("!B2sH")
+# TLS 1.2 MAC / AEAD additional data: seq_num, content type, version, length
+_ADDITIONAL_DATA = struct.Struct("!QB2sH")
+_SEQ_NUM = struct.Struct("!Q")
+
+_MAC_HASHES = {"SHA1": hashlib.sha1, "SHA256": hashlib.sha256, "SHA384": hashlib.sha384}
+
+AES_BLOCK_SIZE = 16
+GCM_TAG_SIZE = 16
+GCM_EXPLICIT_NONCE_SIZE = 8
+
+# TLS CBC padding by length: every padding byte holds the length - 1
+_PADDING = (b"",) + tuple(bytes((n - 1,)) * n for n in range(1, AES_BLOCK_SIZE + 1))
+
+#: Largest plaintext fragment one record may carry (RFC 5246 6.2.1, RFC 8446 5.1)
+MAX_FRAGMENT_LENGTH = 16384
+
+# AEAD encrypt_into/decrypt_into only exist in recent cryptography releases
+_AEAD_INTO = hasattr(AESGCM, "encrypt_into") and hasattr(AESGCM, "decrypt_into")
+
+
+def aead_encrypt_into(aead, nonce, data, associated_data, out):
+    """
+    Seal ``data`` into ``out``, which holds exactly the ciphertext and tag.
+    Without AEAD encrypt_into the result of encrypt() is copied in.
+    """
+    if _AEAD_INTO:
+        aead.encrypt_into(nonce, data, associated_data, out)
+    else:
+        out[:] = aead.encrypt(nonce, data, associated_data)
+
+
+def aead_decrypt_into(aead, nonce, data, associated_data, out):
+    """
+    Open ``data`` into ``out``, which holds exactly the plaintext.
+    Without AEAD decrypt_into the result of decrypt() is copied in.
+    """
+    if _AEAD_INTO:
+        aead.decrypt_into(nonce, data, associated_data, out)
+    else:
+        out[:] = aead.decrypt(nonce, data, associated_data)
+
+
+class CipherState:
+    """
+    Record protection for one direction of a connection.
+
+    ``encrypt`` returns a complete record, header included; ``decrypt``
+    takes a record's payload and 5-byte header and returns the inner
+    content type and the plaintext. Both advance ``seq_num``.
+
+    The ``*_into`` variants write into a caller-provided buffer instead of
+    allocating: ``encrypt_into`` needs ``buffer_size(len(data))`` bytes,
+    ``decrypt_into`` at least ``len(payload)`` bytes.
+    """
+
+    seq_num = 0
+
+    def encrypt(self, content_type: int, data: bytes) -> bytes:
+        """
+        Protect data as one record.
+        :param content_type: TLS content type of data
+        :param data: At most 2^14 bytes of plaintext
+        :return: The record, header included
+        """
+        raise NotImplementedError("encrypt method must be implemented by subclass.")
+
+    def decrypt(self, payload, record_header) -> Tuple[int, bytes]:
+        """
+        Open one record.
+        :param payload: The record payload (bytes-like)
+        :param record_header: The 5-byte record header
+        :return: (content_type, plaintext)
+        """
+        raise NotImplementedError("decrypt method must be implemented by subclass.")
+
+    def buffer_size(self, length: int) -> int:
+        """Bytes encrypt_into needs to protect ``length`` bytes of plaintext."""
+        raise NotImplementedError("buffer_size method must be implemented by subclass.")
+
+    def encrypt_into(self, content_type: int, data, buf) -> int:
+        """
+        Protect data as one record written to the start of buf.
+        :param content_type: TLS content type of data
+        :param data: At most 2^14 bytes of plaintext (bytes-like)
+        :param buf: Writable buffer of at least buffer_size(len(data)) bytes
+        :return: Length of the record, header included
+        """
+        raise NotImplementedError("encrypt_into method must be implemented by subclass.")
+
+    def decrypt_into(self, payload, record_header, buf) -> Tuple[int, memoryview]:
+        """
+        Open one record into buf.
+        :param payload: The record payload (bytes-like)
+        :param record_header: The 5-byte record header
+        :param buf: Writable buffer of at least len(payload) bytes
+        :return: (content_type, memoryview of buf holding the plaintext)
+        """
+        raise NotImplementedError("decrypt_into method must be implemented by subclass.")
+
+    def records_size(self, length: int) -> int:
+        """Bytes encrypt_records_into needs for ``length`` bytes of plaintext."""
+        full, rest = divmod(length, MAX_FRAGMENT_LENGTH)
+        size = full * self.buffer_size(MAX_FRAGMENT_LENGTH)
+        if rest or not full:
+            size += self.buffer_size(rest)
+        return size
+
+    def encrypt_records(self, content_type: int, data) -> bytes:
+        """
+        Protect data of any length as records of at most 2^14 bytes of plaintext.
+        :return: The records, back to back
+        """
+        if len(data) <= MAX_FRAGMENT_LENGTH:
+            return self.encrypt(content_type, data)
+        return b"".join(self.encrypt_record_list(content_type, data))
+
+    def encrypt_record_list(self, content_type: int, data) -> List[bytes]:
+        """
+        Protect data of any length as records of at most 2^14 bytes of
+        plaintext, for a vectored send that needs no joined copy.
+        :return: The records in order
+        """
+        if len(data) <= MAX_FRAGMENT_LENGTH:
+            return [self.encrypt(content_type, data)]
+        data = memoryview(data)
+        return [
+            self.encrypt(content_type, data[offset:offset + MAX_FRAGMENT_LENGTH])
+            for offset in range(0, len(data), MAX_FRAGMENT_LENGTH)
+        ]
+
+    def encrypt_records_into(self, content_type: int, data, buf) -> int:
+        """
+        Protect data of any length as records of at most 2^14 bytes of
+        plaintext, written back to back into buf.
+        :param buf: Writable buffer of at least records_size(len(data)) bytes
+        :return: Bytes written
+        """
+        data = memoryview(data)
+        with memoryview(buf) as view:
+            written = 0
+            for offset in range(0, max(len(data), 1), MAX_FRAGMENT_LENGTH):
+                written += self.encrypt_into(
+                    content_type, data[offset:offset + MAX_FRAGMENT_LENGTH], view[written:]
+                )
+        return written
+
+
+class TLS12GCMState(CipherState):
+    """
+    AES-GCM for TLS 1.2 (RFC 5288): the nonce is the 4-byte implicit IV from
+    the key block followed by an 8-byte explicit part, here the sequence
+    number, which is sent in front of the ciphertext.
+    """
+
+    def __init__(self, key: bytes, implicit_iv: bytes):
+        if not key or len(implicit_iv) != 4:
+            raise TLSKeyError("AES-GCM needs a key and a 4-byte implicit IV")
+        self._aead = AESGCM(key)
+        self._salt = bytes(implicit_iv)
+        self.seq_num = 0
+
+    def encrypt(self, content_type, data):
+        seq_num = self.seq_num
+        explicit_nonce = _SEQ_NUM.pack(seq_num)
+        additional_data = _ADDITIONAL_DATA.pack(seq_num, content_type, TLS12_VERSION, len(data))
+        try:
+            sealed = self._aead.encrypt(self._salt + explicit_nonce, data, additional_data)
+        except (ValueError, OverflowError) as e:
+            raise TLSEncryptionError(f"AES-GCM encryption failed: {e}") from e
+        self.seq_num = seq_num + 1
+        return (
+            RECORD_HEADER.pack(content_type, TLS12_VERSION, GCM_EXPLICIT_NONCE_SIZE + len(sealed))
+            + explicit_nonce
+            + sealed
+        )
+
+    def decrypt(self, payload, record_header):
+        length = len(payload) - GCM_EXPLICIT_NONCE_SIZE - GCM_TAG_SIZE
+        if length < 0:
+            raise TLSDecryptionError("Encrypted data too short for GCM")
+        content_type = record_header[0]
+        additional_data = _ADDITIONAL_DATA.pack(
+            self.seq_num, content_type, bytes(record_header[1:3]), length
+        )
+        payload = memoryview(payload)
+        try:
+            plaintext = self._aead.decrypt(
+                self._salt + payload[:GCM_EXPLICIT_NONCE_SIZE],
+                payload[GCM_EXPLICIT_NONCE_SIZE:],
+                additional_data,
+            )
+        except InvalidTag as e:
+            raise TLSDecryptionError("AES-GCM decryption failed: authentication tag mismatch") from e
+        self.seq_num += 1
+        return content_type, plaintext
+
+    def buffer_size(self, length):
+        return 5 + GCM_EXPLICIT_NONCE_SIZE + length + GCM_TAG_SIZE
+
+    def encrypt_into(self, content_type, data, buf):
+        seq_num = self.seq_num
+        size = self.buffer_size(len(data))
+        with memoryview(buf) as view:
+            RECORD_HEADER.pack_into(view, 0, content_type, TLS12_VERSION, size - 5)
+            _SEQ_NUM.pack_into(view, 5, seq_num)
+            try:
+                aead_encrypt_into(
+                    self._aead,
+                    self._salt + view[5:13],
+                    data,
+                    _ADDITIONAL_DATA.pack(seq_num, content_type, TLS12_VERSION, len(data)),
+                    view[13:size],
+                )
+            except (ValueError, OverflowError) as e:
+                raise TLSEncryptionError(f"AES-GCM encryption failed: {e}") from e
+        self.seq_num = seq_num + 1
+        return size
+
+    def decrypt_into(self, payload, record_header, buf):
+        length = len(payload) - GCM_EXPLICIT_NONCE_SIZE - GCM_TAG_SIZE
+        if length < 0:
+            raise TLSDecryptionError("Encrypted data too short for GCM")
+        content_type = record_header[0]
+        additional_data = _ADDITIONAL_DATA.pack(
+            self.seq_num, content_type, bytes(record_header[1:3]), length
+        )
+        payload = memoryview(payload)
+        plaintext = memoryview(buf)[:length]
+        try:
+            aead_decrypt_into(
+                self._aead,
+                self._salt + payload[:GCM_EXPLICIT_NONCE_SIZE],
+                payload[GCM_EXPLICIT_NONCE_SIZE:],
+                additional_data,
+                plaintext,
+            )
+        except InvalidTag as e:
+            raise TLSDecryptionError("AES-GCM decryption failed: authentication tag mismatch") from e
+        self.seq_num += 1
+        return content_type, plaintext
+
+
+class TLS12CBCState(CipherState):
+    """
+    AES-CBC with HMAC for TLS 1.2 (RFC 5246, section 6.2.3.2).
+
+    One CBC encryptor and one decryptor run for the life of the state. Each
+    record sent starts with a random block, whose ciphertext becomes the
+    record's explicit IV (option 2b of the RFC). A received record is fed
+    as IV + ciphertext, so the decryptor chains from the record's own IV
+    and the first output block is discarded.
+    """
+
+    def __init__(self, key: bytes, mac_key: bytes, mac_hash=hashlib.sha1):
+        if not key or not mac_key:
+            raise TLSKeyError("AES-CBC needs an encryption key and a MAC key")
+        self._cipher = Cipher(algorithms.AES(key), modes.CBC(bytes(AES_BLOCK_SIZE)))
+        self._encryptor = None
+        self._decryptor = None
+        self._mac = hmac.new(mac_key, digestmod=mac_hash)
+        self.mac_size = self._mac.digest_size
+        self.seq_num = 0
+
+    def _record_mac(self, seq_num, content_type, version, data) -> bytes:
+        mac = self._mac.copy()
+        mac.update(_ADDITIONAL_DATA.pack(seq_num, content_type, version, len(data)))
+        mac.update(data)
+        return mac.digest()
+
+    def buffer_size(self, length):
+        # Explicit IV, data, MAC and padding, plus the block of slack CBC
+        # update_into() asks for
+        padded = (length + self.mac_size) // AES_BLOCK_SIZE * AES_BLOCK_SIZE + AES_BLOCK_SIZE
+        return 5 + AES_BLOCK_SIZE + padded + AES_BLOCK_SIZE - 1
+
+    def encrypt(self, content_type, data):
+        buf = bytearray(self.buffer_size(len(data)))
+        del buf[self.encrypt_into(content_type, data, buf):]
+        return bytes(buf)
+
+    def encrypt_into(self, content_type, data, buf):
+        seq_num = self.seq_num
+        mac = self._record_mac(seq_num, content_type, TLS12_VERSION, data)
+        tail = mac + _PADDING[AES_BLOCK_SIZE - (len(data) + len(mac)) % AES_BLOCK_SIZE]
+        if self._encryptor is None:
+            self._encryptor = self._cipher.encryptor()
+        encryptor = self._encryptor
+        with memoryview(buf) as view:
+            written = 5
+            written += encryptor.update_into(os.urandom(AES_BLOCK_SIZE), view[written:])
+            written += encryptor.update_into(data, view[written:])
+            written += encryptor.update_into(tail, view[written:])
+            RECORD_HEADER.pack_into(view, 0, content_type, TLS12_VERSION, written - 5)
+        self.seq_num = seq_num + 1
+        return written
+
+    def decrypt(self, payload, record_header):
+        content_type, plaintext = self.decrypt_into(payload, record_header, bytearray(len(payload)))
+        return content_type, plaintext.tobytes()
+
+    def decrypt_into(self, payload, record_header, buf):
+        size = len(payload)
+        if size < 2 * AES_BLOCK_SIZE or size % AES_BLOCK_SIZE:
+            raise TLSDecryptionError(f"Invalid CBC record length: {size}")
+        if self._decryptor is None:
+            self._decryptor = self._cipher.decryptor()
+        payload = memoryview(payload)
+        # Chain from the record's explicit IV; that block's own output is garbage
+        self._decryptor.update(payload[:AES_BLOCK_SIZE])
+        view = memoryview(buf)
+        padded = view[:self._decryptor.update_into(payload[AES_BLOCK_SIZE:], view)]
+
+        padding_length = padded[-1] + 1
+        length = len(padded) - padding_length - self.mac_size
+        if length < 0:
+            raise TLSDecryptionError(f"Invalid TLS padding length: {padding_length}")
+        plaintext = padded[:length]
+        content_type = record_header[0]
+        expected = self._record_mac(self.seq_num, content_type, bytes(record_header[1:3]), plaintext)
+        if not hmac.compare_digest(padded[length:length + self.mac_size], expected):
+            raise TLSMACVerificationError("CBC MAC verification failed")
+        self.seq_num += 1
+        return content_type, plaintext
+
+
+def tls12_cipher_states(
+    cipher_suite: int,
+    *,
+    client_key: bytes,
+    server_key: bytes,
+    client_iv: bytes = b"",
+    server_iv: bytes = b"",
+    client_mac_key: bytes = b"",
+    server_mac_key: bytes = b"",
+) -> Tuple[CipherState, CipherState]:
+    """
+    Build the TLS 1.2 cipher states of a connection from its key block.
+    :return: (client_write_state, server_write_state)
+    """
+    info = get_cipher_info(cipher_suite)
+    if info["is_aead"]:
+        return TLS12GCMState(client_key, client_iv), TLS12GCMState(server_key, server_iv)
+    mac_hash = _MAC_HASHES.get(info["mac"], hashlib.sha1)
+    return (
+        TLS12CBCState(client_key, client_mac_key, mac_hash),
+        TLS12CBCState(server_key, server_mac_key, mac_hash),
+    )
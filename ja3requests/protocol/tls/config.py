@@ -72,6 +72,10 @@ class TlsConfig:
         # Session cache for TLS session resumption
         self._session_cache = None
 
+        # Pre-generated ECDHE key pairs (KeySharePool), None to generate inline
+        self._key_share_pool = None
+        self._ca_certs = None
+
         # HTTP/2 fingerprint settings
         self._h2_settings = None
         self._h2_window_update = None
@@ -245,9 +249,39 @@ class TlsConfig:
 
     @session_cache.setter
     def session_cache(self, cache):
-        """Set session cache for TLS session resumption."""
+        """
+        Set session cache for TLS session resumption: a TLSSessionStore such
+        as the in-memory TLSSessionCache, or SQLiteSessionCache to share
+        sessions between processes.
+        """
         self._session_cache = cache
 
+    @property
+    def key_share_pool(self):
+        """Get the pool of pre-generated ECDHE key pairs, if any."""
+        return self._key_share_pool
+
+    @key_share_pool.setter
+    def key_share_pool(self, pool):
+        """
+        Set a KeySharePool to take ephemeral ECDHE key pairs from instead of
+        generating them during the handshake, or None to generate inline.
+        """
+        self._key_share_pool = pool
+
+    @property
+    def ca_certs(self):
+        """Get the CA bundle server certificates are verified against."""
+        return self._ca_certs
+
+    @ca_certs.setter
+    def ca_certs(self, ca_certs):
+        """
+        Set the CA bundle to verify server certificates against: a PEM file,
+        a directory of PEM files, or PEM bytes. None uses the system bundle.
+        """
+        self._ca_certs = ca_certs
+
     @property
     def h2_settings(self):
         """Get HTTP/2 SETTINGS for H2 fingerprint."""
@@ -277,3 +277,39 @@ class PSKKeyExchangeModesExtension(Extension):
     def encode(self):
         modes_bytes = b"".join(struct.pack("B", m) for m in self.modes)
         return struct.pack("B", len(modes_bytes)) + modes_bytes
+
+
+class PreSharedKeyExtension(Extension):
+    """Pre-Shared Key extension (type 0x0029).
+
+    Offers TLS 1.3 session tickets for resumption. It must be the last
+    extension in the ClientHello, since each binder is an HMAC over the
+    ClientHello truncated just before the binders list.
+    (RFC 8446 Section 4.2.11)
+    """
+
+    extension_type = 0x0029
+
+    def __init__(self, identities, binders):
+        """
+        :param identities: List of (ticket_bytes, obfuscated_ticket_age) tuples.
+        :param binders: List of binder HMACs, one per identity.
+        """
+        self.identities = identities
+        self.binders = binders
+
+    @property
+    def binders_length(self):
+        """Length of the encoded binders list, i.e. what the binder HMAC does not cover."""
+        return 2 + sum(1 + len(binder) for binder in self.binders)
+
+    def encode(self):
+        identities = b"".join(
+            struct.pack("!H", len(identity)) + identity + struct.pack("!I", age)
+            for identity, age in self.identities
+        )
+        binders = b"".join(struct.pack("B", len(binder)) + binder for binder in self.binders)
+        return (
+            struct.pack("!H", len(identities)) + identities
+            + struct.pack("!H", len(binders)) + binders
+        )
@@ -0,0 +1,195 @@
+"""
+ja3requests.protocol.tls.key_pool
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Pre-generated ephemeral ECDHE key pairs for TLS handshakes.
+
+A KeySharePool keeps a bounded queue of fresh key pairs per named group
+and refills it from a background thread, so the TLS 1.3 key_share and
+the TLS 1.2 ClientKeyExchange do not wait for key generation. The thread
+only generates while no key pair has been taken for ``idle_delay``
+seconds: with the GIL, generating during a burst of handshakes would
+delay them instead of the key generation it saves. Every key pair is
+removed from its queue when taken and is used by one handshake only.
+A forked child drops the queues it inherited, since the parent may use
+the same keys.
+"""
+
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Dict, Iterable, Tuple
+
+from ja3requests.protocol.tls.crypto import ECDHEKeyExchange
+from ja3requests.protocol.tls.debug import debug
+
+# Serializes the restart of refill threads in a forked child. Recreated in
+# every child, so a fork taken while it is held cannot leave it locked
+_restart_lock = threading.Lock()
+
+
+def _reset_restart_lock():
+    global _restart_lock  # pylint: disable=global-statement
+    _restart_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_restart_lock)
+
+
+class KeySharePool:
+    """
+    Bounded pool of single-use ECDHE key pairs, refilled in the background.
+
+    Usage::
+
+        config = TlsConfig.from_browser("chrome")
+        config.key_share_pool = KeySharePool(groups=(29, 23), size=64)
+
+    When a queue is empty, :meth:`take` generates a key pair inline, so
+    the pool only ever removes key generation from the handshake, it never
+    blocks one.
+    """
+
+    def __init__(
+        self,
+        groups: Iterable[int] = (29, 23),
+        size: int = 32,
+        refill_below: int = None,
+        idle_delay: float = 0.005,
+    ):
+        """
+        :param groups: Named groups to pre-generate, as TLS IDs (29=x25519, 23=secp256r1, 24, 25).
+        :param size: Maximum number of key pairs kept per group.
+        :param refill_below: Wake the refill thread once a queue is shorter than this
+            (default: half of size).
+        :param idle_delay: Seconds without a take() before the thread generates key pairs.
+        """
+        self._size = size
+        self._refill_below = size // 2 if refill_below is None else refill_below
+        self._idle_delay = idle_delay
+        self._last_take = 0.0
+        self._queues: Dict[int, deque] = {}
+        for group in groups:
+            ECDHEKeyExchange.get_curve(group)  # ValueError for unsupported groups
+            self._queues[group] = deque()
+        self._hits = 0
+        self._misses = 0
+        self._pid = None
+        self._wakeup = None
+        self._thread = None
+        self._closed = False
+        self._start()
+
+    def _start(self):
+        """Start a refill thread for this process, with empty queues."""
+        for queue in self._queues.values():
+            queue.clear()
+        self._wakeup = threading.Event()
+        self._wakeup.set()  # Fill the queues right away
+        self._thread = threading.Thread(
+            target=_refill,
+            args=(weakref.ref(self), self._wakeup),
+            name="ja3requests-key-pool",
+            daemon=True,
+        )
+        self._thread.start()
+        # Wake the thread when the pool is collected, so it can exit
+        weakref.finalize(self, self._wakeup.set)
+        # Set last: other threads in a forked child wait until this is done
+        self._pid = os.getpid()
+
+    @property
+    def running(self) -> bool:
+        """True while the refill thread is alive."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def take(self, group: int) -> Tuple[object, bytes]:
+        """
+        Remove and return a key pair for a named group.
+
+        :param group: TLS named group ID
+        :return: (private_key, public_key_bytes) as from ECDHEKeyExchange.generate_keypair()
+        """
+        if self._pid != os.getpid() and not self._closed:
+            # The queues were copied from the parent process, which may use
+            # the same keys; the refill thread did not survive the fork
+            with _restart_lock:
+                # Only the first thread here restarts it
+                if self._pid != os.getpid() and not self._closed:
+                    self._start()
+
+        self._last_take = time.monotonic()
+        queue = self._queues.get(group)
+        if queue is not None:
+            try:
+                keypair = queue.popleft()
+            except IndexError:
+                keypair = None
+            if len(queue) < self._refill_below:
+                self._wakeup.set()
+            if keypair is not None:
+                self._hits += 1
+                return keypair
+
+        self._misses += 1
+        return ECDHEKeyExchange.generate_keypair(group)
+
+    def fill(self):
+        """Generate key pairs until every queue is full, in the calling thread."""
+        for group, queue in self._queues.items():
+            while len(queue) < self._size and not self._closed:
+                queue.append(ECDHEKeyExchange.generate_keypair(group))
+
+    def _fill_when_idle(self):
+        """Fill the queues one key pair at a time, pausing while take() is being called."""
+        for group, queue in self._queues.items():
+            while len(queue) < self._size and not self._closed:
+                quiet = time.monotonic() - self._last_take
+                if quiet < self._idle_delay:
+                    time.sleep(self._idle_delay - quiet)
+                    continue
+                queue.append(ECDHEKeyExchange.generate_keypair(group))
+
+    def get_stats(self) -> Dict:
+        """
+        Pool statistics.
+
+        :return: Dict with "hits" and "misses" (key pairs generated inline), and
+            "available" mapping each group to its queue length
+        """
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "available": {group: len(queue) for group, queue in self._queues.items()},
+        }
+
+    def close(self):
+        """Stop the refill thread and discard the pre-generated key pairs."""
+        self._closed = True
+        self._wakeup.set()
+        for queue in self._queues.values():
+            queue.clear()
+
+    def __repr__(self):
+        return f"<KeySharePool groups={list(self._queues)} size={self._size}>"
+
+
+def _refill(pool_ref, wakeup):
+    """
+    Refill thread body. Only a weak reference to the pool is held while
+    waiting, so the thread exits once the pool is closed or collected.
+    """
+    try:
+        while True:
+            wakeup.wait()
+            wakeup.clear()
+            pool = pool_ref()
+            if pool is None or pool._closed:  # pylint: disable=protected-access
+                break
+            pool._fill_when_idle()  # pylint: disable=protected-access
+            del pool
+    except Exception as e:  # pylint: disable=broad-except
+        debug(f"Key pool refill stopped: {e}", level=2)
@@ -1,10 +1,11 @@
 """TLS handshake layer base classes and utilities."""
 
+import logging
 import os
 import time
 import struct
 from abc import ABC, abstractmethod
-from ja3requests.protocol.tls.debug import debug
+from ja3requests.protocol.tls.debug import debug, tls_logger
 
 
 class Random:
@@ -372,15 +373,17 @@ class HandShake(ABC):
     def content(self):  # pylint: disable=too-many-branches
         """Build the handshake content from all configured fields."""
         content = b""
+        # Formatting the fields is costly; skip it unless debug logging is on
+        verbose = tls_logger.isEnabledFor(logging.DEBUG)
         if self.version:
             content += self.version
-            if "version" not in self.t:
+            if verbose and "version" not in self.t:
                 debug(f"version: {self.version}", level=2)
                 self.t.append("version")
 
         if self.random:
             content += self.random
-            if "random" not in self.t:
+            if verbose and "random" not in self.t:
                 debug(f"random: {self.random}", level=2)
                 self.t.append("random")
 
@@ -391,7 +394,7 @@ class HandShake(ABC):
                 content += struct.pack("B", len(self.session_id))
                 content += self.session_id
 
-            if "session_id" not in self.t:
+            if verbose and "session_id" not in self.t:
                 debug(f"session id: {self.session_id}", level=2)
                 self.t.append("session_id")
 
@@ -400,20 +403,20 @@ class HandShake(ABC):
                 "!H", len(self.cipher_suites)
             )  # 2 bytes for cipher suites length
             content += self.cipher_suites
-            if "cipher_suites" not in self.t:
+            if verbose and "cipher_suites" not in self.t:
                 debug(f"cipher suites: {self.cipher_suites}", level=2)
                 self.t.append("cipher_suites")
 
         if self.compression_methods:
             content += struct.pack("B", len(self.compression_methods))
             content += self.compression_methods
-            if "compression_methods" not in self.t:
+            if verbose and "compression_methods" not in self.t:
                 debug(f"compression methods: {self.compression_methods}", level=2)
                 self.t.append("compression_methods")
 
         if self.extensions:
             content += self.extensions
-            if "extensions" not in self.t:
+            if verbose and "extensions" not in self.t:
                 debug(f"extensions: {self.extensions}", level=2)
                 self.t.append("extensions")
 
@@ -434,7 +437,8 @@ class HandShake(ABC):
         Raw handshake message without TLS record layer wrapper
         Used for handshake hash calculation
         """
-        return self.handshake_type + self.length() + self.content()
+        content = self.content()
+        return self.handshake_type + struct.pack("!I", len(content))[1:] + content
 
     @property
     def message(self):
@@ -1,6 +1,9 @@
 """TLS ClientHello handshake message layer."""
 
+import random
 import struct
+import threading
+from collections import OrderedDict
 from ja3requests.protocol.tls.layers import HandShake
 from ja3requests.protocol.tls.extensions import (
     Extension,
@@ -8,8 +11,18 @@ from ja3requests.protocol.tls.extensions import (
     SupportedGroupsExtension,
     SignatureAlgorithmsExtension,
     ALPNExtension,
+    SessionTicketExtension,
+    SupportedVersionsExtension,
+    KeyShareExtension,
+    PSKKeyExchangeModesExtension,
 )
 
+#: Maximum number of compiled ClientHello templates kept by client_hello_template()
+MAX_TEMPLATES = 64
+
+_templates = OrderedDict()
+_templates_lock = threading.Lock()
+
 
 class ClientHello(HandShake):
     """
@@ -55,6 +68,7 @@ class ClientHello(HandShake):
         self._alpn_protocols = alpn_protocols or []
         self._use_grease = use_grease
         self._custom_extensions = _extensions or []
+        self._extension_data = b""
 
         # Set cipher suites
         if cipher_suites:
@@ -154,8 +168,198 @@ class ClientHello(HandShake):
             extension_list.append(ALPNExtension(self._alpn_protocols))
 
         if extension_list:
-            extensions_data = b"".join(ext.to_bytes() for ext in extension_list)
-            self._extensions = struct.pack("!H", len(extensions_data)) + extensions_data
+            self.set_extension_data(b"".join(ext.to_bytes() for ext in extension_list))
+
+    def set_extension_data(self, extension_data):
+        """
+        Replace the extensions with already serialized ones.
+
+        :param extension_data: Concatenated extensions, without the list length
+        """
+        self._extension_data = extension_data
+        self._extensions = struct.pack("!H", len(extension_data)) + extension_data if extension_data else None
+
+    def set_pre_shared_key(self, extension):
+        """
+        Append (or replace) the pre_shared_key extension, which RFC 8446
+        requires to be the last extension of the ClientHello.
+
+        :param extension: PreSharedKeyExtension, or None to drop it
+        """
+        extensions_data = self._extension_data
+        if extension is not None:
+            extensions_data += extension.to_bytes()
+        self._extensions = struct.pack("!H", len(extensions_data)) + extensions_data if extensions_data else None
+
+
+class ClientHelloTemplate:
+    """
+    A ClientHello compiled once for a fingerprint.
+
+    Cipher suites and every extension that is the same on each connection
+    are serialized when the template is built. :meth:`build` only fills in
+    what changes per connection: the random, session ID, GREASE value,
+    SNI, key_share and session ticket. The extension objects given to the
+    template are treated as immutable from then on; assign a new object to
+    change one.
+
+    For TLS 1.3 the supported_versions, key_share and psk_key_exchange_modes
+    extensions are added after the configured ones unless already present.
+    """
+
+    #: Extensions serialized on every build instead of once
+    PER_CONNECTION_TYPES = frozenset({
+        SNIExtension.extension_type,
+        SessionTicketExtension.extension_type,
+        KeyShareExtension.extension_type,
+    })
+
+    def __init__(
+        self,
+        tls_version: bytes,
+        cipher_suites=None,
+        *,
+        supported_groups=None,
+        signature_algorithms=None,
+        alpn_protocols=None,
+        use_grease=True,
+        extensions=None,
+        tls13=False,
+    ):
+        # pylint: disable-next=import-outside-toplevel
+        from ja3requests.protocol.tls.cipher_suites.suites import ReservedGrease
+
+        self.version = tls_version
+        self.extensions = tuple(extensions or ())
+        self._grease_values = ReservedGrease.value_list if use_grease and cipher_suites else None
+        self._cipher_suites = b"".join(
+            struct.pack("!H", getattr(suite, 'value', suite)) for suite in cipher_suites or ()
+        )
+
+        entries = [(ext.extension_type, ext) for ext in self.extensions if isinstance(ext, Extension)]
+        types = {ext.extension_type for ext in self.extensions if hasattr(ext, 'extension_type')}
+        if tls13:
+            if SupportedVersionsExtension.extension_type not in types:
+                entries.append((SupportedVersionsExtension.extension_type, SupportedVersionsExtension([0x0304, 0x0303])))
+            if KeyShareExtension.extension_type not in types:
+                entries.append((KeyShareExtension.extension_type, None))
+            if PSKKeyExchangeModesExtension.extension_type not in types:
+                entries.append((PSKKeyExchangeModesExtension.extension_type, PSKKeyExchangeModesExtension([1])))
+            types.update(ext_type for ext_type, _ in entries)
+        if SNIExtension.extension_type not in types:
+            entries.append((SNIExtension.extension_type, None))
+        if supported_groups and SupportedGroupsExtension.extension_type not in types:
+            entries.append((SupportedGroupsExtension.extension_type, SupportedGroupsExtension(supported_groups)))
+        if signature_algorithms and SignatureAlgorithmsExtension.extension_type not in types:
+            entries.append(
+                (SignatureAlgorithmsExtension.extension_type, SignatureAlgorithmsExtension(signature_algorithms))
+            )
+        if alpn_protocols and ALPNExtension.extension_type not in types:
+            entries.append((ALPNExtension.extension_type, ALPNExtension(alpn_protocols)))
+
+        self.needs_key_share = (KeyShareExtension.extension_type, None) in entries
+        self.has_session_ticket = SessionTicketExtension.extension_type in types
+
+        # Serialized runs of fixed extensions, and (type, Extension or None) slots
+        self._layout = []
+        for ext_type, ext in entries:
+            if ext_type in self.PER_CONNECTION_TYPES:
+                self._layout.append((ext_type, ext))
+            elif self._layout and isinstance(self._layout[-1], bytes):
+                self._layout[-1] += ext.to_bytes()
+            else:
+                self._layout.append(ext.to_bytes())
+
+    def build(self, client_random=None, session_id=None, *, server_name=None, key_share=None, session_ticket=None):
+        """
+        Create the ClientHello for one connection.
+
+        :param client_random: 32-byte random, generated if None
+        :param session_id: Session ID to offer, empty if None
+        :param server_name: Host name for the SNI extension, unless the fingerprint has its own
+        :param key_share: KeyShareExtension with this connection's key pair, if needs_key_share
+        :param session_ticket: RFC 5077 ticket for the session_ticket extension, if has_session_ticket
+        :return: ClientHello
+        """
+        parts = []
+        for part in self._layout:
+            if isinstance(part, bytes):
+                parts.append(part)
+                continue
+            ext_type, ext = part
+            if ext_type == SessionTicketExtension.extension_type and session_ticket:
+                ext = SessionTicketExtension(session_ticket)
+            elif ext is None:
+                ext = SNIExtension(server_name) if ext_type == SNIExtension.extension_type and server_name else key_share
+            if ext is not None:
+                parts.append(ext.to_bytes())
+
+        hello = ClientHello(self.version, client_random=client_random)
+        if self._cipher_suites:
+            if self._grease_values:
+                hello.cipher_suites = struct.pack("!H", random.choice(self._grease_values)) + self._cipher_suites
+            else:
+                hello.cipher_suites = self._cipher_suites
+        if session_id:
+            hello.session_id = session_id
+        hello.set_extension_data(b"".join(parts))
+        return hello
+
+
+def client_hello_template(
+    tls_version: bytes,
+    cipher_suites=None,
+    *,
+    supported_groups=None,
+    signature_algorithms=None,
+    alpn_protocols=None,
+    use_grease=True,
+    extensions=None,
+    tls13=False,
+) -> ClientHelloTemplate:
+    """
+    Return the compiled template for a fingerprint, building it on first use.
+
+    Templates are kept in an LRU of MAX_TEMPLATES entries, keyed by the
+    parameter values and the identity of each cipher suite and extension
+    object, so every TlsConfig created from the same browser preset shares
+    one template.
+    Arguments are the same as for :class:`ClientHelloTemplate`.
+    """
+    cipher_suites = tuple(cipher_suites or ())
+    extensions = tuple(extensions or ())
+    # Cipher suite and extension objects compare by identity
+    key = (
+        tls_version,
+        cipher_suites,
+        tuple(supported_groups or ()),
+        tuple(signature_algorithms or ()),
+        tuple(alpn_protocols or ()),
+        bool(use_grease),
+        extensions,
+        tls13,
+    )
+    with _templates_lock:
+        template = _templates.get(key)
+        if template is not None:
+            _templates.move_to_end(key)
+            return template
+
+    template = ClientHelloTemplate(
+        tls_version,
+        cipher_suites,
+        supported_groups=supported_groups,
+        signature_algorithms=signature_algorithms,
+        alpn_protocols=alpn_protocols,
+        use_grease=use_grease,
+        extensions=extensions,
+        tls13=tls13,
+    )
+    with _templates_lock:
+        _templates[key] = template
+        if len(_templates) > MAX_TEMPLATES:
+            _templates.popitem(last=False)
+    return template
 
 
 if __name__ == '__main__':
@@ -5,28 +5,146 @@ TLS Record Layer Implementation
 This module implements TLS record layer encryption and decryption functionality.
 """
 
-import os
-import struct
-import hmac
-import hashlib
-from typing import Tuple
-
-from ja3requests.exceptions import (
-    TLSEncryptionError,
-    TLSDecryptionError,
-    TLSMACVerificationError,
-    TLSKeyError,
-)
-from .crypto import AESCipher
+from typing import List, Optional, Sequence, Tuple
+
+from ja3requests.exceptions import TLSKeyError
+from .cipher_state import MAX_FRAGMENT_LENGTH, CipherState, tls12_cipher_states
 from .debug import debug
 
+#: Largest record payload a peer may send: 2^14 plus expansion (RFC 5246 6.2.3), and a header
+MAX_RECORD_LENGTH = 5 + MAX_FRAGMENT_LENGTH + 2048
+
+#: Most buffers passed to one sendmsg call (the POSIX minimum for IOV_MAX is 16, Linux allows 1024)
+SENDMSG_MAX_BUFFERS = 1024
+
+
+def send_buffers(sock, buffers: Sequence[bytes]):
+    """
+    Send buffers back to back, as one scatter-gather sendmsg call where the
+    socket supports it and as a single sendall of the joined bytes otherwise.
+    Short writes are resumed from where they stopped, so like sendall this
+    returns only once everything has been sent.
+    """
+    sendmsg = getattr(sock, 'sendmsg', None)
+    if sendmsg is None or len(buffers) == 1:
+        sock.sendall(buffers[0] if len(buffers) == 1 else b"".join(buffers))
+        return
+
+    pending: List[memoryview] = [memoryview(buf) for buf in buffers if len(buf)]
+    while pending:
+        try:
+            sent = sendmsg(pending[:SENDMSG_MAX_BUFFERS])
+        except NotImplementedError:
+            # ssl.SSLSocket has sendmsg but refuses it; nothing was sent
+            sock.sendall(b"".join(pending))
+            return
+        while sent:
+            if sent >= len(pending[0]):
+                sent -= len(pending[0])
+                pending.pop(0)
+            else:
+                pending[0] = pending[0][sent:]
+                sent = 0
+
+
+class ReceiveBuffer:
+    """
+    Growable receive buffer over a single bytearray.
+
+    Socket data is written in place with ``recv_into`` and consumed by
+    advancing a read offset; the unread tail is moved to the front only
+    when the free space at the end runs out. Each received byte is
+    therefore copied a bounded number of times, however large the stream.
+    """
+
+    def __init__(self, capacity: int = 65536):
+        self._buf = bytearray(capacity)
+        self._start = 0
+        self._end = 0
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def _reserve(self, size: int):
+        """Make room for at least ``size`` more bytes after the unread data."""
+        if len(self._buf) - self._end >= size:
+            return
+        unread = self._end - self._start
+        if unread + size <= len(self._buf):
+            # Compact in place; the bytearray is never resized, so memoryviews
+            # handed out earlier can't block it
+            with memoryview(self._buf) as view:
+                view[:unread] = view[self._start:self._end]
+        else:
+            grown = bytearray(max(len(self._buf) * 2, unread + size))
+            grown[:unread] = self._buf[self._start:self._end]
+            self._buf = grown
+        self._start, self._end = 0, unread
+
+    def fill(self, sock, size: int = 65536) -> int:
+        """
+        Receive up to ``size`` bytes from ``sock`` directly into the buffer.
+        :return: Number of bytes received, 0 on EOF
+        """
+        self._reserve(size)
+        with memoryview(self._buf) as view:
+            received = sock.recv_into(view[self._end:self._end + size])
+        self._end += received
+        return received
+
+    def extend(self, data):
+        """Append bytes-like ``data``."""
+        self._reserve(len(data))
+        self._buf[self._end:self._end + len(data)] = data
+        self._end += len(data)
+
+    def view(self, size: int, offset: int = 0) -> memoryview:
+        """
+        Zero-copy view of ``size`` unread bytes starting at ``offset``.
+        Valid until the buffer is next filled or extended.
+        """
+        start = self._start + offset
+        return memoryview(self._buf)[start:start + size]
+
+    def consume(self, size: int):
+        """Discard ``size`` unread bytes."""
+        self._start += size
+        if self._start >= self._end:
+            self._start = self._end = 0
+
+    def read(self, size: int = -1) -> bytes:
+        """Remove and return up to ``size`` bytes (all if negative)."""
+        if size < 0 or size > len(self):
+            size = len(self)
+        with self.view(size) as view:
+            data = view.tobytes()
+        self.consume(size)
+        return data
+
+    def readinto(self, buffer) -> int:
+        """Move unread bytes into a writable buffer, returning the count."""
+        size = min(len(buffer), len(self))
+        with self.view(size) as view:
+            buffer[:size] = view
+        self.consume(size)
+        return size
+
+    def find(self, sub: bytes, start: int = 0) -> int:
+        """Index of ``sub`` in the unread data at or after ``start``, or -1."""
+        index = self._buf.find(sub, self._start + start, self._end)
+        return index - self._start if index != -1 else -1
+
 
 class TLSRecordLayer:
-    """TLS Record Layer for encryption/decryption of application data"""
+    """
+    TLS record protection for application data, one CipherState per direction.
+
+    The states come either from session keys (``set_keys``, TLS 1.2) or
+    straight from a finished handshake (``set_states``, TLS 1.2 or 1.3), in
+    which case the sequence numbers carry on from the handshake.
+    """
 
     def __init__(self):
-        self.client_seq_num = 0
-        self.server_seq_num = 0
         self.client_write_key = None
         self.server_write_key = None
         self.client_write_mac_key = None
@@ -34,6 +152,18 @@ class TLSRecordLayer:
         self.client_write_iv = None
         self.server_write_iv = None
         self.cipher_suite = None
+        self.client_state: Optional[CipherState] = None  # Encrypts records sent
+        self.server_state: Optional[CipherState] = None  # Decrypts records received
+
+    @property
+    def client_seq_num(self) -> int:
+        """Sequence number of the next record sent"""
+        return self.client_state.seq_num if self.client_state is not None else 0
+
+    @property
+    def server_seq_num(self) -> int:
+        """Sequence number of the next record received"""
+        return self.server_state.seq_num if self.server_state is not None else 0
 
     def set_keys(
         self,
@@ -54,56 +184,67 @@ class TLSRecordLayer:
         self.client_write_iv = client_write_iv
         self.server_write_iv = server_write_iv
         self.cipher_suite = cipher_suite
+        self.set_states(
+            *tls12_cipher_states(
+                cipher_suite,
+                client_key=client_write_key,
+                server_key=server_write_key,
+                client_iv=client_write_iv or b"",
+                server_iv=server_write_iv or b"",
+                client_mac_key=client_write_mac_key or b"",
+                server_mac_key=server_write_mac_key or b"",
+            )
+        )
+
+    def set_states(self, client_state: CipherState, server_state: CipherState):
+        """Use existing cipher states, e.g. those of a completed handshake"""
+        self.client_state = client_state
+        self.server_state = server_state
+
+    def _write_state(self) -> CipherState:
+        if self.client_state is None:
+            raise TLSKeyError("Cannot encrypt: client write keys not available")
+        return self.client_state
+
+    def _read_state(self) -> CipherState:
+        if self.server_state is None:
+            raise TLSKeyError("Cannot decrypt: server write keys not available")
+        return self.server_state
 
     def encrypt_application_data(self, data: bytes, content_type: int = 23) -> bytes:
         """
         Encrypt application data for sending to server
 
-        :param data: Application data to encrypt
+        :param data: Application data to encrypt, split into records of at most 2^14 bytes
         :param content_type: TLS content type (23 for application data)
-        :return: TLS record with encrypted data
+        :return: TLS records with encrypted data
         """
-        if not self.client_write_key or not self.client_write_mac_key:
-            raise TLSKeyError(
-                "Cannot encrypt: client write key or MAC key not available"
-            )
+        return self._write_state().encrypt_records(content_type, data)
 
-        try:
-            # Calculate MAC
-            mac_data = (
-                struct.pack('!Q', self.client_seq_num)
-                + struct.pack('!BB', 3, 3)
-                + struct.pack('!BH', content_type, len(data))
-                + data
-            )
+    def encrypt_application_records(self, data: bytes, content_type: int = 23) -> List[bytes]:
+        """
+        Encrypt application data as a list of records, for send_buffers
 
-            if self.cipher_suite in [0x002F, 0x0035]:  # SHA-1 based
-                mac = hmac.new(
-                    self.client_write_mac_key, mac_data, hashlib.sha1
-                ).digest()
-            else:  # SHA-256 based
-                mac = hmac.new(
-                    self.client_write_mac_key, mac_data, hashlib.sha256
-                ).digest()
-
-            # Combine data and MAC
-            plaintext = data + mac
-
-            # Encrypt with AES-CBC
-            iv = os.urandom(16)  # Generate random IV for this record
-            ciphertext = AESCipher.encrypt_cbc(plaintext, self.client_write_key, iv)
-
-            # Create TLS record
-            encrypted_data = iv + ciphertext
-            record_header = struct.pack(
-                '!BBBH', content_type, 3, 3, len(encrypted_data)
-            )
+        :param data: Application data to encrypt, split into records of at most 2^14 bytes
+        :param content_type: TLS content type (23 for application data)
+        :return: TLS records in order
+        """
+        return self._write_state().encrypt_record_list(content_type, data)
 
-            self.client_seq_num += 1
-            return record_header + encrypted_data
+    def records_size(self, length: int) -> int:
+        """Buffer size encrypt_application_data_into needs for ``length`` bytes"""
+        return self._write_state().records_size(length)
 
-        except (ValueError, OSError) as e:
-            raise TLSEncryptionError(f"Record layer encryption failed: {e}") from e
+    def encrypt_application_data_into(self, data, buf, content_type: int = 23) -> int:
+        """
+        Encrypt application data into a caller-provided buffer
+
+        :param data: Application data to encrypt, split into records of at most 2^14 bytes
+        :param buf: Writable buffer of at least records_size(len(data)) bytes
+        :param content_type: TLS content type (23 for application data)
+        :return: Bytes written
+        """
+        return self._write_state().encrypt_records_into(content_type, data, buf)
 
     def decrypt_application_data(self, record_data: bytes) -> Tuple[bytes, int]:
         """
@@ -112,60 +253,29 @@ class TLSRecordLayer:
         :param record_data: Complete TLS record including header
         :return: (decrypted_data, content_type)
         """
-        if len(record_data) < 5:
-            raise ValueError("Invalid TLS record: too short")
-
-        # Parse TLS record header
-        content_type = record_data[0]
-        tls_version = record_data[1:3]
-        length = struct.unpack('!H', record_data[3:5])[0]
-        encrypted_data = record_data[5 : 5 + length]
-
-        if not self.server_write_key or not self.server_write_mac_key:
-            raise TLSKeyError(
-                "Cannot decrypt: server write key or MAC key not available"
-            )
+        header, payload = self._split_record(record_data)
+        content_type, data = self._read_state().decrypt(payload, header)
+        return data, content_type
 
-        try:
-            # Decrypt with AES-CBC (first 16 bytes are IV)
-            plaintext_with_mac = AESCipher.decrypt_cbc(
-                encrypted_data[16:], self.server_write_key, encrypted_data[:16]
-            )
-
-            # Determine MAC length and hash algorithm
-            mac_length = 20 if self.cipher_suite in [0x002F, 0x0035] else 32
-            hash_algo = (
-                hashlib.sha1
-                if self.cipher_suite in [0x002F, 0x0035]
-                else hashlib.sha256
-            )
-
-            if len(plaintext_with_mac) < mac_length:
-                raise ValueError("Decrypted data too short for MAC")
-
-            data = plaintext_with_mac[:-mac_length]
-
-            # Verify MAC
-            mac_data = (
-                struct.pack('!Q', self.server_seq_num)
-                + struct.pack('!BB', tls_version[0], tls_version[1])
-                + struct.pack('!BH', content_type, len(data))
-                + data
-            )
-            expected_mac = hmac.new(
-                self.server_write_mac_key, mac_data, hash_algo
-            ).digest()
-
-            if plaintext_with_mac[-mac_length:] != expected_mac:
-                raise TLSMACVerificationError(
-                    "MAC verification failed: record may have been tampered with"
-                )
+    def decrypt_application_data_into(self, record_data, buf) -> Tuple[memoryview, int]:
+        """
+        Decrypt received TLS record into a caller-provided buffer
 
-            self.server_seq_num += 1
-            return data, content_type
+        :param record_data: Complete TLS record including header
+        :param buf: Writable buffer at least as long as the record
+        :return: (memoryview of buf holding the decrypted data, content_type)
+        """
+        header, payload = self._split_record(record_data)
+        content_type, data = self._read_state().decrypt_into(payload, header, buf)
+        return data, content_type
 
-        except (ValueError, OSError) as e:
-            raise TLSDecryptionError(f"Record layer decryption failed: {e}") from e
+    @staticmethod
+    def _split_record(record_data):
+        if len(record_data) < 5:
+            raise ValueError("Invalid TLS record: too short")
+        record_data = memoryview(record_data)
+        length = int.from_bytes(record_data[3:5], 'big')
+        return bytes(record_data[:5]), record_data[5:5 + length]
 
 
 class TLSSocket:
@@ -180,10 +290,18 @@ class TLSSocket:
         """
         self.raw_socket = raw_socket
         self.record_layer = TLSRecordLayer()
-        self.receive_buffer = b''
-
-        # Set up record layer with session keys if available
-        if hasattr(tls_context, '_client_write_key'):
+        # Share the handshake's buffer: records read ahead during it are kept
+        receive_buffer = getattr(tls_context, 'receive_buffer', None)
+        self.receive_buffer = receive_buffer if receive_buffer is not None else ReceiveBuffer()
+        # Records are decrypted into this buffer, so reading allocates nothing per record
+        self._record_buffer = bytearray(MAX_RECORD_LENGTH)
+        self._plaintext = memoryview(b'')  # decrypted data not yet returned
+
+        # Continue the handshake's cipher states, or set up new ones from the session keys
+        write_state = getattr(tls_context, 'write_state', None)
+        if write_state is not None:
+            self.record_layer.set_states(write_state, tls_context.read_state)
+        elif hasattr(tls_context, '_client_write_key'):
             self.record_layer.set_keys(
                 tls_context._client_write_key,
                 tls_context._server_write_key,
@@ -200,49 +318,53 @@ class TLSSocket:
         return self.raw_socket.send(encrypted_record)
 
     def sendall(self, data: bytes):
-        """Send all data over TLS connection"""
-        encrypted_record = self.record_layer.encrypt_application_data(data)
-        return self.raw_socket.sendall(encrypted_record)
+        """Send all data over TLS connection, the records in one vectored send"""
+        send_buffers(self.raw_socket, self.record_layer.encrypt_application_records(data))
 
     def recv(self, bufsize: int) -> bytes:
         """Receive and decrypt data from TLS connection"""
-        while True:
+        while not self._plaintext:
             # Try to parse a complete TLS record from buffer
-            if len(self.receive_buffer) >= 5:
-                record_length = struct.unpack('!H', self.receive_buffer[3:5])[0]
-                total_record_length = 5 + record_length
-
-                if len(self.receive_buffer) >= total_record_length:
-                    # We have a complete record
-                    record = self.receive_buffer[:total_record_length]
-                    self.receive_buffer = self.receive_buffer[total_record_length:]
-
-                    try:
-                        decrypted_data, content_type = (
-                            self.record_layer.decrypt_application_data(record)
-                        )
-                        if content_type == 23:  # Application data
-                            return decrypted_data[:bufsize]
-                        if content_type == 21:  # Alert
-                            debug(f"Received TLS alert: {decrypted_data.hex()}")
-                            continue
+            buffered = len(self.receive_buffer)
+            if buffered >= 5:
+                with self.receive_buffer.view(2, offset=3) as length:
+                    total_record_length = 5 + int.from_bytes(length, 'big')
+
+                if buffered >= total_record_length:
+                    if total_record_length > len(self._record_buffer):
+                        self._record_buffer = bytearray(total_record_length)
+                    # We have a complete record; decrypt it straight from the buffer
+                    with self.receive_buffer.view(total_record_length) as record:
+                        try:
+                            decrypted_data, content_type = (
+                                self.record_layer.decrypt_application_data_into(
+                                    record, self._record_buffer
+                                )
+                            )
+                        except (ValueError, OSError) as e:
+                            debug(f"Failed to decrypt record: {e}")
+                            raise
+                    self.receive_buffer.consume(total_record_length)
+
+                    if content_type == 23:  # Application data
+                        self._plaintext = decrypted_data
+                    elif content_type == 21:  # Alert
+                        debug(f"Received TLS alert: {bytes(decrypted_data).hex()}")
+                    else:
                         debug(f"Received TLS record type {content_type}")
-                        continue
-                    except (ValueError, OSError) as e:
-                        debug(f"Failed to decrypt record: {e}")
-                        return decrypted_data[:bufsize]
+                    continue
 
             # Need more data
             try:
-                raw_data = self.raw_socket.recv(4096)
-                if not raw_data:
-                    break
-                self.receive_buffer += raw_data
+                if not self.receive_buffer.fill(self.raw_socket):
+                    return b''
             except OSError as e:
                 debug(f"Socket receive error: {e}")
-                break
+                return b''
 
-        return b''
+        data = self._plaintext[:bufsize].tobytes()
+        self._plaintext = self._plaintext[bufsize:]
+        return data
 
     def makefile(self, mode='rb'):
         """Create a file-like object for the TLS socket"""
@@ -263,55 +385,49 @@ class TLSSocketFile:
     def __init__(self, tls_socket, mode='rb'):
         self.tls_socket = tls_socket
         self.mode = mode
-        self.buffer = b''
+        self.buffer = ReceiveBuffer()
+
+    def _fill(self) -> bool:
+        data = self.tls_socket.recv(65536)
+        if not data:
+            return False
+        self.buffer.extend(data)
+        return True
 
     def readline(self, size=-1):
         """Read a line from the TLS socket"""
-        while b'\n' not in self.buffer:
-            data = self.tls_socket.recv(4096)
-            if not data:
+        scanned = 0
+        while True:
+            line_end = self.buffer.find(b'\n', scanned)
+            if line_end != -1:
+                line_end += 1
+                break
+            if 0 < size <= len(self.buffer):
+                break
+            # Only the newly received data needs scanning next time
+            scanned = len(self.buffer)
+            if not self._fill():
+                # No newline found, return what we have
+                line_end = len(self.buffer)
                 break
-            self.buffer += data
-
-        if b'\n' in self.buffer:
-            line_end = self.buffer.find(b'\n') + 1
-            line = self.buffer[:line_end]
-            self.buffer = self.buffer[line_end:]
-
-            if size > 0:
-                return line[:size]
-            return line
 
-        # No newline found, return what we have
-        line = self.buffer
-        self.buffer = b''
         if size > 0:
-            return line[:size]
-        return line
+            line_end = min(line_end, size) if line_end != -1 else size
+        return self.buffer.read(line_end)
 
     def read(self, size=-1):
         """Read data from the TLS socket"""
-        if size == -1:
+        if size is None or size < 0:
             # Read all available data
-            result = self.buffer
-            self.buffer = b''
-            while True:
-                data = self.tls_socket.recv(4096)
-                if not data:
-                    break
-                result += data
-            return result
+            while self._fill():
+                pass
+            return self.buffer.read()
 
         # Read specific amount
         while len(self.buffer) < size:
-            data = self.tls_socket.recv(4096)
-            if not data:
+            if not self._fill():
                 break
-            self.buffer += data
-
-        result = self.buffer[:size]
-        self.buffer = self.buffer[size:]
-        return result
+        return self.buffer.read(size)
 
     def close(self):
         """Close the file object"""
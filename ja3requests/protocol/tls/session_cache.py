@@ -3,22 +3,31 @@ ja3requests.protocol.tls.session_cache
 ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
 Thread-safe TLS session cache for session resumption.
-Stores session IDs and master secrets keyed by (host, port).
+Stores TLS 1.2 session IDs and master secrets, and TLS 1.3 session
+tickets, keyed by (host, port).
+
+TLSSessionStore is the interface behind ``TlsConfig.session_cache``;
+TLSSessionCache keeps sessions in process memory, and
+:mod:`ja3requests.protocol.tls.sqlite_session_cache` shares them between
+processes and restarts.
 """
 
 import threading
 import time
-from typing import Dict, Optional, Tuple
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 
 
 class TLSSessionEntry:
-    """A cached TLS session for resumption."""
+    """A cached TLS session for resumption, by session ID and/or RFC 5077 ticket."""
 
-    def __init__(self, session_id, master_secret, cipher_suite, tls_version=None):
+    def __init__(self, session_id, master_secret, cipher_suite, tls_version=None, ticket=None):
         self.session_id = session_id
         self.master_secret = master_secret
         self.cipher_suite = cipher_suite
         self.tls_version = tls_version
+        self.ticket = ticket
         self.created_at = time.time()
 
     def is_expired(self, ttl):
@@ -28,24 +37,129 @@ class TLSSessionEntry:
     def __repr__(self):
         return (
             f"<TLSSessionEntry id={self.session_id[:8].hex()}... "
-            f"cipher=0x{self.cipher_suite:04X}>"
+            f"ticket={bool(self.ticket)} cipher=0x{self.cipher_suite:04X}>"
+        )
+
+
+class TLS13Ticket:
+    """
+    A TLS 1.3 NewSessionTicket (RFC 8446 Section 4.6.1) and the secret
+    needed to resume with it.
+
+    The PSK itself is derived when the ticket is offered:
+    HKDF-Expand-Label(resumption_master_secret, "resumption", nonce, Hash.length).
+    """
+
+    def __init__(
+        self, ticket, nonce, lifetime, age_add, resumption_master_secret, cipher_suite,
+        *, received_at=None,
+    ):
+        self.ticket = ticket
+        self.nonce = nonce
+        self.lifetime = lifetime  # Seconds the server allows the ticket to be used
+        self.age_add = age_add
+        self.resumption_master_secret = resumption_master_secret
+        self.cipher_suite = cipher_suite
+        self.received_at = received_at or time.time()
+
+    def obfuscated_age(self, now=None):
+        """Ticket age in milliseconds plus age_add, modulo 2^32, for the pre_shared_key identity."""
+        age_ms = int(((now or time.time()) - self.received_at) * 1000)
+        return (age_ms + self.age_add) & 0xFFFFFFFF
+
+    def is_expired(self, ttl):
+        """Check if the ticket outlived its server lifetime or the cache TTL."""
+        return (time.time() - self.received_at) > min(self.lifetime, ttl)
+
+    def __repr__(self):
+        return (
+            f"<TLS13Ticket ticket={self.ticket[:8].hex()}... "
+            f"lifetime={self.lifetime} cipher=0x{self.cipher_suite:04X}>"
         )
 
 
-class TLSSessionCache:
+class TLSSessionStore(ABC):
+    """
+    Interface of a TLS session store, set as ``TlsConfig.session_cache``.
+
+    Implementations must be safe to call from several threads. Hosts are
+    compared case-insensitively.
+    """
+
+    #: TLS 1.3 tickets kept per (host, port); servers usually send two
+    MAX_TICKETS_PER_HOST = 4
+
+    @abstractmethod
+    def get(self, host, port) -> Optional[TLSSessionEntry]:
+        """Return the unexpired TLS 1.2 session for (host, port), or None."""
+        raise NotImplementedError("get method must be implemented by subclass.")
+
+    @abstractmethod
+    def put(self, host, port, session_id, master_secret, cipher_suite, tls_version=None, ticket=None):
+        """Store a TLS 1.2 session; ignored without a session ID or ticket."""
+        raise NotImplementedError("put method must be implemented by subclass.")
+
+    @abstractmethod
+    def put_ticket(self, host, port, ticket: TLS13Ticket):
+        """Store a TLS 1.3 ticket, keeping the newest MAX_TICKETS_PER_HOST."""
+        raise NotImplementedError("put_ticket method must be implemented by subclass.")
+
+    @abstractmethod
+    def get_ticket(self, host, port) -> Optional[TLS13Ticket]:
+        """Take (and remove) the newest unexpired TLS 1.3 ticket, or None."""
+        raise NotImplementedError("get_ticket method must be implemented by subclass.")
+
+    @abstractmethod
+    def remove(self, host, port):
+        """Remove the session and tickets of (host, port)."""
+        raise NotImplementedError("remove method must be implemented by subclass.")
+
+    @abstractmethod
+    def clear(self):
+        """Remove all sessions and tickets."""
+        raise NotImplementedError("clear method must be implemented by subclass.")
+
+    @abstractmethod
+    def cleanup_expired(self):
+        """Remove expired sessions and tickets."""
+        raise NotImplementedError("cleanup_expired method must be implemented by subclass.")
+
+    @abstractmethod
+    def record_handshake(self, host, port, offered, resumed):
+        """Count a completed handshake for the per-host resumption statistics."""
+        raise NotImplementedError("record_handshake method must be implemented by subclass.")
+
+    @abstractmethod
+    def get_stats(self) -> Dict:
+        """Return cache contents and the resumption hit rate of each host."""
+        raise NotImplementedError("get_stats method must be implemented by subclass.")
+
+    @abstractmethod
+    def __len__(self):
+        raise NotImplementedError("__len__ method must be implemented by subclass.")
+
+
+class TLSSessionCache(TLSSessionStore):
     """
-    Thread-safe cache for TLS session resumption data.
+    Thread-safe in-memory cache for TLS session resumption data.
 
     Stores session ID and master secret for each (host, port) pair
-    to enable abbreviated TLS handshakes on reconnection.
+    to enable abbreviated TLS handshakes on reconnection, and the most
+    recent TLS 1.3 session tickets of each pair for PSK resumption.
+
+    Entries are kept in insertion order, which is also expiry order, so
+    eviction and TTL cleanup only look at the oldest entries.
     """
 
     def __init__(self, max_size=100, ttl=3600.0):
         """
-        :param max_size: Maximum number of cached sessions.
+        :param max_size: Maximum number of cached sessions (and of hosts with tickets).
         :param ttl: Time-to-live for each session entry in seconds (default: 1 hour).
         """
-        self._cache: Dict[Tuple[str, int], TLSSessionEntry] = {}
+        self._cache: Dict[Tuple[str, int], TLSSessionEntry] = OrderedDict()
+        self._tickets: Dict[Tuple[str, int], List[TLS13Ticket]] = OrderedDict()
+        # (host, port) -> [handshakes, resumption offered, resumed]
+        self._handshakes: Dict[Tuple[str, int], List[int]] = {}
         self._lock = threading.RLock()
         self._max_size = max_size
         self._ttl = ttl
@@ -65,41 +179,129 @@ class TLSSessionCache:
                 return None
             return entry
 
-    def put(self, host, port, session_id, master_secret, cipher_suite, tls_version=None):
+    def put(self, host, port, session_id, master_secret, cipher_suite, tls_version=None, ticket=None):
         """
         Store a TLS session for later resumption.
+
+        :param ticket: RFC 5077 session ticket; the session ID may then be empty.
         """
-        if not session_id or len(session_id) == 0:
+        if not session_id and not ticket:
             return
 
         key = (host.lower(), port)
-        entry = TLSSessionEntry(session_id, master_secret, cipher_suite, tls_version)
+        entry = TLSSessionEntry(session_id or b"", master_secret, cipher_suite, tls_version, ticket)
 
         with self._lock:
-            # Evict oldest entry if cache is full
-            if len(self._cache) >= self._max_size and key not in self._cache:
-                oldest_key = min(self._cache, key=lambda k: self._cache[k].created_at)
-                del self._cache[oldest_key]
-
+            self._pop_expired_sessions()
+            if key in self._cache:
+                self._cache.move_to_end(key)
+            elif len(self._cache) >= self._max_size:
+                self._cache.popitem(last=False)  # Evict the oldest entry
             self._cache[key] = entry
 
+    def _pop_expired_sessions(self):
+        """Drop expired sessions from the old end; stops at the first live one."""
+        while self._cache:
+            oldest = next(iter(self._cache.values()))
+            if not oldest.is_expired(self._ttl):
+                break
+            self._cache.popitem(last=False)
+
+    def put_ticket(self, host, port, ticket: TLS13Ticket):
+        """
+        Store a TLS 1.3 session ticket, keeping the newest MAX_TICKETS_PER_HOST.
+        """
+        if not ticket.ticket or not ticket.lifetime:
+            return  # A lifetime of zero means the ticket must not be used
+
+        key = (host.lower(), port)
+        with self._lock:
+            tickets = self._tickets.get(key)
+            if tickets is None:
+                if len(self._tickets) >= self._max_size:
+                    self._tickets.popitem(last=False)  # Host with the oldest newest-ticket
+                tickets = self._tickets[key] = []
+            else:
+                self._tickets.move_to_end(key)
+            tickets.append(ticket)
+            del tickets[:-self.MAX_TICKETS_PER_HOST]
+
+    def get_ticket(self, host, port) -> Optional[TLS13Ticket]:
+        """
+        Take the newest unexpired TLS 1.3 ticket for the given host and port.
+
+        The ticket is removed: RFC 8446 (Appendix C.4) asks clients not to
+        offer a ticket more than once, and the resumed connection receives
+        fresh ones.
+        """
+        key = (host.lower(), port)
+        with self._lock:
+            tickets = self._tickets.get(key)
+            while tickets:
+                ticket = tickets.pop()
+                if not ticket.is_expired(self._ttl):
+                    return ticket
+            self._tickets.pop(key, None)
+            return None
+
     def remove(self, host, port):
-        """Remove a cached session."""
+        """Remove a cached session and its tickets."""
         key = (host.lower(), port)
         with self._lock:
             self._cache.pop(key, None)
+            self._tickets.pop(key, None)
 
     def clear(self):
-        """Clear all cached sessions."""
+        """Clear all cached sessions and tickets."""
         with self._lock:
             self._cache.clear()
+            self._tickets.clear()
 
     def cleanup_expired(self):
         """Remove all expired entries."""
         with self._lock:
-            expired = [k for k, v in self._cache.items() if v.is_expired(self._ttl)]
-            for k in expired:
-                del self._cache[k]
+            self._pop_expired_sessions()
+            for k in list(self._tickets):
+                self._tickets[k] = [t for t in self._tickets[k] if not t.is_expired(self._ttl)]
+                if not self._tickets[k]:
+                    del self._tickets[k]
+
+    def record_handshake(self, host, port, offered, resumed):
+        """
+        Count a completed handshake for the per-host resumption statistics.
+
+        :param offered: A cached session or ticket was offered in the ClientHello.
+        :param resumed: The server accepted it (abbreviated handshake).
+        """
+        key = (host.lower(), port)
+        with self._lock:
+            counts = self._handshakes.get(key)
+            if counts is None:
+                if len(self._handshakes) >= self._max_size:
+                    del self._handshakes[next(iter(self._handshakes))]
+                counts = self._handshakes[key] = [0, 0, 0]
+            counts[0] += 1
+            counts[1] += bool(offered)
+            counts[2] += bool(resumed)
+
+    def get_stats(self) -> Dict:
+        """Get cache contents and the resumption hit rate of each host."""
+        with self._lock:
+            stats = {
+                "sessions": len(self._cache),
+                "tickets": sum(len(tickets) for tickets in self._tickets.values()),
+                "handshakes": sum(counts[0] for counts in self._handshakes.values()),
+                "resumed": sum(counts[2] for counts in self._handshakes.values()),
+                "hosts": {},
+            }
+            for (host, port), (handshakes, offered, resumed) in self._handshakes.items():
+                stats["hosts"][f"{host}:{port}"] = {
+                    "handshakes": handshakes,
+                    "offered": offered,
+                    "resumed": resumed,
+                    "hit_rate": resumed / handshakes,
+                }
+            return stats
 
     def __len__(self):
         with self._lock:
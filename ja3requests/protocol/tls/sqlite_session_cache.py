@@ -0,0 +1,272 @@
+"""
+ja3requests.protocol.tls.sqlite_session_cache
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+TLS session store in an SQLite database, shared by every process that
+opens the same file and kept across restarts.
+
+The database runs in WAL mode, so readers never block the writer and
+each process only holds a write lock for the few statements of one
+update. Every row stores its expiry time, and expired rows are deleted
+through an index on it at most once per ``prune_interval``.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from ja3requests.protocol.tls.debug import debug
+from ja3requests.protocol.tls.session_cache import (
+    TLS13Ticket,
+    TLSSessionEntry,
+    TLSSessionStore,
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    host TEXT NOT NULL,
+    port INTEGER NOT NULL,
+    session_id BLOB NOT NULL,
+    master_secret BLOB NOT NULL,
+    cipher_suite INTEGER NOT NULL,
+    tls_version BLOB,
+    ticket BLOB,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (host, port)
+);
+CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions (expires_at);
+CREATE TABLE IF NOT EXISTS tickets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    host TEXT NOT NULL,
+    port INTEGER NOT NULL,
+    ticket BLOB NOT NULL,
+    nonce BLOB NOT NULL,
+    lifetime INTEGER NOT NULL,
+    age_add INTEGER NOT NULL,
+    resumption_master_secret BLOB NOT NULL,
+    cipher_suite INTEGER NOT NULL,
+    received_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tickets_origin ON tickets (host, port, id);
+CREATE INDEX IF NOT EXISTS tickets_expires_at ON tickets (expires_at);
+CREATE TABLE IF NOT EXISTS handshakes (
+    host TEXT NOT NULL,
+    port INTEGER NOT NULL,
+    handshakes INTEGER NOT NULL,
+    offered INTEGER NOT NULL,
+    resumed INTEGER NOT NULL,
+    PRIMARY KEY (host, port)
+);
+"""
+
+
+class SQLiteSessionCache(TLSSessionStore):
+    """
+    Cross-process TLS session store backed by an SQLite file.
+
+    Usage::
+
+        config = TlsConfig()
+        config.session_cache = SQLiteSessionCache("/var/tmp/ja3requests-sessions.db")
+
+    Each thread (and each process, including after ``fork``) opens its own
+    connection to the file. The file is created readable by its owner only,
+    since it holds master secrets.
+    """
+
+    def __init__(self, path, max_size=10000, ttl=3600.0, *, timeout=5.0, prune_interval=60.0):
+        """
+        :param path: Database file, created if missing.
+        :param max_size: Maximum number of hosts with a cached session (and with tickets).
+        :param ttl: Time-to-live for each session entry in seconds (default: 1 hour).
+        :param timeout: Seconds to wait for another process's write lock.
+        :param prune_interval: Minimum seconds between deletions of expired rows.
+        """
+        self.path = path
+        self._max_size = max_size
+        self._ttl = ttl
+        self._timeout = timeout
+        self._prune_interval = prune_interval
+        self._last_prune = 0.0
+        self._local = threading.local()
+
+        os.close(os.open(path, os.O_RDWR | os.O_CREAT, 0o600))
+        self._connection()
+
+    def _connection(self):
+        """This thread's connection, reopened after a fork."""
+        db = getattr(self._local, "db", None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.path, timeout=self._timeout, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(_SCHEMA)
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    def _transaction(self):
+        return _Transaction(self._connection())
+
+    def _maybe_prune(self, db, now):
+        """Delete expired rows and trim to max_size, at most once per prune_interval."""
+        if now - self._last_prune < self._prune_interval:
+            return
+        self._last_prune = now
+        db.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+        db.execute("DELETE FROM tickets WHERE expires_at <= ?", (now,))
+        db.execute(
+            "DELETE FROM sessions WHERE rowid IN ("
+            " SELECT rowid FROM sessions ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self._max_size,),
+        )
+        db.execute(
+            "DELETE FROM tickets WHERE (host, port) IN ("
+            " SELECT host, port FROM tickets GROUP BY host, port"
+            " ORDER BY MAX(id) DESC LIMIT -1 OFFSET ?)",
+            (self._max_size,),
+        )
+
+    def get(self, host, port) -> Optional[TLSSessionEntry]:
+        row = self._connection().execute(
+            "SELECT session_id, master_secret, cipher_suite, tls_version, ticket, created_at"
+            " FROM sessions WHERE host = ? AND port = ? AND expires_at > ?",
+            (host.lower(), port, time.time()),
+        ).fetchone()
+        if row is None:
+            return None
+        entry = TLSSessionEntry(row[0], row[1], row[2], row[3], row[4])
+        entry.created_at = row[5]
+        return entry
+
+    def put(self, host, port, session_id, master_secret, cipher_suite, tls_version=None, ticket=None):
+        if not session_id and not ticket:
+            return
+        now = time.time()
+        with self._transaction() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (host.lower(), port, session_id or b"", master_secret, cipher_suite,
+                 tls_version, ticket, now, now + self._ttl),
+            )
+            self._maybe_prune(db, now)
+
+    def put_ticket(self, host, port, ticket: TLS13Ticket):
+        if not ticket.ticket or not ticket.lifetime:
+            return
+        key = (host.lower(), port)
+        with self._transaction() as db:
+            db.execute(
+                "INSERT INTO tickets (host, port, ticket, nonce, lifetime, age_add,"
+                " resumption_master_secret, cipher_suite, received_at, expires_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                key + (ticket.ticket, ticket.nonce, ticket.lifetime, ticket.age_add,
+                       ticket.resumption_master_secret, ticket.cipher_suite, ticket.received_at,
+                       ticket.received_at + min(ticket.lifetime, self._ttl)),
+            )
+            db.execute(
+                "DELETE FROM tickets WHERE host = ? AND port = ? AND id NOT IN ("
+                " SELECT id FROM tickets WHERE host = ? AND port = ? ORDER BY id DESC LIMIT ?)",
+                key + key + (self.MAX_TICKETS_PER_HOST,),
+            )
+            self._maybe_prune(db, time.time())
+
+    def get_ticket(self, host, port) -> Optional[TLS13Ticket]:
+        # Read and delete under one write lock, so two processes never
+        # take the same single-use ticket
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT id, ticket, nonce, lifetime, age_add, resumption_master_secret,"
+                " cipher_suite, received_at FROM tickets"
+                " WHERE host = ? AND port = ? AND expires_at > ? ORDER BY id DESC LIMIT 1",
+                (host.lower(), port, time.time()),
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute("DELETE FROM tickets WHERE id = ?", (row[0],))
+        return TLS13Ticket(*row[1:7], received_at=row[7])
+
+    def remove(self, host, port):
+        key = (host.lower(), port)
+        with self._transaction() as db:
+            db.execute("DELETE FROM sessions WHERE host = ? AND port = ?", key)
+            db.execute("DELETE FROM tickets WHERE host = ? AND port = ?", key)
+
+    def clear(self):
+        with self._transaction() as db:
+            db.execute("DELETE FROM sessions")
+            db.execute("DELETE FROM tickets")
+
+    def cleanup_expired(self):
+        self._last_prune = 0.0
+        with self._transaction() as db:
+            self._maybe_prune(db, time.time())
+
+    def record_handshake(self, host, port, offered, resumed):
+        key = (host.lower(), port)
+        try:
+            with self._transaction() as db:
+                db.execute("INSERT OR IGNORE INTO handshakes VALUES (?, ?, 0, 0, 0)", key)
+                db.execute(
+                    "UPDATE handshakes SET handshakes = handshakes + 1, offered = offered + ?,"
+                    " resumed = resumed + ? WHERE host = ? AND port = ?",
+                    (int(bool(offered)), int(bool(resumed))) + key,
+                )
+        except sqlite3.OperationalError as e:
+            # Statistics must never fail a handshake, e.g. on a busy database
+            debug(f"Could not record handshake statistics: {e}")
+
+    def get_stats(self) -> Dict:
+        db = self._connection()
+        now = time.time()
+        stats = {
+            "sessions": db.execute("SELECT COUNT(*) FROM sessions WHERE expires_at > ?", (now,)).fetchone()[0],
+            "tickets": db.execute("SELECT COUNT(*) FROM tickets WHERE expires_at > ?", (now,)).fetchone()[0],
+            "handshakes": 0,
+            "resumed": 0,
+            "hosts": {},
+        }
+        for host, port, handshakes, offered, resumed in db.execute("SELECT * FROM handshakes"):
+            stats["handshakes"] += handshakes
+            stats["resumed"] += resumed
+            stats["hosts"][f"{host}:{port}"] = {
+                "handshakes": handshakes,
+                "offered": offered,
+                "resumed": resumed,
+                "hit_rate": resumed / handshakes,
+            }
+        return stats
+
+    def close(self):
+        """Close this thread's connection to the database."""
+        db = getattr(self._local, "db", None)
+        if db is not None:
+            db.close()
+            self._local.db = None
+
+    def __len__(self):
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM sessions WHERE expires_at > ?", (time.time(),)
+        ).fetchone()[0]
+
+    def __repr__(self):
+        return f"<SQLiteSessionCache path={self.path!r} max={self._max_size} ttl={self._ttl}>"
+
+
+class _Transaction:
+    """``with`` block running its statements in one IMMEDIATE transaction."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.db.execute("COMMIT" if exc_type is None else "ROLLBACK")
+        return False
@@ -16,6 +16,13 @@ from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
 from cryptography.hazmat.backends import default_backend
 
 from ja3requests.protocol.tls.debug import debug
+from ja3requests.protocol.tls.cipher_state import (
+    RECORD_HEADER,
+    TLS12_VERSION,
+    CipherState,
+    aead_decrypt_into,
+    aead_encrypt_into,
+)
 
 
 # ============================================================================
@@ -141,6 +148,25 @@ class TLS13KeySchedule:
         debug(f"TLS 1.3 Early Secret: {self.early_secret.hex()[:32]}...")
         return self.early_secret
 
+    def compute_binder_key(self):
+        """
+        Compute the binder key for a resumption PSK.
+
+        binder_key = Derive-Secret(early_secret, "res binder", "")
+        """
+        if self.early_secret is None:
+            raise ValueError("TLS 1.3: early secret not computed")
+        return HKDF.derive_secret(self.early_secret, "res binder", b"", self.hash_algo)
+
+    def compute_psk_binder(self, truncated_client_hello):
+        """
+        Compute a PSK binder over a ClientHello truncated before its binders list.
+
+        binder = HMAC(finished_key(binder_key), Transcript-Hash(Truncate(ClientHello)))
+        """
+        finished_key = self.compute_finished_key(self.compute_binder_key())
+        return self.compute_finished_verify_data(finished_key, truncated_client_hello)
+
     def compute_handshake_secret(self, shared_secret, hello_messages=b""):
         """
         Compute Handshake Secret.
@@ -186,6 +212,24 @@ class TLS13KeySchedule:
 
         return self.master_secret
 
+    def compute_resumption_master_secret(self, handshake_messages):
+        """
+        Compute the Resumption Master Secret from ClientHello..client Finished.
+
+        resumption_master_secret = Derive-Secret(master_secret, "res master", messages)
+        """
+        return HKDF.derive_secret(self.master_secret, "res master", handshake_messages, self.hash_algo)
+
+    def compute_resumption_psk(self, resumption_master_secret, ticket_nonce):
+        """
+        Derive the PSK for one NewSessionTicket.
+
+        PSK = HKDF-Expand-Label(resumption_master_secret, "resumption", ticket_nonce, Hash.length)
+        """
+        return HKDF.expand_label(
+            resumption_master_secret, "resumption", ticket_nonce, self.hash_len, self.hash_algo
+        )
+
     def derive_traffic_keys(self, secret, key_length=16, iv_length=12):
         """
         Derive traffic key and IV from a traffic secret.
@@ -263,14 +307,21 @@ class TLS13KeyExchange:
 # TLS 1.3 Record Layer Encryption
 # ============================================================================
 
-class TLS13RecordProtection:
-    """TLS 1.3 record layer encryption/decryption using AES-GCM."""
+class TLS13RecordProtection(CipherState):
+    """
+    TLS 1.3 record protection with AES-GCM or ChaCha20-Poly1305.
+
+    The AEAD instance and the static IV are set up once per traffic key;
+    each record's nonce is the IV XOR the sequence number (RFC 8446, 5.3).
+    """
 
     def __init__(self, key, iv, cipher="aes-gcm"):
         self.key = key
         self.iv = iv
         self.seq_num = 0
         self._cipher_name = cipher
+        self._iv_int = int.from_bytes(iv, "big")
+        self._iv_size = len(iv)
         if cipher == "chacha20-poly1305":
             self._aead = ChaCha20Poly1305(key)
         else:
@@ -278,8 +329,7 @@ class TLS13RecordProtection:
 
     def _compute_nonce(self):
         """Compute per-record nonce: IV XOR sequence number."""
-        seq_bytes = self.seq_num.to_bytes(len(self.iv), byteorder='big')
-        nonce = bytes(a ^ b for a, b in zip(self.iv, seq_bytes))
+        nonce = (self._iv_int ^ self.seq_num).to_bytes(self._iv_size, "big")
         self.seq_num += 1
         return nonce
 
@@ -288,19 +338,11 @@ class TLS13RecordProtection:
         Encrypt a TLS 1.3 record.
 
         TLSInnerPlaintext = plaintext + content_type(1 byte)
-        TLSCiphertext = AES-GCM(nonce, aad=header, plaintext=TLSInnerPlaintext)
+        TLSCiphertext = AEAD(nonce, aad=header, plaintext=TLSInnerPlaintext)
         """
-        # TLSInnerPlaintext: data + content type byte
-        inner = plaintext + struct.pack("B", content_type)
-        nonce = self._compute_nonce()
-
-        # Build header first to use as AAD
-        # Encrypted length = inner length + 16 bytes GCM tag
-        length = len(inner) + 16
-        header = struct.pack("!BHH", 0x17, 0x0303, length)
-
-        encrypted = self._aead.encrypt(nonce, inner, header)
-
+        # Header first, it is the AAD; the 16-byte tag follows the inner plaintext
+        header = RECORD_HEADER.pack(0x17, TLS12_VERSION, len(plaintext) + 17)
+        encrypted = self._aead.encrypt(self._compute_nonce(), b"".join((plaintext, bytes((content_type,)))), header)
         return header + encrypted
 
     def decrypt(self, ciphertext, record_header=None):
@@ -309,23 +351,41 @@ class TLS13RecordProtection:
 
         Returns (content_type, plaintext).
         """
-        nonce = self._compute_nonce()
-        aad = record_header  # AAD is the 5-byte record header in TLS 1.3
-
-        inner = self._aead.decrypt(nonce, ciphertext, aad)
-
-        # Strip padding zeros and extract content type (last non-zero byte)
-        # TLSInnerPlaintext: content + content_type + zeros
-        i = len(inner) - 1
-        while i >= 0 and inner[i] == 0:
-            i -= 1
+        # AAD is the 5-byte record header in TLS 1.3
+        inner = self._aead.decrypt(self._compute_nonce(), ciphertext, record_header)
 
-        if i < 0:
+        # TLSInnerPlaintext: content + content_type + zero padding
+        inner = inner.rstrip(b"\x00")
+        if not inner:
             raise ValueError("TLS 1.3: empty inner plaintext")
-
-        content_type = inner[i]
-        plaintext = inner[:i]
-        return content_type, plaintext
+        return inner[-1], inner[:-1]
+
+    def buffer_size(self, length):
+        # Inner content type byte and the 16-byte tag
+        return 5 + length + 17
+
+    def encrypt_into(self, content_type, data, buf):
+        size = self.buffer_size(len(data))
+        header = RECORD_HEADER.pack(0x17, TLS12_VERSION, size - 5)
+        with memoryview(buf) as view:
+            view[:5] = header
+            aead_encrypt_into(
+                self._aead, self._compute_nonce(), b"".join((data, bytes((content_type,)))), header, view[5:size]
+            )
+        return size
+
+    def decrypt_into(self, payload, record_header, buf):
+        if len(payload) <= 16:
+            raise ValueError("TLS 1.3: record too short")
+        inner = memoryview(buf)[:len(payload) - 16]
+        aead_decrypt_into(self._aead, self._compute_nonce(), payload, record_header, inner)
+
+        end = len(inner)
+        while end and inner[end - 1] == 0:
+            end -= 1
+        if not end:
+            raise ValueError("TLS 1.3: empty inner plaintext")
+        return inner[end - 1], inner[:end - 1]
 
 
 # ============================================================================
@@ -352,12 +412,13 @@ class TLS13Handshake:
     Using the HKDF key schedule, key exchange, and record protection primitives.
     """
 
-    def __init__(self, conn, private_key, key_share_group, client_hello_bytes):
+    def __init__(self, conn, private_key, key_share_group, client_hello_bytes, psk=None):
         """
-        :param conn: Raw TCP socket
+        :param conn: Raw TCP socket, or None when driven sans-IO by ``TLS.handshake_steps``
         :param private_key: ECDHE private key (from ClientHello key_share)
         :param key_share_group: Named group ID used in key_share
         :param client_hello_bytes: Raw ClientHello handshake message (for transcript)
+        :param psk: Resumption PSK offered in the ClientHello's pre_shared_key, if any
         """
         self.conn = conn
         self._private_key = private_key
@@ -368,20 +429,28 @@ class TLS13Handshake:
         self._client_handshake_rp = None  # Record protection for encrypting to server
         self._server_app_rp = None
         self._client_app_rp = None
+        self._server_finished_transcript = None  # CH..server Finished, for application secrets
         self._cipher_suite = None
         self._hash_algo = hashlib.sha256
         self._key_length = 16
         self._cipher_type = "aes-gcm"
+        self._psk = psk
+        self.psk_accepted = False  # Server selected our PSK (psk_dhe_ke resumption)
 
     def process_server_hello(self, server_hello_data):
         """
         Parse ServerHello, extract key_share, compute shared secret,
         and derive handshake traffic keys.
 
-        :param server_hello_data: Raw ServerHello handshake message bytes
+        :param server_hello_data: Raw ServerHello handshake message bytes, either the
+            body alone or the full message including its 4-byte handshake header
         :return: True if successful
         """
         self._transcript += server_hello_data
+        # A ServerHello body starts with legacy_version (0x03, ..), so a leading
+        # 0x02 can only be the handshake type of a full message.
+        if server_hello_data[:1] == b"\x02":
+            server_hello_data = server_hello_data[4:]
 
         # Parse ServerHello to extract cipher suite and key_share
         offset = 0
@@ -432,6 +501,9 @@ class TLS13Handshake:
                         server_group = struct.unpack("!H", ext_data[:2])[0]
                         key_len = struct.unpack("!H", ext_data[2:4])[0]
                         server_public_key = ext_data[4:4 + key_len]
+                elif ext_type == 0x0029 and len(ext_data) == 2:  # pre_shared_key
+                    # We offer a single identity, so only index 0 is valid
+                    self.psk_accepted = self._psk is not None and ext_data == b"\x00\x00"
 
         if server_public_key is None:
             debug("TLS 1.3: No key_share in ServerHello")
@@ -454,7 +526,12 @@ class TLS13Handshake:
 
         # Derive handshake traffic keys
         self._key_schedule = TLS13KeySchedule(self._hash_algo)
-        self._key_schedule.compute_early_secret()
+        if self.psk_accepted:
+            if len(self._psk) != self._key_schedule.hash_len:
+                debug("TLS 1.3: Server accepted a PSK with a different hash")
+                return False
+            debug("TLS 1.3: Server accepted PSK, resuming session")
+        self._key_schedule.compute_early_secret(self._psk if self.psk_accepted else None)
         self._key_schedule.compute_handshake_secret(shared_secret, self._transcript)
 
         # Create record protection for handshake phase
@@ -497,11 +574,46 @@ class TLS13Handshake:
             debug(f"TLS 1.3: Parsed handshake message type={msg_type} len={msg_len}")
         return messages
 
-    def verify_server_finished(self, finished_data):
+    @staticmethod
+    def certificate_list(certificate):
+        """
+        Re-encode a Certificate message body in the TLS 1.2 form the
+        certificate verifier reads: the certificates without their extensions.
+
+        :param certificate: TLS 1.3 Certificate message body
+        :return: 3-byte list length followed by length-prefixed DER certificates
+        """
+        if not certificate:
+            return b""
+        offset = 1 + certificate[0]  # certificate_request_context
+        end = offset + 3 + int.from_bytes(certificate[offset:offset + 3], "big")
+        offset += 3
+        entries = b""
+        while offset + 3 <= min(end, len(certificate)):
+            cert_len = int.from_bytes(certificate[offset:offset + 3], "big")
+            entries += certificate[offset:offset + 3 + cert_len]
+            offset += 3 + cert_len
+            offset += 2 + int.from_bytes(certificate[offset:offset + 2], "big")  # extensions
+        return struct.pack("!I", len(entries))[1:] + entries
+
+    def certificate_verify_content(self, trailing):
+        """
+        The bytes the server's CertificateVerify signs (RFC 8446 section 4.4.3).
+
+        :param trailing: Length of the decrypted handshake bytes from the start
+            of the CertificateVerify message on, which the transcript excludes
+        :return: 64 spaces, the context string and the transcript hash through Certificate
+        """
+        transcript = self._transcript[:len(self._transcript) - trailing]
+        return b"\x20" * 64 + b"TLS 1.3, server CertificateVerify\x00" + self._hash_algo(transcript).digest()
+
+    def verify_server_finished(self, finished_data, trailing=0):
         """
         Verify the server's Finished message.
 
         :param finished_data: The verify_data from server's Finished message
+        :param trailing: Length of the decrypted handshake bytes from the start
+            of the Finished message on, which the transcript excludes
         :return: True if valid
         """
         finished_key = self._key_schedule.compute_finished_key(
@@ -509,7 +621,7 @@ class TLS13Handshake:
         )
         # Transcript up to (but not including) server Finished
         expected = self._key_schedule.compute_finished_verify_data(
-            finished_key, self._transcript
+            finished_key, self._transcript[:len(self._transcript) - trailing]
         )
         return hmac.compare_digest(finished_data, expected)
 
@@ -531,6 +643,8 @@ class TLS13Handshake:
         finished_msg += struct.pack("!I", len(verify_data))[1:]
         finished_msg += verify_data
 
+        # Application traffic secrets are derived from CH..server Finished
+        self._server_finished_transcript = self._transcript
         self._transcript += finished_msg
 
         # Encrypt with client handshake key
@@ -542,7 +656,10 @@ class TLS13Handshake:
 
         :return: (client_app_rp, server_app_rp)
         """
-        self._key_schedule.compute_master_secret(self._transcript)
+        transcript = self._server_finished_transcript
+        if transcript is None:
+            transcript = self._transcript
+        self._key_schedule.compute_master_secret(transcript)
 
         s_key, s_iv = self._key_schedule.derive_traffic_keys(
             self._key_schedule.server_application_traffic_secret, self._key_length
@@ -556,3 +673,20 @@ class TLS13Handshake:
 
         debug("TLS 1.3: Application traffic keys derived")
         return self._client_app_rp, self._server_app_rp
+
+    def resumption_master_secret(self):
+        """
+        Secret from which the PSKs of this connection's NewSessionTickets are
+        derived. Call after ``build_client_finished`` and ``derive_application_keys``.
+        """
+        return self._key_schedule.compute_resumption_master_secret(self._transcript)
+
+    @property
+    def cipher_suite(self):
+        """Cipher suite selected in the ServerHello."""
+        return self._cipher_suite
+
+    @property
+    def key_schedule(self):
+        """Key schedule of this handshake, once the ServerHello was processed."""
+        return self._key_schedule
@@ -0,0 +1,262 @@
+"""
+ja3requests.protocol.tls.trust_store
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+CA trust store and certificate path building.
+
+The CA bundle is parsed on the first verification, not at import, and
+each bundle is loaded once per process (see :func:`get_trust_store`).
+Certificates are indexed by subject name and SubjectKeyIdentifier, so
+finding the candidate issuers of a certificate is a dict lookup however
+many roots the bundle holds.
+"""
+
+import os
+import ssl
+import threading
+import warnings
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from cryptography import x509
+from cryptography.exceptions import InvalidSignature
+from cryptography.utils import CryptographyDeprecationWarning
+from cryptography.hazmat.primitives import hashes
+
+from ja3requests.protocol.tls.debug import debug
+
+#: Longest path tried from the leaf to a trust anchor, in certificates
+MAX_CHAIN_DEPTH = 10
+
+_SHA256 = hashes.SHA256()
+
+_stores: Dict[object, "TrustStore"] = {}
+_stores_lock = threading.Lock()
+
+
+def get_trust_store(ca_certs=None) -> "TrustStore":
+    """
+    Return the process-wide TrustStore for a CA bundle, creating it on first use.
+
+    :param ca_certs: Bundle file or directory path, PEM bytes, or None for the system default
+    :return: TrustStore
+    """
+    with _stores_lock:
+        store = _stores.get(ca_certs)
+        if store is None:
+            store = _stores[ca_certs] = TrustStore(ca_certs)
+        return store
+
+
+def default_ca_path() -> Optional[str]:
+    """The system CA bundle file or directory OpenSSL would use, if any."""
+    paths = ssl.get_default_verify_paths()
+    for path in (paths.cafile, paths.openssl_cafile, paths.capath, paths.openssl_capath):
+        if path and os.path.exists(path):
+            return path
+    return None
+
+
+class CertificateIndex:
+    """Certificates indexed by subject name and SubjectKeyIdentifier."""
+
+    def __init__(self, certificates: Iterable[x509.Certificate] = ()):
+        self._by_subject: Dict[x509.Name, List[x509.Certificate]] = {}
+        self._by_key_id: Dict[bytes, List[x509.Certificate]] = {}
+        self._fingerprints = set()
+        for cert in certificates:
+            self.add(cert)
+
+    def add(self, cert: x509.Certificate):
+        """Index a certificate; duplicates are ignored."""
+        fingerprint = cert.fingerprint(_SHA256)
+        if fingerprint in self._fingerprints:
+            return
+        self._fingerprints.add(fingerprint)
+        self._by_subject.setdefault(cert.subject, []).append(cert)
+        key_id = _subject_key_id(cert)
+        if key_id is not None:
+            self._by_key_id.setdefault(key_id, []).append(cert)
+
+    def __contains__(self, cert: x509.Certificate) -> bool:
+        return cert.fingerprint(_SHA256) in self._fingerprints
+
+    def __len__(self):
+        return len(self._fingerprints)
+
+    def issuers_of(self, cert: x509.Certificate) -> List[x509.Certificate]:
+        """
+        Candidate issuers of cert: those whose SubjectKeyIdentifier matches its
+        AuthorityKeyIdentifier, or whose subject matches its issuer name.
+        Signatures are not checked here.
+        """
+        key_id = _authority_key_id(cert)
+        if key_id is not None and key_id in self._by_key_id:
+            return [c for c in self._by_key_id[key_id] if c.subject == cert.issuer]
+        return list(self._by_subject.get(cert.issuer, ()))
+
+
+class TrustStore:
+    """
+    The trust anchors of one CA bundle, loaded lazily.
+
+    Usage::
+
+        store = get_trust_store()
+        path = store.build_chain(leaf, intermediates)
+    """
+
+    def __init__(self, ca_certs=None):
+        """
+        :param ca_certs: Bundle file or directory path, PEM bytes, or None for the system default
+        """
+        self.ca_certs = ca_certs
+        self._index: Optional[CertificateIndex] = None
+        self._lock = threading.Lock()
+
+    @property
+    def index(self) -> CertificateIndex:
+        """The trust anchors, parsed from the bundle on first access."""
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    with warnings.catch_warnings():
+                        # Some long-lived roots have non-positive serial numbers
+                        warnings.simplefilter("ignore", CryptographyDeprecationWarning)
+                        self._index = CertificateIndex(self._load())
+                    debug(f"Loaded {len(self._index)} trust anchors")
+        return self._index
+
+    def _load(self) -> List[x509.Certificate]:
+        ca_certs = self.ca_certs
+        if isinstance(ca_certs, str) and ca_certs.lstrip().startswith("-----BEGIN"):
+            ca_certs = ca_certs.encode("ascii")
+        if isinstance(ca_certs, bytes):
+            return _load_pem(ca_certs)
+
+        path = ca_certs or default_ca_path()
+        if path is None:
+            debug("No CA bundle found; no certificate can be anchored")
+            return []
+        if os.path.isdir(path):
+            certificates = []
+            for name in sorted(os.listdir(path)):
+                file_path = os.path.join(path, name)
+                if os.path.isfile(file_path):
+                    certificates.extend(_load_pem(_read(file_path)))
+            return certificates
+        return _load_pem(_read(path))
+
+    def __len__(self):
+        return len(self.index)
+
+    def build_chain(
+        self, leaf: x509.Certificate, intermediates: Iterable[x509.Certificate] = ()
+    ) -> Optional[List[x509.Certificate]]:
+        """
+        Find a path from leaf to a trust anchor.
+
+        The intermediates may be in any order, contain unrelated or duplicate
+        certificates, or be incomplete, as long as the missing issuers are
+        trust anchors. Every link's signature is checked, and every issuer
+        must be a CA that is currently valid.
+
+        :param leaf: The server certificate
+        :param intermediates: Other certificates the server sent
+        :return: [leaf, ..., anchor], or None if there is no trusted path
+        """
+        if leaf in self.index:
+            return [leaf]
+        return self._extend([leaf], CertificateIndex(intermediates), _now())
+
+    def _extend(self, path, intermediates, now):
+        cert = path[-1]
+        for anchor in self.index.issuers_of(cert):
+            if _issued_by(cert, anchor, now, trusted=True):
+                return path + [anchor]
+        if len(path) >= MAX_CHAIN_DEPTH:
+            return None
+        for issuer in intermediates.issuers_of(cert):
+            if issuer not in path and _issued_by(cert, issuer, now):
+                chain = self._extend(path + [issuer], intermediates, now)
+                if chain is not None:
+                    return chain
+        return None
+
+
+def _read(path) -> bytes:
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError as e:
+        debug(f"Could not read CA file {path}: {e}")
+        return b""
+
+
+def _load_pem(data: bytes) -> List[x509.Certificate]:
+    if b"-----BEGIN CERTIFICATE-----" not in data:
+        return []
+    try:
+        return x509.load_pem_x509_certificates(data)
+    except ValueError:
+        # One malformed entry: load the others one by one
+        certificates = []
+        for block in data.split(b"-----END CERTIFICATE-----")[:-1]:
+            try:
+                certificates.append(x509.load_pem_x509_certificate(block + b"-----END CERTIFICATE-----\n"))
+            except ValueError as e:
+                debug(f"Skipping malformed CA certificate: {e}")
+        return certificates
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _subject_key_id(cert) -> Optional[bytes]:
+    try:
+        return cert.extensions.get_extension_for_class(x509.SubjectKeyIdentifier).value.digest
+    except (x509.ExtensionNotFound, ValueError):
+        return None
+
+
+def _authority_key_id(cert) -> Optional[bytes]:
+    try:
+        return cert.extensions.get_extension_for_class(x509.AuthorityKeyIdentifier).value.key_identifier
+    except (x509.ExtensionNotFound, ValueError):
+        return None
+
+
+def _is_ca(cert, trusted=False) -> bool:
+    """
+    True if cert may issue certificates: BasicConstraints with ca set, and
+    keyCertSign if it has a KeyUsage.
+
+    :param trusted: cert is a trust anchor from the CA bundle, which may also
+        be an X.509 v1 root; those predate extensions
+    """
+    try:
+        if not cert.extensions.get_extension_for_class(x509.BasicConstraints).value.ca:
+            return False
+    except x509.ExtensionNotFound:
+        return trusted and cert.version == x509.Version.v1
+    except ValueError:
+        return False
+    try:
+        return cert.extensions.get_extension_for_class(x509.KeyUsage).value.key_cert_sign
+    except x509.ExtensionNotFound:
+        return True
+    except ValueError:
+        return False
+
+
+def _issued_by(cert, issuer, now, trusted=False) -> bool:
+    """True if issuer is a currently valid CA that signed cert; trusted marks a trust anchor."""
+    if not _is_ca(issuer, trusted) or not issuer.not_valid_before_utc <= now <= issuer.not_valid_after_utc:
+        return False
+    try:
+        cert.verify_directly_issued_by(issuer)
+        return True
+    except (ValueError, TypeError, InvalidSignature) as e:
+        debug(f"{issuer.subject.rfc4514_string()} did not issue {cert.subject.rfc4514_string()}: {e}", level=2)
+        return False
@@ -44,9 +44,11 @@ class HttpRequest(BaseRequest):
 
         return sock.new_conn()
 
-    def send(self, **kwargs):
-        pool = kwargs.pop('pool', None)
-
+    def create_context(self, **_kwargs):
+        """
+        Build the HTTP context for this request.
+        :return: HTTPContext
+        """
         context = HTTPContext()
         context.set_payload(
             method=self.method,
@@ -60,13 +62,24 @@ class HttpRequest(BaseRequest):
             proxy=self.proxy,
             cookies=self.cookies,
         )
+        return context
+
+    def send(self, **kwargs):
+        pool = kwargs.pop('pool', None)
+        resolver = kwargs.pop('resolver', None)
+
+        context = self.create_context(**kwargs)
+        context.resolver = resolver
         sock = self.create_connection(context, pool=pool)
         sock.send()
-        response = HTTPResponse(sock.conn)
-        response.handle()
-
-        # Return connection to pool if available
-        if pool and hasattr(sock, 'return_to_pool'):
-            sock.return_to_pool()
+        # The connection goes back to the pool once the body has been read
+        release_conn = sock.return_to_pool if pool and hasattr(sock, 'return_to_pool') else None
+        discard_conn = sock.discard if pool and hasattr(sock, 'discard') else None
+        response = HTTPResponse(sock.conn, method=context.method, release_conn=release_conn, discard_conn=discard_conn)
+        try:
+            response.handle()
+        except BaseException:
+            response.close()
+            raise
 
         return response
@@ -44,9 +44,12 @@ class HttpsRequest(BaseRequest):
 
         return sock.new_conn()
 
-    def send(self, **kwargs):
-        pool = kwargs.pop('pool', None)
-
+    def create_context(self, **kwargs):
+        """
+        Build the HTTPS context for this request.
+        :param kwargs:
+        :return: HTTPSContext
+        """
         if kwargs.get("h1", False) is True:
             context = HTTPSContext(protocol="HTTP/1.1")
         else:
@@ -65,13 +68,24 @@ class HttpsRequest(BaseRequest):
             cookies=self.cookies,
             tls_config=self.tls_config,
         )
+        return context
+
+    def send(self, **kwargs):
+        pool = kwargs.pop('pool', None)
+        resolver = kwargs.pop('resolver', None)
+
+        context = self.create_context(**kwargs)
+        context.resolver = resolver
         sock = self.create_connection(context, pool=pool)
         conn = sock.send()
-        response = HTTPSResponse(conn)
-        response.handle()
-
-        # Return connection to pool if available
-        if pool and hasattr(sock, 'return_to_pool'):
-            sock.return_to_pool()
+        # The connection goes back to the pool once the body has been read
+        release_conn = sock.return_to_pool if pool and hasattr(sock, 'return_to_pool') else None
+        discard_conn = sock.discard if pool and hasattr(sock, 'discard') else None
+        response = HTTPSResponse(conn, method=context.method, release_conn=release_conn, discard_conn=discard_conn)
+        try:
+            response.handle()
+        except BaseException:
+            response.close()
+            raise
 
         return response
@@ -10,9 +10,10 @@ import warnings
 from io import IOBase
 from http.cookiejar import CookieJar
 from urllib.parse import urlparse, parse_qs
-from typing import Any, AnyStr, List, Dict, Tuple, Union
+from typing import Any, AnyStr, IO, Iterator, List, Dict, Tuple, Union
 from ja3requests.requests.https import HttpsRequest
 from ja3requests.requests.http import HttpRequest
+from ja3requests.utils import is_stream_body
 from ja3requests.exceptions import (
     NotAllowedRequestMethod,
     MissingScheme,
@@ -38,7 +39,7 @@ class Request:
             Tuple[Tuple[Any, Any]],
             AnyStr,
         ] = None,
-        data: Union[Dict[AnyStr, Any], List, Tuple, AnyStr] = None,
+        data: Union[Dict[AnyStr, Any], List, Tuple, AnyStr, IO, Iterator[AnyStr]] = None,
         headers: Dict[AnyStr, AnyStr] = None,
         cookies: Union[Dict[AnyStr, AnyStr], CookieJar, AnyStr] = None,
         files: Dict[AnyStr, Union[List[Union[AnyStr, IOBase]], IOBase, AnyStr]] = None,
@@ -223,6 +224,10 @@ class Request:
                 RuntimeWarning,
             )
 
+        if is_stream_body(data):
+            # File objects and iterables are sent as read, never form-encoded
+            return data
+
         if not isinstance(data, (dict, list, tuple, bytes, str)):
             raise InvalidData(f"Invalid data: {data!r}")
 
@@ -6,7 +6,6 @@ This module contains response.
 """
 
 import json
-import gzip
 import zlib
 import brotli
 from ja3requests.base import BaseResponse
@@ -17,18 +16,95 @@ from ja3requests.exceptions import InvalidStatusLine, InvalidResponseHeaders, HT
 from ja3requests.protocol.tls.debug import debug
 
 
+class _ContentDecoder:
+    """
+    Incremental decoder for a Content-Encoding.
+    If the data turns out not to be encoded, it is passed through unchanged.
+    """
+
+    def __init__(self, encoding):
+        self._encoding = encoding
+        self._decompressor = None
+        self._passthrough = encoding not in (b"gzip", b"deflate", b"br")
+        self._started = False
+        # Encoded bytes taken before the first decoded output, which are the
+        # body itself if it turns out not to be encoded
+        self._undecoded = bytearray()
+
+    def _new_decompressor(self, data):
+        if self._encoding == b"gzip":
+            return zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self._encoding == b"deflate":
+            # Servers send either zlib-wrapped or raw deflate streams
+            if len(data) >= 2 and data[0] & 0x0F == 8 and (data[0] << 8 | data[1]) % 31 == 0:
+                return zlib.decompressobj()
+            return zlib.decompressobj(-zlib.MAX_WBITS)
+        return brotli.Decompressor()
+
+    def decompress(self, data):
+        """
+        Decode the next piece of the body.
+        :param data: Encoded bytes
+        :return: Decoded bytes, possibly empty
+        """
+        if self._passthrough or not data:
+            return data
+        chunk = data
+        try:
+            if self._decompressor is None:
+                self._decompressor = self._new_decompressor(data)
+            if self._encoding == b"br":
+                decoded = self._decompressor.process(data)
+            else:
+                decoded = self._decompressor.decompress(data)
+                # Concatenated gzip members
+                while self._decompressor.eof and self._decompressor.unused_data:
+                    data = self._decompressor.unused_data
+                    self._decompressor = self._new_decompressor(data)
+                    decoded += self._decompressor.decompress(data)
+        except (OSError, zlib.error, brotli.error) as e:
+            debug(f"Warning: Failed to decompress content with {self._encoding}: {e}")
+            if self._started:
+                raise
+            # Return original body if decompression fails
+            self._passthrough = True
+            data, self._undecoded = bytes(self._undecoded) + chunk, None
+            return data
+        if not self._started:
+            if decoded:
+                self._started = True
+                self._undecoded = None
+            else:
+                self._undecoded += chunk
+        return decoded
+
+    def flush(self):
+        """
+        Return whatever the decompressor still buffers.
+        :return:
+        """
+        if self._passthrough or self._decompressor is None or self._encoding == b"br":
+            return b""
+        return self._decompressor.flush()
+
+
 class HTTPResponse(BaseResponse):
     """
     An HTTP response from socket connection.
     """
 
-    def __init__(self, sock, method=None):
+    def __init__(self, sock, method=None, release_conn=None, discard_conn=None):
         super().__init__()
         self.fp = sock.makefile("rb")
         self._method = method
         self._chunked = False
         self._content_encoding = None
-        self._content_length = 0
+        self._content_length = None
+        # Called once the body has been fully read and the connection is reusable
+        self._release_conn = release_conn
+        # Called instead when the connection cannot be reused: the body was
+        # close-delimited or cut short, or the response was closed unread
+        self._discard_conn = discard_conn
 
     def __repr__(self):
         return (
@@ -40,6 +116,22 @@ class HTTPResponse(BaseResponse):
         self.fp = None
         fp.close()
 
+    def close(self):
+        """
+        Close the response. A connection whose body was not read to its end
+        is discarded, which frees its slot in the pool.
+        :return:
+        """
+        if self.fp is not None:
+            self._close_conn()
+        self._body_abandoned()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:  # pylint: disable=broad-exception-caught
+            pass
+
     def _read_status_line(self):
         line = self.fp.readline(MAX_LINE + 1)
         if len(line) > MAX_LINE:
@@ -108,64 +200,121 @@ class HTTPResponse(BaseResponse):
         Read body from remote connection.
         :return:
         """
-        body = b""
+        return b"".join(self.stream(chunk_size=65536))
 
-        if self.fp is None:
-            return body
+    def stream(self, chunk_size=1024, decode_content=True):
+        """
+        Read the body incrementally from the connection.
 
-        if self._method == "HEAD":
-            self._close_conn()
-            return body
+        Transfer framing (Content-Length, chunked or connection close) and
+        Content-Encoding are decoded as data arrives, so memory stays
+        proportional to chunk_size rather than to the body.
+        :param chunk_size: Maximum number of raw bytes read per step.
+        :param decode_content: Whether to decompress gzip/deflate/br bodies.
+        :yield: bytes chunks
+        """
+        decoder = None
+        if decode_content and self._content_encoding:
+            decoder = _ContentDecoder(self._content_encoding)
 
-        if self._chunked:
-            body = self._read_chunked()
+        for data in self._iter_raw(chunk_size):
+            if decoder is not None:
+                data = decoder.decompress(data)
+            if data:
+                yield data
 
-        if self._content_length > 0:
-            body = self.fp.read(self._content_length)
+        if decoder is not None:
+            data = decoder.flush()
+            if data:
+                yield data
 
-        if self._content_encoding and self._content_encoding != b"":
-            try:
-                if self._content_encoding == b"gzip":
-                    body = gzip.decompress(body)
-                elif self._content_encoding == b"deflate":
-                    try:
-                        body = zlib.decompress(body, -zlib.MAX_WBITS)
-                    except zlib.error:
-                        body = zlib.decompress(body)
-                elif self._content_encoding == b"br":
-                    body = brotli.decompress(body)
-            except (OSError, zlib.error, brotli.error) as e:
-                debug(
-                    f"Warning: Failed to decompress content with {self._content_encoding}: {e}"
-                )
-                # Return original body if decompression fails
+    def _iter_raw(self, chunk_size):
+        """Yield the body with transfer framing removed but still content-encoded."""
+        if self.fp is None:
+            return
 
-        return body
+        if self._method == "HEAD" or self.status_code[:1] == b"1" or self.status_code in (b"204", b"304"):
+            self._body_complete()
+            return
 
-    def _read_chunked(self):
-        chunked_data = b""
+        if self._chunked:
+            complete = yield from self._iter_chunked(chunk_size)
+        elif self._content_length is not None:
+            remaining = self._content_length
+            while remaining > 0:
+                data = self.fp.read(min(remaining, chunk_size))
+                if not data:
+                    break
+                remaining -= len(data)
+                yield data
+            complete = remaining == 0
+        else:
+            # Delimited by connection close, never reusable
+            while True:
+                data = self.fp.read(chunk_size)
+                if not data:
+                    break
+                yield data
+            complete = False
+
+        if complete:
+            self._body_complete()
+        else:
+            self._body_abandoned()
+
+    def _iter_chunked(self, chunk_size):
+        """
+        Yield the data of a chunked body.
+        :return: Whether the terminating chunk and trailers were read
+        """
         while True:
-            chunked_size = self.fp.readline(MAX_LINE + 1).strip()
-            if chunked_size == b"":
+            line = self.fp.readline(MAX_LINE + 1)
+            if not line:
+                return False
+            chunk_size_field = line.strip().split(b";", 1)[0]
+            if chunk_size_field == b"":
                 continue
-            if chunked_size == b"0":
-                break
             try:
-                size = int(chunked_size, 16)
-                chunked_data += self.fp.read(size)
-                # Read the trailing CRLF after chunk data
-                self.fp.readline(MAX_LINE + 1)
+                size = int(chunk_size_field, 16)
             except ValueError:
                 # If we can't parse as hex, this might not be chunked encoding
-                # Read the line as regular content and break
-                debug(f"Warning: Expected hex chunk size, got: {chunked_size}")
-                chunked_data += chunked_size + b"\n"
-                # Read remaining content
-                remaining = self.fp.read()
-                chunked_data += remaining
-                break
-
-        return chunked_data
+                # Yield the line as regular content and read to close
+                debug(f"Warning: Expected hex chunk size, got: {chunk_size_field}")
+                yield chunk_size_field + b"\n"
+                while True:
+                    data = self.fp.read(chunk_size)
+                    if not data:
+                        return False
+                    yield data
+
+            if size == 0:
+                # Skip trailer fields up to the final empty line
+                while self.fp.readline(MAX_LINE + 1) not in (b"\r\n", b"\n", b""):
+                    pass
+                return True
+
+            while size > 0:
+                data = self.fp.read(min(size, chunk_size))
+                if not data:
+                    return False
+                size -= len(data)
+                yield data
+            # Read the trailing CRLF after chunk data
+            self.fp.readline(MAX_LINE + 1)
+
+    def _body_complete(self):
+        """Hand the connection back once the whole body has been read."""
+        release_conn, self._release_conn = self._release_conn, None
+        self._discard_conn = None
+        if release_conn is not None:
+            release_conn()
+
+    def _body_abandoned(self):
+        """Give up a connection whose body did not end in a reusable state."""
+        discard_conn, self._discard_conn = self._discard_conn, None
+        self._release_conn = None
+        if discard_conn is not None:
+            discard_conn()
 
     def handle(self):
         """
@@ -189,7 +338,8 @@ class HTTPResponse(BaseResponse):
             debug(f"Warning: Unsupported transfer encoding: {transfer_encoding}")
             self._chunked = False
 
-        self._content_length = int(headers.get(b"content-length", 0))
+        content_length = headers.get(b"content-length")
+        self._content_length = int(content_length) if content_length is not None else None
 
     @property
     def raw_headers(self):
@@ -335,14 +485,8 @@ class Response(BaseResponse):
         if not self.response or not self.response.fp:
             return
 
-        # Read raw body in chunks (before decompression)
-        # For simplicity, read full body then yield chunks
-        # (true streaming through TLS records is complex)
-        self._body = self.response.read_body() if self.response else b""
         self._body_consumed = True
-        data = self._body
-        for i in range(0, len(data), chunk_size):
-            yield data[i:i + chunk_size]
+        yield from self.response.stream(chunk_size=chunk_size)
 
     def iter_lines(self, chunk_size=512, delimiter=None):
         """
@@ -364,9 +508,9 @@ class Response(BaseResponse):
 
     def close(self):
         """Close the underlying connection and release resources."""
-        if self.response and hasattr(self.response, 'fp') and self.response.fp:
+        if self.response and hasattr(self.response, 'fp'):
             try:
-                self.response._close_conn()
+                self.response.close()
             except (OSError, AttributeError):
                 pass
 
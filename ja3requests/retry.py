@@ -5,6 +5,7 @@ Ja3Requests.retry
 HTTP-level retry with configurable backoff strategy.
 """
 
+import asyncio
 import time
 import random
 
@@ -84,6 +85,13 @@ class HTTPRetry:
         except (ValueError, TypeError):
             return None
 
+    def get_sleep_time(self, response, retry_number):
+        """Seconds to wait before retrying, respecting Retry-After if present."""
+        retry_after = self.get_retry_after(response) if response else None
+        if retry_after is not None:
+            return retry_after
+        return self.get_backoff_time(retry_number)
+
     def sleep_for_retry(self, response, retry_number):
         """Sleep before retrying, respecting Retry-After if present."""
         retry_after = self.get_retry_after(response) if response else None
@@ -93,3 +101,9 @@ class HTTPRetry:
             backoff = self.get_backoff_time(retry_number)
             if backoff > 0:
                 time.sleep(backoff)
+
+    async def async_sleep_for_retry(self, response, retry_number):
+        """Non-blocking sleep_for_retry for use on an asyncio event loop."""
+        seconds = self.get_sleep_time(response, retry_number)
+        if seconds > 0:
+            await asyncio.sleep(seconds)
@@ -20,9 +20,11 @@ from ja3requests.requests.request import Request
 from ja3requests.exceptions import MaxRetriedException
 from ja3requests.protocol.tls.config import TlsConfig
 from ja3requests.pool import ConnectionPool, get_default_pool
+from ja3requests.protocol.resolver import Resolver, get_default_resolver
 from ja3requests.cookies import Ja3RequestsCookieJar, merge_cookies
 from ja3requests.protocol.tls.session_cache import TLSSessionCache
 from ja3requests.retry import HTTPRetry
+from ja3requests.utils import is_stream_body, stream_body_position, without_body_headers
 
 # Preferred clock, based on which one is more accurate on a given system.
 if sys.platform == "win32":
@@ -44,6 +46,7 @@ class Session(BaseSession):
         use_pooling: bool = True,
         hooks: Dict = None,
         retry: HTTPRetry = None,
+        resolver: Optional[Resolver] = None,
     ):
         super().__init__()
         self._tls_config = tls_config or TlsConfig()
@@ -63,6 +66,7 @@ class Session(BaseSession):
                 if event in self.hooks:
                     self.hooks[event].extend(callbacks)
         self._retry = retry
+        self._resolver = resolver if resolver is not None else get_default_resolver()
 
     @property
     def tls_config(self) -> TlsConfig:
@@ -84,6 +88,42 @@ class Session(BaseSession):
         """Set connection pool"""
         self._pool = pool
 
+    @property
+    def resolver(self) -> Resolver:
+        """Get the resolver new connections look host names up with"""
+        return self._resolver
+
+    @resolver.setter
+    def resolver(self, resolver: Resolver):
+        """Set the resolver, e.g. a CachingResolver with a hosts map"""
+        self._resolver = resolver
+
+    def prewarm(self, origins, connections: int = 1, timeout: Optional[float] = None, wait: bool = False):
+        """
+        Open pooled connections to origins ahead of the first requests.
+
+        Connections are opened concurrently in background threads with the
+        session's TlsConfig and resolver; each completes DNS, TCP, the TLS
+        handshake and ALPN, and waits in the pool for a request.
+        :param origins: Origin URLs, e.g. ["https://api.example.com"]
+        :param connections: Connections to open per origin
+        :param timeout: Connect and handshake timeout per connection
+        :param wait: Block until every connection attempt has finished
+        :return: Prewarm handle; is_ready(origin) and status() report readiness
+        """
+        if self._pool is None:
+            raise ValueError("Prewarming needs a session with connection pooling.")
+        handle = self._pool.prewarm(
+            origins,
+            connections,
+            tls_config=self._tls_config,
+            timeout=timeout,
+            resolver=self._resolver,
+        )
+        if wait:
+            handle.wait()
+        return handle
+
     def close(self):
         """Close the session and all pooled connections"""
         if self._pool and self._pool is not get_default_pool():
@@ -293,16 +333,27 @@ class Session(BaseSession):
 
         # Pass connection pool to request
         kwargs['pool'] = self._pool
+        kwargs['resolver'] = self._resolver
 
         stream = kwargs.pop("stream", False)
         retry = self._retry
         method = getattr(self.Request, 'method', 'GET') if self.Request else 'GET'
         max_attempts = 1 + (retry.total if retry and retry.is_retryable_method(method) else 0)
+        # A streamed body is used up by the first attempt: rewind a seekable
+        # file before each retry, and never retry a generator or a pipe
+        body = request.data
+        body_position = None
+        if is_stream_body(body):
+            body_position = stream_body_position(body)
+            if body_position is None:
+                max_attempts = 1
 
         last_response = None
         last_error = None
 
         for attempt in range(max_attempts):
+            if attempt and body_position is not None:
+                body.seek(body_position)
             try:
                 rep = request.send(**kwargs)
                 response = Response(request, rep, stream=stream)
@@ -378,7 +429,8 @@ class Session(BaseSession):
             req = Request(
                 method="GET",
                 url=url,
-                headers=self.Request.headers,
+                # Redirects are followed with a bodiless GET
+                headers=without_body_headers(self.Request.headers),
                 cookies=self._cookies,
                 proxies=self.Request.proxies,
                 tls_config=self._tls_config,
@@ -0,0 +1,327 @@
+"""
+Ja3Requests.sockets.async_sockets
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module of asyncio HTTP/HTTPS Sockets.
+
+The TLS handshake and record protection are the same sans-IO code used by
+the blocking sockets (``TLS.handshake_steps``, ``TLS.encrypt_application_records``
+and ``TLS.decrypt_record``); only the transport is asyncio streams.
+"""
+
+import asyncio
+import io
+import socket
+
+from ja3requests.exceptions import TLSHandshakeError
+from ja3requests.protocol.exceptions import ConnectTimeoutError, ProxyError, ProxyTimeoutError
+from ja3requests.protocol.tls import TLS, HANDSHAKE_SEND
+from ja3requests.protocol.tls.debug import debug
+from ja3requests.sockets.https import h2_response_message, http_response_complete
+from ja3requests.sockets.proxy import check_tunnel_status, proxy_credentials, tunnel_request
+
+
+class _ResponseBuffer:
+    """Socket-like wrapper handing a fully received response to HTTPResponse."""
+
+    def __init__(self, data):
+        self._data = data
+
+    def makefile(self, _mode="rb"):
+        """Return a file object over the response bytes."""
+        return io.BytesIO(self._data)
+
+
+class AsyncHttpSocket:
+    """
+    HTTP connection on asyncio streams
+    """
+
+    scheme = "http"
+
+    def __init__(self, context):
+        self.context = context
+        self.reader = None
+        self.writer = None
+
+    @classmethod
+    def pool_key(cls, context):
+        """Pool key of a connection for context: its origin and the proxy it goes through"""
+        return cls.scheme, context.destination_address, context.port, context.proxy, context.proxy_auth
+
+    @property
+    def key(self):
+        """Pool key of this connection"""
+        return self.pool_key(self.context)
+
+    async def new_conn(self):
+        """
+        Open the TCP connection, through a CONNECT tunnel if the context has a proxy
+        :return: self
+        """
+        host = self.context.destination_address
+        port = self.context.port
+        if self.context.proxy:
+            host, port = self.context.proxy.rsplit(":", 1)
+        debug(f"Connecting to {host}:{port} (asyncio)")
+        try:
+            self.reader, self.writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port, local_addr=self.context.source_address),
+                self.context.connect_timeout,
+            )
+        except asyncio.TimeoutError as err:
+            raise ConnectTimeoutError(f"Connection to {host}:{port} timeout out.") from err
+
+        sock = self.writer.get_extra_info("socket")
+        if sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if self.context.proxy:
+            await self._open_tunnel()
+        return self
+
+    async def _open_tunnel(self):
+        """Ask the HTTP proxy to CONNECT to the destination; the streams then carry the tunnel."""
+        self.writer.write(tunnel_request(self.context, *proxy_credentials(self.context)))
+        try:
+            await self.writer.drain()
+            head = await asyncio.wait_for(self.reader.readuntil(b"\r\n\r\n"), self.context.connect_timeout)
+            check_tunnel_status(head.decode("latin-1"))
+        except asyncio.TimeoutError as err:
+            await self.close()
+            raise ProxyTimeoutError("Proxy server connection time out") from err
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError) as err:
+            await self.close()
+            raise ProxyError("Proxy server closed the connection before opening the tunnel") from err
+        except OSError:
+            await self.close()
+            raise
+
+    def is_reusable(self):
+        """Whether the connection can carry another request"""
+        return (
+            self.writer is not None
+            and not self.writer.is_closing()
+            and not self.reader.at_eof()
+        )
+
+    async def send(self, context=None):
+        """
+        Send the request message and read the complete response.
+        :param context: Context of the request, for connections reused from the pool
+        :return: Socket-like object for HTTPResponse
+        """
+        if context is not None:
+            self.context = context
+        try:
+            return await asyncio.wait_for(self._exchange(), self.context.read_timeout)
+        except asyncio.TimeoutError as err:
+            raise ConnectionError("Read timed out") from err
+
+    async def _exchange(self):
+        self.writer.write(self.context.message)
+        await self.writer.drain()
+        for piece in self.context.iter_body_pieces():
+            self.writer.write(piece)
+            await self.writer.drain()
+
+        data = bytearray()
+        while not http_response_complete(data, self.context.method):
+            chunk = await self.reader.read(65536)
+            if not chunk:
+                break
+            data += chunk
+
+        if not data:
+            raise ConnectionError("No valid HTTP response received from server")
+        return _ResponseBuffer(data)
+
+    async def close(self):
+        """Close the connection"""
+        writer, self.writer = self.writer, None
+        if writer is None:
+            return
+        try:
+            writer.close()
+            await writer.wait_closed()
+        except (OSError, ConnectionError):
+            pass
+
+
+class AsyncHttpsSocket(AsyncHttpSocket):
+    """
+    HTTPS connection on asyncio streams with a JA3-fingerprinted TLS handshake
+    """
+
+    scheme = "https"
+
+    def __init__(self, context):
+        super().__init__(context)
+        self.tls = None
+        self._h2 = None
+
+    async def new_conn(self):
+        await super().new_conn()
+
+        host = self.context.destination_address
+        port = self.context.port
+
+        tls_config = getattr(self.context, 'tls_config', None)
+        handshake_timeout = getattr(self.context, 'connect_timeout', None)
+        session_cache = getattr(tls_config, 'session_cache', None) if tls_config else None
+        tls = TLS(
+            None,
+            handshake_timeout=handshake_timeout,
+            session_cache=session_cache,
+            server_host=host,
+            server_port=port,
+        )
+
+        if tls_config and not getattr(tls_config, 'server_name', None):
+            # Default SNI to the host without leaking it into the shared config,
+            # which concurrent connections to other hosts also read
+            tls_config.server_name = host
+            try:
+                tls.set_payload(tls_config=tls_config)
+            finally:
+                tls_config.server_name = None
+        else:
+            tls.set_payload(tls_config=tls_config)
+
+        try:
+            # A None timeout waits as long as the handshake takes, like the TCP connect
+            handshake_success = await asyncio.wait_for(self._handshake(tls), handshake_timeout)
+        except asyncio.TimeoutError as err:
+            await self.close()
+            raise ConnectionError(f"TLS handshake with {host}:{port} timed out") from err
+        except TLSHandshakeError:
+            await self.close()
+            raise
+        except Exception as e:
+            debug(f"TLS Handshake failed: {e}")
+            await self.close()
+            raise ConnectionError(f"TLS handshake failed: {e}") from e
+
+        if not handshake_success:
+            await self.close()
+            raise ConnectionError(
+                "TLS handshake failed - server rejected the connection"
+            )
+
+        self.tls = tls
+        debug("TLS handshake completed, ready for encrypted HTTP communication")
+        return self
+
+    async def _handshake(self, tls):
+        """Drive the sans-IO handshake over the asyncio streams."""
+        steps = tls.handshake_steps()
+        result = None
+        try:
+            while True:
+                op, data = steps.send(result)
+                if op == HANDSHAKE_SEND:
+                    self.writer.write(data)
+                    await self.writer.drain()
+                    result = None
+                else:
+                    result = await self._read_record()
+        except StopIteration as stop:
+            return bool(stop.value)
+
+    async def _read_record(self):
+        """Read one TLS record as (record_type, header, payload), or None on EOF."""
+        try:
+            header = await self.reader.readexactly(5)
+            payload = await self.reader.readexactly(int.from_bytes(header[3:5], 'big'))
+        except asyncio.IncompleteReadError:
+            return None
+        return header[0], header, payload
+
+    async def _read_application_data(self):
+        """
+        Read records until one carries application data.
+        :return: Decrypted bytes, or b"" once the peer closed or alerted
+        """
+        while True:
+            record = await self._read_record()
+            if record is None:
+                return b""
+
+            content_type, plaintext = self.tls.decrypt_record(*record)
+            if content_type == 0x17:
+                if plaintext:
+                    return plaintext
+            elif content_type == 0x15:  # Alert
+                if len(plaintext) >= 2:
+                    debug(f"TLS alert: level={plaintext[0]}, desc={plaintext[1]}")
+                    if plaintext[0] == 2 or plaintext[1] == 0:
+                        return b""
+            else:
+                debug("Received post-handshake message, skipping")
+
+    def _write_encrypted(self, data):
+        # writelines lets the transport send the records without joining them
+        self.writer.writelines(self.tls.encrypt_application_records(data))
+
+    async def _exchange(self):
+        if getattr(self.tls, '_negotiated_protocol', None) == 'h2':
+            return await self._exchange_h2()
+
+        self._write_encrypted(self.context.message)
+        await self.writer.drain()
+        # A file or iterable body is encrypted piece by piece as it is read
+        for piece in self.context.iter_body_pieces():
+            self._write_encrypted(piece)
+            await self.writer.drain()
+
+        data = bytearray()
+        while not http_response_complete(data, self.context.method):
+            chunk = await self._read_application_data()
+            if not chunk:
+                break
+            data += chunk
+
+        if not data:
+            raise ConnectionError("No valid HTTP response received from server")
+        return _ResponseBuffer(data)
+
+    async def _exchange_h2(self):
+        """Send the request as an HTTP/2 stream and wait for its response."""
+        from ja3requests.protocol.h2.connection import H2Connection  # pylint: disable=import-outside-toplevel
+
+        tls_config = getattr(self.context, 'tls_config', None)
+        if self._h2 is None:
+            h2_settings = getattr(tls_config, 'h2_settings', None) if tls_config else None
+            h2_window = getattr(tls_config, 'h2_window_update', None) if tls_config else None
+            self._h2 = H2Connection(self._write_encrypted, None, settings=h2_settings)
+            self._h2.initiate(
+                window_update_increment=int(h2_window) if h2_window else None
+            )
+
+        # Building the HTTP/1.1 message finalises the body and its headers
+        _ = self.context.message
+        body = self.context.body
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        headers = [(name, str(value)) for name, value in (self.context.headers or {}).items()]
+
+        stream_id = self._h2.send_request(
+            self.context.method,
+            self.context.destination_address,
+            self.context.path,
+            headers=headers,
+            body=body,
+        )
+        await self.writer.drain()
+
+        while not self._h2.stream_complete(stream_id):
+            data = await self._read_application_data()
+            if not data:
+                raise ConnectionError("HTTP/2 connection closed before the response completed")
+            self._h2.receive_data(data)
+            await self.writer.drain()
+
+        resp_headers, resp_body = self._h2.pop_response(stream_id)
+
+        if not resp_headers:
+            raise ConnectionError(f"HTTP/2 stream {stream_id} was reset by the server")
+        return _ResponseBuffer(h2_response_message(resp_headers, resp_body))
@@ -26,16 +26,27 @@ class HttpSocket(BaseSocket):
 
         # Try to get connection from pool
         if self._pool:
-            pooled_conn = self._pool.get_connection(host, port, "http")
+            pooled_conn = self._pool.get_connection(
+                host, port, "http", timeout=self._pool.checkout_timeout
+            )
             if pooled_conn and pooled_conn.conn:
                 debug(f"Reusing pooled HTTP connection to {host}:{port}")
                 self.conn = pooled_conn.conn
                 self._pooled_conn = pooled_conn
                 self._reused = True
                 return self
+            # A slot reserved under max_connections_per_host (conn is None)
+            # is filled by the connection opened below
+            self._pooled_conn = pooled_conn
 
         # Create new connection
-        self.conn = self._new_conn(host, port)
+        try:
+            self.conn = self._new_conn(host, port)
+        except BaseException:
+            if self._pooled_conn is not None:
+                self._pool.discard_connection(self._pooled_conn)
+                self._pooled_conn = None
+            raise
         self._reused = False
         return self
 
@@ -44,19 +55,40 @@ class HttpSocket(BaseSocket):
         Connection send message
         :return:
         """
-        read_timeout = getattr(self.context, 'read_timeout', None)
-        if read_timeout is not None:
-            self.conn.settimeout(read_timeout)
-        self.conn.sendall(self.context.message)
+        try:
+            read_timeout = getattr(self.context, 'read_timeout', None)
+            if read_timeout is not None:
+                self.conn.settimeout(read_timeout)
+            self.conn.sendall(self.context.message)
+            self._send_body_stream()
+        except BaseException:
+            self.discard()
+            raise
         return self.conn
 
+    def warm(self):
+        """
+        Open a new connection and leave it idle in the pool, so a later
+        request skips the connect.
+        :return: 'http/1.1'
+        """
+        host = self.context.destination_address
+        port = self.context.port
+
+        self.conn = self._new_conn(host, port)
+        if not self._pool.put_connection(host, port, "http", self.conn):
+            self.close()
+            raise ConnectionError(f"Connection pool is full, not keeping {host}:{port}")
+        self.conn = None
+        return "http/1.1"
+
     def return_to_pool(self):
         """Return connection to pool for reuse"""
         if self._pool and self.conn:
             host = self.context.destination_address
             port = self.context.port
 
-            if self._reused and self._pooled_conn:
+            if self._pooled_conn is not None:
                 success = self._pool.put_connection(
                     host, port, "http", self.conn, pooled_conn=self._pooled_conn
                 )
@@ -70,6 +102,13 @@ class HttpSocket(BaseSocket):
             else:
                 self.close()
 
+    def discard(self):
+        """Close a connection that cannot be reused and free the pool slot it held"""
+        pooled_conn, self._pooled_conn = self._pooled_conn, None
+        if pooled_conn is not None:
+            self._pool.discard_connection(pooled_conn)
+        self.close()
+
     def close(self):
         """Close the connection"""
         try:
@@ -5,25 +5,231 @@ Ja3Requests.sockets.https
 This module of HTTPS Socket.
 """
 
-import hashlib
-import hmac
-import os
+import io
 import socket
-import struct
-import time
-
-from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 
 from ja3requests.base import BaseSocket
-from ja3requests.exceptions import (
-    TLSDecryptionError,
-    TLSKeyError,
-    TLSMACVerificationError,
-)
+from ja3requests.exceptions import TLSHandshakeError
 from ja3requests.protocol.tls import TLS
-from ja3requests.protocol.tls.crypto import AESCipher
 from ja3requests.protocol.tls.debug import debug
+from ja3requests.protocol.tls.record_layer import send_buffers
+
+
+def parse_content_length(headers):
+    """Parse Content-Length header from raw HTTP headers, or None if absent"""
+    try:
+        headers_str = headers.decode('utf-8', errors='ignore')
+        for line in headers_str.split('\r\n'):
+            if line.lower().startswith('content-length:'):
+                return int(line.split(':', 1)[1].strip())
+    except (ValueError, UnicodeDecodeError):
+        pass
+    return None
+
+
+def h2_response_head(resp_headers, content_length=None):
+    """
+    Render the head of an HTTP/2 response as an HTTP/1.1 message for HTTPResponse.
+
+    :param resp_headers: Decoded (name, value) header list, pseudo-headers included
+    :param content_length: Body length to declare instead of the server's
+        content-length; with neither, the body runs until the stream ends
+    :return: bytes
+    """
+    status = "200"
+    lines = []
+    for name, value in resp_headers:
+        if name == ":status":
+            status = value
+        elif name == "content-length":
+            if content_length is None:
+                content_length = value
+        elif not name.startswith(":"):
+            lines.append(f"{name}: {value}\r\n")
+    if content_length is not None:
+        lines.append(f"Content-Length: {content_length}\r\n")
+    return (f"HTTP/1.1 {status} OK\r\n" + "".join(lines) + "\r\n").encode()
+
+
+def h2_response_message(resp_headers, resp_body):
+    """
+    Render a fully received HTTP/2 response as an HTTP/1.1 message for HTTPResponse.
+
+    :param resp_headers: Decoded (name, value) header list, pseudo-headers included
+    :param resp_body: Response body bytes
+    :return: bytes
+    """
+    return h2_response_head(resp_headers, len(resp_body)) + resp_body
+
+
+def http_response_complete(data, method=None):
+    """
+    Whether ``data`` holds a complete HTTP/1.1 response.
+
+    Responses without Content-Length or chunked framing are delimited by
+    connection close, so they are never complete here. Only the head is
+    copied, so checking a growing bytearray after every read stays linear.
+    """
+    header_end = data.find(b'\r\n\r\n')
+    if header_end == -1:
+        return False
+
+    headers_part = bytes(data[:header_end + 4])
+    body_length = len(data) - len(headers_part)
+    if method == "HEAD" or headers_part[9:12] in (b"204", b"304"):
+        return True
+
+    if b'transfer-encoding: chunked' in headers_part.lower():
+        return body_length >= 5 and data.endswith(b'0\r\n\r\n')
+
+    content_length = parse_content_length(headers_part)
+    if content_length is not None:
+        return body_length >= content_length
+    return False
+
+
+class TLSRecordStream(io.RawIOBase):
+    """
+    Raw readable stream of the decrypted application data on a TLS connection.
+
+    Socket data lands in the connection's ReceiveBuffer via recv_into and
+    records are decrypted from memoryviews of it as the caller asks for
+    data: a read returns the plaintext of every complete record already
+    received that fits, and only reads the socket when none is, so a
+    response body is never buffered whole.
+    Post-handshake messages are skipped; close_notify, a fatal alert or EOF
+    end the stream.
+    """
+
+    def __init__(self, conn, tls):
+        super().__init__()
+        self._conn = conn
+        self._tls = tls
+        self._buffer = tls.receive_buffer
+        self._pending = memoryview(b"")
+        self._eof = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending:
+            if self._eof:
+                return 0
+            self._pending = memoryview(self._read_application_data())
+
+        # Go on with the records already received while there is room, so a
+        # large read needs no more calls than there are recv_into batches
+        size = 0
+        while True:
+            take = min(len(buffer) - size, len(self._pending))
+            buffer[size:size + take] = self._pending[:take]
+            self._pending = self._pending[take:]
+            size += take
+            if size == len(buffer) or self._eof or not self.has_buffered_record():
+                return size
+            self._pending = memoryview(self._read_application_data())
+
+    def has_buffered_record(self):
+        """Whether a complete record is already in the receive buffer."""
+        buffered = len(self._buffer)
+        if buffered < 5:
+            return False
+        with self._buffer.view(2, offset=3) as length:
+            return buffered >= 5 + int.from_bytes(length, 'big')
+
+    def read_record(self):
+        """
+        Read and decrypt the next record.
+        :return: (content_type, plaintext), or None if the connection closed
+        """
+        while not self.has_buffered_record():
+            if not self._buffer.fill(self._conn):
+                return None
+
+        with self._buffer.view(5) as view:
+            header = view.tobytes()
+        length = int.from_bytes(header[3:5], 'big')
+        with self._buffer.view(length, offset=5) as payload:
+            content_type, plaintext = self._tls.decrypt_record(header[0], header, payload)
+            if isinstance(plaintext, memoryview):
+                # Unprotected records come back as the view itself
+                plaintext = plaintext.tobytes()
+        self._buffer.consume(5 + length)
+        return content_type, plaintext
+
+    def _read_application_data(self):
+        """Read records until one carries application data, or b"" at the end of the stream."""
+        record = self.read_record()
+        if record is None:
+            self._eof = True
+            return b""
+
+        content_type, plaintext = record
+        if content_type == 0x17:
+            return plaintext
+        if content_type == 0x15 and len(plaintext) >= 2:
+            debug(f"TLS alert: level={plaintext[0]}, desc={plaintext[1]}")
+            # Fatal alert, or close notify (desc=0) means server is done
+            if plaintext[0] == 2 or plaintext[1] == 0:
+                self._eof = True
+        elif content_type == 0x16:
+            debug("Received post-handshake message, skipping")
+        return b""
+
+
+class H2ResponseStream(io.RawIOBase):
+    """
+    Raw readable stream of one HTTP/2 response, rendered as HTTP/1.1.
+
+    The head comes first, then the body as its DATA frames are read from
+    the connection, so a large body is never buffered whole. ``on_close``
+    runs once, when the body has ended or the stream is closed before
+    that; closing it early cancels the stream with RST_STREAM.
+    """
+
+    def __init__(self, h2, stream_id, head, on_close):
+        super().__init__()
+        self._h2 = h2
+        self._stream_id = stream_id
+        self._pending = memoryview(head)
+        self._on_close = on_close
+        self._finished = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending:
+            if self._finished:
+                return 0
+            data, ended = self._h2.read_data(self._stream_id)
+            self._pending = memoryview(data)
+            if ended:
+                self._finish(reset=False)
+
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+    def _finish(self, reset):
+        """Release the stream once, cancelling it first if its body was not read to the end."""
+        if self._finished:
+            return
+        self._finished = True
+        try:
+            if reset:
+                self._h2.reset_stream(self._stream_id)
+        finally:
+            self._on_close()
+
+    def close(self):
+        if not self.closed:
+            try:
+                self._finish(reset=True)
+            finally:
+                super().close()
 
 
 class HttpsSocket(BaseSocket):
@@ -36,23 +242,129 @@ class HttpsSocket(BaseSocket):
         self._pool = pool
         self._pooled_conn = None  # Reference to pooled connection wrapper
         self._reused = False  # Whether connection was reused from pool
+        self._h2 = None  # H2Connection when ALPN negotiated h2
+        self._h2_response = None  # H2ResponseStream of the request sent on _h2
 
     def new_conn(self):
         host = self.context.destination_address
         port = self.context.port
 
-        # Try to get connection from pool
-        if self._pool:
-            pooled_conn = self._pool.get_connection(host, port, "https")
-            if pooled_conn and pooled_conn.conn and pooled_conn.tls:
+        if not self._pool:
+            return self._connect(host, port)
+
+        # A multiplexed h2 connection can take this request alongside others
+        if self._checkout_h2(host, port) or self._checkout_h1(host, port):
+            return self
+
+        if self._pool.get_origin_protocol(host, port, "https") not in (None, "h2"):
+            return self._connect(host, port)
+
+        # The origin speaks (or may speak) h2: let one thread handshake while
+        # concurrent requests wait and then share its connection. Only that
+        # is worth waiting for, so the lock goes once ALPN shows http/1.1
+        connect_lock = self._pool.connect_lock(host, port, "https")
+        connect_lock.acquire()
+        try:
+            reserved = self._pooled_conn
+            if self._checkout_h2(host, port):
+                if reserved is not None:
+                    self._pool.discard_connection(reserved)
+                return self
+            if self._pool.get_origin_protocol(host, port, "https") not in (None, "h2"):
+                # Another thread has meanwhile found the origin speaks HTTP/1.1
+                connect_lock.release()
+                connect_lock = None
+                return self._connect(host, port)
+
+            negotiated = self._open(host, port)
+            if negotiated != 'h2':
+                connect_lock.release()
+                connect_lock = None
+            else:
+                self._start_h2(host, port)
+            return self
+        finally:
+            if connect_lock is not None:
+                connect_lock.release()
+
+    def _checkout_h2(self, host, port):
+        """
+        Take a stream on a pooled HTTP/2 connection.
+        :return: True if this socket now uses a shared h2 connection
+        """
+        pooled_conn = self._pool.get_h2_connection(host, port, "https")
+        if pooled_conn is None:
+            return False
+
+        debug(f"Multiplexing on pooled h2 connection to {host}:{port}")
+        self.conn = pooled_conn.conn
+        self.tls = pooled_conn.tls
+        self._h2 = pooled_conn.h2_connection
+        self._pooled_conn = pooled_conn
+        self._reused = True
+        return True
+
+    def _checkout_h1(self, host, port):
+        """
+        Take an idle HTTP/1.1 connection from the pool.
+        :return: True if a pooled connection is reused
+        """
+        while True:
+            pooled_conn = self._pool.get_connection(
+                host, port, "https", timeout=self._pool.checkout_timeout
+            )
+            if pooled_conn is not None and pooled_conn.conn is None:
+                # A slot reserved under max_connections_per_host; _connect fills it
+                self._pooled_conn = pooled_conn
+                return False
+            if not (pooled_conn and pooled_conn.conn and pooled_conn.tls):
+                return False
+
+            self.conn = pooled_conn.conn
+            self.tls = pooled_conn.tls
+            # Post-handshake records (e.g. TLS 1.3 NewSessionTicket) or a
+            # close_notify may be waiting; the pool's checkout probe (or its
+            # reaper) saw them arrive, so a quiet connection is used as it is
+            if not pooled_conn.pending_data or self._process_pending_records():
                 debug(f"Reusing pooled connection to {host}:{port}")
-                self.conn = pooled_conn.conn
-                self.tls = pooled_conn.tls
                 self._pooled_conn = pooled_conn
                 self._reused = True
-                return self
+                return True
+            debug(f"Pooled connection to {host}:{port} was closed by the server")
+            self._pool.discard_connection(pooled_conn)
+            self.conn = None
+            self.tls = None
+
+    def _connect(self, host, port):
+        """Open a new TCP connection and run the TLS handshake."""
+        if self._open(host, port) == 'h2':
+            self._start_h2(host, port)
+        return self
+
+    def _open(self, host, port):
+        """
+        Run the handshake on a new connection and record the origin's protocol.
+        :return: The protocol negotiated with ALPN, or None
+        """
+        try:
+            self._handshake(host, port)
+        except BaseException:
+            self._release_reservation()
+            raise
+
+        negotiated = getattr(self.tls, '_negotiated_protocol', None)
+        if self._pool:
+            self._pool.set_origin_protocol(host, port, "https", negotiated or "http/1.1")
+        return negotiated
+
+    def _release_reservation(self):
+        """Give back a connection slot reserved by get_connection(timeout=...)."""
+        if self._pooled_conn is not None and self._pooled_conn.conn is None:
+            self._pool.discard_connection(self._pooled_conn)
+            self._pooled_conn = None
 
-        # Create new connection
+    def _handshake(self, host, port):
+        """Open the TCP connection and run the TLS handshake on it."""
         debug(f"Connecting to {host}:{port}")
         self.conn = self._new_conn(host, port)
 
@@ -74,7 +386,11 @@ class HttpsSocket(BaseSocket):
 
         # Set JA3 parameters
         tls.set_payload(tls_config=tls_config)
-        handshake_success = tls.handshake()
+        try:
+            handshake_success = tls.handshake()
+        except TLSHandshakeError:
+            self.conn.close()
+            raise
 
         if not handshake_success:
             self.conn.close()
@@ -85,16 +401,81 @@ class HttpsSocket(BaseSocket):
         self.tls = tls
         self._reused = False
         debug("TLS handshake completed, ready for encrypted HTTP communication")
-        return self
+
+    def _start_h2(self, host, port):
+        """Send the HTTP/2 preface and offer the connection to the pool for sharing."""
+        from ja3requests.protocol.h2.connection import H2Connection  # pylint: disable=import-outside-toplevel
+
+        # h2 connections are shared, not counted per host like HTTP/1.1
+        self._release_reservation()
+
+        conn = self.conn
+        tls = self.tls
+        # One stream object for the connection's lifetime, so plaintext left
+        # over from a record is kept for the next read
+        stream = TLSRecordStream(conn, tls)
+
+        def h2_send(data):
+            # H2Connection hands over its queued frames in one piece; they
+            # leave as full records in a single vectored send
+            send_buffers(conn, tls.encrypt_application_records(data))
+
+        tls_config = getattr(self.context, 'tls_config', None)
+        h2_settings = getattr(tls_config, 'h2_settings', None) if tls_config else None
+        h2_window = getattr(tls_config, 'h2_window_update', None) if tls_config else None
+
+        self._h2 = H2Connection(h2_send, stream.read, settings=h2_settings)
+        self._h2.initiate(
+            window_update_increment=int(h2_window) if h2_window else None
+        )
+
+        if self._pool:
+            pooled_conn = self._pool.put_h2_connection(
+                host, port, "https", conn, tls=tls, h2_connection=self._h2
+            )
+            if pooled_conn is not None and pooled_conn.acquire_stream():
+                self._pooled_conn = pooled_conn
+
+    def warm(self):
+        """
+        Open a new connection and leave it idle in the pool, the way a
+        finished request would, so a later request skips the handshake.
+        :return: The negotiated protocol, 'h2' or 'http/1.1'
+        """
+        host = self.context.destination_address
+        port = self.context.port
+
+        self._handshake(host, port)
+        protocol = getattr(self.tls, '_negotiated_protocol', None) or "http/1.1"
+        self._pool.set_origin_protocol(host, port, "https", protocol)
+
+        if protocol == 'h2':
+            self._start_h2(host, port)
+            if self._pooled_conn is None:
+                self.close()
+                raise ConnectionError(f"Connection pool is full, not keeping {host}:{port}")
+            self._pool.release_h2_stream(self._pooled_conn)
+        elif self._pool.put_connection(host, port, "https", self.conn, tls=self.tls):
+            self.conn = None
+            self.tls = None
+        else:
+            self.close()
+            raise ConnectionError(f"Connection pool is full, not keeping {host}:{port}")
+        return protocol
 
     def return_to_pool(self):
         """Return connection to pool for reuse"""
+        if self._h2 is not None:
+            # The stream slot goes back once the response stream is closed
+            self._close_h2_response()
+            return
+
         if self._pool and self.conn and self.tls:
             host = self.context.destination_address
             port = self.context.port
 
-            # If this was a reused connection, return the original wrapper
-            if self._reused and self._pooled_conn:
+            # Return the wrapper of a reused connection or a reserved slot
+            if self._pooled_conn is not None:
                 success = self._pool.put_connection(
                     host,
                     port,
@@ -117,6 +498,17 @@ class HttpsSocket(BaseSocket):
                 debug(f"Pool full, closing connection: {host}:{port}")
                 self.close()
 
+    def discard(self):
+        """Close a connection that cannot be reused and free the pool slot it held"""
+        if self._h2 is not None:
+            self._close_h2_response()
+            return
+
+        pooled_conn, self._pooled_conn = self._pooled_conn, None
+        if pooled_conn is not None:
+            self._pool.discard_connection(pooled_conn)
+        self.close()
+
     def close(self):
         """Close the connection"""
         try:
@@ -146,537 +538,146 @@ class HttpsSocket(BaseSocket):
         return self._send_h1()
 
     def _send_h1(self):
-        """Send HTTP/1.1 request over TLS."""
+        """
+        Send HTTP/1.1 request over TLS.
+        :return: self; the response is read through makefile() as it arrives
+        """
         try:
-            # Brief delay for server to process our Finished message
-            time.sleep(0.3)
             read_timeout = getattr(self.context, 'read_timeout', None)
             self.conn.settimeout(read_timeout if read_timeout is not None else 15.0)
 
-            # Encrypt and send HTTP request
-            encrypted_data = self._encrypt_application_data(self.context.message)
-            debug(f"Sending encrypted HTTP request: {len(encrypted_data)} bytes")
-            self.conn.sendall(encrypted_data)
+            # Encrypt the HTTP request and send all its records at once
+            records = self.tls.encrypt_application_records(self.context.message)
+            debug(f"Sending encrypted HTTP request: {len(records)} records")
+            send_buffers(self.conn, records)
+            # A file or iterable body follows the head, encrypted as it is read
+            self._send_body_stream(self.tls.encrypt_application_records)
             debug("HTTP request sent successfully")
-
-            # Read and decrypt TLS response records using proper record-level reading
-            result = self._handle_encrypted_response()
-            if result:
-                return result
-
-            raise ConnectionError("No valid HTTP response received from server")
+            return self
 
         except Exception as e:  # pylint: disable=broad-exception-caught
             debug(f"Encrypted communication failed: {e}")
+            self.discard()
             raise ConnectionError(f"TLS communication failed: {e}") from e
-        finally:
-            self.conn.settimeout(None)
-
-    def _send_h2(self):
-        """Send HTTP/2 request over TLS using H2Connection."""
-        from ja3requests.protocol.h2.connection import H2Connection  # pylint: disable=import-outside-toplevel
 
-        try:
-            read_timeout = getattr(self.context, 'read_timeout', None)
-            self.conn.settimeout(read_timeout if read_timeout is not None else 15.0)
-
-            tls = self.tls
-
-            def h2_send(data):
-                encrypted = self._encrypt_application_data(data)
-                self.conn.sendall(encrypted)
-
-            def h2_recv(n):
-                return self._decrypt_single_record() or b""
-
-            # Get H2 fingerprint settings from TLS config
-            tls_config = getattr(self.context, 'tls_config', None)
-            h2_settings = getattr(tls_config, 'h2_settings', None) if tls_config else None
-            h2_window = getattr(tls_config, 'h2_window_update', None) if tls_config else None
-
-            h2 = H2Connection(h2_send, h2_recv, settings=h2_settings)
-            h2.initiate(
-                window_update_increment=int(h2_window) if h2_window else None
-            )
-
-            # Parse HTTP request to extract method, path, headers
-            method = getattr(self.context, 'method', 'GET')
-            host = getattr(self.context, 'destination_address', '')
-            path = getattr(self.context, 'path', '/')
-
-            # Build headers from context
-            req_headers = []
-            ctx_headers = getattr(self.context, 'headers', None) or {}
-            if isinstance(ctx_headers, dict):
-                for k, v in ctx_headers.items():
-                    req_headers.append((k, v))
-
-            # Extract body
-            body = getattr(self.context, '_data', None)
-            if isinstance(body, str):
-                body = body.encode('utf-8')
-
-            stream_id = h2.send_request(method, host, path, headers=req_headers, body=body)
-            resp_headers, resp_body = h2.receive_response(stream_id)
-
-            # Convert H2 response to HTTP/1.1-like format for Response class compatibility
-            status = "200"
-            for name, value in resp_headers:
-                if name == ":status":
-                    status = value
-                    break
-
-            http_response = f"HTTP/1.1 {status} OK\r\n"
-            for name, value in resp_headers:
-                if not name.startswith(":"):
-                    http_response += f"{name}: {value}\r\n"
-            http_response += f"Content-Length: {len(resp_body)}\r\n"
-            http_response += "\r\n"
-
-            # Build a mock socket connection for HTTPSResponse
-            response_data = http_response.encode() + resp_body
-            return self._create_mock_connection(response_data)
-
-        except Exception as e:  # pylint: disable=broad-exception-caught
-            debug(f"H2 communication failed: {e}")
-            raise ConnectionError(f"HTTP/2 communication failed: {e}") from e
-        finally:
-            self.conn.settimeout(None)
-
-    def _decrypt_single_record(self):
-        """Read and decrypt a single TLS record, return plaintext."""
-        header = self._recv_exact(5)
-        if not header or len(header) < 5:
-            return None
-        record_type = header[0]
-        length = struct.unpack("!H", header[3:5])[0]
-        payload = self._recv_exact(length)
-        if not payload:
-            return None
-        try:
-            plaintext = self._decrypt_record(payload, record_type)
-            return plaintext
-        except Exception:  # pylint: disable=broad-exception-caught
-            return None
-
-    def _handle_encrypted_response(
-        self,
-    ):  # pylint: disable=too-many-branches,too-many-nested-blocks
+    def makefile(self, _mode="rb"):
         """
-        Handle encrypted TLS response from server.
-        Reads complete TLS records using _recv_exact and decrypts them.
+        Create a file-like object reading decrypted application data.
+        :return: Buffered reader over a TLSRecordStream, or over the
+            H2ResponseStream of the request sent on an HTTP/2 connection
         """
-        http_response_data = b""
+        if self._h2_response is not None:
+            return io.BufferedReader(self._h2_response)
+        return io.BufferedReader(TLSRecordStream(self.conn, self.tls))
 
+    def _process_pending_records(self):
+        """
+        Consume TLS records that are already readable without blocking.
+        :return: False if the server closed the connection or sent an alert
+        """
+        stream = TLSRecordStream(self.conn, self.tls)
         while True:
-            # Read TLS record header (5 bytes: type + version + length)
-            header = self._recv_exact(5)
-            if not header:
-                break
-
-            record_type = header[0]
-            record_length = int.from_bytes(header[3:5], byteorder='big')
-
-            debug(f"TLS record: type=0x{record_type:02X}, length={record_length}")
-
-            # Read the complete record payload
-            record_data = self._recv_exact(record_length)
-            if not record_data:
-                debug("Failed to read complete TLS record payload")
-                break
-
-            if record_type == 0x17:  # Application data
-                decrypted_data = self._decrypt_application_data(record_data)
-                if decrypted_data:
-                    http_response_data += decrypted_data
-                    debug(f"Decrypted {len(decrypted_data)} bytes of HTTP data")
-
-                    # Check if we have a complete HTTP response
-                    if b'\r\n\r\n' in http_response_data:
-                        header_end = http_response_data.find(b'\r\n\r\n') + 4
-                        headers_part = http_response_data[:header_end]
-                        body_part = http_response_data[header_end:]
-
-                        # Check for chunked transfer encoding
-                        headers_lower = headers_part.lower()
-                        if b'transfer-encoding: chunked' in headers_lower:
-                            # For chunked, check if we have the terminator
-                            if body_part.endswith(b'0\r\n\r\n'):
-                                break
-                            # Keep reading more records
-                            continue
-
-                        # Check Content-Length
-                        content_length = self._parse_content_length(headers_part)
-                        if content_length is not None:
-                            if len(body_part) >= content_length:
-                                break
-                            # Keep reading more records
-                            continue
-
-                        # No Content-Length and not chunked: connection-close semantics
-                        # Keep reading until server closes
-
-            elif record_type == 0x15:  # Alert
-                if len(record_data) >= 2:
-                    alert_level = record_data[0]
-                    alert_desc = record_data[1]
-                    debug(f"TLS alert: level={alert_level}, desc={alert_desc}")
-                    if alert_level == 2:  # Fatal
-                        break
-                # Close notify (level=1, desc=0) means server is done
-                if len(record_data) >= 2 and record_data[1] == 0:
-                    break
-
-            elif record_type == 0x16:  # Handshake (e.g. NewSessionTicket)
-                debug("Received post-handshake message, skipping")
-                continue
-            else:
-                debug(f"Unexpected TLS record type: 0x{record_type:02X}")
-
-        if http_response_data:
-            debug(f"Total decrypted HTTP response: {len(http_response_data)} bytes")
-            return self._create_response_connection(http_response_data)
-
-        return None
+            if not stream.has_buffered_record() and not self._readable():
+                return True
 
-    def _recv_exact(self, length):
-        """Receive exactly 'length' bytes from the connection"""
-        data = b""
-        while len(data) < length:
             try:
-                chunk = self.conn.recv(length - len(data))
-            except socket.timeout:
-                debug(f"Socket timeout reading {length} bytes (got {len(data)})")
-                return data if data else None
-            if not chunk:
-                return data if data else None
-            data += chunk
-        return data
-
-    def _decrypt_application_data(self, encrypted_data):
-        """Decrypt TLS application data record (supports both CBC and GCM)"""
-        # Check if using GCM cipher suite
-        if getattr(self.tls, '_is_gcm', False):
-            return self._decrypt_application_data_gcm(encrypted_data)
-        return self._decrypt_application_data_cbc(encrypted_data)
-
-    def _decrypt_application_data_gcm(
-        self, encrypted_data
-    ):  # pylint: disable=too-many-locals
-        """Decrypt TLS application data using AES-GCM"""
+                record = stream.read_record()
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                debug(f"Failed to read pending record: {e}")
+                return False
+            if record is None:
+                return False
+            content_type, plaintext = record
+            if content_type == 0x15:
+                debug(f"TLS alert on idle connection: {plaintext[:2].hex()}")
+                return False
+            debug(f"Consumed pending TLS record type 0x{content_type:02X}")
+
+    def _readable(self):
+        """Whether data or EOF is waiting on the socket, peeked without blocking."""
+        timeout = self.conn.gettimeout()
+        self.conn.settimeout(0)
         try:
-            # GCM record format: explicit_nonce (8) + ciphertext + auth_tag (16)
-            if len(encrypted_data) < 24:  # 8 + 16 minimum
-                raise TLSDecryptionError("Encrypted data too short for GCM")
-
-            # Extract components
-            explicit_nonce = encrypted_data[:8]
-            ciphertext = encrypted_data[8:-16]
-            auth_tag = encrypted_data[-16:]
-
-            # Build full nonce: implicit_iv (4) + explicit_nonce (8) = 12 bytes
-            server_write_iv = getattr(self.tls, '_server_write_iv', None)
-            server_write_key = getattr(self.tls, '_server_write_key', None)
-
-            if not server_write_key or not server_write_iv:
-                raise TLSKeyError("Server GCM keys not available")
-
-            nonce = server_write_iv + explicit_nonce
-
-            # Build AAD
-            content_type = 0x17  # Application data
-            version = b'\x03\x03'  # TLS 1.2
-            server_seq_num = getattr(self.tls, '_server_seq_num', 0)
-
-            aad = (
-                server_seq_num.to_bytes(8, byteorder='big')
-                + bytes([content_type])
-                + version
-                + len(ciphertext).to_bytes(2, byteorder='big')
-            )
-
-            # Decrypt with AES-GCM
-            plaintext = AESCipher.decrypt_gcm(
-                ciphertext, server_write_key, nonce, auth_tag, aad
-            )
-
-            self.tls._server_seq_num += 1  # pylint: disable=protected-access
-            debug(f"GCM decrypted {len(plaintext)} bytes")
-            return plaintext
+            self.conn.recv(1, socket.MSG_PEEK)
+        except BlockingIOError:
+            return False
+        except OSError:
+            pass  # Reading the record reports the error
+        finally:
+            self.conn.settimeout(timeout)
+        return True
 
-        except (TLSDecryptionError, TLSKeyError):
-            raise
-        except Exception as e:
-            raise TLSDecryptionError(f"GCM decryption failed: {e}") from e
+    def _send_h2(self):
+        """
+        Send the request as a stream on this socket's HTTP/2 connection.
 
-    def _decrypt_application_data_cbc(
-        self, encrypted_data
-    ):  # pylint: disable=too-many-locals
-        """Decrypt TLS application data using AES-CBC with HMAC"""
+        The connection may be shared with other threads through the pool.
+        Only the response headers are awaited here: the body is read through
+        makefile() as its DATA frames arrive, and the stream slot is released
+        once it has ended or the response is closed.
+        :return: self
+        """
         try:
-            # Extract explicit IV (first 16 bytes) and ciphertext
-            if len(encrypted_data) < 16:
-                raise TLSDecryptionError("Encrypted data too short for CBC IV")
-
-            explicit_iv = encrypted_data[:16]
-            ciphertext = encrypted_data[16:]
-
-            # Decrypt using server's keys
-            server_write_key = getattr(self.tls, '_server_write_key', None)
-            server_write_mac_key = getattr(self.tls, '_server_write_mac_key', None)
-
-            if not server_write_key or not server_write_mac_key:
-                raise TLSKeyError("Server encryption keys not available")
-
-            # Decrypt the ciphertext without removing PKCS7 padding
-            # (TLS uses its own padding scheme)
-            plaintext_with_mac_and_padding = AESCipher.decrypt_cbc(
-                ciphertext, server_write_key, explicit_iv, remove_padding=False
-            )
-
-            # Handle TLS padding removal
-            if not plaintext_with_mac_and_padding:
-                raise TLSDecryptionError("AES-CBC decryption returned empty result")
-
-            # TLS padding: last byte indicates padding length - 1
-            # So padding_length = last_byte + 1
-            padding_length = plaintext_with_mac_and_padding[-1] + 1
-            if padding_length > len(plaintext_with_mac_and_padding):
-                raise TLSDecryptionError(
-                    f"Invalid TLS padding length: {padding_length}"
-                )
+            read_timeout = getattr(self.context, 'read_timeout', None)
+            # Not reset afterwards: other streams may be waiting on this socket
+            self.conn.settimeout(read_timeout if read_timeout is not None else 15.0)
 
-            plaintext_with_mac = plaintext_with_mac_and_padding[:-padding_length]
+            # Building the HTTP/1.1 message finalises the body and its headers
+            _ = self.context.message
+            body = getattr(self.context, 'body', None)
+            if isinstance(body, str):
+                body = body.encode('utf-8')
+            ctx_headers = getattr(self.context, 'headers', None) or {}
+            req_headers = [(name, str(value)) for name, value in ctx_headers.items()]
 
-            # Separate MAC (last 20 bytes for SHA1) from plaintext
-            mac_length = 20  # SHA1 MAC
-            if len(plaintext_with_mac) < mac_length:
-                raise TLSDecryptionError(
-                    f"Data too short for MAC: {len(plaintext_with_mac)}"
+            stream_id = None
+            try:
+                stream_id = self._h2.send_request(
+                    getattr(self.context, 'method', 'GET'),
+                    self.context.destination_address,
+                    getattr(self.context, 'path', '/'),
+                    headers=req_headers,
+                    body=body,
                 )
-
-            plaintext = plaintext_with_mac[:-mac_length]
-            received_mac = plaintext_with_mac[-mac_length:]
-
-            # Verify MAC
-            content_type = 0x17  # Application data
-            version = b'\x03\x03'  # TLS 1.2
-            server_seq_num = getattr(self.tls, '_server_seq_num', 0)
-
-            mac_input = (
-                server_seq_num.to_bytes(8, byteorder='big')
-                + bytes([content_type])
-                + version
-                + len(plaintext).to_bytes(2, byteorder='big')
-                + plaintext
+                resp_headers = self._h2.receive_headers(stream_id)
+                if not resp_headers:
+                    raise ConnectionError(f"stream {stream_id} was reset by the server")
+            except BaseException:
+                if stream_id is not None:
+                    self._h2.reset_stream(stream_id)
+                self._release_h2_stream()
+                raise
+
+            self._h2_response = H2ResponseStream(
+                self._h2, stream_id, h2_response_head(resp_headers), self._release_h2_stream
             )
+            return self
 
-            expected_mac = hmac.new(
-                server_write_mac_key, mac_input, hashlib.sha1
-            ).digest()
-
-            if received_mac != expected_mac:
-                raise TLSMACVerificationError("CBC MAC verification failed")
-
-            debug("MAC verification successful")
-
-            # Increment server sequence number
-            self.tls._server_seq_num += 1  # pylint: disable=protected-access
-
-            debug(f"Successfully decrypted {len(plaintext)} bytes")
-            return plaintext
-
-        except (TLSDecryptionError, TLSKeyError, TLSMACVerificationError):
-            raise
-        except Exception as e:
-            raise TLSDecryptionError(f"CBC decryption failed: {e}") from e
-
-    def _parse_content_length(self, headers):
-        """Parse Content-Length header from HTTP headers"""
-        try:
-            headers_str = headers.decode('utf-8', errors='ignore')
-            for line in headers_str.split('\r\n'):
-                if line.lower().startswith('content-length:'):
-                    return int(line.split(':', 1)[1].strip())
-        except (ValueError, UnicodeDecodeError):
-            pass
-        return None
-
-    def _create_response_connection(self, http_data):
-        """Create a mock connection with real HTTP response data"""
-
-        class RealResponseConnection:
-            """Mock connection wrapping real HTTP response data."""
-
-            def __init__(self, data):
-                self.response_data = data
-                self.position = 0
-                self.closed = False
-
-            def recv(self, size):
-                """Receive data from response buffer."""
-                if self.closed or self.position >= len(self.response_data):
-                    return b""
-                end_pos = min(self.position + size, len(self.response_data))
-                chunk = self.response_data[self.position : end_pos]
-                self.position = end_pos
-                return chunk
-
-            def readline(self, max_size=None):
-                """Read a line from the response data."""
-                if self.closed or self.position >= len(self.response_data):
-                    return b""
-                start = self.position
-                line_end = self.response_data.find(b'\r\n', start)
-                if line_end == -1:
-                    line_end = self.response_data.find(b'\n', start)
-                    if line_end == -1:
-                        line_end = len(self.response_data)
-                        line = self.response_data[start:line_end]
-                        self.position = line_end
-                        return line
-                    line = self.response_data[start : line_end + 1]
-                    self.position = line_end + 1
-                else:
-                    line = self.response_data[start : line_end + 2]
-                    self.position = line_end + 2
-                if max_size and len(line) > max_size:
-                    line = line[:max_size]
-                    self.position = start + max_size
-                return line
-
-            def read(self, size=-1):
-                """Read data from the response."""
-                if self.closed or self.position >= len(self.response_data):
-                    return b""
-                if size == -1:
-                    data = self.response_data[self.position :]
-                    self.position = len(self.response_data)
-                else:
-                    end_pos = min(self.position + size, len(self.response_data))
-                    data = self.response_data[self.position : end_pos]
-                    self.position = end_pos
-                return data
-
-            def makefile(self, _mode="rb"):
-                """Create a file-like object for the response data."""
-                return self
-
-            def close(self):
-                """Close the connection."""
-                self.closed = True
-
-        debug(
-            f"Created response connection with {len(http_data)} bytes of real HTTP data"
-        )
-        return RealResponseConnection(http_data)
-
-    def _encrypt_application_data(self, data: bytes) -> bytes:
-        """
-        Encrypt HTTP data as TLS application data record (supports CBC and GCM)
-        """
-        if getattr(self.tls, '_is_gcm', False):
-            return self._encrypt_application_data_gcm(data)
-        return self._encrypt_application_data_cbc(data)
-
-    def _encrypt_application_data_gcm(self, data: bytes) -> bytes:
-        """Encrypt application data using AES-GCM"""
-        # pylint: disable=protected-access
-        content_type = 0x17  # Application data
-        version = b'\x03\x03'  # TLS 1.2
-
-        current_seq_num = getattr(self.tls, '_client_seq_num', 1)
-
-        # Generate explicit nonce (8 bytes)
-        explicit_nonce = current_seq_num.to_bytes(8, byteorder='big')
-
-        # Full nonce = implicit_iv (4) + explicit_nonce (8)
-        nonce = (
-            self.tls._client_write_iv  # pylint: disable=protected-access
-            + explicit_nonce
-        )
-
-        # Build AAD
-        aad = (
-            current_seq_num.to_bytes(8, byteorder='big')
-            + bytes([content_type])
-            + version
-            + len(data).to_bytes(2, byteorder='big')
-        )
-
-        # Encrypt with AES-GCM
-        client_write_key = (
-            self.tls._client_write_key
-        )  # pylint: disable=protected-access
-        ciphertext, auth_tag = AESCipher.encrypt_gcm(data, client_write_key, nonce, aad)
-
-        # Record data = explicit_nonce + ciphertext + auth_tag
-        encrypted_data = explicit_nonce + ciphertext + auth_tag
-
-        record = (
-            bytes([content_type])
-            + version
-            + len(encrypted_data).to_bytes(2, byteorder='big')
-            + encrypted_data
-        )
-
-        self.tls._client_seq_num += 1  # pylint: disable=protected-access
-        return record
-
-    def _encrypt_application_data_cbc(self, data: bytes) -> bytes:
-        """Encrypt application data using AES-CBC with HMAC"""
-        # pylint: disable=too-many-locals,protected-access
-        content_type = 0x17  # Application data
-        version = b'\x03\x03'  # TLS 1.2
-
-        current_seq_num = getattr(self.tls, '_client_seq_num', 1)
-
-        # Create MAC input for application data
-        mac_input = (
-            current_seq_num.to_bytes(8, byteorder='big')
-            + bytes([content_type])
-            + version
-            + len(data).to_bytes(2, byteorder='big')
-            + data
-        )
-
-        # Calculate HMAC
-        client_mac_key = (
-            self.tls._client_write_mac_key
-        )  # pylint: disable=protected-access
-        mac = hmac.new(client_mac_key, mac_input, hashlib.sha1).digest()
-
-        # Combine data and MAC
-        plaintext = data + mac
-
-        # Add PKCS#7 padding
-        block_size = 16
-        padding_length = block_size - (len(plaintext) % block_size)
-        padding = bytes([padding_length - 1] * padding_length)
-        padded_plaintext = plaintext + padding
-
-        # Generate explicit IV
-        explicit_iv = os.urandom(16)
-
-        # Encrypt
-        cbc_write_key = self.tls._client_write_key  # pylint: disable=protected-access
-        cipher = Cipher(
-            algorithms.AES(cbc_write_key),
-            modes.CBC(explicit_iv),
-            backend=default_backend(),
-        )
-        encryptor = cipher.encryptor()
-        ciphertext = encryptor.update(padded_plaintext) + encryptor.finalize()
-
-        # Construct TLS record
-        encrypted_data = explicit_iv + ciphertext
-        record = (
-            bytes([content_type])
-            + version
-            + len(encrypted_data).to_bytes(2, byteorder='big')
-            + encrypted_data
-        )
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            debug(f"H2 communication failed: {e}")
+            raise ConnectionError(f"HTTP/2 communication failed: {e}") from e
 
-        self.tls._client_seq_num += 1  # pylint: disable=protected-access
-        return record
+    def _close_h2_response(self):
+        """Close the response stream of the request sent on _h2, which releases its stream."""
+        response, self._h2_response = self._h2_response, None
+        if response is not None:
+            response.close()
+
+    def _release_h2_stream(self):
+        """Give the stream slot back, or close an h2 connection nobody shares."""
+        h2 = self._h2
+        pooled_conn = self._pooled_conn
+        self._pooled_conn = None
+        if pooled_conn is None:
+            h2.close()
+            self.close()
+            return
+
+        if h2.max_concurrent_streams is not None:
+            pooled_conn.set_max_concurrent_streams(h2.max_concurrent_streams)
+        if h2.goaway_received or h2.closed:
+            pooled_conn.mark_goaway()
+        self._pool.release_h2_stream(pooled_conn)
+        # The pool owns the connection; this socket no longer does
+        self.conn = None
+        self.tls = None
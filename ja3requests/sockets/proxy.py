@@ -7,6 +7,7 @@ This module of Proxy Socket.
 
 from base64 import b64encode
 from ja3requests.base import BaseSocket
+from ja3requests.exceptions import TLSHandshakeError
 from ja3requests.protocol.exceptions import (
     SocketException,
     ProxyError,
@@ -14,6 +15,77 @@ from ja3requests.protocol.exceptions import (
 )
 
 
+def proxy_credentials(context):
+    """
+    Proxy user and password from the proxy URL.
+    :param context: Request context
+    :return: (username, password), either may be None
+    """
+    if not context.proxy_auth:
+        return None, None
+    if ":" in context.proxy_auth:
+        username, password = context.proxy_auth.split(":")
+        return username, password
+    return context.proxy_auth, None
+
+
+def tunnel_request(context, username=None, password=None):
+    """
+    CONNECT request asking an HTTP proxy for a tunnel to the context's destination.
+    :param context: Request context
+    :param username: Proxy user for Basic Proxy-Authorization
+    :param password: Proxy password
+    :return: Request bytes
+    """
+    message = [
+        f"CONNECT {context.destination_address}:{context.port} HTTP/1.1",
+        f"Host: {context.destination_address}",
+    ]
+    if auth := context.headers.get("Proxy-Authorization", None):
+        message.append(f"Proxy-Authorization: Basic {auth}")
+    else:
+        auth = ""
+        if username:
+            auth += username
+        if password:
+            auth += f":{password}"
+
+        if len(auth) > 0:
+            message.append(
+                f"Proxy-Authorization: Basic {b64encode(auth.encode()).decode()}"
+            )
+
+    message = "\r\n".join(message)
+    message += "\r\n\r\n"
+    return message.encode()
+
+
+def check_tunnel_status(status_line):
+    """
+    Raise unless the proxy's reply to CONNECT says the tunnel is open.
+    :param status_line: The proxy's response, from its status line on
+    :raises ProxyError: If the proxy refused the tunnel or is not an HTTP proxy
+    """
+    parts = status_line.split("\r\n", 1)[0].split(" ", 2)
+    if len(parts) < 2 or not parts[0].startswith("HTTP/") or not parts[1].isdigit():
+        raise ProxyError("Proxy server does not appear to be an HTTP proxy")
+
+    status_code = int(parts[1])
+    if status_code != 200:
+        error = ""
+        # Tunnel connection failed: 502 Proxy Bad Server
+        if status_code in (400, 403, 405):
+            error = "The HTTP proxy server may not be supported"
+
+        elif status_code in (407,):
+            error = f"Tunnel connection failed: status_code = {status_code}, Unauthorized"
+
+        else:
+            error = f"Tunnel connection failed: status_code = {status_code}"
+
+        raise ProxyError(error)
+
+
 class ProxySocket(BaseSocket):
     """
     Proxy Socket
@@ -26,16 +98,7 @@ class ProxySocket(BaseSocket):
         else:
             self.proxy_host, self.proxy_port = None, None
 
-        if self.context.proxy_auth:
-            if ":" in self.context.proxy_auth:
-                (
-                    self.proxy_username,
-                    self.proxy_password,
-                ) = self.context.proxy_auth.split(":")
-            else:
-                self.proxy_username, self.proxy_password = self.context.proxy_auth, None
-        else:
-            self.proxy_username, self.proxy_password = None, None
+        self.proxy_username, self.proxy_password = proxy_credentials(self.context)
 
     def new_conn(self):
         if not self.proxy_host and not self.proxy_port:
@@ -43,51 +106,13 @@ class ProxySocket(BaseSocket):
 
         self.conn = self._new_conn(self.proxy_host, self.proxy_port)
 
-        message = [
-            f"CONNECT {self.context.destination_address}:{self.context.port} HTTP/1.1",
-            f"Host: {self.context.destination_address}",
-        ]
-        if auth := self.context.headers.get("Proxy-Authorization", None):
-            message.append(f"Proxy-Authorization: Basic {auth}")
-        else:
-            auth = ""
-            if self.proxy_username:
-                auth += self.proxy_username
-            if self.proxy_password:
-                auth += f":{self.proxy_password}"
-
-            if len(auth) > 0:
-                message.append(
-                    f"Proxy-Authorization: Basic {b64encode(auth.encode()).decode()}"
-                )
-
-        message = "\r\n".join(message)
-        message += "\r\n\r\n"
-
         try:
-            self.conn.send(message.encode())
+            self.conn.send(tunnel_request(self.context, self.proxy_username, self.proxy_password))
             status_line = self.conn.recv(4096).decode()
-            proto, status_code, _ = status_line.split(" ", 2)
         except (TimeoutError, ConnectionRefusedError, UnicodeError) as err:
             raise ProxyTimeoutError("Proxy server connection time out") from err
 
-        if not proto.startswith("HTTP/"):
-            raise ProxyError("Proxy server does not appear to be an HTTP proxy")
-
-        status_code = int(status_code)
-        if status_code != 200:
-            error = ""
-            # Tunnel connection failed: 502 Proxy Bad Server
-            if status_code in (400, 403, 405):
-                error = "The HTTP proxy server may not be supported"
-
-            elif status_code in (407,):
-                error = f"Tunnel connection failed: status_code = {status_code}, Unauthorized"
-
-            else:
-                error = f"Tunnel connection failed: status_code = {status_code}"
-
-            raise ProxyError(error)
+        check_tunnel_status(status_line)
 
         return self
 
@@ -102,6 +127,7 @@ class ProxySocket(BaseSocket):
             return self._send_https_through_proxy()
         # For HTTP through proxy, send directly
         self.conn.sendall(self.context.message)
+        self._send_body_stream()
         return self.conn
 
     def _send_https_through_proxy(self):
@@ -158,7 +184,11 @@ class ProxySocket(BaseSocket):
                     tls_config.server_name = self.context.destination_address
 
                 tls.set_payload(tls_config=tls_config)
-                handshake_success = tls.handshake()
+                try:
+                    handshake_success = tls.handshake()
+                except TLSHandshakeError:
+                    self.conn.close()
+                    raise
 
                 if not handshake_success:
                     self.conn.close()
@@ -8,6 +8,7 @@ SOCKS4/SOCKS5 proxy socket implementation.
 import struct
 import socket
 from ja3requests.base import BaseSocket
+from ja3requests.exceptions import TLSHandshakeError
 from ja3requests.protocol.exceptions import (
     SocketException,
     ProxyError,
@@ -216,6 +217,7 @@ class SocksProxySocket(BaseSocket):
 
         # For HTTP through SOCKS, send directly
         self.conn.sendall(self.context.message)
+        self._send_body_stream()
         return self.conn
 
     def _send_https_through_socks(self):
@@ -229,7 +231,12 @@ class SocksProxySocket(BaseSocket):
             tls_config.server_name = self.context.destination_address
 
         tls.set_payload(tls_config=tls_config)
-        if not tls.handshake():
+        try:
+            handshake_success = tls.handshake()
+        except TLSHandshakeError:
+            self.conn.close()
+            raise
+        if not handshake_success:
             self.conn.close()
             raise ConnectionError("TLS handshake failed through SOCKS tunnel")
 
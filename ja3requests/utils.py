@@ -5,10 +5,14 @@ Ja3Requests.utils
 This module provides utility functions.
 """
 
+import collections.abc
+import io
+import os
 import platform
+import stat
 from base64 import b64encode
-from typing import Union, AnyStr, List
-from .const import DEFAULT_MAX_RETRY_LIMIT
+from typing import Union, AnyStr, Iterator, List, Optional
+from .const import DEFAULT_MAX_RETRY_LIMIT, DEFAULT_UPLOAD_CHUNK_SIZE
 from .exceptions import MaxRetriedException
 from .cookies import cookiejar_from_dict
 from .__version__ import __version__
@@ -16,6 +20,9 @@ from .__version__ import __version__
 
 ACCEPT_ENCODING = "gzip,deflate"
 
+#: Bytes of chunked transfer-coding framing around a chunk of at most 2^14 bytes ("4000\r\n" ... "\r\n")
+CHUNK_FRAMING_SIZE = 8
+
 
 def b(s: AnyStr):  # pylint: disable=C
     """
@@ -204,3 +211,119 @@ def add_dict_to_cookiejar(cj, cookie_dict):
     """
 
     return cookiejar_from_dict(cookie_dict, cj)
+
+
+def is_stream_body(data) -> bool:
+    """
+    Whether a request body is sent as it is read rather than built up front:
+    file objects (anything with read()), generators and other iterators.
+    Other iterables such as sets or ranges are not streamed; wrap them in
+    iter() to send their items as the body.
+    :param data:
+    :return: bool
+    """
+    if data is None or isinstance(data, (str, bytes, bytearray, memoryview)):
+        return False
+    return hasattr(data, "read") or isinstance(data, collections.abc.Iterator)
+
+
+def stream_body_length(data) -> Optional[int]:
+    """
+    Bytes a streamed body will produce, if that can be known without reading it.
+    Regular files and seekable binary streams are measured from their current
+    position; text files, pipes, generators and other iterables are not.
+    :param data:
+    :return: Length, or None when the body has to be sent chunked
+    """
+    if not hasattr(data, "read") or isinstance(data, io.TextIOBase):
+        return None
+
+    try:
+        fileno = data.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        fileno = None
+    if fileno is not None:
+        try:
+            info = os.fstat(fileno)
+        except OSError:
+            return None
+        if not stat.S_ISREG(info.st_mode):
+            return None
+        try:
+            return max(info.st_size - data.tell(), 0)
+        except (AttributeError, OSError):
+            return info.st_size
+
+    try:
+        if not data.seekable():
+            return None
+        position = data.tell()
+        end = data.seek(0, io.SEEK_END)
+        data.seek(position)
+    except (AttributeError, OSError):
+        return None
+    return max(end - position, 0)
+
+
+def stream_body_position(data) -> Optional[int]:
+    """
+    Position a streamed body can be rewound to before it is sent again.
+    Only seekable file objects can be replayed; generators, iterators and
+    pipes are used up by the first attempt.
+    :param data:
+    :return: Current position, or None when the body cannot be rewound
+    """
+    if not hasattr(data, "read") or not hasattr(data, "seek"):
+        return None
+    try:
+        if hasattr(data, "seekable") and not data.seekable():
+            return None
+        return data.tell()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def without_body_headers(headers: Optional[dict]) -> Optional[dict]:
+    """
+    Copy of request headers without the ones describing a body
+    (Content-Length, Content-Type, Transfer-Encoding), for a redirected
+    request that is sent without one.
+    :param headers:
+    :return: dict, or None if headers is None
+    """
+    if headers is None:
+        return None
+    body_headers = ("content-length", "content-type", "transfer-encoding")
+    return {name: value for name, value in headers.items() if str(name).lower() not in body_headers}
+
+
+def iter_stream_body(data, chunk_size: int = DEFAULT_UPLOAD_CHUNK_SIZE, chunked: bool = False) -> Iterator[bytes]:
+    """
+    Read a streamed body as pieces of at most chunk_size bytes, one piece in
+    memory at a time. File objects are read chunk_size bytes at a time;
+    larger items from an iterable are split. Text is encoded as UTF-8.
+    :param data: File object or iterable of bytes/str
+    :param chunk_size: Largest piece yielded, framing included
+    :param chunked: Frame the pieces with the chunked transfer-coding and end
+        with the last-chunk, so each piece can go out as it is
+    :return: Iterator of bytes
+    """
+    if chunked:
+        chunk_size -= CHUNK_FRAMING_SIZE
+
+    if hasattr(data, "read"):
+        pieces = iter(lambda: data.read(chunk_size), data.read(0))
+    else:
+        pieces = iter(data)
+
+    for piece in pieces:
+        if isinstance(piece, str):
+            piece = piece.encode("utf-8")
+        for offset in range(0, len(piece), chunk_size):
+            chunk = piece[offset:offset + chunk_size] if len(piece) > chunk_size else piece
+            if chunked:
+                chunk = b"%x\r\n%s\r\n" % (len(chunk), chunk)
+            yield bytes(chunk)
+
+    if chunked:
+        yield b"0\r\n\r\n"
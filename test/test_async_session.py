@@ -0,0 +1,490 @@
+"""Tests for the asyncio AsyncSession and its sockets."""
+
+import asyncio
+import io
+import unittest
+from unittest.mock import MagicMock, patch
+
+from ja3requests import AsyncSession
+from ja3requests.protocol.exceptions import ProxyError
+from ja3requests.protocol.tls import TLS, HANDSHAKE_SEND, HANDSHAKE_RECV
+from ja3requests.protocol.tls.config import TlsConfig
+from ja3requests.retry import HTTPRetry
+from ja3requests.sockets.async_sockets import AsyncHttpsSocket
+from ja3requests.sockets.https import http_response_complete, parse_content_length
+
+
+class _LocalServer:
+    """Tiny keep-alive HTTP/1.1 server on asyncio streams."""
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.connections = 0
+        self.requests = []
+        self.server = None
+        self.port = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    def url(self, path="/"):
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                request_line, *header_lines = head.decode().split("\r\n")
+                method, path, _ = request_line.split(" ", 2)
+                headers = {}
+                for line in header_lines:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                body = await reader.readexactly(length) if length else b""
+                self.requests.append((method, path, headers, body))
+
+                status, extra, payload = self.routes[path](method, headers, body)
+                response = f"HTTP/1.1 {status}\r\nContent-Length: {len(payload)}\r\n"
+                response += "".join(f"{k}: {v}\r\n" for k, v in extra)
+                writer.write(response.encode() + b"\r\n" + payload)
+                await writer.drain()
+                if ("Connection", "close") in extra:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+class _TunnelProxy:
+    """HTTP proxy that answers CONNECT with a status and pipes the tunnel to the destination."""
+
+    def __init__(self, status="200 Connection established"):
+        self.status = status
+        self.connects = []
+        self.server = None
+        self.port = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        head = (await reader.readuntil(b"\r\n\r\n")).decode()
+        self.connects.append(head)
+        writer.write(f"HTTP/1.1 {self.status}\r\n\r\n".encode())
+        if not self.status.startswith("200"):
+            writer.close()
+            return
+        host, port = head.split(" ")[1].rsplit(":", 1)
+        target_reader, target_writer = await asyncio.open_connection(host, int(port))
+
+        async def pipe(source, sink):
+            try:
+                while data := await source.read(65536):
+                    sink.write(data)
+                    await sink.drain()
+            except ConnectionError:
+                pass
+            finally:
+                sink.close()
+
+        await asyncio.gather(pipe(reader, target_writer), pipe(target_reader, writer))
+
+
+def _ok(body=b"ok"):
+    return lambda method, headers, data: ("200 OK", [], body)
+
+
+class AsyncServerTestCase(unittest.TestCase):
+    """Runs each test coroutine against a fresh local server."""
+
+    routes = {}
+
+    def run_with_server(self, coro_fn, routes=None):
+        async def runner():
+            server = await _LocalServer(routes or self.routes).start()
+            try:
+                return await coro_fn(server)
+            finally:
+                await server.stop()
+
+        return asyncio.run(runner())
+
+
+class TestAsyncSessionRequests(AsyncServerTestCase):
+    """Basic request/response behaviour."""
+
+    routes = {
+        "/": _ok(b"hello"),
+        "/echo": lambda method, headers, data: ("200 OK", [], method.encode() + b":" + data),
+        "/close": lambda method, headers, data: ("200 OK", [("Connection", "close")], b"bye"),
+    }
+
+    def test_get(self):
+        async def check(server):
+            async with AsyncSession() as session:
+                response = await session.get(server.url())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, b"hello")
+
+        self.run_with_server(check)
+
+    def test_post_body(self):
+        async def check(server):
+            async with AsyncSession() as session:
+                response = await session.post(server.url("/echo"), data="a=1")
+            self.assertEqual(response.content, b"POST:a=1")
+
+        self.run_with_server(check)
+
+    def test_head_has_no_body(self):
+        async def check(server):
+            async with AsyncSession() as session:
+                response = await session.head(server.url())
+                self.assertEqual(response.status_code, 200)
+                # The connection must still be usable after a body-less response
+                response = await session.get(server.url())
+            self.assertEqual(response.content, b"hello")
+
+        self.run_with_server(check)
+
+    def test_keep_alive_reuses_connection(self):
+        async def check(server):
+            async with AsyncSession() as session:
+                for _ in range(3):
+                    await session.get(server.url())
+            self.assertEqual(server.connections, 1)
+
+        self.run_with_server(check)
+
+    def test_connection_close_is_not_reused(self):
+        async def check(server):
+            async with AsyncSession() as session:
+                await session.get(server.url("/close"))
+                await session.get(server.url("/close"))
+            self.assertEqual(server.connections, 2)
+
+        self.run_with_server(check)
+
+    def test_concurrent_requests(self):
+        async def check(server):
+            async with AsyncSession() as session:
+                responses = await asyncio.gather(
+                    *[session.get(server.url()) for _ in range(20)]
+                )
+            self.assertEqual([r.status_code for r in responses], [200] * 20)
+            self.assertEqual(len(server.requests), 20)
+
+        self.run_with_server(check)
+
+    def test_idle_connections_are_capped(self):
+        async def check(server):
+            async with AsyncSession(max_connections_per_host=2) as session:
+                await asyncio.gather(*[session.get(server.url()) for _ in range(5)])
+                idle = sum(len(conns) for conns in session._idle.values())
+            self.assertLessEqual(idle, 2)
+
+        self.run_with_server(check)
+
+    def test_proxy_tunnel(self):
+        async def check(server):
+            proxy = await _TunnelProxy().start()
+            try:
+                async with AsyncSession() as session:
+                    proxies = {"http": f"user:secret@127.0.0.1:{proxy.port}"}
+                    first = await session.get(server.url(), proxies=proxies)
+                    second = await session.get(server.url(), proxies=proxies)
+            finally:
+                await proxy.stop()
+            self.assertEqual((first.content, second.content), (b"hello", b"hello"))
+            self.assertEqual(len(proxy.connects), 1)
+            self.assertTrue(proxy.connects[0].startswith(f"CONNECT 127.0.0.1:{server.port} HTTP/1.1\r\n"))
+            self.assertIn("Proxy-Authorization: Basic dXNlcjpzZWNyZXQ=", proxy.connects[0])
+            self.assertEqual(server.requests[0][1], "/")
+
+        self.run_with_server(check)
+
+    def test_proxied_and_direct_connections_are_not_shared(self):
+        async def check(server):
+            proxy = await _TunnelProxy().start()
+            try:
+                async with AsyncSession() as session:
+                    await session.get(server.url(), proxies={"http": f"127.0.0.1:{proxy.port}"})
+                    await session.get(server.url())
+            finally:
+                await proxy.stop()
+            self.assertEqual(server.connections, 2)
+
+        self.run_with_server(check)
+
+    def test_proxy_refusing_tunnel(self):
+        async def check():
+            proxy = await _TunnelProxy("407 Proxy Authentication Required").start()
+            try:
+                async with AsyncSession() as session:
+                    await session.get("http://127.0.0.1:1/", proxies={"http": f"127.0.0.1:{proxy.port}"})
+            finally:
+                await proxy.stop()
+
+        with self.assertRaisesRegex(ProxyError, "Unauthorized"):
+            asyncio.run(check())
+
+    def test_socks_proxies_not_supported(self):
+        async def check():
+            async with AsyncSession() as session:
+                await session.get("http://127.0.0.1:1/", proxies={"http": "socks5://127.0.0.1:1080"})
+
+        with self.assertRaises(NotImplementedError):
+            asyncio.run(check())
+
+
+class TestAsyncSessionCookiesAndRedirects(AsyncServerTestCase):
+    """Cookie persistence and redirect following."""
+
+    routes = {
+        "/set": lambda method, headers, data: ("200 OK", [("Set-Cookie", "token=abc; Path=/")], b""),
+        "/show": lambda method, headers, data: ("200 OK", [], headers.get("cookie", "").encode()),
+        "/redirect": lambda method, headers, data: ("302 Found", [("Location", "/show")], b""),
+    }
+
+    def test_cookies_persist(self):
+        async def check(server):
+            async with AsyncSession() as session:
+                await session.get(server.url("/set"))
+                response = await session.get(server.url("/show"))
+            self.assertIn(b"token=abc", response.content)
+
+        self.run_with_server(check)
+
+    def test_follows_relative_redirect(self):
+        async def check(server):
+            async with AsyncSession() as session:
+                response = await session.get(server.url("/redirect"))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(server.requests[-1][1], "/show")
+
+        self.run_with_server(check)
+
+    def test_redirect_after_file_body_is_bodiless(self):
+        async def check(server):
+            async with AsyncSession() as session:
+                response = await asyncio.wait_for(
+                    session.post(server.url("/redirect"), data=io.BytesIO(b"abc")), 5
+                )
+            self.assertEqual(response.status_code, 200)
+            method, path, headers, body = server.requests[-1]
+            self.assertEqual((method, path, body), ("GET", "/show", b""))
+            self.assertNotIn("content-length", headers)
+            self.assertNotIn("content-type", headers)
+
+        self.run_with_server(check)
+
+    def test_redirect_disabled(self):
+        async def check(server):
+            async with AsyncSession() as session:
+                response = await session.get(server.url("/redirect"), allow_redirects=False)
+            self.assertEqual(response.status_code, 302)
+
+        self.run_with_server(check)
+
+
+class TestAsyncSessionHooksAndRetry(AsyncServerTestCase):
+    """Hooks and retry with asyncio backoff."""
+
+    def test_hooks_called(self):
+        events = []
+
+        async def check(server):
+            hooks = {
+                "before_request": [lambda req: events.append("before")],
+                "after_request": [lambda rep: events.append(rep.status_code)],
+            }
+            async with AsyncSession(hooks=hooks) as session:
+                await session.get(server.url())
+
+        self.run_with_server(check, routes={"/": _ok()})
+        self.assertEqual(events, ["before", 200])
+
+    def test_retry_on_status(self):
+        statuses = ["503 Service Unavailable", "503 Service Unavailable", "200 OK"]
+
+        def flaky(method, headers, data):
+            return statuses.pop(0), [], b""
+
+        async def check(server):
+            retry = HTTPRetry(total=3, backoff_factor=0.5)
+            async with AsyncSession(retry=retry) as session:
+                with patch("ja3requests.retry.asyncio.sleep") as sleep:
+                    response = await session.get(server.url())
+            self.assertEqual(sleep.await_count, 2)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(server.requests), 3)
+
+        self.run_with_server(check, routes={"/": flaky})
+
+    def test_retry_rewinds_file_body(self):
+        statuses = ["503 Service Unavailable", "200 OK"]
+
+        def flaky(method, headers, data):
+            return statuses.pop(0), [], b""
+
+        async def check(server):
+            async with AsyncSession(retry=HTTPRetry(total=1, backoff_factor=0)) as session:
+                response = await asyncio.wait_for(session.put(server.url(), data=io.BytesIO(b"file body")), 5)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([request[3] for request in server.requests], [b"file body"] * 2)
+
+        self.run_with_server(check, routes={"/": flaky})
+
+
+class TestHandshakeSteps(unittest.TestCase):
+    """The sans-IO handshake generator shared by the sync and async drivers."""
+
+    def test_first_step_sends_client_hello(self):
+        tls = TLS(None)
+        tls.set_payload(tls_config=TlsConfig())
+        steps = tls.handshake_steps()
+        op, data = next(steps)
+        self.assertEqual(op, HANDSHAKE_SEND)
+        self.assertEqual(data[0], 0x16)
+        self.assertEqual(data[5], 0x01)  # ClientHello
+        op, data = steps.send(None)
+        self.assertEqual(op, HANDSHAKE_RECV)
+        self.assertIsNone(data)
+
+    def test_eof_during_handshake_raises(self):
+        tls = TLS(None)
+        tls.set_payload(tls_config=TlsConfig())
+        steps = tls.handshake_steps()
+        next(steps)
+        steps.send(None)
+        with self.assertRaises(Exception):
+            steps.send(None)
+
+    def test_fatal_alert_raises(self):
+        tls = TLS(None)
+        tls.set_payload(tls_config=TlsConfig())
+        steps = tls.handshake_steps()
+        next(steps)
+        steps.send(None)
+        alert = b"\x15\x03\x03\x00\x02"
+        with self.assertRaises(ConnectionError):
+            steps.send((0x15, alert, b"\x02\x28"))
+
+
+class TestAsyncHandshakeFailures(unittest.TestCase):
+    """Handshake failures keep their cause; a None timeout is not replaced."""
+
+    def _connect(self, handshake, connect_timeout=None, timeouts=None):
+        wait_for = asyncio.wait_for
+
+        async def recording_wait_for(awaitable, timeout):
+            timeouts.append(timeout)
+            return await wait_for(awaitable, timeout)
+
+        async def runner():
+            server = await asyncio.start_server(lambda r, w: None, "127.0.0.1", 0)
+            context = MagicMock(
+                destination_address="127.0.0.1",
+                port=server.sockets[0].getsockname()[1],
+                source_address=None,
+                connect_timeout=connect_timeout,
+                tls_config=None,
+                proxy=None,
+            )
+            try:
+                with patch.object(AsyncHttpsSocket, "_handshake", side_effect=handshake, autospec=True), \
+                        patch("ja3requests.sockets.async_sockets.asyncio.wait_for", new=recording_wait_for):
+                    return await AsyncHttpsSocket(context).new_conn()
+            finally:
+                server.close()
+                await server.wait_closed()
+
+        return asyncio.run(asyncio.wait_for(runner(), 5))
+
+    def test_failure_keeps_original_exception(self):
+        async def handshake(_sock, _tls):
+            raise ValueError("unexpected record")
+
+        with self.assertRaises(ConnectionError) as ctx:
+            self._connect(handshake, timeouts=[])
+        self.assertIsInstance(ctx.exception.__cause__, ValueError)
+
+    def test_timeout_is_reported_as_such(self):
+        async def handshake(_sock, _tls):
+            await asyncio.sleep(1)
+
+        with self.assertRaises(ConnectionError) as ctx:
+            self._connect(handshake, connect_timeout=0.05, timeouts=[])
+        self.assertIn("timed out", str(ctx.exception))
+        self.assertIsInstance(ctx.exception.__cause__, asyncio.TimeoutError)
+
+    def test_none_timeout_is_honoured(self):
+        timeouts = []
+
+        async def handshake(_sock, _tls):
+            return True
+
+        sock = self._connect(handshake, timeouts=timeouts)
+        self.assertIsNotNone(sock.tls)
+        # Neither the TCP connect nor the handshake gets a made-up limit
+        self.assertEqual(timeouts, [None, None])
+
+
+class TestResponseCompletion(unittest.TestCase):
+    """Framing checks used to stop reading a keep-alive response."""
+
+    def test_content_length(self):
+        head = b"HTTP/1.1 200 OK\r\nContent-Length: 5\r\n\r\n"
+        self.assertFalse(http_response_complete(head + b"abc"))
+        self.assertTrue(http_response_complete(head + b"abcde"))
+
+    def test_chunked(self):
+        head = b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+        self.assertFalse(http_response_complete(head + b"3\r\nabc\r\n"))
+        self.assertTrue(http_response_complete(head + b"3\r\nabc\r\n0\r\n\r\n"))
+
+    def test_head_and_no_content(self):
+        head = b"HTTP/1.1 200 OK\r\nContent-Length: 5\r\n\r\n"
+        self.assertTrue(http_response_complete(head, "HEAD"))
+        self.assertTrue(http_response_complete(b"HTTP/1.1 204 No Content\r\n\r\n"))
+
+    def test_incomplete_headers(self):
+        self.assertFalse(http_response_complete(b"HTTP/1.1 200 OK\r\n"))
+
+    def test_growing_bytearray(self):
+        head = b"HTTP/1.1 200 OK\r\nContent-Length: 5\r\n\r\n"
+        data = bytearray(head)
+        for piece in (b"ab", b"cd"):
+            data += piece
+            self.assertFalse(http_response_complete(data))
+        data += b"e"
+        self.assertTrue(http_response_complete(data))
+
+    def test_chunked_head_alone_is_incomplete(self):
+        # The head ends in "0\r\n\r\n" but no chunk has arrived yet
+        head = b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\nX-Count: 10\r\n\r\n"
+        self.assertFalse(http_response_complete(bytearray(head)))
+
+    def test_parse_content_length(self):
+        self.assertEqual(parse_content_length(b"Content-Length: 42\r\nX: y"), 42)
+        self.assertIsNone(parse_content_length(b"X: y"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+"""Tests for the certificate verification result cache."""
+
+import datetime
+import time
+import unittest
+from unittest import mock
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from ja3requests.protocol.tls import TLS
+from ja3requests.protocol.tls import certificate_verify
+from ja3requests.protocol.tls.certificate_verify import (
+    CertificateVerificationCache,
+    CertificateVerifier,
+)
+
+
+def _name(common_name):
+    return x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, common_name)])
+
+
+def _chain(hostname="example.com", lifetime=datetime.timedelta(days=30)):
+    """
+    A leaf for hostname signed by a throwaway CA, as a TLS certificate_list,
+    and the CA certificate in PEM to trust it with.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    ca_key = ec.generate_private_key(ec.SECP256R1())
+    ca = (
+        x509.CertificateBuilder().subject_name(_name("Test CA")).issuer_name(_name("Test CA"))
+        .public_key(ca_key.public_key()).serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1)).not_valid_after(now + lifetime)
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(ca_key, hashes.SHA256())
+    )
+    leaf_key = ec.generate_private_key(ec.SECP256R1())
+    leaf = (
+        x509.CertificateBuilder().subject_name(_name(hostname)).issuer_name(ca.subject)
+        .public_key(leaf_key.public_key()).serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1)).not_valid_after(now + lifetime)
+        .add_extension(x509.SubjectAlternativeName([x509.DNSName(hostname)]), critical=False)
+        .sign(ca_key, hashes.SHA256())
+    )
+    entries = b"".join(
+        len(der).to_bytes(3, "big") + der
+        for der in (leaf.public_bytes(serialization.Encoding.DER), ca.public_bytes(serialization.Encoding.DER))
+    )
+    return len(entries).to_bytes(3, "big") + entries, ca.public_bytes(serialization.Encoding.PEM)
+
+
+class TestCertificateVerificationCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.chain, cls.ca_pem = _chain()
+
+    def setUp(self):
+        self.cache = CertificateVerificationCache()
+        self.verifier = CertificateVerifier(ca_certs=self.ca_pem, cache=self.cache)
+
+    def test_identical_chain_skips_parsing_and_signatures(self):
+        self.assertEqual(self.verifier.verify_certificate("example.com", self.chain), (True, None))
+        with mock.patch.object(CertificateVerifier, "_verify_chain") as verify_chain, \
+                mock.patch.object(CertificateVerifier, "_load_certificate") as load:
+            result = CertificateVerifier(ca_certs=self.ca_pem, cache=self.cache).verify_certificate(
+                "Example.COM", self.chain
+            )
+        self.assertEqual(result, (True, None))
+        verify_chain.assert_not_called()
+        load.assert_not_called()
+        self.assertEqual(self.cache.get_stats(), {"size": 1, "hits": 1, "misses": 1, "hit_rate": 0.5})
+
+    def test_key_covers_hostname_chain_and_checks(self):
+        self.verifier.verify_certificate("example.com", self.chain)
+        self.assertEqual(self.verifier.verify_certificate("other.com", self.chain)[0], False)
+        self.verifier.verify_certificate("example.com", self.chain, check_expiry=False)
+        self.verifier.verify_certificate("example.com", _chain()[0])
+        CertificateVerifier(cache=self.cache).verify_certificate("example.com", self.chain)
+        self.assertEqual(self.cache.get_stats()["hits"], 0)
+
+    def test_failures_are_not_cached(self):
+        for _ in range(2):
+            valid, error = self.verifier.verify_certificate("other.com", self.chain)
+            self.assertFalse(valid)
+            self.assertIn("does not match", error)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_expiry_bounded_by_leaf_not_after(self):
+        key = self.cache.key("example.com", self.chain, True, True, self.ca_pem)
+        self.cache.put(key, not_after=time.time() - 1)
+        self.assertFalse(self.cache.get(key))
+        self.assertEqual(len(self.cache), 0)
+
+        self.verifier.verify_certificate("example.com", self.chain)
+        not_after = time.time() + 30 * 86400
+        self.assertAlmostEqual(self.cache._entries[key], min(not_after, time.time() + 3600), delta=5)
+
+    def test_max_age(self):
+        cache = CertificateVerificationCache(max_age=0)
+        verifier = CertificateVerifier(ca_certs=self.ca_pem, cache=cache)
+        verifier.verify_certificate("example.com", self.chain)
+        verifier.verify_certificate("example.com", self.chain)
+        self.assertEqual(cache.get_stats()["hits"], 0)
+
+    def test_lru_eviction(self):
+        cache = CertificateVerificationCache(max_size=2)
+        keys = [cache.key(host, self.chain, True, True) for host in ("a.com", "b.com", "c.com")]
+        far = time.time() + 3600
+        cache.put(keys[0], far)
+        cache.put(keys[1], far)
+        self.assertTrue(cache.get(keys[0]))
+        cache.put(keys[2], far)
+        self.assertTrue(cache.get(keys[0]))
+        self.assertFalse(cache.get(keys[1]))
+
+    def test_without_cache(self):
+        verifier = CertificateVerifier(ca_certs=self.ca_pem)
+        self.assertEqual(verifier.verify_certificate("example.com", self.chain), (True, None))
+        self.assertIsNone(verifier.cache)
+
+
+class TestTLSUsesSharedCache(unittest.TestCase):
+    def test_reconnect_hits_shared_cache(self):
+        chain, ca_pem = _chain("cached.example.com")
+        certificate_verify.default_verification_cache.clear()
+        for _ in range(2):
+            tls = TLS(None)
+            tls._server_name = "cached.example.com"
+            tls._ca_certs = ca_pem
+            tls._verify_server_certificate(chain)
+            self.assertTrue(tls._cert_verified)
+        stats = certificate_verify.default_verification_cache.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,428 @@
+"""Tests for the per-direction TLS cipher states."""
+
+import datetime
+import hashlib
+import hmac
+import os
+import socket
+import ssl
+import struct
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from cryptography import x509
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+from cryptography.x509.oid import NameOID
+
+from ja3requests.exceptions import TLSDecryptionError, TLSKeyError, TLSMACVerificationError
+from ja3requests.protocol.tls import TLS, cipher_state
+from ja3requests.protocol.tls.cipher_state import (
+    MAX_FRAGMENT_LENGTH,
+    TLS12CBCState,
+    TLS12GCMState,
+    tls12_cipher_states,
+)
+from ja3requests.protocol.tls.config import TlsConfig
+from ja3requests.protocol.tls.crypto import CIPHER_SUITE_INFO, get_cipher_info
+from ja3requests.protocol.tls.record_layer import TLSRecordLayer, TLSSocket
+from ja3requests.protocol.tls.tls13 import TLS13RecordProtection
+
+
+def _payload(record):
+    return record[:5], record[5:]
+
+
+class TestTLS12GCMState(unittest.TestCase):
+    def setUp(self):
+        self.key, self.salt = os.urandom(16), os.urandom(4)
+        self.sender = TLS12GCMState(self.key, self.salt)
+        self.receiver = TLS12GCMState(self.key, self.salt)
+
+    def test_record_matches_rfc5288(self):
+        self.sender.seq_num = 7
+        record = self.sender.encrypt(0x17, b"hello")
+        header, payload = _payload(record)
+        self.assertEqual(header, b"\x17\x03\x03" + struct.pack("!H", 8 + 5 + 16))
+        explicit = struct.pack("!Q", 7)
+        self.assertEqual(payload[:8], explicit)
+        aad = explicit + b"\x17\x03\x03\x00\x05"
+        self.assertEqual(AESGCM(self.key).decrypt(self.salt + explicit, payload[8:], aad), b"hello")
+        self.assertEqual(self.sender.seq_num, 8)
+
+    def test_round_trip_advances_both_sequence_numbers(self):
+        for i in range(3):
+            header, payload = _payload(self.sender.encrypt(0x17, b"x" * i))
+            self.assertEqual(self.receiver.decrypt(payload, header), (0x17, b"x" * i))
+        self.assertEqual((self.sender.seq_num, self.receiver.seq_num), (3, 3))
+
+    def test_tampering_and_replay_fail(self):
+        header, payload = _payload(self.sender.encrypt(0x17, b"data"))
+        tampered = payload[:-1] + bytes([payload[-1] ^ 1])
+        with self.assertRaises(TLSDecryptionError):
+            self.receiver.decrypt(tampered, header)
+        self.receiver.decrypt(payload, header)
+        with self.assertRaises(TLSDecryptionError):
+            self.receiver.decrypt(payload, header)
+        with self.assertRaises(TLSDecryptionError):
+            self.receiver.decrypt(b"\x00" * 23, header)
+
+    def test_bad_keys(self):
+        with self.assertRaises(TLSKeyError):
+            TLS12GCMState(self.key, b"")
+
+
+class TestTLS12CBCState(unittest.TestCase):
+    def setUp(self):
+        self.key, self.mac_key = os.urandom(16), os.urandom(20)
+        self.sender = TLS12CBCState(self.key, self.mac_key)
+        self.receiver = TLS12CBCState(self.key, self.mac_key)
+
+    def test_record_matches_rfc5246(self):
+        self.sender.seq_num = 3
+        header, payload = _payload(self.sender.encrypt(0x16, b"finished"))
+        self.assertEqual(header[:3], b"\x16\x03\x03")
+        self.assertEqual(struct.unpack("!H", header[3:])[0], len(payload))
+        self.assertEqual(len(payload) % 16, 0)
+
+        # Independent decryption with the explicit IV at the front of the record
+        decryptor = Cipher(algorithms.AES(self.key), modes.CBC(payload[:16])).decryptor()
+        padded = decryptor.update(payload[16:]) + decryptor.finalize()
+        padding = padded[-1] + 1
+        self.assertEqual(padded[-padding:], bytes([padding - 1]) * padding)
+        fragment, mac = padded[:-padding - 20], padded[-padding - 20:-padding]
+        self.assertEqual(fragment, b"finished")
+        expected = hmac.new(
+            self.mac_key, struct.pack("!QB2sH", 3, 0x16, b"\x03\x03", 8) + fragment, hashlib.sha1
+        ).digest()
+        self.assertEqual(mac, expected)
+
+    def test_round_trip_over_chained_records(self):
+        messages = [b"", b"a", os.urandom(15), os.urandom(16), os.urandom(1000), os.urandom(16384)]
+        records = [_payload(self.sender.encrypt(0x17, m)) for m in messages]
+        for message, (header, payload) in zip(messages, records):
+            self.assertEqual(self.receiver.decrypt(payload, header), (0x17, message))
+        self.assertEqual(self.receiver.seq_num, len(messages))
+
+    def test_explicit_ivs_differ(self):
+        first = self.sender.encrypt(0x17, b"same")
+        second = self.sender.encrypt(0x17, b"same")
+        self.assertNotEqual(first[5:21], second[5:21])
+
+    def test_tampering_fails_mac(self):
+        header, payload = _payload(self.sender.encrypt(0x17, b"data" * 10))
+        tampered = bytearray(payload)
+        tampered[20] ^= 1
+        with self.assertRaises(TLSMACVerificationError):
+            self.receiver.decrypt(bytes(tampered), header)
+        self.assertEqual(self.receiver.seq_num, 0)
+
+    def test_wrong_sequence_number_fails_mac(self):
+        header, payload = _payload(self.sender.encrypt(0x17, b"data"))
+        self.receiver.seq_num = 1
+        with self.assertRaises(TLSMACVerificationError):
+            self.receiver.decrypt(payload, header)
+
+    def test_bad_lengths(self):
+        for size in (0, 16, 40):
+            with self.assertRaises(TLSDecryptionError):
+                self.receiver.decrypt(b"\x00" * size, b"\x17\x03\x03" + struct.pack("!H", size))
+
+    def test_sha256_mac(self):
+        mac_key = os.urandom(32)
+        sender = TLS12CBCState(self.key, mac_key, hashlib.sha256)
+        receiver = TLS12CBCState(self.key, mac_key, hashlib.sha256)
+        self.assertEqual(sender.mac_size, 32)
+        header, payload = _payload(sender.encrypt(0x17, b"abc"))
+        self.assertEqual(len(payload), 16 + 16 * ((3 + 32) // 16 + 1))
+        self.assertEqual(receiver.decrypt(payload, header), (0x17, b"abc"))
+
+
+class TestFactoryAndSetupCost(unittest.TestCase):
+    def test_states_follow_the_cipher_suite(self):
+        client, server = tls12_cipher_states(
+            0xC02F, client_key=os.urandom(16), server_key=os.urandom(16),
+            client_iv=os.urandom(4), server_iv=os.urandom(4),
+        )
+        self.assertIsInstance(client, TLS12GCMState)
+        self.assertIsInstance(server, TLS12GCMState)
+
+        client, _ = tls12_cipher_states(
+            0xC027, client_key=os.urandom(16), server_key=os.urandom(16),
+            client_mac_key=os.urandom(32), server_mac_key=os.urandom(32),
+        )
+        self.assertIsInstance(client, TLS12CBCState)
+        self.assertEqual(client.mac_size, 32)
+
+    def test_aead_is_keyed_once_per_direction(self):
+        with mock.patch.object(cipher_state, "AESGCM", wraps=AESGCM) as aesgcm:
+            state = TLS12GCMState(os.urandom(16), os.urandom(4))
+            for _ in range(50):
+                state.encrypt(0x17, b"data")
+        self.assertEqual(aesgcm.call_count, 1)
+
+    def test_cbc_cipher_is_set_up_once_per_direction(self):
+        with mock.patch.object(cipher_state, "Cipher", wraps=Cipher) as cipher:
+            state = TLS12CBCState(os.urandom(16), os.urandom(20))
+            for _ in range(50):
+                state.encrypt(0x17, b"data")
+        self.assertEqual(cipher.call_count, 1)
+
+    def test_cipher_info_is_not_rebuilt(self):
+        self.assertIs(get_cipher_info(0xC02F), CIPHER_SUITE_INFO[0xC02F])
+        self.assertEqual(get_cipher_info(0x1234)["name"], "UNKNOWN_1234")
+
+
+class TestTLS13RecordProtection(unittest.TestCase):
+    def test_nonce_is_iv_xor_sequence_number(self):
+        iv = os.urandom(12)
+        rp = TLS13RecordProtection(os.urandom(16), iv)
+        rp.seq_num = 0x0102030405
+        seq = rp.seq_num.to_bytes(12, "big")
+        self.assertEqual(rp._compute_nonce(), bytes(a ^ b for a, b in zip(iv, seq)))
+        self.assertEqual(rp.seq_num, 0x0102030406)
+
+    def test_round_trip_strips_padding(self):
+        key, iv = os.urandom(32), os.urandom(12)
+        sender = TLS13RecordProtection(key, iv, cipher="chacha20-poly1305")
+        receiver = TLS13RecordProtection(key, iv, cipher="chacha20-poly1305")
+        header, payload = _payload(sender.encrypt(0x16, b"msg"))
+        self.assertEqual(receiver.decrypt(payload, header), (0x16, b"msg"))
+
+        inner = b"msg\x17" + b"\x00" * 10
+        header = b"\x17\x03\x03" + struct.pack("!H", len(inner) + 16)
+        nonce = sender._compute_nonce()
+        payload = ChaCha20Poly1305(key).encrypt(nonce, inner, header)
+        self.assertEqual(receiver.decrypt(payload, header), (0x17, b"msg"))
+
+
+def _state_pairs():
+    """(sender, receiver) pairs sharing keys, one per kind of state."""
+    gcm_key, salt = os.urandom(16), os.urandom(4)
+    cbc_key, mac_key = os.urandom(32), os.urandom(32)
+    tls13_key, tls13_iv = os.urandom(16), os.urandom(12)
+    chacha_key = os.urandom(32)
+    return {
+        "gcm": (TLS12GCMState(gcm_key, salt), TLS12GCMState(gcm_key, salt)),
+        "cbc": (
+            TLS12CBCState(cbc_key, mac_key, hashlib.sha256),
+            TLS12CBCState(cbc_key, mac_key, hashlib.sha256),
+        ),
+        "tls13": (TLS13RecordProtection(tls13_key, tls13_iv), TLS13RecordProtection(tls13_key, tls13_iv)),
+        "chacha": (
+            TLS13RecordProtection(chacha_key, tls13_iv, "chacha20-poly1305"),
+            TLS13RecordProtection(chacha_key, tls13_iv, "chacha20-poly1305"),
+        ),
+    }
+
+
+class TestCallerProvidedBuffers(unittest.TestCase):
+    """Every state encrypts and decrypts into buffers the caller owns."""
+
+    def test_into_matches_bytes_api(self):
+        for kind, (sender, receiver) in _state_pairs().items():
+            with self.subTest(kind):
+                buf = bytearray(sender.buffer_size(MAX_FRAGMENT_LENGTH))
+                out = bytearray(len(buf))
+                for message in (b"", b"abc", os.urandom(1000), os.urandom(MAX_FRAGMENT_LENGTH)):
+                    size = sender.encrypt_into(0x17, message, buf)
+                    self.assertLessEqual(size, sender.buffer_size(len(message)))
+                    record = bytes(buf[:size])
+                    self.assertEqual(struct.unpack("!H", record[3:5])[0], size - 5)
+                    content_type, plaintext = receiver.decrypt_into(record[5:], record[:5], out)
+                    self.assertEqual((content_type, bytes(plaintext)), (0x17, message))
+                    self.assertIs(plaintext.obj, out)
+
+                    # The bytes API on the same states continues the same sequence
+                    record = sender.encrypt(0x17, message)
+                    self.assertEqual(receiver.decrypt(record[5:], record[:5]), (0x17, message))
+                self.assertEqual(sender.seq_num, 8)
+                self.assertEqual(receiver.seq_num, 8)
+
+    def test_into_without_aead_into(self):
+        # cryptography releases before AEAD encrypt_into/decrypt_into
+        for kind in ("gcm", "tls13", "chacha"):
+            sender, receiver = _state_pairs()[kind]
+            with self.subTest(kind), mock.patch.object(cipher_state, "_AEAD_INTO", False):
+                buf = bytearray(sender.buffer_size(1000))
+                out = bytearray(len(buf))
+                message = os.urandom(1000)
+                size = sender.encrypt_into(0x17, message, buf)
+                content_type, plaintext = receiver.decrypt_into(buf[5:size], buf[:5], out)
+                self.assertEqual((content_type, bytes(plaintext)), (0x17, message))
+                self.assertIs(plaintext.obj, out)
+
+                record = sender.encrypt(0x17, message)
+                with self.assertRaises((TLSDecryptionError, InvalidTag)):
+                    receiver.decrypt_into(record[5:-1] + bytes([record[-1] ^ 1]), record[:5], out)
+
+    def test_encrypt_records_fragments_at_the_limit(self):
+        data = os.urandom(3 * MAX_FRAGMENT_LENGTH + 100)
+        for kind, (sender, receiver) in _state_pairs().items():
+            with self.subTest(kind):
+                buf = bytearray(sender.records_size(len(data)))
+                written = sender.encrypt_records_into(0x17, data, buf)
+                wire = bytes(buf[:written]) + sender.encrypt_records(0x17, data)
+
+                received, offset, lengths = b"", 0, []
+                while offset < len(wire):
+                    length = struct.unpack("!H", wire[offset + 3:offset + 5])[0]
+                    header, payload = wire[offset:offset + 5], wire[offset + 5:offset + 5 + length]
+                    _, plaintext = receiver.decrypt(payload, header)
+                    lengths.append(len(plaintext))
+                    received += plaintext
+                    offset += 5 + length
+                self.assertEqual(received, data + data)
+                self.assertEqual(lengths, [MAX_FRAGMENT_LENGTH] * 3 + [100] + [MAX_FRAGMENT_LENGTH] * 3 + [100])
+
+    def test_empty_data_is_one_record(self):
+        sender, receiver = _state_pairs()["gcm"]
+        buf = bytearray(sender.records_size(0))
+        written = sender.encrypt_records_into(0x17, b"", buf)
+        self.assertEqual(receiver.decrypt(buf[5:written], buf[:5]), (0x17, b""))
+
+
+class TestTLSRecordLayer(unittest.TestCase):
+    def test_continues_handshake_states(self):
+        client, server = _state_pairs()["gcm"]
+        client.seq_num = server.seq_num = 1  # Finished already sent
+        layer = TLSRecordLayer()
+        layer.set_states(client, server)
+        record = layer.encrypt_application_data(b"x" * (MAX_FRAGMENT_LENGTH + 1))
+        self.assertEqual(layer.client_seq_num, 3)
+        first = record[:5 + struct.unpack("!H", record[3:5])[0]]
+        self.assertEqual(layer.decrypt_application_data(first), (b"x" * MAX_FRAGMENT_LENGTH, 0x17))
+        self.assertEqual(layer.server_seq_num, 2)
+
+    def test_gcm_keys(self):
+        key, salt = os.urandom(16), os.urandom(4)
+        layer = TLSRecordLayer()
+        layer.set_keys(
+            key, key, client_write_mac_key=b"", server_write_mac_key=b"",
+            client_write_iv=salt, server_write_iv=salt, cipher_suite=0xC02F,
+        )
+        self.assertIsInstance(layer.client_state, TLS12GCMState)
+        buf = bytearray(layer.records_size(5))
+        written = layer.encrypt_application_data_into(b"hello", buf)
+        out = bytearray(written)
+        data, content_type = layer.decrypt_application_data_into(buf[:written], out)
+        self.assertEqual((bytes(data), content_type), (b"hello", 0x17))
+
+    def test_tls_socket_uses_the_handshake_states(self):
+        client, server = _state_pairs()["tls13"]
+        tls = TLS.__new__(TLS)
+        tls._tls13_client_rp, tls._tls13_server_rp = client, server
+        a, b = socket.socketpair()
+        try:
+            tls_socket = TLSSocket(a, tls)
+            self.assertIs(tls_socket.record_layer.client_state, client)
+            self.assertIs(tls_socket.record_layer.server_state, server)
+        finally:
+            a.close()
+            b.close()
+
+
+def _rsa_server_context(ciphers):
+    directory = tempfile.mkdtemp(prefix="ja3test")
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder().subject_name(name).issuer_name(name)
+        .public_key(key.public_key()).serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = os.path.join(directory, "cert.pem")
+    key_path = os.path.join(directory, "key.pem")
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ))
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    ctx.load_cert_chain(cert_path, key_path)
+    ctx.maximum_version = ssl.TLSVersion.TLSv1_2
+    ctx.set_ciphers(ciphers)
+    return ctx
+
+
+class TestCBCAgainstOpenSSL(unittest.TestCase):
+    """Full handshakes and echoed records with OpenSSL over CBC suites."""
+
+    @classmethod
+    def setUpClass(cls):
+        try:
+            cls.context = _rsa_server_context("ECDHE-RSA-AES128-SHA256:ECDHE-RSA-AES128-SHA:@SECLEVEL=0")
+        except ssl.SSLError as e:
+            raise unittest.SkipTest(f"OpenSSL without CBC suites: {e}")
+        cls.listener = socket.create_server(("127.0.0.1", 0))
+        cls.port = cls.listener.getsockname()[1]
+        threading.Thread(target=cls._serve, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.listener.close()
+
+    @classmethod
+    def _serve(cls):
+        while True:
+            try:
+                conn, _ = cls.listener.accept()
+            except OSError:
+                return
+            try:
+                with cls.context.wrap_socket(conn, server_side=True) as tls_conn:
+                    length = struct.unpack("!I", tls_conn.recv(4))[0]
+                    data = b""
+                    while len(data) < length:
+                        data += tls_conn.recv(length - len(data))
+                    tls_conn.sendall(data)
+            except (OSError, ssl.SSLError):
+                pass
+
+    def _echo(self, cipher_suite, message):
+        config = TlsConfig()
+        config.tls_version = 0x0303
+        config.cipher_suites = [cipher_suite]
+        config.supported_groups = [23, 29]
+        config.signature_algorithms = [0x0401, 0x0804, 0x0403]
+        sock = socket.create_connection(("127.0.0.1", self.port), timeout=5)
+        try:
+            tls = TLS(sock, server_host="127.0.0.1", server_port=self.port)
+            tls.set_payload(tls_config=config)
+            self.assertTrue(tls.handshake())
+            self.assertEqual(tls._selected_cipher_suite, cipher_suite)
+
+            sock.sendall(tls.encrypt_application_data(struct.pack("!I", len(message)) + message))
+            received = b""
+            while len(received) < len(message):
+                header = sock.recv(5, socket.MSG_WAITALL)
+                payload = sock.recv(struct.unpack("!H", header[3:5])[0], socket.MSG_WAITALL)
+                content_type, plaintext = tls.decrypt_record(header[0], header, payload)
+                self.assertEqual(content_type, 0x17)
+                received += plaintext
+            return received
+        finally:
+            sock.close()
+
+    def test_sha1_suite(self):
+        message = os.urandom(40000)
+        self.assertEqual(self._echo(0xC013, message), message)
+
+    def test_sha256_suite(self):
+        message = os.urandom(40000)
+        self.assertEqual(self._echo(0xC027, message), message)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+"""Tests for precompiled ClientHello templates."""
+
+import struct
+import unittest
+
+from ja3requests.protocol.tls import TLS
+from ja3requests.protocol.tls.config import TlsConfig
+from ja3requests.protocol.tls.extensions import (
+    ExtendedMasterSecretExtension,
+    KeyShareExtension,
+    PSKKeyExchangeModesExtension,
+    SessionTicketExtension,
+    SNIExtension,
+    SupportedVersionsExtension,
+)
+from ja3requests.protocol.tls.layers import client_hello
+from ja3requests.protocol.tls.layers.client_hello import (
+    ClientHello,
+    ClientHelloTemplate,
+    client_hello_template,
+)
+from ja3requests.protocol.tls.session_cache import TLSSessionCache
+
+RANDOM = b"\x42" * 32
+PARAMS = {
+    "supported_groups": [29, 23],
+    "signature_algorithms": [0x0403, 0x0804],
+    "alpn_protocols": ["h2", "http/1.1"],
+}
+
+
+class TestTemplateMatchesClientHello(unittest.TestCase):
+    """A template builds the same bytes as constructing a ClientHello directly."""
+
+    def test_tls12(self):
+        extensions = [ExtendedMasterSecretExtension(), SessionTicketExtension()]
+        template = ClientHelloTemplate(
+            b"\x03\x03", [0xC02F, 0xC013], use_grease=False, extensions=extensions, **PARAMS
+        )
+        direct = ClientHello(
+            b"\x03\x03", [0xC02F, 0xC013], RANDOM, "example.com",
+            use_grease=False, _extensions=extensions, **PARAMS,
+        )
+        built = template.build(RANDOM, server_name="example.com")
+        self.assertEqual(built.message, direct.message)
+        self.assertEqual(built.extensions[2:], built._extension_data)
+
+    def test_tls13_adds_version_key_share_and_psk_modes(self):
+        key_share = KeyShareExtension([(0x001D, b"\x01" * 32)])
+        extensions = [ExtendedMasterSecretExtension()]
+        template = ClientHelloTemplate(
+            b"\x03\x03", [0x1301], use_grease=False, extensions=extensions, tls13=True, **PARAMS
+        )
+        direct = ClientHello(
+            b"\x03\x03", [0x1301], RANDOM, "example.com", use_grease=False,
+            _extensions=extensions + [
+                SupportedVersionsExtension([0x0304, 0x0303]), key_share, PSKKeyExchangeModesExtension([1]),
+            ],
+            **PARAMS,
+        )
+        self.assertTrue(template.needs_key_share)
+        built = template.build(RANDOM, server_name="example.com", key_share=key_share)
+        self.assertEqual(built.message, direct.message)
+
+    def test_configured_key_share_is_kept(self):
+        key_share = KeyShareExtension([(0x0017, b"\x04" * 65)])
+        template = ClientHelloTemplate(b"\x03\x03", [0x1301], extensions=[key_share], tls13=True)
+        self.assertFalse(template.needs_key_share)
+        self.assertIn(key_share.to_bytes(), template.build().extensions)
+
+    def test_configured_sni_wins_over_server_name(self):
+        template = ClientHelloTemplate(b"\x03\x03", [0xC02F], extensions=[SNIExtension("custom.com")])
+        extensions = template.build(server_name="auto.com").extensions
+        self.assertIn(b"custom.com", extensions)
+        self.assertNotIn(b"auto.com", extensions)
+
+    def test_per_connection_fields(self):
+        template = ClientHelloTemplate(
+            b"\x03\x03", [0xC02F], extensions=[SessionTicketExtension()], **PARAMS
+        )
+        first = template.build(server_name="a.com", session_id=b"\x07" * 32, session_ticket=b"T" * 40)
+        second = template.build(server_name="b.com")
+
+        self.assertEqual(first.session_id, b"\x07" * 32)
+        self.assertIn(struct.pack("!HH", 0x0023, 40) + b"T" * 40, first.extensions)
+        self.assertIn(struct.pack("!HH", 0x0023, 0), second.extensions)
+        self.assertIn(b"b.com", second.extensions)
+        self.assertNotEqual(first.random, second.random)
+
+    def test_grease_is_chosen_per_build(self):
+        template = ClientHelloTemplate(b"\x03\x03", [0xC02F])
+        greases = {template.build().cipher_suites[:2] for _ in range(64)}
+        self.assertGreater(len(greases), 1)
+        self.assertTrue(all(g[0] == g[1] and g[1] & 0x0F == 0x0A for g in greases))
+
+    def test_without_server_name_sni_is_omitted(self):
+        template = ClientHelloTemplate(b"\x03\x03", [0xC02F], use_grease=False, **PARAMS)
+        self.assertEqual(
+            template.build(RANDOM).message,
+            ClientHello(b"\x03\x03", [0xC02F], RANDOM, use_grease=False, **PARAMS).message,
+        )
+
+
+class TestTemplateCache(unittest.TestCase):
+    def test_configs_from_one_preset_share_a_template(self):
+        first, second = TlsConfig.from_browser("chrome", 120), TlsConfig.from_browser("chrome", 120)
+        templates = [
+            client_hello_template(
+                b"\x03\x03", config.cipher_suites, supported_groups=config.supported_groups,
+                signature_algorithms=config.signature_algorithms, alpn_protocols=config.alpn_protocols,
+                use_grease=config.use_grease, extensions=config.extensions,
+            )
+            for config in (first, second)
+        ]
+        self.assertIs(templates[0], templates[1])
+
+    def test_changed_config_compiles_a_new_template(self):
+        extensions = [ExtendedMasterSecretExtension()]
+        template = client_hello_template(b"\x03\x03", [0xC02F], extensions=extensions)
+        self.assertIs(client_hello_template(b"\x03\x03", [0xC02F], extensions=list(extensions)), template)
+        self.assertIsNot(client_hello_template(b"\x03\x03", [0xC02F, 0xC013], extensions=extensions), template)
+        self.assertIsNot(
+            client_hello_template(b"\x03\x03", [0xC02F], extensions=[ExtendedMasterSecretExtension()]),
+            template,
+        )
+
+    def test_cache_is_bounded(self):
+        for i in range(client_hello.MAX_TEMPLATES + 10):
+            client_hello_template(b"\x03\x03", [0xC02F], supported_groups=[i])
+        self.assertEqual(len(client_hello._templates), client_hello.MAX_TEMPLATES)
+
+
+class TestSetPayloadUsesTemplate(unittest.TestCase):
+    def test_tls13_connections_get_their_own_key_share(self):
+        config = TlsConfig()
+        config.tls_version = 0x0304
+        config.server_name = "example.com"
+        hellos = []
+        for _ in range(2):
+            tls = TLS(None)
+            tls.set_payload(tls_config=config)
+            hellos.append(tls.body.extensions)
+            self.assertIsNotNone(tls._tls13_private_key)
+        self.assertNotEqual(hellos[0], hellos[1])
+        self.assertEqual(len(hellos[0]), len(hellos[1]))
+
+    def test_tls12_ticket_offer_leaves_template_unchanged(self):
+        config = TlsConfig()
+        config.cipher_suites = [0xC02F]
+        config.extensions = [SessionTicketExtension()]
+        cache = TLSSessionCache()
+        cache.put("a.com", 443, b"", b"\x01" * 48, 0xC02F, ticket=b"T" * 64)
+
+        resumed = TLS(None, session_cache=cache, server_host="a.com", server_port=443)
+        resumed.set_payload(tls_config=config)
+        fresh = TLS(None)
+        fresh.set_payload(tls_config=config)
+
+        self.assertIn(b"T" * 64, resumed.body.extensions)
+        self.assertIn(struct.pack("!HH", 0x0023, 0), fresh.body.extensions)
+        self.assertEqual(fresh.body.session_id, b"\x00")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -269,6 +269,13 @@ class TestHPACKDecoder(unittest.TestCase):
         decoded = dec.decode_headers(encoded)
         self.assertEqual(decoded, original)
 
+    def test_decode_dynamic_table_name_reference(self):
+        enc = HPACKEncoder()
+        dec = HPACKDecoder()
+        for value in ("a", "b", "c"):
+            headers = [("x-request", value)]
+            self.assertEqual(dec.decode_headers(enc.encode_headers(headers)), headers)
+
 
 # ============================================================================
 # Connection Tests
@@ -287,20 +294,21 @@ class TestH2Connection(unittest.TestCase):
         conn = H2Connection(fake_send, fake_recv)
         conn.initiate()
 
-        # First send: connection preface
-        self.assertEqual(sent[0], CONNECTION_PREFACE)
-        # Second send: SETTINGS frame
-        frame, _ = H2Frame.parse(sent[1])
+        # One send: connection preface followed by the SETTINGS frame
+        self.assertEqual(len(sent), 1)
+        self.assertTrue(sent[0].startswith(CONNECTION_PREFACE))
+        frame, _ = H2Frame.parse(sent[0][len(CONNECTION_PREFACE):])
         self.assertEqual(frame.type, FRAME_SETTINGS)
 
     def test_initiate_with_window_update(self):
         sent = []
         conn = H2Connection(lambda d: sent.append(d), lambda n: b"")
         conn.initiate(window_update_increment=15663105)
-        # Should have 3 sends: preface, settings, window_update
-        self.assertEqual(len(sent), 3)
-        frame, _ = H2Frame.parse(sent[2])
-        self.assertEqual(frame.type, FRAME_WINDOW_UPDATE)
+        # Preface, SETTINGS and WINDOW_UPDATE coalesced into one send
+        self.assertEqual(len(sent), 1)
+        frames, rest = H2Frame.parse_all(sent[0][len(CONNECTION_PREFACE):])
+        self.assertEqual(rest, b"")
+        self.assertEqual([f.type for f in frames], [FRAME_SETTINGS, FRAME_WINDOW_UPDATE])
 
     def test_send_request_returns_stream_id(self):
         sent = []
@@ -320,10 +328,9 @@ class TestH2Connection(unittest.TestCase):
         sent = []
         conn = H2Connection(lambda d: sent.append(d), lambda n: b"")
         conn.send_request("POST", "example.com", "/api", body=b'{"key":"val"}')
-        # Should send HEADERS + DATA
-        self.assertEqual(len(sent), 2)
-        headers_frame, _ = H2Frame.parse(sent[0])
-        data_frame, _ = H2Frame.parse(sent[1])
+        # HEADERS + DATA in one send
+        self.assertEqual(len(sent), 1)
+        (headers_frame, data_frame), _ = H2Frame.parse_all(sent[0])
         self.assertEqual(headers_frame.type, FRAME_HEADERS)
         self.assertEqual(data_frame.type, FRAME_DATA)
         self.assertEqual(data_frame.payload, b'{"key":"val"}')
@@ -0,0 +1,314 @@
+"""Tests for HTTP/2 flow control in H2Connection."""
+
+import socket
+import struct
+import threading
+import unittest
+
+from ja3requests.protocol.h2.connection import H2Connection
+from ja3requests.protocol.h2.frame import (
+    CONNECTION_PREFACE,
+    DEFAULT_WINDOW_SIZE,
+    FLAG_END_STREAM,
+    FLAG_PADDED,
+    FRAME_DATA,
+    FRAME_HEADERS,
+    FRAME_SETTINGS,
+    FRAME_WINDOW_UPDATE,
+    H2Frame,
+    SETTINGS_INITIAL_WINDOW_SIZE,
+    SETTINGS_MAX_FRAME_SIZE,
+    build_data_frame,
+    build_headers_frame,
+    build_settings_frame,
+    build_window_update_frame,
+)
+from ja3requests.protocol.h2.hpack import HPACKDecoder, HPACKEncoder
+from ja3requests.protocol.tls import MAX_FRAGMENT_LENGTH, TLS
+
+
+class _FlowControlPeer(threading.Thread):
+    """
+    HTTP/2 server that enforces flow control on a socketpair.
+
+    ``GET /<n>`` is answered with n bytes, sent only within the client's
+    windows; uploads are acknowledged with WINDOW_UPDATE and answered with
+    the number of bytes received. Frames that break the peer's limits are
+    recorded in ``violations``.
+    """
+
+    def __init__(self, sock, initial_window=DEFAULT_WINDOW_SIZE, max_frame_size=16384):
+        super().__init__(daemon=True)
+        self.sock = sock
+        self.initial_window = initial_window
+        self.max_frame_size = max_frame_size
+        self.violations = []
+        self.window_updates = 0
+        self.data_frames = 0
+        self._client_window = DEFAULT_WINDOW_SIZE  # Client's connection receive window
+        self._client_initial_window = DEFAULT_WINDOW_SIZE
+        self._client_stream_windows = {}
+        self._outgoing = {}  # stream_id -> bytes still to send
+        self._recv_window = DEFAULT_WINDOW_SIZE
+        self._stream_recv_windows = {}
+        self._uploads = {}
+        self._encoder = HPACKEncoder()
+
+    def _write(self, *frames):
+        self.sock.sendall(b"".join(frame.serialize() for frame in frames))
+
+    def _respond(self, stream_id, body):
+        block = self._encoder.encode_headers([(":status", "200")])
+        self._write(build_headers_frame(stream_id, block))
+        self._client_stream_windows[stream_id] = self._client_initial_window
+        self._outgoing[stream_id] = body
+
+    def _flush(self):
+        for stream_id in list(self._outgoing):
+            body = self._outgoing[stream_id]
+            while True:
+                size = min(len(body), 16384, self._client_window, self._client_stream_windows[stream_id])
+                if body and size <= 0:
+                    break
+                self._write(build_data_frame(stream_id, body[:size], end_stream=size == len(body)))
+                self._client_window -= size
+                self._client_stream_windows[stream_id] -= size
+                body = body[size:]
+                if not body:
+                    break
+            if body:
+                self._outgoing[stream_id] = body
+            else:
+                del self._outgoing[stream_id]
+
+    def _handle(self, frame, decoder):
+        if frame.type == FRAME_SETTINGS and not frame.flags:
+            settings = dict(
+                struct.unpack("!HI", frame.payload[i:i + 6]) for i in range(0, len(frame.payload), 6)
+            )
+            self._client_initial_window = settings.get(SETTINGS_INITIAL_WINDOW_SIZE, self._client_initial_window)
+            self._write(build_settings_frame(ack=True))
+        elif frame.type == FRAME_WINDOW_UPDATE:
+            self.window_updates += 1
+            increment = struct.unpack("!I", frame.payload)[0]
+            if frame.stream_id == 0:
+                self._client_window += increment
+            elif frame.stream_id in self._client_stream_windows:
+                self._client_stream_windows[frame.stream_id] += increment
+        elif frame.type == FRAME_HEADERS:
+            path = dict(decoder.decode_headers(frame.payload))[":path"]
+            self._stream_recv_windows[frame.stream_id] = self.initial_window
+            if frame.flags & FLAG_END_STREAM:
+                self._respond(frame.stream_id, b"x" * int(path.strip("/")))
+            else:
+                self._uploads[frame.stream_id] = 0
+        elif frame.type == FRAME_DATA:
+            self.data_frames += 1
+            size = len(frame.payload)
+            self._recv_window -= size
+            self._stream_recv_windows[frame.stream_id] -= size
+            if size > self.max_frame_size:
+                self.violations.append(f"frame of {size} bytes")
+            if self._recv_window < 0 or self._stream_recv_windows[frame.stream_id] < 0:
+                self.violations.append(f"window exceeded on stream {frame.stream_id}")
+            self._uploads[frame.stream_id] += size
+            updates = [build_window_update_frame(0, size)] if size else []
+            self._recv_window += size
+            if frame.flags & FLAG_END_STREAM:
+                self._respond(frame.stream_id, str(self._uploads.pop(frame.stream_id)).encode())
+            elif size:
+                updates.append(build_window_update_frame(frame.stream_id, size))
+                self._stream_recv_windows[frame.stream_id] += size
+            if updates:
+                self._write(*updates)
+
+    def run(self):
+        decoder = HPACKDecoder()
+        self._write(build_settings_frame({
+            SETTINGS_INITIAL_WINDOW_SIZE: self.initial_window,
+            SETTINGS_MAX_FRAME_SIZE: self.max_frame_size,
+        }))
+        buf = b""
+        try:
+            while True:
+                data = self.sock.recv(65536)
+                if not data:
+                    return
+                buf += data
+                if buf.startswith(CONNECTION_PREFACE):
+                    buf = buf[len(CONNECTION_PREFACE):]
+                frames, buf = H2Frame.parse_all(buf)
+                for frame in frames:
+                    self._handle(frame, decoder)
+                self._flush()
+        except OSError:
+            pass
+
+
+class TestFlowControlTransfers(unittest.TestCase):
+    """Multi-MB transfers complete against a peer that enforces windows."""
+
+    def setUp(self):
+        self.client, self.server = socket.socketpair()
+        self.client.settimeout(10)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.close()
+
+    def _connection(self, peer, settings=None):
+        peer.start()
+        h2 = H2Connection(self.client.sendall, self.client.recv, settings=settings)
+        h2.initiate()
+        return h2
+
+    def test_large_download_does_not_stall(self):
+        h2 = self._connection(_FlowControlPeer(self.server))
+        size = 8 * 1024 * 1024
+        stream_id = h2.send_request("GET", "example.com", f"/{size}")
+        headers, body = h2.receive_response(stream_id)
+        self.assertIn((":status", "200"), headers)
+        self.assertEqual(len(body), size)
+
+    def test_concurrent_downloads_share_connection_window(self):
+        h2 = self._connection(_FlowControlPeer(self.server))
+        size = 2 * 1024 * 1024
+        results = []
+
+        def worker():
+            stream_id = h2.send_request("GET", "example.com", f"/{size}")
+            results.append(len(h2.receive_response(stream_id)[1]))
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(20)
+        self.assertEqual(results, [size] * 4)
+
+    def test_large_upload_respects_peer_windows(self):
+        peer = _FlowControlPeer(self.server, initial_window=20000, max_frame_size=16384)
+        h2 = self._connection(peer)
+        # Let the peer's SETTINGS arrive before sending the body
+        h2.receive_response(h2.send_request("GET", "example.com", "/1"))
+
+        body = b"u" * (3 * 1024 * 1024 + 7)
+        stream_id = h2.send_request("POST", "example.com", "/upload", body=body)
+        _, response = h2.receive_response(stream_id)
+        self.assertEqual(int(response), len(body))
+        self.assertEqual(peer.violations, [])
+
+    def test_streamed_upload_respects_peer_windows(self):
+        peer = _FlowControlPeer(self.server, initial_window=20000, max_frame_size=16384)
+        h2 = self._connection(peer)
+        h2.receive_response(h2.send_request("GET", "example.com", "/1"))
+
+        chunks = [b"g" * 50000] * 40 + [b"tail"]
+        stream_id = h2.send_request("POST", "example.com", "/upload", body=iter(chunks))
+        _, response = h2.receive_response(stream_id)
+        self.assertEqual(int(response), sum(map(len, chunks)))
+        self.assertEqual(peer.violations, [])
+
+    def test_window_updates_are_batched(self):
+        peer = _FlowControlPeer(self.server)
+        h2 = self._connection(peer)
+        size = 1024 * 1024
+        h2.receive_response(h2.send_request("GET", "example.com", f"/{size}"))
+        # One update per half window, not one per 16 KB DATA frame
+        self.assertLessEqual(peer.window_updates, 2 * size // (DEFAULT_WINDOW_SIZE // 2) + 2)
+        self.assertGreater(peer.window_updates, 0)
+
+    def test_larger_initial_window_needs_fewer_updates(self):
+        peer = _FlowControlPeer(self.server)
+        h2 = self._connection(peer, {SETTINGS_INITIAL_WINDOW_SIZE: 4 * 1024 * 1024})
+        size = 1024 * 1024
+        h2.receive_response(h2.send_request("GET", "example.com", f"/{size}"))
+        # Only the connection window (still 64 KB) needs replenishing
+        self.assertLessEqual(peer.window_updates, size // (DEFAULT_WINDOW_SIZE // 2) + 1)
+
+
+class TestFlowControlAccounting(unittest.TestCase):
+    """Window bookkeeping without a peer."""
+
+    def setUp(self):
+        self.sent = []
+        self.h2 = H2Connection(self.sent.append, lambda n: b"")
+
+    def _frames(self):
+        frames, _ = H2Frame.parse_all(b"".join(self.sent))
+        return frames
+
+    def test_body_split_by_max_frame_size(self):
+        self.h2.send_request("POST", "example.com", "/", body=b"a" * 40000)
+        data = [f for f in self._frames() if f.type == FRAME_DATA]
+        self.assertEqual([f.length for f in data], [16384, 16384, 7232])
+        self.assertEqual([bool(f.flags & FLAG_END_STREAM) for f in data], [False, False, True])
+
+    def test_body_waits_for_window_update(self):
+        stream_id = self.h2.send_request("POST", "example.com", "/", body=b"a" * 70000)
+        sent = sum(f.length for f in self._frames() if f.type == FRAME_DATA)
+        self.assertEqual(sent, DEFAULT_WINDOW_SIZE)
+
+        self.sent.clear()
+        self.h2.receive_data(
+            build_window_update_frame(0, 10000).serialize()
+            + build_window_update_frame(stream_id, 10000).serialize()
+        )
+        data = [f for f in self._frames() if f.type == FRAME_DATA]
+        self.assertEqual(sum(f.length for f in data), 70000 - DEFAULT_WINDOW_SIZE)
+        self.assertTrue(data[-1].flags & FLAG_END_STREAM)
+
+    def test_settings_initial_window_change_applies_to_open_streams(self):
+        settings = build_settings_frame({SETTINGS_INITIAL_WINDOW_SIZE: 1000})
+        self.h2.receive_data(settings.serialize())
+        stream_id = self.h2.send_request("POST", "example.com", "/", body=b"a" * 5000)
+        self.assertEqual(sum(f.length for f in self._frames() if f.type == FRAME_DATA), 1000)
+
+        self.sent.clear()
+        self.h2.receive_data(build_settings_frame({SETTINGS_INITIAL_WINDOW_SIZE: 5000}).serialize())
+        self.assertEqual(sum(f.length for f in self._frames() if f.type == FRAME_DATA), 4000)
+        self.assertNotIn(stream_id, self.h2._send_queue)
+
+    def test_padded_data_is_stripped_and_counted(self):
+        stream_id = self.h2.send_request("GET", "example.com", "/")
+        padded = H2Frame(FRAME_DATA, FLAG_PADDED | FLAG_END_STREAM, stream_id, b"\x03body\x00\x00\x00")
+        self.assertEqual(self.h2.receive_data(padded.serialize()), [stream_id])
+        self.assertEqual(self.h2.pop_response(stream_id)[1], b"body")
+        self.assertEqual(self.h2._recv_unacked, 8)
+
+    def test_reset_stream_drops_queued_body(self):
+        stream_id = self.h2.send_request("POST", "example.com", "/", body=b"a" * 100000)
+        self.assertIn(stream_id, self.h2._send_queue)
+        rst = H2Frame(0x03, 0, stream_id, b"\x00\x00\x00\x08")
+        self.h2.receive_data(rst.serialize())
+        self.assertNotIn(stream_id, self.h2._send_queue)
+
+
+class _PlainRecordProtection:
+    """Record protection stand-in that frames plaintext without encrypting it."""
+
+    @staticmethod
+    def encrypt(content_type, data):
+        return bytes([content_type, 3, 3]) + len(data).to_bytes(2, "big") + data
+
+
+class TestRecordFragmentation(unittest.TestCase):
+    """A full DATA frame (16 KB + 9 byte header) spans two TLS records."""
+
+    def test_application_data_split_at_record_limit(self):
+        tls = TLS.__new__(TLS)
+        tls._tls13_client_rp = _PlainRecordProtection()
+        frame = build_data_frame(1, b"d" * 16384).serialize()
+        wire = tls.encrypt_application_data(frame)
+
+        lengths = []
+        offset = 0
+        while offset < len(wire):
+            length = int.from_bytes(wire[offset + 3:offset + 5], "big")
+            lengths.append(length)
+            offset += 5 + length
+        self.assertEqual(lengths, [MAX_FRAGMENT_LENGTH, len(frame) - MAX_FRAGMENT_LENGTH])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,7 +4,7 @@ import os
 import struct
 import unittest
 
-from ja3requests.protocol.h2.huffman import huffman_encode, huffman_decode
+from ja3requests.protocol.h2.huffman import huffman_encode, huffman_decode, huffman_encoded_length
 from ja3requests.protocol.h2.hpack import HPACKEncoder, HPACKDecoder, encode_string, decode_string
 from ja3requests.protocol.tls.tls13 import TLS13RecordProtection
 
@@ -67,6 +67,63 @@ class TestHuffmanDecode(unittest.TestCase):
         self.assertEqual(decoded, original)
 
 
+# RFC 7541 Appendix C.4 / C.6 Huffman-encoded strings
+RFC_VECTORS = [
+    (b"www.example.com", "f1e3c2e5f23a6ba0ab90f4ff"),
+    (b"no-cache", "a8eb10649cbf"),
+    (b"custom-key", "25a849e95ba97d7f"),
+    (b"custom-value", "25a849e95bb8e8b4bf"),
+    (b"302", "6402"),
+    (b"private", "aec3771a4b"),
+    (b"Mon, 21 Oct 2013 20:13:21 GMT", "d07abe941054d444a8200595040b8166e082a62d1bff"),
+    (b"https://www.example.com", "9d29ad171863c78f0b97c8e9ae82ae43d3"),
+]
+
+
+class TestHuffmanTableDriven(unittest.TestCase):
+    """State-machine decoder: RFC vectors and padding/EOS validation."""
+
+    def test_rfc_vectors(self):
+        for plain, encoded in RFC_VECTORS:
+            self.assertEqual(huffman_encode(plain).hex(), encoded)
+            self.assertEqual(huffman_decode(bytes.fromhex(encoded)), plain)
+            self.assertEqual(huffman_encoded_length(plain), len(encoded) // 2)
+
+    def test_every_byte_roundtrips(self):
+        data = bytes(range(256)) * 3
+        self.assertEqual(huffman_decode(huffman_encode(data)), data)
+        for byte in range(256):
+            self.assertEqual(huffman_decode(huffman_encode(bytes([byte]))), bytes([byte]))
+
+    def test_padding_longer_than_seven_bits_rejected(self):
+        with self.assertRaises(ValueError):
+            huffman_decode(huffman_encode(b"a") + b"\xff")
+
+    def test_padding_not_all_ones_rejected(self):
+        # "a" is 00011 (5 bits); pad with zeros instead of ones
+        with self.assertRaises(ValueError):
+            huffman_decode(bytes([0b00011000]))
+
+    def test_eos_rejected(self):
+        with self.assertRaises(ValueError):
+            huffman_decode(b"\xff\xff\xff\xff")
+
+    def test_encode_string_prefers_shorter_form(self):
+        self.assertEqual(encode_string("hello")[0], 5)  # raw by default
+        huffman = encode_string("www.example.com", huffman=True)
+        self.assertEqual(huffman, bytes([0x80 | 12]) + bytes.fromhex("f1e3c2e5f23a6ba0ab90f4ff"))
+        # Bytes with long codes get longer under Huffman, so stay raw
+        self.assertEqual(encode_string(b"\x00\x01", huffman=True), b"\x02\x00\x01")
+
+    def test_encoder_uses_huffman_and_roundtrips(self):
+        headers = [(":authority", "www.example.com"), ("x-binary", "\x01\x02")]
+        block = HPACKEncoder().encode_headers(headers)
+        self.assertIn(bytes.fromhex("f1e3c2e5f23a6ba0ab90f4ff"), block)
+        self.assertEqual(HPACKDecoder().decode_headers(block), headers)
+        raw = HPACKEncoder(huffman=False).encode_headers(headers)
+        self.assertIn(b"www.example.com", raw)
+
+
 # ============================================================================
 # HPACK with Huffman integration
 # ============================================================================
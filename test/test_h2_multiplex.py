@@ -0,0 +1,373 @@
+"""Tests for multiplexing concurrent requests over one HTTP/2 connection."""
+
+import socket
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+from ja3requests.pool import ConnectionPool
+from ja3requests.protocol.h2.connection import H2Connection
+from ja3requests.protocol.h2.frame import (
+    CONNECTION_PREFACE,
+    ERROR_CANCEL,
+    ERROR_PROTOCOL,
+    FLAG_END_STREAM,
+    FRAME_GOAWAY,
+    FRAME_HEADERS,
+    FRAME_RST_STREAM,
+    FRAME_SETTINGS,
+    H2Frame,
+    SETTINGS_MAX_CONCURRENT_STREAMS,
+    build_data_frame,
+    build_goaway_frame,
+    build_headers_frame,
+    build_settings_frame,
+)
+from ja3requests.protocol.h2.hpack import HPACKDecoder, HPACKEncoder
+from ja3requests.protocol.tls.record_layer import ReceiveBuffer
+from ja3requests.sockets import https as https_module
+from ja3requests.sockets.https import HttpsSocket
+
+
+def _record(payload):
+    return b"\x17\x03\x03" + len(payload).to_bytes(2, "big") + payload
+
+
+class _H2Peer(threading.Thread):
+    """
+    Minimal HTTP/2 server on one end of a socketpair.
+
+    Requests are answered once ``batch`` of them are pending, in reverse
+    order and with the frames of all responses interleaved. In ``records``
+    mode frames travel inside plaintext TLS-style records.
+    """
+
+    def __init__(self, sock, batch=1, records=False, max_streams=100):
+        super().__init__(daemon=True)
+        self.sock = sock
+        self.batch = batch
+        self.records = records
+        self.max_streams = max_streams
+        self.requests = 0
+
+    def _write(self, frames):
+        data = b"".join(frame.serialize() for frame in frames)
+        self.sock.sendall(_record(data) if self.records else data)
+
+    def _frames(self):
+        """Yield frames sent by the client until it closes the connection."""
+        raw = b""
+        frames_buf = b""
+        while True:
+            data = self.sock.recv(65536)
+            if not data:
+                return
+            if self.records:
+                raw += data
+                while len(raw) >= 5 and len(raw) >= 5 + int.from_bytes(raw[3:5], "big"):
+                    length = int.from_bytes(raw[3:5], "big")
+                    frames_buf += raw[5:5 + length]
+                    raw = raw[5 + length:]
+            else:
+                frames_buf += data
+            if frames_buf.startswith(CONNECTION_PREFACE):
+                frames_buf = frames_buf[len(CONNECTION_PREFACE):]
+            frames, frames_buf = H2Frame.parse_all(frames_buf)
+            yield from frames
+
+    def run(self):
+        decoder = HPACKDecoder()
+        encoder = HPACKEncoder()
+        self._write([build_settings_frame({SETTINGS_MAX_CONCURRENT_STREAMS: self.max_streams})])
+        pending = []
+        try:
+            for frame in self._frames():
+                if frame.type == FRAME_SETTINGS and not frame.flags:
+                    self._write([build_settings_frame(ack=True)])
+                if frame.type != FRAME_HEADERS:
+                    continue
+                headers = dict(decoder.decode_headers(frame.payload))
+                pending.append((frame.stream_id, headers[":path"]))
+                self.requests += 1
+                if len(pending) < self.batch:
+                    continue
+
+                responses = list(reversed(pending))
+                pending = []
+                out = []
+                for stream_id, path in responses:
+                    block = encoder.encode_headers([(":status", "200"), ("x-path", path)])
+                    out.append(build_headers_frame(stream_id, block))
+                for stream_id, path in responses:
+                    out.append(build_data_frame(stream_id, path.encode() * 50))
+                for stream_id, path in responses:
+                    out.append(build_data_frame(stream_id, b"|end", end_stream=True))
+                self._write(out)
+        except OSError:
+            pass
+
+
+class TestH2ConnectionMultiplexing(unittest.TestCase):
+    """H2Connection routes interleaved frames to concurrent callers."""
+
+    def setUp(self):
+        self.client, self.server = socket.socketpair()
+        self.client.settimeout(5)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.close()
+
+    def _connection(self):
+        h2 = H2Connection(self.client.sendall, self.client.recv)
+        h2.initiate()
+        return h2
+
+    def test_concurrent_streams_share_connection(self):
+        count = 10
+        _H2Peer(self.server, batch=count).start()
+        h2 = self._connection()
+        results = {}
+        errors = []
+
+        def worker(index):
+            try:
+                stream_id = h2.send_request("GET", "example.com", f"/{index}")
+                results[index] = h2.receive_response(stream_id)
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(results), count)
+        for index, (headers, body) in results.items():
+            self.assertIn(("x-path", f"/{index}"), headers)
+            self.assertEqual(body, f"/{index}".encode() * 50 + b"|end")
+        self.assertEqual(h2._streams, {})
+        self.assertEqual(h2.max_concurrent_streams, 100)
+
+    def test_out_of_order_response_waits_for_own_stream(self):
+        _H2Peer(self.server, batch=2).start()
+        h2 = self._connection()
+        first = h2.send_request("GET", "example.com", "/a")
+        second = h2.send_request("GET", "example.com", "/b")
+        # The reply to /b arrives first and is kept for its stream
+        self.assertEqual(h2.receive_response(first)[1], b"/a" * 50 + b"|end")
+        self.assertTrue(h2.stream_complete(second))
+        self.assertEqual(h2.receive_response(second)[1], b"/b" * 50 + b"|end")
+
+    def test_goaway_ends_unprocessed_streams(self):
+        h2 = self._connection()
+        kept = h2.send_request("GET", "example.com", "/kept")
+        dropped = h2.send_request("GET", "example.com", "/dropped")
+        self.server.sendall(build_goaway_frame(kept).serialize())
+        self.assertEqual(h2.receive_response(dropped), ([], b""))
+        self.assertTrue(h2.goaway_received)
+        with self.assertRaises(ConnectionError):
+            h2.send_request("GET", "example.com", "/late")
+
+    def test_eof_fails_all_waiters(self):
+        h2 = self._connection()
+        stream_ids = [h2.send_request("GET", "example.com", f"/{i}") for i in range(3)]
+        errors = []
+
+        def worker(stream_id):
+            try:
+                h2.receive_response(stream_id)
+            except ConnectionError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(s,)) for s in stream_ids]
+        for thread in threads:
+            thread.start()
+        self.server.shutdown(socket.SHUT_WR)
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(errors), 3)
+        self.assertTrue(h2.closed)
+
+
+class TestClosedAndIdleStreams(unittest.TestCase):
+    """Frames for streams that are over or were never opened do not create state."""
+
+    def setUp(self):
+        self.sent = []
+        self.h2 = H2Connection(self.sent.append, lambda n: b"")
+        self.encoder = HPACKEncoder()
+
+    def _sent_frames(self, frame_type):
+        frames, _ = H2Frame.parse_all(b"".join(self.sent))
+        return [f for f in frames if f.type == frame_type]
+
+    def _finished_stream(self):
+        stream_id = self.h2.send_request("GET", "example.com", "/")
+        block = self.encoder.encode_headers([(":status", "200")])
+        self.h2.receive_data(build_headers_frame(stream_id, block, end_stream=True).serialize())
+        self.h2.pop_response(stream_id)
+        return stream_id
+
+    def test_frames_on_closed_stream_are_ignored(self):
+        stream_id = self._finished_stream()
+        self.h2.receive_data(build_data_frame(stream_id, b"late" * 100).serialize())
+        self.assertEqual(self.h2._streams, {})
+        # Still counted against the connection window
+        self.assertEqual(self.h2._recv_unacked, 400)
+        self.assertFalse(self.h2.closed)
+
+    def test_header_block_on_closed_stream_keeps_hpack_in_step(self):
+        closed = self._finished_stream()
+        block = self.encoder.encode_headers([(":status", "200"), ("x-late", "v" * 20)])
+        self.h2.receive_data(build_headers_frame(closed, block).serialize())
+
+        stream_id = self.h2.send_request("GET", "example.com", "/next")
+        # Refers to the dynamic table entry the dropped block added
+        block = self.encoder.encode_headers([(":status", "200"), ("x-late", "v" * 20)])
+        self.h2.receive_data(build_headers_frame(stream_id, block, end_stream=True).serialize())
+        self.assertIn(("x-late", "v" * 20), self.h2.pop_response(stream_id)[0])
+
+    def test_frame_on_idle_stream_is_a_connection_error(self):
+        self.h2.send_request("GET", "example.com", "/")
+        self.h2.receive_data(build_data_frame(7, b"x").serialize())
+        self.assertNotIn(7, self.h2._streams)
+        self.assertTrue(self.h2.closed)
+        goaway = self._sent_frames(FRAME_GOAWAY)
+        self.assertEqual(int.from_bytes(goaway[0].payload[4:8], "big"), ERROR_PROTOCOL)
+
+    def test_timed_out_stream_is_reset(self):
+        def recv(_size):
+            raise socket.timeout("timed out")
+
+        h2 = H2Connection(self.sent.append, recv)
+        stream_id = h2.send_request("GET", "example.com", "/")
+        with self.assertRaises(socket.timeout):
+            h2.receive_response(stream_id)
+        self.assertEqual(h2._streams, {})
+        resets = self._sent_frames(FRAME_RST_STREAM)
+        self.assertEqual([f.stream_id for f in resets], [stream_id])
+        self.assertEqual(int.from_bytes(resets[0].payload, "big"), ERROR_CANCEL)
+
+
+class _PlainTLS:
+    """TLS stand-in that negotiates h2 and sends records in the clear."""
+
+    instances = 0
+
+    def __init__(self, *_args, **_kwargs):
+        type(self).instances += 1
+        self.receive_buffer = ReceiveBuffer()
+        self._negotiated_protocol = "h2"
+
+    def set_payload(self, **_kwargs):
+        pass
+
+    def handshake(self):
+        return True
+
+    @staticmethod
+    def encrypt_application_data(data):
+        return _record(data)
+
+    @staticmethod
+    def encrypt_application_records(data):
+        return [_record(data)]
+
+    @staticmethod
+    def decrypt_record(record_type, _header, payload):
+        return record_type, payload
+
+
+class TestHttpsSocketH2Pooling(unittest.TestCase):
+    """HttpsSocket shares one pooled h2 connection between requests."""
+
+    def setUp(self):
+        _PlainTLS.instances = 0
+        self.pool = ConnectionPool()
+        self.pairs = []
+
+    def tearDown(self):
+        self.pool.close_all()
+        for client, server in self.pairs:
+            client.close()
+            server.close()
+
+    def _new_conn(self, *_args, **_kwargs):
+        client, server = socket.socketpair()
+        self.pairs.append((client, server))
+        _H2Peer(server, records=True, max_streams=8).start()
+        return client
+
+    @staticmethod
+    def _context(path):
+        context = MagicMock(
+            destination_address="example.com",
+            port=443,
+            method="GET",
+            path=path,
+            headers={"User-Agent": "test"},
+            body=None,
+            read_timeout=5,
+            connect_timeout=5,
+            tls_config=None,
+        )
+        return context
+
+    def _request(self, path):
+        sock = HttpsSocket(self._context(path), pool=self.pool).new_conn()
+        message = sock.send().makefile("rb").read()
+        sock.return_to_pool()
+        return message
+
+    def test_concurrent_requests_use_one_handshake(self):
+        results = {}
+        errors = []
+
+        def worker(offset):
+            try:
+                for index in range(offset, 100, 20):
+                    results[index] = self._request(f"/{index}")
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                errors.append(e)
+
+        with patch.object(https_module, "TLS", _PlainTLS), \
+                patch.object(HttpsSocket, "_new_conn", side_effect=self._new_conn):
+            threads = [threading.Thread(target=worker, args=(i,)) for i in range(20)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(30)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(results), 100)
+        for index, message in results.items():
+            self.assertTrue(message.startswith(b"HTTP/1.1 200 OK\r\n"))
+            self.assertTrue(message.endswith(f"/{index}".encode() * 50 + b"|end"))
+        # Up to 8 streams per connection: 20 threads never need more than 3
+        self.assertLessEqual(_PlainTLS.instances, 3)
+        self.assertEqual(self.pool.get_stats()["h2_hosts"]["https://example.com:443"]["active_streams"], 0)
+
+    def test_sequential_requests_reuse_connection(self):
+        with patch.object(https_module, "TLS", _PlainTLS), \
+                patch.object(HttpsSocket, "_new_conn", side_effect=self._new_conn):
+            for index in range(100):
+                self.assertTrue(self._request(f"/{index}").endswith(b"|end"))
+        self.assertEqual(_PlainTLS.instances, 1)
+        self.assertEqual(self.pool.get_origin_protocol("example.com", 443), "h2")
+
+    def test_unpooled_h2_connection_is_closed(self):
+        with patch.object(https_module, "TLS", _PlainTLS), \
+                patch.object(HttpsSocket, "_new_conn", side_effect=self._new_conn):
+            sock = HttpsSocket(self._context("/x"), pool=None).new_conn()
+            conn = sock.send()
+        self.assertTrue(conn.makefile("rb").read().endswith(b"/x" * 50 + b"|end"))
+        self.assertIsNone(sock.conn)
+        self.assertEqual(self.pairs[0][0].fileno(), -1)
+
+
+if __name__ == "__main__":
+    unittest.main()
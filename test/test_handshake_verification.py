@@ -0,0 +1,184 @@
+"""Tests for certificate verification during the TLS 1.2 and 1.3 handshakes."""
+
+import datetime
+import os
+import socket
+import ssl
+import tempfile
+import threading
+import unittest
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from ja3requests.exceptions import TLSHandshakeError
+from ja3requests.protocol.tls import TLS
+from ja3requests.protocol.tls.certificate_verify import (
+    CertificateSignatureError,
+    verify_handshake_signature,
+)
+from ja3requests.protocol.tls.config import TlsConfig
+
+NOW = datetime.datetime.now(datetime.timezone.utc)
+
+
+def _self_signed(common_name="localhost"):
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, common_name)])
+    cert = (
+        x509.CertificateBuilder().subject_name(name).issuer_name(name)
+        .public_key(key.public_key()).serial_number(x509.random_serial_number())
+        .not_valid_before(NOW - datetime.timedelta(days=1))
+        .not_valid_after(NOW + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.DNSName(common_name)]), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+    return cert, key
+
+
+def _server_context(cert, key, version):
+    directory = tempfile.mkdtemp(prefix="ja3test")
+    cert_path = os.path.join(directory, "cert.pem")
+    key_path = os.path.join(directory, "key.pem")
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ))
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    ctx.load_cert_chain(cert_path, key_path)
+    ctx.minimum_version = ctx.maximum_version = version
+    return ctx
+
+
+def _config(tls_version, ca_certs, server_name="localhost", verify=True):
+    config = TlsConfig()
+    config.tls_version = tls_version
+    if tls_version == 0x0304:
+        config.cipher_suites = [0x1301, 0x1302, 0x1303]
+        config.supported_groups = [29]
+    else:
+        config.cipher_suites = [0xC02B, 0xC02F]
+        config.supported_groups = [23, 29]
+    config.signature_algorithms = [0x0403, 0x0804, 0x0401]
+    config.server_name = server_name
+    config.verify_cert = verify
+    config.ca_certs = ca_certs
+    return config
+
+
+class _VerificationAgainstOpenSSL:
+    """Handshakes with an OpenSSL server whose certificate is self-signed for localhost."""
+
+    TLS_VERSION = None
+    SSL_VERSION = None
+
+    @classmethod
+    def setUpClass(cls):
+        cert, key = _self_signed()
+        cls.ca_pem = cert.public_bytes(serialization.Encoding.PEM)
+        cls.context = _server_context(cert, key, cls.SSL_VERSION)
+        cls.listener = socket.create_server(("127.0.0.1", 0))
+        cls.port = cls.listener.getsockname()[1]
+        threading.Thread(target=cls._serve, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.listener.close()
+
+    @classmethod
+    def _serve(cls):
+        while True:
+            try:
+                conn, _ = cls.listener.accept()
+            except OSError:
+                return
+            try:
+                with cls.context.wrap_socket(conn, server_side=True) as tls_conn:
+                    tls_conn.recv(1)
+            except (OSError, ssl.SSLError):
+                pass
+
+    def _handshake(self, config):
+        sock = socket.create_connection(("127.0.0.1", self.port), timeout=5)
+        try:
+            tls = TLS(sock, server_host="127.0.0.1", server_port=self.port)
+            tls.set_payload(tls_config=config)
+            return tls, tls.handshake()
+        finally:
+            sock.close()
+
+    def test_trusted_certificate(self):
+        tls, completed = self._handshake(_config(self.TLS_VERSION, self.ca_pem))
+        self.assertTrue(completed)
+        self.assertTrue(tls._cert_verified)
+
+    def test_untrusted_certificate_aborts(self):
+        other_ca = _self_signed()[0].public_bytes(serialization.Encoding.PEM)
+        with self.assertRaisesRegex(TLSHandshakeError, "trusted root"):
+            self._handshake(_config(self.TLS_VERSION, other_ca))
+
+    def test_hostname_mismatch_aborts(self):
+        with self.assertRaisesRegex(TLSHandshakeError, "does not match"):
+            self._handshake(_config(self.TLS_VERSION, self.ca_pem, server_name="example.com"))
+
+    def test_verification_disabled(self):
+        other_ca = _self_signed()[0].public_bytes(serialization.Encoding.PEM)
+        tls, completed = self._handshake(_config(self.TLS_VERSION, other_ca, verify=False))
+        self.assertTrue(completed)
+        self.assertFalse(tls._cert_verified)
+
+
+class TestTLS12Verification(_VerificationAgainstOpenSSL, unittest.TestCase):
+    TLS_VERSION = 0x0303
+    SSL_VERSION = ssl.TLSVersion.TLSv1_2
+
+
+class TestTLS13Verification(_VerificationAgainstOpenSSL, unittest.TestCase):
+    TLS_VERSION = 0x0304
+    SSL_VERSION = ssl.TLSVersion.TLSv1_3
+
+
+class TestHandshakeSignature(unittest.TestCase):
+    """Signatures over handshake messages are checked with the certificate's key."""
+
+    def setUp(self):
+        cert, self.key = _self_signed()
+        self.cert_der = cert.public_bytes(serialization.Encoding.DER)
+        self.signature = self.key.sign(b"content", ec.ECDSA(hashes.SHA256()))
+
+    def test_valid_signature(self):
+        verify_handshake_signature(self.cert_der, 0x0403, self.signature, b"content", tls13=True)
+
+    def test_signature_over_other_content(self):
+        with self.assertRaises(CertificateSignatureError):
+            verify_handshake_signature(self.cert_der, 0x0403, self.signature, b"tampered")
+
+    def test_signature_from_other_key(self):
+        other = ec.generate_private_key(ec.SECP256R1()).sign(b"content", ec.ECDSA(hashes.SHA256()))
+        with self.assertRaises(CertificateSignatureError):
+            verify_handshake_signature(self.cert_der, 0x0403, other, b"content")
+
+    def test_scheme_must_match_key(self):
+        with self.assertRaisesRegex(CertificateSignatureError, "does not match"):
+            verify_handshake_signature(self.cert_der, 0x0804, self.signature, b"content")
+
+    def test_tls13_forbids_legacy_schemes(self):
+        for scheme in (0x0401, 0x0203):
+            with self.assertRaisesRegex(CertificateSignatureError, "Unsupported"):
+                verify_handshake_signature(self.cert_der, scheme, self.signature, b"content", tls13=True)
+
+    def test_unsigned_server_key_exchange_aborts(self):
+        tls = TLS(None)
+        tls._verify_cert = True
+        with self.assertRaises(TLSHandshakeError):
+            tls._verify_server_key_exchange(b"\x03\x00\x1d\x01\x00")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+"""Tests for Happy Eyeballs connection racing in protocol.sockets."""
+
+import socket
+import time
+import unittest
+from unittest import mock
+
+from ja3requests.protocol import sockets
+from ja3requests.protocol.sockets import HAS_IPV6, _interleave, create_connection
+
+
+def _res(family, host, port):
+    return (family, socket.SOCK_STREAM, socket.IPPROTO_TCP, "", (host, port))
+
+
+class TestInterleave(unittest.TestCase):
+    def setUp(self):
+        self.v6 = [_res(socket.AF_INET6, f"2001:db8::{i}", 443) for i in range(3)]
+        self.v4 = [_res(socket.AF_INET, f"192.0.2.{i}", 443) for i in range(2)]
+
+    def test_alternates_families_from_first_result(self):
+        ordered = _interleave(self.v6 + self.v4)
+        self.assertEqual(ordered, [self.v6[0], self.v4[0], self.v6[1], self.v4[1], self.v6[2]])
+
+    def test_remembered_family_goes_first(self):
+        ordered = _interleave(self.v6 + self.v4, socket.AF_INET)
+        self.assertEqual(ordered[:2], [self.v4[0], self.v6[0]])
+
+    def test_single_family_keeps_order(self):
+        self.assertEqual(_interleave(self.v4, socket.AF_INET6), self.v4)
+
+
+class TestCreateConnection(unittest.TestCase):
+    def setUp(self):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.bind(("127.0.0.1", 0))
+        self.server.listen(8)
+        self.addCleanup(self.server.close)
+        self.port = self.server.getsockname()[1]
+        sockets._families.clear()
+
+    def _connect(self, addresses, **kwargs):
+        with mock.patch.object(socket, "getaddrinfo", return_value=addresses):
+            return create_connection(("race.test", self.port), **kwargs)
+
+    def test_refused_address_falls_through_immediately(self):
+        start = time.monotonic()
+        sock = self._connect(
+            [_res(socket.AF_INET, "127.0.0.2", self.port), _res(socket.AF_INET, "127.0.0.1", self.port)],
+            timeout=5,
+            attempt_delay=2,
+        )
+        self.addCleanup(sock.close)
+        self.assertEqual(sock.getpeername(), ("127.0.0.1", self.port))
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_unresponsive_address_is_raced(self):
+        # 192.0.2.0/24 is reserved for documentation; connects either hang or fail
+        start = time.monotonic()
+        sock = self._connect(
+            [_res(socket.AF_INET, "192.0.2.1", self.port), _res(socket.AF_INET, "127.0.0.1", self.port)],
+            timeout=5,
+            attempt_delay=0.05,
+        )
+        self.addCleanup(sock.close)
+        self.assertEqual(sock.getpeername(), ("127.0.0.1", self.port))
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_winner_uses_timeout_and_options(self):
+        sock = self._connect([_res(socket.AF_INET, "127.0.0.1", self.port)], timeout=3)
+        self.addCleanup(sock.close)
+        self.assertEqual(sock.gettimeout(), 3)
+        self.assertTrue(sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY))
+
+    def test_losers_are_closed(self):
+        opened = []
+        real_socket = socket.socket
+
+        def tracking_socket(*args):
+            sock = real_socket(*args)
+            opened.append(sock)
+            return sock
+
+        with mock.patch.object(socket, "socket", side_effect=tracking_socket):
+            sock = self._connect(
+                [_res(socket.AF_INET, "192.0.2.1", self.port), _res(socket.AF_INET, "127.0.0.1", self.port)],
+                timeout=5,
+                attempt_delay=0.05,
+            )
+        self.addCleanup(sock.close)
+        self.assertEqual([s.fileno() == -1 for s in opened], [True, False])
+
+    def test_all_refused_raises_last_error(self):
+        with self.assertRaises(ConnectionRefusedError):
+            self._connect(
+                [_res(socket.AF_INET, "127.0.0.2", self.port), _res(socket.AF_INET, "127.0.0.3", self.port)],
+                timeout=5,
+            )
+
+    def test_empty_getaddrinfo(self):
+        with self.assertRaises(socket.error):
+            self._connect([])
+
+    @unittest.skipUnless(HAS_IPV6, "requires IPv6")
+    def test_winning_family_is_remembered(self):
+        addresses = [_res(socket.AF_INET6, "::1", self.port), _res(socket.AF_INET, "127.0.0.1", self.port)]
+        sock = self._connect(addresses, timeout=5)
+        sock.close()
+        self.assertEqual(sockets._families["race.test"], socket.AF_INET)
+
+        with mock.patch.object(sockets, "_race", wraps=sockets._race) as race:
+            self._connect(addresses, timeout=5).close()
+        self.assertEqual(race.call_args[0][0][0][0], socket.AF_INET)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+"""Tests for the ring-buffer HPACK dynamic table and table size handling."""
+
+import unittest
+
+from ja3requests.protocol.h2.connection import H2Connection
+from ja3requests.protocol.h2.frame import (
+    H2Frame,
+    SETTINGS_HEADER_TABLE_SIZE,
+    build_settings_frame,
+)
+from ja3requests.protocol.h2.hpack import (
+    STATIC_TABLE,
+    DynamicTable,
+    HPACKDecoder,
+    HPACKEncoder,
+    encode_integer,
+)
+
+
+def _entry_size(name, value):
+    return len(name) + len(value) + 32
+
+
+class TestDynamicTable(unittest.TestCase):
+    """DynamicTable indexing, lookup and eviction."""
+
+    def test_newest_entry_is_index_zero(self):
+        table = DynamicTable()
+        table.add("a", "1")
+        table.add("b", "2")
+        self.assertEqual(len(table), 2)
+        self.assertEqual(table[0], ("b", "2"))
+        self.assertEqual(table[1], ("a", "1"))
+        self.assertIsNone(table.get(2))
+        with self.assertRaises(IndexError):
+            _ = table[2]
+
+    def test_find_exact_and_name(self):
+        table = DynamicTable()
+        table.add("x-id", "1")
+        table.add("other", "v")
+        self.assertEqual(table.find("x-id", "1"), (1, 1))
+        self.assertEqual(table.find("x-id", "2"), (None, 1))
+        self.assertEqual(table.find("missing", ""), (None, None))
+
+    def test_name_index_points_at_newest(self):
+        table = DynamicTable()
+        table.add("x-id", "1")
+        table.add("x-id", "2")
+        self.assertEqual(table.find("x-id", "3"), (None, 0))
+
+    def test_eviction_by_size(self):
+        table = DynamicTable(3 * _entry_size("k0", "v0"))
+        for i in range(5):
+            table.add(f"k{i}", f"v{i}")
+        self.assertEqual(len(table), 3)
+        self.assertEqual([table[i] for i in range(3)], [("k4", "v4"), ("k3", "v3"), ("k2", "v2")])
+        self.assertEqual(table.size, 3 * _entry_size("k0", "v0"))
+        self.assertEqual(table.find("k0", "v0"), (None, None))
+
+    def test_evicting_old_duplicate_keeps_newer_index(self):
+        table = DynamicTable(2 * _entry_size("k", "v"))
+        table.add("k", "v")
+        table.add("k", "v")
+        table.add("z", "z")  # evicts the older ("k", "v")
+        self.assertEqual(table.find("k", "v"), (1, 1))
+
+    def test_oversized_entry_empties_table(self):
+        table = DynamicTable(100)
+        table.add("a", "b")
+        table.add("big", "x" * 200)
+        self.assertEqual(len(table), 0)
+        self.assertEqual(table.size, 0)
+
+    def test_resize_keeps_order_and_evicts(self):
+        table = DynamicTable(4096)
+        for i in range(10):
+            table.add(f"k{i}", "v")
+        table.resize(3 * _entry_size("k0", "v"))
+        self.assertEqual([table[i][0] for i in range(len(table))], ["k9", "k8", "k7"])
+        table.resize(4096)
+        table.add("k10", "v")
+        self.assertEqual([table[i][0] for i in range(len(table))], ["k10", "k9", "k8", "k7"])
+
+    def test_ring_wraps_many_times(self):
+        table = DynamicTable(4096)
+        for i in range(10000):
+            table.add(f"name-{i}", f"value-{i}")
+            self.assertLessEqual(table.size, 4096)
+        self.assertEqual(table[0], ("name-9999", "value-9999"))
+        self.assertEqual(table.find("name-9998", "value-9998"), (1, 1))
+
+
+class TestEncoderDecoderTables(unittest.TestCase):
+    """Encoder and decoder tables stay in step over a long connection."""
+
+    def test_long_lived_roundtrip_is_bounded(self):
+        enc = HPACKEncoder()
+        dec = HPACKDecoder()
+        for i in range(5000):
+            headers = [
+                (":method", "GET"),
+                (":path", f"/item/{i}"),
+                ("x-request-id", str(i)),
+                ("x-common", "same"),
+            ]
+            self.assertEqual(dec.decode_headers(enc.encode_headers(headers)), headers)
+        self.assertLessEqual(dec.dynamic_table.size, 4096)
+        self.assertEqual(dec.dynamic_table.size, enc.dynamic_table.size)
+
+    def test_table_size_update_is_emitted_and_applied(self):
+        enc = HPACKEncoder()
+        dec = HPACKDecoder()
+        dec.decode_headers(enc.encode_headers([("x-a", "1"), ("x-b", "2")]))
+        enc.set_max_table_size(0)
+        block = enc.encode_headers([("x-c", "3")])
+        self.assertEqual(block[0], 0x20)  # size update to 0 comes first
+        self.assertEqual(dec.decode_headers(block), [("x-c", "3")])
+        self.assertEqual(len(dec.dynamic_table), 0)
+        self.assertEqual(len(enc.dynamic_table), 0)
+
+    def test_encoder_never_exceeds_its_limit(self):
+        enc = HPACKEncoder()
+        enc.set_max_table_size(65536)
+        self.assertEqual(enc.dynamic_table.max_size, enc.MAX_DYNAMIC_TABLE_SIZE)
+        self.assertNotEqual(enc.encode_headers([("x", "y")])[0] & 0xE0, 0x20)
+
+    def test_size_update_above_limit_rejected(self):
+        dec = HPACKDecoder(max_table_size=4096)
+        with self.assertRaises(ValueError):
+            dec.decode_headers(encode_integer(8192, 5, 0x20))
+
+    def test_decoder_resolves_dynamic_index(self):
+        dec = HPACKDecoder()
+        dec.dynamic_table.add("x-a", "1")
+        block = encode_integer(len(STATIC_TABLE), 7, 0x80)
+        self.assertEqual(dec.decode_headers(block), [("x-a", "1")])
+
+
+class TestConnectionTableSize(unittest.TestCase):
+    """H2Connection wires SETTINGS_HEADER_TABLE_SIZE into HPACK."""
+
+    def test_local_setting_bounds_decoder(self):
+        conn = H2Connection(lambda d: None, lambda n: b"", settings={SETTINGS_HEADER_TABLE_SIZE: 65536})
+        self.assertEqual(conn._decoder.max_table_size, 65536)
+
+    def test_peer_setting_shrinks_encoder(self):
+        sent = []
+        conn = H2Connection(sent.append, lambda n: b"")
+        conn.receive_data(build_settings_frame({SETTINGS_HEADER_TABLE_SIZE: 256}).serialize())
+        self.assertEqual(conn._encoder.dynamic_table.max_size, 256)
+
+        sent.clear()
+        conn.send_request("GET", "example.com", "/")
+        frames, _ = H2Frame.parse_all(b"".join(sent))
+        self.assertEqual(frames[0].payload[:3], encode_integer(256, 5, 0x20))
+
+
+if __name__ == "__main__":
+    unittest.main()
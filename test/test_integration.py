@@ -108,10 +108,6 @@ class TestHttpsSocketH2Methods(unittest.TestCase):
         from ja3requests.sockets.https import HttpsSocket
         self.assertTrue(hasattr(HttpsSocket, '_send_h2'))
 
-    def test_decrypt_single_record_exists(self):
-        from ja3requests.sockets.https import HttpsSocket
-        self.assertTrue(hasattr(HttpsSocket, '_decrypt_single_record'))
-
 
 class TestTLS13WithSessionCache(unittest.TestCase):
     """Test TLS 1.3 uses session cache."""
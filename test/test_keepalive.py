@@ -0,0 +1,109 @@
+"""Tests for reusing pooled HTTPS connections without a fixed send delay."""
+
+import os
+import socket
+import unittest
+from unittest.mock import MagicMock, patch
+
+from ja3requests.pool import ConnectionPool
+from ja3requests.protocol.tls.record_layer import ReceiveBuffer
+from ja3requests.sockets.https import HttpsSocket
+
+
+class _PlainTLS:
+    """TLS stand-in whose records are already plaintext."""
+
+    def __init__(self):
+        self.receive_buffer = ReceiveBuffer()
+
+    def decrypt_record(self, record_type, _header, payload):
+        return record_type, payload
+
+
+def _record(content_type, payload):
+    return bytes([content_type, 3, 3]) + len(payload).to_bytes(2, "big") + payload
+
+
+class TestPooledConnectionReuse(unittest.TestCase):
+    """HttpsSocket.new_conn consumes pending records on pooled connections."""
+
+    def setUp(self):
+        self.client, self.server = socket.socketpair()
+        self.pool = ConnectionPool()
+        self.pool.put_connection("example.com", 443, "https", self.client, tls=_PlainTLS())
+        self.context = MagicMock(destination_address="example.com", port=443)
+
+    def tearDown(self):
+        self.server.close()
+        self.pool.close_all()
+
+    def test_idle_connection_is_reused(self):
+        sock = HttpsSocket(self.context, pool=self.pool).new_conn()
+        self.assertIs(sock.conn, self.client)
+        self.assertTrue(sock._reused)
+
+    def test_pending_ticket_is_consumed(self):
+        self.server.sendall(_record(0x16, b"\x04\x00\x00\x00"))
+        sock = HttpsSocket(self.context, pool=self.pool).new_conn()
+        self.assertIs(sock.conn, self.client)
+        self.client.setblocking(False)
+        with self.assertRaises(BlockingIOError):
+            self.client.recv(1)
+
+    def test_closed_connection_is_discarded(self):
+        self.server.sendall(_record(0x15, b"\x01\x00"))  # close_notify
+        sock = HttpsSocket(self.context, pool=self.pool)
+        with patch.object(HttpsSocket, "_new_conn", side_effect=OSError("new")) as new_conn:
+            with self.assertRaises(OSError):
+                sock.new_conn()
+        new_conn.assert_called_once()
+        self.assertEqual(self.pool.get_stats()["total_connections"], 0)
+
+    def test_eof_connection_is_discarded(self):
+        self.server.close()
+        sock = HttpsSocket(self.context, pool=self.pool)
+        with patch.object(HttpsSocket, "_new_conn", side_effect=OSError("new")):
+            with self.assertRaises(OSError):
+                sock.new_conn()
+        self.assertEqual(self.pool.get_stats()["total_connections"], 0)
+
+    def test_quiet_connection_is_not_probed_again(self):
+        with patch.object(HttpsSocket, "_readable", side_effect=AssertionError("probed")):
+            sock = HttpsSocket(self.context, pool=self.pool).new_conn()
+        self.assertIs(sock.conn, self.client)
+
+    def test_pending_records_on_high_fd(self):
+        # select() cannot take descriptors of 1024 and above
+        try:
+            high_fd = os.dup2(self.client.fileno(), 1500)
+        except OSError:
+            self.skipTest("cannot open descriptor 1500")
+        high = socket.socket(fileno=high_fd)
+        self.addCleanup(high.close)
+        pool = ConnectionPool()
+        self.addCleanup(pool.close_all)
+        pool.put_connection("example.com", 443, "https", high, tls=_PlainTLS())
+
+        self.server.sendall(_record(0x16, b"\x04\x00\x00\x00"))
+        sock = HttpsSocket(self.context, pool=pool).new_conn()
+        self.assertIs(sock.conn, high)
+        self.assertFalse(sock._readable())
+
+
+class TestNoFixedDelay(unittest.TestCase):
+    """_send_h1 must not sleep before sending the request."""
+
+    def test_send_h1_does_not_sleep(self):
+        context = MagicMock(message=b"GET / HTTP/1.1\r\n\r\n", read_timeout=1, method="GET")
+        sock = HttpsSocket(context)
+        sock.conn = MagicMock()
+        sock.tls = MagicMock()
+        sock.tls.encrypt_application_records.side_effect = lambda data: [data]
+        with patch("time.sleep") as sleep:
+            self.assertIs(sock._send_h1(), sock)
+        sleep.assert_not_called()
+        sock.conn.sendall.assert_called_once_with(context.message)
+
+
+if __name__ == "__main__":
+    unittest.main()
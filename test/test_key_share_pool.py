@@ -0,0 +1,158 @@
+"""Tests for the background pool of pre-generated ECDHE key pairs."""
+
+import gc
+import os
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from cryptography.hazmat.primitives.asymmetric import ec, x25519
+
+from ja3requests.protocol.tls import TLS
+from ja3requests.protocol.tls.config import TlsConfig
+from ja3requests.protocol.tls.crypto import ECDHEKeyExchange
+from ja3requests.protocol.tls.key_pool import KeySharePool
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.005)
+
+
+def _full(pool, size):
+    return lambda: all(n == size for n in pool.get_stats()["available"].values())
+
+
+class TestKeySharePool(unittest.TestCase):
+    def setUp(self):
+        self.pool = KeySharePool(groups=(29, 23), size=8)
+        self.addCleanup(self.pool.close)
+
+    def test_fills_in_background(self):
+        _wait_for(_full(self.pool, 8))
+        self.assertTrue(self.pool.running)
+
+    def test_keys_are_usable_and_typed_per_group(self):
+        _wait_for(_full(self.pool, 8))
+        private, public = self.pool.take(29)
+        self.assertIsInstance(private, x25519.X25519PrivateKey)
+        self.assertEqual(len(public), 32)
+
+        private, public = self.pool.take(23)
+        self.assertIsInstance(private, ec.EllipticCurvePrivateKey)
+        peer, peer_public = ECDHEKeyExchange.generate_keypair(23)
+        self.assertEqual(
+            ECDHEKeyExchange.compute_shared_secret(private, peer_public, 23),
+            ECDHEKeyExchange.compute_shared_secret(peer, public, 23),
+        )
+
+    def test_keys_are_never_reused(self):
+        publics = [self.pool.take(29)[1] for _ in range(100)]
+        self.assertEqual(len(set(publics)), 100)
+
+    def test_refills_after_burst(self):
+        _wait_for(_full(self.pool, 8))
+        for _ in range(8):
+            self.pool.take(29)
+        self.assertEqual(self.pool.get_stats()["hits"], 8)
+        _wait_for(_full(self.pool, 8))
+
+    def test_empty_queue_generates_inline(self):
+        pool = KeySharePool(groups=(29,), size=0)
+        self.addCleanup(pool.close)
+        self.assertEqual(len(pool.take(29)[1]), 32)
+        self.assertEqual(len(pool.take(24)[1]), 97)  # Group not pooled
+        self.assertEqual(pool.get_stats()["misses"], 2)
+
+    def test_unsupported_group(self):
+        with self.assertRaises(ValueError):
+            KeySharePool(groups=(0x6399,))
+
+    def test_close_stops_thread_and_drops_keys(self):
+        _wait_for(_full(self.pool, 8))
+        self.pool.close()
+        _wait_for(lambda: not self.pool.running)
+        self.assertEqual(self.pool.get_stats()["available"], {29: 0, 23: 0})
+        self.assertEqual(len(self.pool.take(29)[1]), 32)
+
+    def test_thread_exits_when_pool_is_collected(self):
+        pool = KeySharePool(groups=(29,), size=2)
+        thread = pool._thread
+        del pool
+        gc.collect()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+
+    @unittest.skipUnless(hasattr(os, "fork"), "requires fork")
+    def test_forked_child_does_not_use_parents_keys(self):
+        _wait_for(_full(self.pool, 8))
+        inherited = {public for _, public in self.pool._queues[29]}
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover - child process
+            try:
+                os.close(read_fd)
+                public = self.pool.take(29)[1]
+                os.write(write_fd, b"\x01" if public not in inherited else b"\x00")
+            finally:
+                os._exit(0)
+        os.close(write_fd)
+        with os.fdopen(read_fd, "rb") as reader:
+            result = reader.read()
+        os.waitpid(pid, 0)
+        self.assertEqual(result, b"\x01")
+
+    def test_fork_restart_happens_once(self):
+        # As after a fork: the pool belongs to another process
+        self.pool._pid = -1
+        starts = []
+        start = KeySharePool._start
+
+        def slow_start(pool):
+            starts.append(pool)
+            time.sleep(0.05)  # Keep other threads arriving meanwhile
+            start(pool)
+
+        with patch.object(KeySharePool, "_start", autospec=True, side_effect=slow_start):
+            threads = [threading.Thread(target=self.pool.take, args=(29,)) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(5)
+
+        self.assertEqual(len(starts), 1)
+        self.assertEqual(self.pool._pid, os.getpid())
+        self.assertEqual(self.pool.get_stats()["hits"] + self.pool.get_stats()["misses"], 8)
+
+
+class TestHandshakeUsesPool(unittest.TestCase):
+    def test_tls13_key_share_comes_from_pool(self):
+        pool = KeySharePool(groups=(29,), size=4)
+        self.addCleanup(pool.close)
+        _wait_for(_full(pool, 4))
+
+        config = TlsConfig()
+        config.tls_version = 0x0304
+        config.key_share_pool = pool
+        tls = TLS(None)
+        tls.set_payload(tls_config=config)
+
+        self.assertEqual(pool.get_stats()["hits"], 1)
+        public = tls._tls13_private_key.public_key().public_bytes_raw()
+        self.assertIn(public, tls.body.extensions)
+
+    def test_without_pool_keys_are_generated_inline(self):
+        config = TlsConfig()
+        config.tls_version = 0x0304
+        tls = TLS(None)
+        tls.set_payload(tls_config=config)
+        self.assertIsNone(tls._key_share_pool)
+        self.assertIsNotNone(tls._tls13_private_key)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,163 @@
+"""Tests for the background pool reaper (event-driven idle connection health checks)."""
+
+import gc
+import socket
+import time
+import unittest
+from unittest.mock import patch
+
+from ja3requests.pool import ConnectionPool, PooledConnection
+
+INTERVAL = 0.05
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+class TestPoolReaper(unittest.TestCase):
+    """Idle sockets are watched by one selector thread instead of probed at checkout."""
+
+    def setUp(self):
+        self.pool = ConnectionPool(reaper_interval=INTERVAL, idle_timeout=60.0)
+        self.peers = []
+
+    def tearDown(self):
+        self.pool.close_all()
+        for peer in self.peers:
+            peer.close()
+
+    def _socketpair(self):
+        client, server = socket.socketpair()
+        self.peers.append(server)
+        return client, server
+
+    def test_reaper_starts_with_first_connection(self):
+        self.assertFalse(self.pool.get_stats()["reaper_running"])
+        client, _ = self._socketpair()
+        self.pool.put_connection("a.com", 443, "https", client)
+        self.assertTrue(self.pool.get_stats()["reaper_running"])
+
+    def test_peer_close_evicted_by_reaper(self):
+        client, server = self._socketpair()
+        self.pool.put_connection("a.com", 443, "https", client)
+        server.close()
+
+        self.assertTrue(_wait_for(lambda: self.pool.get_stats()["total_connections"] == 0))
+        stats = self.pool.get_stats()
+        self.assertEqual(stats["evicted_by_reaper"], 1)
+        self.assertEqual(stats["evicted_at_checkout"], 0)
+        self.assertIsNone(self.pool.get_connection("a.com", 443, "https"))
+
+    def test_idle_expiry_evicted_by_reaper(self):
+        pool = ConnectionPool(reaper_interval=INTERVAL, idle_timeout=0.1)
+        try:
+            client, _ = self._socketpair()
+            pool.put_connection("a.com", 443, "https", client)
+            self.assertTrue(_wait_for(lambda: pool.get_stats()["total_connections"] == 0))
+            self.assertEqual(pool.get_stats()["evicted_by_reaper"], 1)
+        finally:
+            pool.close_all()
+
+    def test_checkout_skips_socket_probe(self):
+        client, _ = self._socketpair()
+        self.pool.put_connection("a.com", 443, "https", client)
+        with patch.object(PooledConnection, "poll", side_effect=AssertionError("probed")):
+            pooled = self.pool.get_connection("a.com", 443, "https")
+        self.assertIs(pooled.conn, client)
+
+    def test_unread_data_flags_connection_instead_of_evicting(self):
+        client, server = self._socketpair()
+        self.pool.put_connection("a.com", 443, "https", client)
+        server.sendall(b"\x15\x03\x03")  # e.g. a TLS record the client has not read
+
+        self.assertTrue(_wait_for(lambda: self.pool._pools[("a.com", 443, "https")][0].pending_data))
+        self.assertEqual(self.pool.get_stats()["total_connections"], 1)
+
+        with patch.object(PooledConnection, "poll", return_value=True) as probe:
+            pooled = self.pool.get_connection("a.com", 443, "https")
+        probe.assert_called_once()
+        # Left set for the caller, which reads the waiting records first
+        self.assertTrue(pooled.pending_data)
+        self.pool.put_connection("a.com", 443, "https", client, pooled_conn=pooled)
+        self.assertFalse(pooled.pending_data)
+
+    def test_checked_out_connection_is_left_alone(self):
+        client, server = self._socketpair()
+        self.pool.put_connection("a.com", 443, "https", client)
+        pooled = self.pool.get_connection("a.com", 443, "https")
+        server.close()
+
+        time.sleep(INTERVAL * 4)
+        self.assertIsNotNone(pooled.conn)
+        self.assertEqual(self.pool.get_stats()["evicted_by_reaper"], 0)
+        self.pool.discard_connection(pooled)
+
+    def test_idle_h2_connection_evicted_on_peer_close(self):
+        client, server = self._socketpair()
+        pooled = self.pool.put_h2_connection("a.com", 443, "https", client)
+        server.close()
+
+        self.assertTrue(_wait_for(lambda: self.pool.get_stats()["total_connections"] == 0))
+        self.assertIsNone(pooled.conn)
+        self.assertIsNone(self.pool.get_h2_connection("a.com", 443, "https"))
+
+    def test_h2_connection_with_active_stream_is_left_alone(self):
+        client, server = self._socketpair()
+        pooled = self.pool.put_h2_connection("a.com", 443, "https", client)
+        self.assertTrue(pooled.acquire_stream())
+        server.close()
+
+        time.sleep(INTERVAL * 4)
+        self.assertIsNotNone(pooled.conn)
+        self.assertEqual(self.pool.get_stats()["total_connections"], 1)
+
+    def test_close_all_stops_reaper_and_put_restarts_it(self):
+        client, _ = self._socketpair()
+        self.pool.put_connection("a.com", 443, "https", client)
+        reaper = self.pool._reaper
+        self.pool.close_all()
+        reaper.join(2.0)
+        self.assertFalse(reaper.running)
+        self.assertFalse(self.pool.get_stats()["reaper_running"])
+
+        client, _ = self._socketpair()
+        self.pool.put_connection("a.com", 443, "https", client)
+        self.assertTrue(self.pool.get_stats()["reaper_running"])
+
+    def test_reaper_exits_when_pool_is_collected(self):
+        pool = ConnectionPool(reaper_interval=INTERVAL)
+        client, _ = self._socketpair()
+        pool.put_connection("a.com", 443, "https", client)
+        reaper = pool._reaper
+        del pool
+        gc.collect()
+        reaper.join(2.0)
+        self.assertFalse(reaper.running)
+
+
+class TestCheckoutEvictionStats(unittest.TestCase):
+    """Without a reaper, dead connections are still found (and counted) at checkout."""
+
+    def test_dead_connection_counted_at_checkout(self):
+        pool = ConnectionPool()
+        client, server = socket.socketpair()
+        try:
+            pool.put_connection("a.com", 443, "https", client)
+            server.close()
+            self.assertIsNone(pool.get_connection("a.com", 443, "https"))
+            stats = pool.get_stats()
+            self.assertEqual(stats["evicted_at_checkout"], 1)
+            self.assertEqual(stats["evicted_by_reaper"], 0)
+            self.assertFalse(stats["reaper_running"])
+        finally:
+            pool.close_all()
+
+
+if __name__ == "__main__":
+    unittest.main()
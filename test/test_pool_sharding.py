@@ -0,0 +1,373 @@
+"""Tests for per-origin pool locking, global accounting and blocking checkout."""
+
+import socket
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from ja3requests.exceptions import PoolTimeout, Timeout
+from ja3requests.pool import ConnectionPool, PooledConnection
+from ja3requests.sessions import Session
+from ja3requests.sockets.http import HttpSocket
+from ja3requests.sockets.https import HttpsSocket
+
+
+def _mock_conn():
+    conn = MagicMock()
+    conn.recv.side_effect = BlockingIOError
+    return conn
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return predicate()
+
+
+class TestPerOriginLocks(unittest.TestCase):
+    """Origins are locked independently and probes run outside the lock."""
+
+    def test_other_origin_not_blocked(self):
+        pool = ConnectionPool()
+        pool.put_connection("b.com", 443, "https", _mock_conn())
+        result = []
+        with pool._origin("a.com", 443, "https").lock:
+            worker = threading.Thread(
+                target=lambda: result.append(pool.get_connection("b.com", 443, "https"))
+            )
+            worker.start()
+            worker.join(2.0)
+        self.assertFalse(worker.is_alive())
+        self.assertIsNotNone(result[0])
+
+    def test_socket_probe_runs_outside_origin_lock(self):
+        pool = ConnectionPool()
+        pool.put_connection("a.com", 443, "https", _mock_conn())
+        origin = pool._origin("a.com", 443, "https")
+        held = []
+        with patch.object(PooledConnection, "poll", autospec=True,
+                          side_effect=lambda _self: held.append(origin.lock.locked()) or False):
+            self.assertIsNotNone(pool.get_connection("a.com", 443, "https"))
+        self.assertEqual(held, [False])
+
+    def test_origin_keys_are_case_insensitive(self):
+        pool = ConnectionPool()
+        self.assertIs(pool._origin("Example.COM", 443, "HTTPS"), pool._origin("example.com", 443, "https"))
+
+    def test_origin_protocol_and_connect_lock_per_origin(self):
+        pool = ConnectionPool()
+        pool.set_origin_protocol("a.com", 443, "https", "h2")
+        self.assertEqual(pool.get_origin_protocol("A.com", 443, "https"), "h2")
+        self.assertIsNone(pool.get_origin_protocol("b.com", 443, "https"))
+        self.assertIs(pool.connect_lock("a.com", 443), pool.connect_lock("a.com", 443))
+        self.assertIsNot(pool.connect_lock("a.com", 443), pool.connect_lock("b.com", 443))
+
+
+class TestGlobalAccounting(unittest.TestCase):
+    """max_pool_size is enforced across origins without a global lock."""
+
+    def test_concurrent_puts_never_exceed_max_pool_size(self):
+        pool = ConnectionPool(max_connections_per_host=100, max_pool_size=50)
+        accepted = []
+
+        def put(host_id):
+            for _ in range(20):
+                if pool.put_connection(f"host{host_id}.com", 443, "https", _mock_conn()):
+                    accepted.append(host_id)
+
+        threads = [threading.Thread(target=put, args=(i,)) for i in range(10)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(accepted), 50)
+        self.assertEqual(pool.get_stats()["total_connections"], 50)
+        self.assertEqual(sum(pool.get_stats()["hosts"].values()), 50)
+
+    def test_h2_connections_share_the_limit(self):
+        pool = ConnectionPool(max_pool_size=2)
+        self.assertTrue(pool.put_connection("a.com", 443, "https", _mock_conn()))
+        self.assertIsNotNone(pool.put_h2_connection("b.com", 443, "https", _mock_conn()))
+        self.assertIsNone(pool.put_h2_connection("c.com", 443, "https", _mock_conn()))
+        self.assertFalse(pool.put_connection("c.com", 443, "https", _mock_conn()))
+
+    def test_discard_releases_slot(self):
+        pool = ConnectionPool(max_pool_size=1)
+        pool.put_connection("a.com", 443, "https", _mock_conn())
+        pool.discard_connection(pool.get_connection("a.com", 443, "https"))
+        self.assertEqual(pool.get_stats()["total_connections"], 0)
+        self.assertTrue(pool.put_connection("b.com", 443, "https", _mock_conn()))
+
+
+class TestBlockingCheckout(unittest.TestCase):
+    """get_connection(timeout=...) waits for a connection or a slot, in FIFO order."""
+
+    def setUp(self):
+        self.pool = ConnectionPool(max_connections_per_host=1)
+
+    def tearDown(self):
+        self.pool.close_all()
+
+    def test_free_slot_is_reserved(self):
+        reserved = self.pool.get_connection("a.com", 443, "https", timeout=1.0)
+        self.assertIsNone(reserved.conn)
+        self.assertEqual(self.pool.get_stats()["total_connections"], 1)
+
+        conn = _mock_conn()
+        self.assertTrue(self.pool.put_connection("a.com", 443, "https", conn, pooled_conn=reserved))
+        self.assertIs(reserved.conn, conn)
+        self.assertIs(self.pool.get_connection("a.com", 443, "https", timeout=1.0), reserved)
+        self.assertEqual(self.pool.get_stats()["total_connections"], 1)
+
+    def test_times_out_when_host_is_at_its_limit(self):
+        self.pool.get_connection("a.com", 443, "https", timeout=1.0)
+        start = time.monotonic()
+        with self.assertRaises(PoolTimeout) as caught:
+            self.pool.get_connection("a.com", 443, "https", timeout=0.1)
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+        self.assertIsInstance(caught.exception, Timeout)
+        self.assertEqual(len(self.pool._origin("a.com", 443, "https").waiters), 0)
+
+    def test_waiter_gets_returned_connection(self):
+        reserved = self.pool.get_connection("a.com", 443, "https", timeout=1.0)
+        result = []
+        waiter = threading.Thread(
+            target=lambda: result.append(self.pool.get_connection("a.com", 443, "https", timeout=2.0))
+        )
+        waiter.start()
+        self.assertTrue(_wait_for(lambda: self.pool._origin("a.com", 443, "https").waiters))
+
+        self.pool.put_connection("a.com", 443, "https", _mock_conn(), pooled_conn=reserved)
+        waiter.join(2.0)
+        self.assertIs(result[0], reserved)
+
+    def test_discarded_reservation_frees_slot_for_waiter(self):
+        reserved = self.pool.get_connection("a.com", 443, "https", timeout=1.0)
+        result = []
+        waiter = threading.Thread(
+            target=lambda: result.append(self.pool.get_connection("a.com", 443, "https", timeout=2.0))
+        )
+        waiter.start()
+        self.assertTrue(_wait_for(lambda: self.pool._origin("a.com", 443, "https").waiters))
+
+        self.pool.discard_connection(reserved)
+        waiter.join(2.0)
+        self.assertIsNot(result[0], reserved)
+        self.assertIsNone(result[0].conn)
+        self.assertEqual(self.pool.get_stats()["total_connections"], 1)
+
+    def test_waiters_are_served_in_arrival_order(self):
+        reserved = self.pool.get_connection("a.com", 443, "https", timeout=1.0)
+        self.pool.put_connection("a.com", 443, "https", _mock_conn(), pooled_conn=reserved)
+        pooled = self.pool.get_connection("a.com", 443, "https", timeout=1.0)
+        origin = self.pool._origin("a.com", 443, "https")
+        order = []
+
+        def worker(name):
+            conn = self.pool.get_connection("a.com", 443, "https", timeout=5.0)
+            order.append(name)
+            self.pool.put_connection("a.com", 443, "https", conn.conn, pooled_conn=conn)
+
+        threads = []
+        for i in range(5):
+            thread = threading.Thread(target=worker, args=(i,))
+            thread.start()
+            threads.append(thread)
+            self.assertTrue(_wait_for(lambda n=i + 1: len(origin.waiters) == n))
+
+        self.pool.put_connection("a.com", 443, "https", pooled.conn, pooled_conn=pooled)
+        for thread in threads:
+            thread.join(5.0)
+        self.assertEqual(order, [0, 1, 2, 3, 4])
+
+    def test_waits_for_slot_freed_by_another_origin(self):
+        pool = ConnectionPool(max_connections_per_host=5, max_pool_size=1)
+        other = pool.get_connection("b.com", 443, "https", timeout=1.0)
+        result = []
+        waiter = threading.Thread(
+            target=lambda: result.append(pool.get_connection("a.com", 443, "https", timeout=2.0))
+        )
+        waiter.start()
+        time.sleep(0.1)
+        pool.discard_connection(other)
+        waiter.join(2.0)
+        self.assertIsNone(result[0].conn)
+        self.assertEqual(result[0].host, "a.com")
+
+    def test_dead_idle_connection_is_replaced_by_a_slot(self):
+        dead = MagicMock()
+        dead.recv.return_value = b""
+        self.pool.put_connection("a.com", 443, "https", dead)
+        pooled = self.pool.get_connection("a.com", 443, "https", timeout=1.0)
+        self.assertIsNone(pooled.conn)
+        self.assertEqual(self.pool.get_stats()["evicted_at_checkout"], 1)
+        self.assertEqual(self.pool.get_stats()["total_connections"], 1)
+
+
+class TestSocketCheckoutTimeout(unittest.TestCase):
+    """Sockets fill reserved slots when the pool has a checkout_timeout."""
+
+    def setUp(self):
+        self.pool = ConnectionPool(max_connections_per_host=1, checkout_timeout=0.1)
+        self.context = MagicMock(destination_address="example.com", port=80)
+
+    def tearDown(self):
+        self.pool.close_all()
+
+    def test_new_connection_fills_reservation(self):
+        client, server = socket.socketpair()
+        self.addCleanup(server.close)
+        sock = HttpSocket(self.context, pool=self.pool)
+        with patch.object(HttpSocket, "_new_conn", return_value=client):
+            sock.new_conn()
+        self.assertIsNone(sock._pooled_conn.conn)
+
+        with self.assertRaises(PoolTimeout):
+            HttpSocket(self.context, pool=self.pool).new_conn()
+
+        sock.return_to_pool()
+        self.assertEqual(self.pool.get_stats()["total_connections"], 1)
+        reused = HttpSocket(self.context, pool=self.pool).new_conn()
+        self.assertIs(reused.conn, client)
+
+    def test_failed_connect_releases_reservation(self):
+        with patch.object(HttpSocket, "_new_conn", side_effect=OSError("refused")):
+            with self.assertRaises(OSError):
+                HttpSocket(self.context, pool=self.pool).new_conn()
+        self.assertEqual(self.pool.get_stats()["total_connections"], 0)
+        self.assertIsNone(self.pool.get_connection("example.com", 80, "http", timeout=0.1).conn)
+
+
+class TestColdHttpsConnect(unittest.TestCase):
+    """Only an h2 connection being set up makes other requests wait."""
+
+    def setUp(self):
+        self.pool = ConnectionPool()
+        self.context = MagicMock(destination_address="example.com", port=443, tls_config=None)
+        self.handshakes = []
+        self.overlap = threading.Barrier(2, timeout=2)
+
+    def tearDown(self):
+        self.pool.close_all()
+
+    def _handshake(self, sock, _host, _port):
+        self.handshakes.append(sock)
+        if len(self.handshakes) == 1:
+            time.sleep(0.1)  # Let the other requests queue up behind the first
+        else:
+            self.overlap.wait()
+        sock.conn = _mock_conn()
+        sock.tls = MagicMock(_negotiated_protocol="http/1.1")
+
+    def test_http11_handshakes_run_concurrently(self):
+        errors = []
+
+        def connect():
+            try:
+                HttpsSocket(self.context, pool=self.pool).new_conn()
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                errors.append(e)
+
+        with patch.object(HttpsSocket, "_handshake", autospec=True, side_effect=self._handshake):
+            threads = [threading.Thread(target=connect) for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(5)
+
+        # The two requests that waited on the first handshake connect side by side
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.handshakes), 3)
+        self.assertFalse(self.pool.connect_lock("example.com", 443, "https").locked())
+        self.assertEqual(self.pool.get_origin_protocol("example.com", 443, "https"), "http/1.1")
+
+
+class _OneShotServer:
+    """HTTP server answering each connection once with the given response, then closing it."""
+
+    def __init__(self, response):
+        self.response = response
+        self.listener = socket.socket()
+        self.listener.bind(("127.0.0.1", 0))
+        self.listener.listen(8)
+        self.port = self.listener.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.listener.accept()
+            except OSError:
+                return
+            with conn:
+                request = b""
+                while b"\r\n\r\n" not in request:
+                    chunk = conn.recv(4096)
+                    if not chunk:
+                        break
+                    request += chunk
+                conn.sendall(self.response)
+
+    def close(self):
+        self.listener.close()
+
+
+class TestReservationRelease(unittest.TestCase):
+    """A reserved slot is freed when its connection cannot go back to the pool."""
+
+    def setUp(self):
+        self.pool = ConnectionPool(max_connections_per_host=1, checkout_timeout=1.0)
+        self.session = Session(pool=self.pool)
+
+    def tearDown(self):
+        self.pool.close_all()
+
+    def _serve(self, response):
+        server = _OneShotServer(response)
+        self.addCleanup(server.close)
+        return f"http://127.0.0.1:{server.port}/"
+
+    def _assert_slot_free(self, port):
+        self.assertIsNone(self.pool.get_connection("127.0.0.1", port, "http", timeout=0.1).conn)
+
+    def test_close_delimited_response(self):
+        url = self._serve(b"HTTP/1.1 200 OK\r\nConnection: close\r\n\r\nuntil close")
+        for _ in range(3):
+            response = self.session.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, b"until close")
+        self.assertEqual(self.pool.get_stats()["total_connections"], 0)
+
+    def test_truncated_body(self):
+        url = self._serve(b"HTTP/1.1 200 OK\r\nContent-Length: 100\r\n\r\nshort")
+        for _ in range(3):
+            self.assertEqual(self.session.get(url).content, b"short")
+        self.assertEqual(self.pool.get_stats()["total_connections"], 0)
+
+    def test_streamed_response_closed_unread(self):
+        url = self._serve(b"HTTP/1.1 200 OK\r\nContent-Length: 4\r\n\r\ndata")
+        response = self.session.get(url, stream=True)
+        response.close()
+        self.assertEqual(self.session.get(url).content, b"data")
+
+    def test_streamed_response_dropped(self):
+        url = self._serve(b"HTTP/1.1 200 OK\r\nContent-Length: 4\r\n\r\ndata")
+        self.session.get(url, stream=True)
+        self.session.response = None
+        self._assert_slot_free(int(url.rsplit(":", 1)[1].strip("/")))
+
+    def test_failed_send_releases_slot(self):
+        url = self._serve(b"")
+        with patch.object(HttpSocket, "_send_body_stream", side_effect=OSError("reset")):
+            with self.assertRaises(OSError):
+                self.session.post(url, data={"a": "1"})
+        self._assert_slot_free(int(url.rsplit(":", 1)[1].strip("/")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+"""Tests for opening pooled connections ahead of traffic."""
+
+import datetime
+import os
+import socket
+import ssl
+import tempfile
+import threading
+import unittest
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from ja3requests.exceptions import NotAllowedScheme
+from ja3requests.pool import ConnectionPool
+from ja3requests.prewarm import _origin_key
+from ja3requests.protocol.tls.config import TlsConfig
+from ja3requests.sessions import Session
+
+
+def _server_context(alpn):
+    directory = tempfile.mkdtemp(prefix="ja3test")
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder().subject_name(name).issuer_name(name)
+        .public_key(key.public_key()).serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = os.path.join(directory, "cert.pem")
+    key_path = os.path.join(directory, "key.pem")
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ))
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    ctx.load_cert_chain(cert_path, key_path)
+    ctx.maximum_version = ssl.TLSVersion.TLSv1_2
+    ctx.set_alpn_protocols(alpn)
+    return ctx
+
+
+def _tls_config():
+    config = TlsConfig()
+    config.tls_version = 0x0303
+    config.cipher_suites = [0xC02B, 0xC02F]
+    config.supported_groups = [23, 29]
+    config.signature_algorithms = [0x0403, 0x0804, 0x0401]
+    config.alpn_protocols = ["h2", "http/1.1"]
+    return config
+
+
+class _Server:
+    """Listener that accepts connections, handshakes if TLS, and holds them open."""
+
+    def __init__(self, context=None):
+        self.context = context
+        self.listener = socket.create_server(("127.0.0.1", 0))
+        self.port = self.listener.getsockname()[1]
+        self.accepted = 0
+        self.held = []
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.listener.accept()
+            except OSError:
+                return
+            self.accepted += 1
+            if self.context is not None:
+                threading.Thread(target=self._handshake, args=(conn,), daemon=True).start()
+            else:
+                self.held.append(conn)
+
+    def _handshake(self, conn):
+        try:
+            self.held.append(self.context.wrap_socket(conn, server_side=True))
+        except (OSError, ssl.SSLError):
+            conn.close()
+
+    def close(self):
+        self.listener.close()
+        for conn in self.held:
+            conn.close()
+
+
+class TestPrewarm(unittest.TestCase):
+    def setUp(self):
+        self.pool = ConnectionPool()
+        self.addCleanup(self.pool.close_all)
+
+    def _server(self, context=None):
+        server = _Server(context)
+        self.addCleanup(server.close)
+        return server
+
+    def test_http11_connections_join_the_idle_queue(self):
+        server = self._server(_server_context(["http/1.1"]))
+        origin = f"https://127.0.0.1:{server.port}"
+        warmup = self.pool.prewarm([origin], 3, tls_config=_tls_config(), timeout=5)
+
+        self.assertTrue(warmup.wait(10))
+        self.assertTrue(warmup.is_ready(origin))
+        self.assertEqual(
+            warmup.status()[origin],
+            {"requested": 3, "ready": 3, "failed": 0, "protocol": "http/1.1", "done": True},
+        )
+        self.assertEqual(len(self.pool._pools[("127.0.0.1", server.port, "https")]), 3)
+        self.assertEqual(self.pool.get_origin_protocol("127.0.0.1", server.port), "http/1.1")
+        self.assertEqual(server.accepted, 3)
+
+        pooled = self.pool.get_connection("127.0.0.1", server.port, "https")
+        self.assertIsNotNone(pooled.tls)
+
+    def test_h2_connections_join_the_h2_list(self):
+        server = self._server(_server_context(["h2"]))
+        origin = f"https://127.0.0.1:{server.port}"
+        warmup = self.pool.prewarm([origin], 2, tls_config=_tls_config(), timeout=5)
+
+        self.assertTrue(warmup.wait(10))
+        self.assertEqual(warmup.origins[origin].protocol, "h2")
+        h2 = self.pool._h2_pools[("127.0.0.1", server.port, "https")]
+        self.assertEqual(len(h2), 2)
+        self.assertTrue(all(c.active_streams == 0 for c in h2))
+        self.assertIsNotNone(self.pool.get_h2_connection("127.0.0.1", server.port))
+
+    def test_plain_http_origin(self):
+        server = self._server()
+        origin = f"http://127.0.0.1:{server.port}"
+        warmup = self.pool.prewarm([origin, origin], 2)
+        self.assertTrue(warmup.wait(10))
+        self.assertEqual(warmup.status()[origin]["ready"], 2)
+        self.assertEqual(len(self.pool._pools[("127.0.0.1", server.port, "http")]), 2)
+
+    def test_failures_are_reported_per_origin(self):
+        server = self._server()
+        closed = socket.create_server(("127.0.0.1", 0))
+        dead_port = closed.getsockname()[1]
+        closed.close()
+
+        good, bad = f"http://127.0.0.1:{server.port}", f"http://127.0.0.1:{dead_port}"
+        warmup = self.pool.prewarm([good, bad], 1, timeout=2)
+        self.assertTrue(warmup.wait(20))
+        self.assertTrue(warmup.is_ready(good))
+        self.assertFalse(warmup.is_ready(bad))
+        self.assertEqual(warmup.origins[bad].failed, 1)
+        self.assertTrue(warmup.origins[bad].errors)
+
+    def test_session_prewarm_uses_its_config(self):
+        server = self._server(_server_context(["http/1.1"]))
+        config = _tls_config()
+        with Session(tls_config=config, pool=self.pool) as session:
+            warmup = session.prewarm([f"https://localhost:{server.port}"], wait=True, timeout=5)
+        self.assertTrue(warmup.done)
+        self.assertTrue(warmup.is_ready(f"https://localhost:{server.port}"))
+        # SNI is set on a per-origin copy, not on the session's config
+        self.assertIsNone(config.server_name)
+
+    def test_session_without_pool(self):
+        with self.assertRaises(ValueError):
+            Session(use_pooling=False).prewarm(["https://example.com"])
+
+
+class TestOriginKey(unittest.TestCase):
+    def test_normalisation(self):
+        self.assertEqual(_origin_key("example.com")[0], "https://example.com:443")
+        self.assertEqual(_origin_key("HTTP://Example.com/path")[0], "http://example.com:80")
+        self.assertEqual(_origin_key("https://example.com:8443")[3], 8443)
+        with self.assertRaises(NotAllowedScheme):
+            _origin_key("ftp://example.com")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,241 @@
+"""Tests for the bytearray receive buffer used by the TLS record readers."""
+
+import os
+import socket
+import struct
+import threading
+import unittest
+
+from ja3requests.protocol.tls import TLS
+from ja3requests.protocol.tls.record_layer import (
+    ReceiveBuffer,
+    TLSRecordLayer,
+    TLSSocket,
+)
+from ja3requests.sockets.https import TLSRecordStream
+
+
+class TestReceiveBuffer(unittest.TestCase):
+    """ReceiveBuffer append/consume semantics."""
+
+    def test_extend_and_read(self):
+        buf = ReceiveBuffer(8)
+        buf.extend(b"hello ")
+        buf.extend(b"world")
+        self.assertEqual(len(buf), 11)
+        self.assertEqual(buf.read(5), b"hello")
+        self.assertEqual(buf.read(), b" world")
+        self.assertEqual(len(buf), 0)
+
+    def test_compacts_instead_of_growing(self):
+        buf = ReceiveBuffer(16)
+        buf.extend(b"a" * 12)
+        buf.consume(10)
+        buf.extend(b"b" * 10)
+        self.assertEqual(len(buf._buf), 16)
+        self.assertEqual(buf.read(), b"aa" + b"b" * 10)
+
+    def test_grows_when_full(self):
+        buf = ReceiveBuffer(4)
+        data = os.urandom(1000)
+        buf.extend(data)
+        self.assertEqual(buf.read(), data)
+
+    def test_view_is_zero_copy(self):
+        buf = ReceiveBuffer()
+        buf.extend(b"\x17\x03\x03\x00\x02ok")
+        with buf.view(2, offset=3) as length:
+            self.assertEqual(int.from_bytes(length, "big"), 2)
+        with buf.view(2, offset=5) as payload:
+            self.assertEqual(payload.tobytes(), b"ok")
+
+    def test_outstanding_view_does_not_block_growth(self):
+        buf = ReceiveBuffer(4)
+        buf.extend(b"abcd")
+        view = buf.view(4)
+        buf.extend(b"efgh")
+        self.assertEqual(view.tobytes(), b"abcd")
+        self.assertEqual(buf.read(), b"abcdefgh")
+
+    def test_find(self):
+        buf = ReceiveBuffer()
+        buf.extend(b"xxline\nrest")
+        buf.consume(2)
+        self.assertEqual(buf.find(b"\n"), 4)
+        self.assertEqual(buf.find(b"\n", 5), -1)
+
+    def test_readinto(self):
+        buf = ReceiveBuffer()
+        buf.extend(b"abcdef")
+        out = bytearray(4)
+        self.assertEqual(buf.readinto(out), 4)
+        self.assertEqual(out, b"abcd")
+        self.assertEqual(buf.read(), b"ef")
+
+    def test_fill_uses_recv_into(self):
+        client, server = socket.socketpair()
+        try:
+            server.sendall(b"payload")
+            buf = ReceiveBuffer(4)
+            received = 0
+            while received < 7:
+                received += buf.fill(client, 4)
+            self.assertEqual(buf.read(), b"payload")
+            server.close()
+            self.assertEqual(buf.fill(client), 0)
+        finally:
+            client.close()
+
+
+class _Keys:
+    def __init__(self):
+        self._client_write_key = os.urandom(16)
+        self._server_write_key = os.urandom(16)
+        self._client_write_mac_key = os.urandom(20)
+        self._server_write_mac_key = os.urandom(20)
+        self._client_write_iv = os.urandom(16)
+        self._server_write_iv = os.urandom(16)
+        self._selected_cipher_suite = 0x002F
+
+
+def _server_layer(keys):
+    layer = TLSRecordLayer()
+    layer.set_keys(
+        keys._server_write_key,
+        keys._client_write_key,
+        client_write_mac_key=keys._server_write_mac_key,
+        server_write_mac_key=keys._client_write_mac_key,
+        client_write_iv=keys._server_write_iv,
+        server_write_iv=keys._client_write_iv,
+        cipher_suite=0x002F,
+    )
+    return layer
+
+
+class TestTLSSocketRead(unittest.TestCase):
+    """TLSSocket/TLSSocketFile read encrypted records through the buffer."""
+
+    def setUp(self):
+        self.keys = _Keys()
+        self.client, self.server = socket.socketpair()
+        self.tls_socket = TLSSocket(self.client, self.keys)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.close()
+
+    def _send(self, *chunks):
+        layer = _server_layer(self.keys)
+        wire = b"".join(layer.encrypt_application_data(chunk) for chunk in chunks)
+        threading.Thread(target=lambda: (self.server.sendall(wire), self.server.close())).start()
+
+    def test_record_larger_than_bufsize_is_not_truncated(self):
+        body = os.urandom(10000)
+        self._send(body)
+        received = b""
+        while True:
+            data = self.tls_socket.recv(4096)
+            if not data:
+                break
+            received += data
+        self.assertEqual(received, body)
+
+    def test_file_read_across_records(self):
+        chunks = [os.urandom(16384) for _ in range(8)]
+        self._send(*chunks)
+        fp = self.tls_socket.makefile("rb")
+        self.assertEqual(fp.read(100), chunks[0][:100])
+        self.assertEqual(fp.read(), b"".join(chunks)[100:])
+
+    def test_file_readline(self):
+        self._send(b"HTTP/1.1 200 OK\r\nContent-", b"Length: 2\r\n\r\nok")
+        fp = self.tls_socket.makefile("rb")
+        self.assertEqual(fp.readline(), b"HTTP/1.1 200 OK\r\n")
+        self.assertEqual(fp.readline(), b"Content-Length: 2\r\n")
+        self.assertEqual(fp.readline(), b"\r\n")
+        self.assertEqual(fp.readline(1), b"o")
+        self.assertEqual(fp.read(), b"k")
+
+
+def _record(content_type, payload):
+    return struct.pack("!BHH", content_type, 0x0303, len(payload)) + payload
+
+
+class _CountingSocket:
+    """Socket wrapper counting recv_into calls."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.recv_calls = 0
+
+    def recv_into(self, buffer, size=0):
+        self.recv_calls += 1
+        return self.sock.recv_into(buffer, size)
+
+
+class _PlainTLS:
+    """TLS stand-in whose records are not encrypted."""
+
+    def __init__(self):
+        self.receive_buffer = ReceiveBuffer()
+
+    @staticmethod
+    def decrypt_record(record_type, _header, payload):
+        return record_type, bytes(payload)
+
+
+class TestBufferedRecordReading(unittest.TestCase):
+    """One recv_into serves every record it brought in; partial records carry over."""
+
+    def setUp(self):
+        self.client, self.server = socket.socketpair()
+        self.conn = _CountingSocket(self.client)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.close()
+
+    def test_handshake_records_share_one_recv(self):
+        records = [_record(22, os.urandom(size)) for size in (90, 2000, 4)]
+        partial = _record(23, b"application data")
+        self.server.sendall(b"".join(records) + partial[:7])
+
+        tls = TLS(self.conn)
+        for record in records:
+            self.assertEqual(tls._recv_record(), (record[0], record[:5], record[5:]))
+        self.assertEqual(self.conn.recv_calls, 1)
+
+        # The partial record stays buffered for whoever reads after the handshake
+        self.assertEqual(len(tls.receive_buffer), 7)
+        self.server.sendall(partial[7:])
+        self.assertEqual(tls._recv_record()[2], b"application data")
+        self.assertEqual(self.conn.recv_calls, 2)
+
+        self.server.close()
+        self.assertIsNone(tls._recv_record())
+
+    def test_read_returns_all_buffered_records(self):
+        chunks = [os.urandom(1000) for _ in range(3)]
+        self.server.sendall(b"".join(_record(23, chunk) for chunk in chunks) + _record(23, b"x")[:3])
+        stream = TLSRecordStream(self.conn, _PlainTLS())
+
+        buffer = bytearray(10000)
+        self.assertEqual(stream.readinto(buffer), 3000)
+        self.assertEqual(bytes(buffer[:3000]), b"".join(chunks))
+        self.assertEqual(self.conn.recv_calls, 1)
+
+    def test_read_stops_when_caller_buffer_is_full(self):
+        chunks = [os.urandom(1000) for _ in range(3)]
+        self.server.sendall(b"".join(_record(23, chunk) for chunk in chunks))
+        self.server.close()
+        stream = TLSRecordStream(self.conn, _PlainTLS())
+
+        buffer = bytearray(1500)
+        self.assertEqual(stream.readinto(buffer), 1500)
+        self.assertEqual(stream.readinto(buffer), 1500)
+        self.assertEqual(bytes(buffer), b"".join(chunks)[1500:])
+        self.assertEqual(stream.readinto(buffer), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,238 @@
+"""Tests for the caching, single-flight host name resolver."""
+
+import http.server
+import socket
+import threading
+import time
+import unittest
+from unittest import mock
+
+from ja3requests.protocol import resolver as resolver_module
+from ja3requests.protocol.resolver import CachingResolver, Resolver, SystemResolver
+from ja3requests.protocol.sockets import create_connection
+from ja3requests.sessions import Session
+
+
+class _CountingResolver(Resolver):
+    """Resolver that answers 127.0.0.1 for every name, or fails for "missing." names."""
+
+    def __init__(self, ttl=None, gate=None):
+        self.calls = 0
+        self.ttl = ttl
+        self.gate = gate
+
+    def resolve(self, host, port, family=socket.AF_UNSPEC, socktype=socket.SOCK_STREAM):
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait(5)
+        if host.startswith("missing."):
+            raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+        return [(socket.AF_INET, socktype, socket.IPPROTO_TCP, "", ("127.0.0.1", port))], self.ttl
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCachingResolver(unittest.TestCase):
+    def setUp(self):
+        self.upstream = _CountingResolver()
+        self.clock = _Clock()
+        patcher = mock.patch.object(resolver_module.time, "monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_answers_are_cached_for_ttl(self):
+        resolver = CachingResolver(self.upstream, ttl=10)
+        first = resolver.getaddrinfo("example.com", 443)
+        self.assertEqual(resolver.getaddrinfo("EXAMPLE.com", 443), first)
+        self.assertEqual(self.upstream.calls, 1)
+
+        self.clock.now += 11
+        resolver.getaddrinfo("example.com", 443)
+        self.assertEqual(self.upstream.calls, 2)
+        self.assertEqual(resolver.get_stats(), {"size": 1, "hits": 1, "misses": 2})
+
+    def test_resolver_ttl_is_respected_and_clamped(self):
+        resolver = CachingResolver(_CountingResolver(ttl=300), ttl=10, max_ttl=60)
+        resolver.getaddrinfo("example.com", 443)
+        self.clock.now += 59
+        self.assertEqual(resolver.resolve("example.com", 443)[1], 1)
+        self.clock.now += 2
+        resolver.getaddrinfo("example.com", 443)
+        self.assertEqual(resolver.resolver.calls, 2)
+
+    def test_failures_are_cached_for_negative_ttl(self):
+        resolver = CachingResolver(self.upstream, negative_ttl=2)
+        for _ in range(3):
+            with self.assertRaises(socket.gaierror):
+                resolver.getaddrinfo("missing.example", 443)
+        self.assertEqual(self.upstream.calls, 1)
+        self.clock.now += 3
+        with self.assertRaises(socket.gaierror):
+            resolver.getaddrinfo("missing.example", 443)
+        self.assertEqual(self.upstream.calls, 2)
+
+    def test_other_errors_are_not_cached(self):
+        upstream = mock.Mock(spec=Resolver)
+        upstream.resolve.side_effect = [OSError("timed out"), ([], None)]
+        resolver = CachingResolver(upstream)
+        with self.assertRaises(OSError):
+            resolver.getaddrinfo("example.com", 443)
+        self.assertEqual(resolver.getaddrinfo("example.com", 443), [])
+
+    def test_hosts_map(self):
+        resolver = CachingResolver(self.upstream, hosts={"pinned.test": ["10.0.0.1", "2001:db8::1"]})
+        infos = resolver.getaddrinfo("Pinned.Test", 8443)
+        self.assertEqual([info[4] for info in infos], [("10.0.0.1", 8443), ("2001:db8::1", 8443, 0, 0)])
+        self.assertEqual(len(resolver.getaddrinfo("pinned.test", 1, socket.AF_INET6)), 1)
+        self.assertEqual(self.upstream.calls, 0)
+
+        resolver.remove_host("pinned.test")
+        resolver.getaddrinfo("pinned.test", 1)
+        self.assertEqual(self.upstream.calls, 1)
+        with self.assertRaises(ValueError):
+            resolver.add_host("bad.test", "not-an-ip")
+
+    def test_ip_literals_skip_the_resolver(self):
+        resolver = CachingResolver(self.upstream)
+        self.assertEqual(resolver.getaddrinfo("127.0.0.1", 80)[0][4], ("127.0.0.1", 80))
+        self.assertEqual(self.upstream.calls, 0)
+        self.assertEqual(len(resolver), 0)
+
+    def test_lru_bound(self):
+        resolver = CachingResolver(self.upstream, max_size=2)
+        for host in ("a.test", "b.test", "a.test", "c.test", "a.test"):
+            resolver.getaddrinfo(host, 80)
+        self.assertEqual(len(resolver), 2)
+        self.assertEqual(self.upstream.calls, 3)
+
+    def test_clear(self):
+        resolver = CachingResolver(self.upstream)
+        resolver.getaddrinfo("example.com", 443)
+        resolver.clear()
+        resolver.getaddrinfo("example.com", 443)
+        self.assertEqual(self.upstream.calls, 2)
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_lookups_share_one_query(self):
+        gate = threading.Event()
+        upstream = _CountingResolver(gate=gate)
+        resolver = CachingResolver(upstream)
+        results = []
+
+        threads = [
+            threading.Thread(target=lambda: results.append(resolver.getaddrinfo("slow.test", 443)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        gate.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(upstream.calls, 1)
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(result == results[0] for result in results))
+
+    def test_leader_and_waiters_get_the_clamped_ttl(self):
+        gate = threading.Event()
+        resolver = CachingResolver(_CountingResolver(ttl=300, gate=gate), max_ttl=60)
+        ttls = []
+
+        threads = [
+            threading.Thread(target=lambda: ttls.append(resolver.resolve("slow.test", 443)[1]))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        # Release the lookup only once every caller is waiting on it
+        deadline = time.monotonic() + 5
+        while resolver.get_stats()["hits"] < 3 and time.monotonic() < deadline:
+            time.sleep(0.005)
+        gate.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(resolver.resolver.calls, 1)
+        self.assertEqual(ttls, [60] * 4)
+
+    def test_waiters_see_the_failure(self):
+        gate = threading.Event()
+        resolver = CachingResolver(_CountingResolver(gate=gate), negative_ttl=0)
+        errors = []
+
+        def lookup():
+            try:
+                resolver.getaddrinfo("missing.test", 443)
+            except socket.gaierror as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=lookup) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        gate.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(errors), 4)
+        self.assertEqual(len(resolver), 0)
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):  # pylint: disable=invalid-name
+        body = self.headers.get("Host", "").encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+class TestConnectionsUseResolver(unittest.TestCase):
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def test_create_connection(self):
+        resolver = CachingResolver(hosts={"pinned.test": "127.0.0.1"})
+        sock = create_connection(("pinned.test", self.port), timeout=5, resolver=resolver)
+        self.addCleanup(sock.close)
+        self.assertEqual(sock.getpeername(), ("127.0.0.1", self.port))
+
+    def test_session_resolver(self):
+        resolver = CachingResolver(hosts={"pinned.test": "127.0.0.1"})
+        with Session(use_pooling=False, resolver=resolver) as session:
+            response = session.get(f"http://pinned.test:{self.port}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content.startswith(b"pinned.test"))
+
+    def test_session_default_resolver_is_shared(self):
+        self.assertIs(Session().resolver, resolver_module.get_default_resolver())
+        self.assertIsInstance(SystemResolver().getaddrinfo("127.0.0.1", 80)[0], tuple)
+
+    def test_session_default_resolver_does_not_cache(self):
+        lookups = []
+        getaddrinfo = socket.getaddrinfo
+
+        def recording_getaddrinfo(host, *args, **kwargs):
+            lookups.append(host)
+            return getaddrinfo(host, *args, **kwargs)
+
+        with mock.patch("socket.getaddrinfo", recording_getaddrinfo), Session(use_pooling=False) as session:
+            for _ in range(2):
+                self.assertEqual(session.get(f"http://localhost:{self.port}/").status_code, 200)
+        self.assertEqual(lookups.count("localhost"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
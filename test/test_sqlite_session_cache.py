@@ -0,0 +1,257 @@
+"""Tests for the SQLite-backed cross-process TLS session store."""
+
+import multiprocessing
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+import unittest
+
+from ja3requests.protocol.tls import TLS
+from ja3requests.protocol.tls.config import TlsConfig
+from ja3requests.protocol.tls.session_cache import TLS13Ticket, TLSSessionCache, TLSSessionStore
+from ja3requests.protocol.tls.sqlite_session_cache import SQLiteSessionCache
+
+
+def _ticket(ticket=b"ticket", lifetime=7200):
+    return TLS13Ticket(ticket, b"\x01", lifetime, 7, b"\x11" * 32, 0x1301)
+
+
+def _take_ticket(path, results):
+    results.put(SQLiteSessionCache(path).get_ticket("a.com", 443) is not None)
+
+
+def _put_session(path):
+    SQLiteSessionCache(path).put("child.com", 443, b"\x09" * 32, b"\x01" * 48, 0xC02F)
+
+
+class _CacheTests:
+    """Behaviour every TLSSessionStore shares."""
+
+    def make_cache(self, **kwargs):
+        raise NotImplementedError
+
+    def test_is_a_session_store(self):
+        self.assertIsInstance(self.make_cache(), TLSSessionStore)
+
+    def test_put_and_get(self):
+        cache = self.make_cache()
+        cache.put("Example.COM", 443, b"\x01" * 32, b"\xaa" * 48, 0xC02F, tls_version=b"\x03\x03")
+        entry = cache.get("example.com", 443)
+        self.assertEqual(
+            (entry.session_id, entry.master_secret, entry.cipher_suite, entry.tls_version),
+            (b"\x01" * 32, b"\xaa" * 48, 0xC02F, b"\x03\x03"),
+        )
+        self.assertIsNone(cache.get("example.com", 8443))
+        self.assertEqual(len(cache), 1)
+
+    def test_ticket_only_session(self):
+        cache = self.make_cache()
+        cache.put("a.com", 443, b"", b"\xaa" * 48, 0xC02F, ticket=b"T" * 100)
+        self.assertEqual(cache.get("a.com", 443).ticket, b"T" * 100)
+        cache.put("b.com", 443, None, b"\xaa" * 48, 0xC02F)
+        self.assertIsNone(cache.get("b.com", 443))
+
+    def test_expired_session_is_not_returned(self):
+        cache = self.make_cache(ttl=0.05)
+        cache.put("a.com", 443, b"\x01", b"\x02", 0x002F)
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("a.com", 443))
+        self.assertEqual(len(cache), 0)
+
+    def test_tickets_are_single_use_newest_first(self):
+        cache = self.make_cache()
+        for i in range(6):
+            cache.put_ticket("a.com", 443, _ticket(bytes([i])))
+        taken = [cache.get_ticket("A.com", 443) for _ in range(5)]
+        self.assertEqual([t.ticket for t in taken[:4]], [b"\x05", b"\x04", b"\x03", b"\x02"])
+        self.assertIsNone(taken[4])
+
+    def test_ticket_round_trip(self):
+        cache = self.make_cache()
+        stored = _ticket()
+        cache.put_ticket("a.com", 443, stored)
+        ticket = cache.get_ticket("a.com", 443)
+        self.assertEqual(
+            (ticket.ticket, ticket.nonce, ticket.lifetime, ticket.age_add,
+             ticket.resumption_master_secret, ticket.cipher_suite),
+            (b"ticket", b"\x01", 7200, 7, b"\x11" * 32, 0x1301),
+        )
+        self.assertAlmostEqual(ticket.received_at, stored.received_at, places=3)
+
+    def test_ticket_lifetime_bounds_expiry(self):
+        cache = self.make_cache()
+        ticket = _ticket(lifetime=1)
+        ticket.received_at -= 2
+        cache.put_ticket("a.com", 443, ticket)
+        self.assertIsNone(cache.get_ticket("a.com", 443))
+
+    def test_remove_and_clear(self):
+        cache = self.make_cache()
+        cache.put("a.com", 443, b"\x01", b"\x02", 0x002F)
+        cache.put_ticket("a.com", 443, _ticket())
+        cache.remove("a.com", 443)
+        self.assertIsNone(cache.get("a.com", 443))
+        self.assertIsNone(cache.get_ticket("a.com", 443))
+
+        cache.put("b.com", 443, b"\x01", b"\x02", 0x002F)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_handshake_stats(self):
+        cache = self.make_cache()
+        cache.record_handshake("a.com", 443, offered=False, resumed=False)
+        cache.record_handshake("a.com", 443, offered=True, resumed=True)
+        stats = cache.get_stats()
+        self.assertEqual(stats["hosts"]["a.com:443"], {
+            "handshakes": 2, "offered": 1, "resumed": 1, "hit_rate": 0.5,
+        })
+        self.assertEqual((stats["handshakes"], stats["resumed"]), (2, 1))
+
+    def test_offered_in_client_hello(self):
+        cache = self.make_cache()
+        cache.put("a.com", 443, b"\x07" * 32, b"\x01" * 48, 0xC02F)
+        tls = TLS(None, session_cache=cache, server_host="a.com", server_port=443)
+        config = TlsConfig()
+        config.session_cache = cache
+        tls.set_payload(tls_config=config)
+        self.assertEqual(tls.body.session_id, b"\x07" * 32)
+
+
+class TestMemorySessionCache(_CacheTests, unittest.TestCase):
+    def make_cache(self, **kwargs):
+        return TLSSessionCache(**kwargs)
+
+    def test_put_drops_expired_entries_from_the_old_end(self):
+        cache = TLSSessionCache(ttl=1.0)
+        cache.put("a.com", 443, b"\x01", b"\x02", 0x002F)
+        cache.put("b.com", 443, b"\x01", b"\x02", 0x002F)
+        cache._cache[("a.com", 443)].created_at -= 2.0
+        cache.put("c.com", 443, b"\x01", b"\x02", 0x002F)
+        self.assertEqual(list(cache._cache), [("b.com", 443), ("c.com", 443)])
+
+    def test_overwrite_moves_entry_to_the_new_end(self):
+        cache = TLSSessionCache(max_size=2)
+        cache.put("a.com", 443, b"\x01", b"\x02", 0x002F)
+        cache.put("b.com", 443, b"\x01", b"\x02", 0x002F)
+        cache.put("a.com", 443, b"\x03", b"\x02", 0x002F)
+        cache.put("c.com", 443, b"\x01", b"\x02", 0x002F)
+        self.assertIsNone(cache.get("b.com", 443))
+        self.assertEqual(cache.get("a.com", 443).session_id, b"\x03")
+
+
+class TestSQLiteSessionCache(_CacheTests, unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="ja3test")
+        self.path = os.path.join(self.directory, "sessions.db")
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def make_cache(self, **kwargs):
+        cache = SQLiteSessionCache(self.path, **kwargs)
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_wal_mode_and_private_file(self):
+        cache = self.make_cache()
+        mode = cache._connection().execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o600)
+
+    def test_survives_restart(self):
+        cache = self.make_cache()
+        cache.put("a.com", 443, b"\x01" * 32, b"\x02" * 48, 0xC02F)
+        cache.put_ticket("a.com", 443, _ticket())
+        cache.record_handshake("a.com", 443, offered=True, resumed=True)
+        cache.close()
+
+        reopened = self.make_cache()
+        self.assertEqual(reopened.get("a.com", 443).master_secret, b"\x02" * 48)
+        self.assertIsNotNone(reopened.get_ticket("a.com", 443))
+        self.assertEqual(reopened.get_stats()["hosts"]["a.com:443"]["resumed"], 1)
+
+    def test_shared_between_processes(self):
+        cache = self.make_cache()
+        cache.put_ticket("a.com", 443, _ticket())
+
+        context = multiprocessing.get_context("spawn")
+        worker = context.Process(target=_put_session, args=(self.path,))
+        worker.start()
+        worker.join(30)
+        self.assertEqual(worker.exitcode, 0)
+        self.assertEqual(cache.get("child.com", 443).session_id, b"\x09" * 32)
+
+        results = context.Queue()
+        takers = [context.Process(target=_take_ticket, args=(self.path, results)) for _ in range(2)]
+        for taker in takers:
+            taker.start()
+        for taker in takers:
+            taker.join(30)
+        self.assertEqual(sorted(results.get(timeout=5) for _ in takers), [False, True])
+
+    @unittest.skipUnless(hasattr(os, "fork"), "requires fork")
+    def test_forked_child_opens_its_own_connection(self):
+        cache = self.make_cache()
+        cache.put("a.com", 443, b"\x01", b"\x02", 0x002F)
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover - child process
+            try:
+                cache.put("forked.com", 443, b"\x03", b"\x04", 0x002F)
+                os._exit(0 if cache.get("a.com", 443) else 1)
+            except BaseException:  # pylint: disable=broad-exception-caught
+                os._exit(2)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertIsNotNone(cache.get("forked.com", 443))
+
+    def test_threads_use_separate_connections(self):
+        cache = self.make_cache()
+        errors = []
+
+        def worker(index):
+            try:
+                for i in range(20):
+                    cache.put(f"h{index}-{i}.com", 443, b"\x01", b"\x02", 0x002F)
+                    cache.record_handshake("a.com", 443, offered=True, resumed=bool(i % 2))
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                errors.append(e)
+            finally:
+                cache.close()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(cache), 80)
+        self.assertEqual(cache.get_stats()["hosts"]["a.com:443"]["handshakes"], 80)
+
+    def test_prune_trims_to_max_size_and_drops_expired(self):
+        cache = self.make_cache(max_size=2, prune_interval=0)
+        for host in ("a.com", "b.com", "c.com"):
+            cache.put(host, 443, b"\x01", b"\x02", 0x002F)
+            cache.put_ticket(host, 443, _ticket())
+        self.assertIsNone(cache.get("a.com", 443))
+        self.assertIsNone(cache.get_ticket("a.com", 443))
+        self.assertEqual(cache.get_stats()["sessions"], 2)
+
+        expired = _ticket(lifetime=1)
+        expired.received_at -= 5
+        cache.put_ticket("d.com", 443, expired)
+        cache.cleanup_expired()
+        rows = cache._connection().execute("SELECT COUNT(*) FROM tickets WHERE host = 'd.com'")
+        self.assertEqual(rows.fetchone()[0], 0)
+
+    def test_prune_waits_for_interval(self):
+        cache = self.make_cache(max_size=1, prune_interval=3600)
+        cache.put("a.com", 443, b"\x01", b"\x02", 0x002F)
+        cache.put("b.com", 443, b"\x01", b"\x02", 0x002F)
+        self.assertEqual(len(cache), 2)
+        cache.cleanup_expired()
+        self.assertEqual(len(cache), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
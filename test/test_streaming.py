@@ -1,9 +1,26 @@
 """Tests for streaming response support (#9)."""
 
+import gzip
 import io
+import socket
 import unittest
+import zlib
+
+import brotli
 
 from ja3requests.response import Response, HTTPResponse
+from ja3requests.protocol.h2.connection import H2Connection
+from ja3requests.protocol.h2.frame import (
+    ERROR_CANCEL,
+    FRAME_RST_STREAM,
+    FRAME_WINDOW_UPDATE,
+    H2Frame,
+    build_data_frame,
+    build_headers_frame,
+)
+from ja3requests.protocol.h2.hpack import HPACKEncoder
+from ja3requests.protocol.tls.record_layer import ReceiveBuffer
+from ja3requests.sockets.https import H2ResponseStream, TLSRecordStream, h2_response_head
 
 
 class FakeSocket:
@@ -148,5 +165,272 @@ class TestResponseClose(unittest.TestCase):
         resp.close()  # should not raise
 
 
+class ChunkedReader(io.BytesIO):
+    """BytesIO that records the largest single read."""
+
+    max_read = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.max_read = max(self.max_read, len(data))
+        return data
+
+
+def make_raw_response(head: bytes, body: bytes, stream=True, release_conn=None):
+    fp = ChunkedReader(head + b"\r\n" + body)
+    sock = FakeSocket(b"")
+    sock._buffer = fp
+    http_resp = HTTPResponse(sock, release_conn=release_conn)
+    http_resp.handle()
+    return Response(response=http_resp, stream=stream), fp
+
+
+def chunked(data: bytes, size: int) -> bytes:
+    out = b""
+    for i in range(0, len(data), size):
+        piece = data[i:i + size]
+        out += f"{len(piece):x}\r\n".encode() + piece + b"\r\n"
+    return out + b"0\r\n\r\n"
+
+
+class TestIncrementalDecoding(unittest.TestCase):
+    """iter_content decodes framing and compression as data arrives."""
+
+    payload = bytes(range(256)) * 400
+
+    def test_content_length_reads_bounded(self):
+        head = f"HTTP/1.1 200 OK\r\nContent-Length: {len(self.payload)}\r\n".encode()
+        resp, fp = make_raw_response(head, self.payload)
+        chunks = list(resp.iter_content(chunk_size=1000))
+        self.assertEqual(b"".join(chunks), self.payload)
+        self.assertLessEqual(fp.max_read, 1000)
+
+    def test_chunked(self):
+        head = b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n"
+        resp, fp = make_raw_response(head, chunked(self.payload, 7000))
+        chunks = list(resp.iter_content(chunk_size=1024))
+        self.assertEqual(b"".join(chunks), self.payload)
+        self.assertLessEqual(max(len(c) for c in chunks), 1024)
+        self.assertLessEqual(fp.max_read, 1024)
+
+    def test_chunked_with_extension_and_trailer(self):
+        head = b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n"
+        body = b"5;name=value\r\nhello\r\n0\r\nX-Trailer: 1\r\n\r\nNEXT"
+        resp, fp = make_raw_response(head, body)
+        self.assertEqual(b"".join(resp.iter_content()), b"hello")
+        # Trailers are consumed, the next response starts right after
+        self.assertEqual(fp.read(), b"NEXT")
+
+    def test_chunked_gzip(self):
+        head = b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\nContent-Encoding: gzip\r\n"
+        resp, _ = make_raw_response(head, chunked(gzip.compress(self.payload), 500))
+        self.assertEqual(b"".join(resp.iter_content(chunk_size=256)), self.payload)
+
+    def test_multi_member_gzip(self):
+        body = gzip.compress(b"first ") + gzip.compress(b"second")
+        head = f"HTTP/1.1 200 OK\r\nContent-Encoding: gzip\r\nContent-Length: {len(body)}\r\n".encode()
+        resp, _ = make_raw_response(head, body, stream=False)
+        self.assertEqual(resp.content, b"first second")
+
+    def test_raw_deflate(self):
+        compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        body = compressor.compress(self.payload) + compressor.flush()
+        head = f"HTTP/1.1 200 OK\r\nContent-Encoding: deflate\r\nContent-Length: {len(body)}\r\n".encode()
+        resp, _ = make_raw_response(head, body)
+        self.assertEqual(b"".join(resp.iter_content(chunk_size=100)), self.payload)
+
+    def test_brotli(self):
+        body = brotli.compress(self.payload)
+        head = f"HTTP/1.1 200 OK\r\nContent-Encoding: br\r\nContent-Length: {len(body)}\r\n".encode()
+        resp, _ = make_raw_response(head, body)
+        self.assertEqual(b"".join(resp.iter_content(chunk_size=64)), self.payload)
+
+    def test_invalid_encoding_falls_back_to_raw(self):
+        head = b"HTTP/1.1 200 OK\r\nContent-Encoding: gzip\r\nContent-Length: 9\r\n"
+        resp, _ = make_raw_response(head, b"not gzip!", stream=False)
+        self.assertEqual(resp.content, b"not gzip!")
+
+    def test_invalid_encoding_after_header_falls_back_to_raw(self):
+        # A gzip header decodes to nothing; the failure comes in a later read
+        body = b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff" + b"\xff not deflate data"
+        head = f"HTTP/1.1 200 OK\r\nContent-Encoding: gzip\r\nContent-Length: {len(body)}\r\n".encode()
+        resp, _ = make_raw_response(head, body)
+        self.assertEqual(b"".join(resp.iter_content(chunk_size=10)), body)
+
+    def test_close_delimited_body(self):
+        resp, _ = make_raw_response(b"HTTP/1.1 200 OK\r\n", b"until close")
+        self.assertEqual(b"".join(resp.iter_content()), b"until close")
+
+    def test_iter_lines_streaming(self):
+        head = b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n"
+        resp, _ = make_raw_response(head, chunked(b"a\nbb\nccc\n", 3))
+        self.assertEqual(list(resp.iter_lines(chunk_size=2)), [b"a", b"bb", b"ccc"])
+
+
+class TestReleaseConnection(unittest.TestCase):
+    """The connection is released only after the body has been fully read."""
+
+    def test_released_after_body(self):
+        released = []
+        head = b"HTTP/1.1 200 OK\r\nContent-Length: 4\r\n"
+        resp, _ = make_raw_response(head, b"data", release_conn=lambda: released.append(1))
+        self.assertEqual(released, [])
+        list(resp.iter_content(chunk_size=1))
+        self.assertEqual(released, [1])
+
+    def test_not_released_when_truncated(self):
+        released = []
+        head = b"HTTP/1.1 200 OK\r\nContent-Length: 10\r\n"
+        resp, _ = make_raw_response(head, b"data", release_conn=lambda: released.append(1))
+        self.assertEqual(b"".join(resp.iter_content()), b"data")
+        self.assertEqual(released, [])
+
+    def test_not_released_when_close_delimited(self):
+        released = []
+        resp, _ = make_raw_response(b"HTTP/1.1 200 OK\r\n", b"data", release_conn=lambda: released.append(1))
+        list(resp.iter_content())
+        self.assertEqual(released, [])
+
+    def test_no_content_released_immediately(self):
+        released = []
+        make_raw_response(b"HTTP/1.1 204 No Content\r\n", b"", stream=False,
+                          release_conn=lambda: released.append(1))
+        self.assertEqual(released, [1])
+
+
+class _PlainTLS:
+    """TLS stand-in whose records are already plaintext."""
+
+    def __init__(self):
+        self.receive_buffer = ReceiveBuffer()
+
+    def decrypt_record(self, record_type, _header, payload):
+        return record_type, payload
+
+
+def _record(content_type, payload):
+    return bytes([content_type, 3, 3]) + len(payload).to_bytes(2, "big") + payload
+
+
+class TestTLSRecordStream(unittest.TestCase):
+    """Decrypted application data is read record by record."""
+
+    def setUp(self):
+        self.client, self.server = socket.socketpair()
+        self.fp = io.BufferedReader(TLSRecordStream(self.client, _PlainTLS()))
+
+    def tearDown(self):
+        self.client.close()
+        self.server.close()
+
+    def test_reads_across_records(self):
+        self.server.sendall(_record(0x17, b"HTTP/1.1 200 OK\r\nCont") + _record(0x17, b"ent-Length: 2\r\n\r\nok"))
+        self.assertEqual(self.fp.readline(), b"HTTP/1.1 200 OK\r\n")
+        self.assertEqual(self.fp.readline(), b"Content-Length: 2\r\n")
+        self.assertEqual(self.fp.readline(), b"\r\n")
+        self.assertEqual(self.fp.read(2), b"ok")
+
+    def test_does_not_wait_for_more_records_than_needed(self):
+        self.server.sendall(_record(0x17, b"abc"))
+        self.client.settimeout(1)
+        self.assertEqual(self.fp.read(3), b"abc")
+
+    def test_skips_handshake_and_ends_on_close_notify(self):
+        self.server.sendall(
+            _record(0x16, b"\x04\x00\x00\x00") + _record(0x17, b"data") + _record(0x15, b"\x01\x00")
+        )
+        self.assertEqual(self.fp.read(), b"data")
+
+    def test_eof(self):
+        self.server.sendall(_record(0x17, b"xy"))
+        self.server.close()
+        self.assertEqual(self.fp.read(), b"xy")
+
+
+class _H2Socket:
+    """Socket-like object handing HTTPResponse one HTTP/2 response stream."""
+
+    def __init__(self, raw):
+        self._raw = raw
+
+    def makefile(self, _mode):
+        return io.BufferedReader(self._raw)
+
+
+class TestH2ResponseStreaming(unittest.TestCase):
+    """HTTP/2 response bodies are read frame by frame, not buffered whole."""
+
+    def setUp(self):
+        self.sent = []
+        self.incoming = []
+        self.reads = 0
+        self.closed = []
+        self.h2 = H2Connection(self.sent.append, self._recv)
+        self.stream_id = self.h2.send_request("GET", "example.com", "/export")
+        block = HPACKEncoder().encode_headers([(":status", "200"), ("content-type", "text/csv")])
+        self.incoming.append(build_headers_frame(self.stream_id, block).serialize())
+
+    def _recv(self, _size):
+        self.reads += 1
+        return self.incoming.pop(0) if self.incoming else b""
+
+    def _sent_frames(self, frame_type):
+        frames, _ = H2Frame.parse_all(b"".join(self.sent))
+        return [f for f in frames if f.type == frame_type]
+
+    def _response(self):
+        headers = self.h2.receive_headers(self.stream_id)
+        raw = H2ResponseStream(self.h2, self.stream_id, h2_response_head(headers), lambda: self.closed.append(True))
+        response = HTTPResponse(_H2Socket(raw))
+        response.handle()
+        return response
+
+    def test_body_read_as_frames_arrive(self):
+        for _ in range(8):
+            self.incoming.append(build_data_frame(self.stream_id, b"a" * 16384).serialize())
+        self.incoming.append(build_data_frame(self.stream_id, b"", end_stream=True).serialize())
+
+        response = self._response()
+        chunks = response.stream(chunk_size=16384)
+        self.assertEqual(next(chunks), b"a" * 16384)
+        self.assertLessEqual(self.reads, 3)
+        self.assertEqual(len(self.incoming), 8)  # Only the first DATA frame was read
+        self.assertEqual(sum(len(chunk) for chunk in chunks), 7 * 16384)
+        self.assertEqual(self.closed, [True])
+        self.assertNotIn(self.stream_id, self.h2._streams)
+
+    def test_stream_window_reopened_as_body_is_read(self):
+        # Everything arrives at once; only the connection window is returned on receipt
+        self.incoming[0] += b"".join(
+            build_data_frame(self.stream_id, b"b" * 16384).serialize() for _ in range(3)
+        )
+        self.h2.receive_headers(self.stream_id)
+        updates = self._sent_frames(FRAME_WINDOW_UPDATE)
+        self.assertEqual([f.stream_id for f in updates], [0])
+
+        self.assertEqual(self.h2.read_data(self.stream_id), (b"b" * 16384, False))
+        self.assertEqual(len(self._sent_frames(FRAME_WINDOW_UPDATE)), 1)
+        self.h2.read_data(self.stream_id)
+        updates = self._sent_frames(FRAME_WINDOW_UPDATE)
+        self.assertEqual(updates[-1].stream_id, self.stream_id)
+        self.assertEqual(int.from_bytes(updates[-1].payload, "big"), 32768)
+
+    def test_closing_unread_body_cancels_stream(self):
+        self.incoming.append(build_data_frame(self.stream_id, b"c" * 100).serialize())
+        response = self._response()
+        response.close()
+
+        resets = self._sent_frames(FRAME_RST_STREAM)
+        self.assertEqual([f.stream_id for f in resets], [self.stream_id])
+        self.assertEqual(int.from_bytes(resets[0].payload, "big"), ERROR_CANCEL)
+        self.assertEqual(self.closed, [True])
+        self.assertNotIn(self.stream_id, self.h2._streams)
+
+    def test_declared_content_length_is_kept(self):
+        head = h2_response_head([(":status", "200"), ("content-length", "5")])
+        self.assertEqual(head, b"HTTP/1.1 200 OK\r\nContent-Length: 5\r\n\r\n")
+        self.assertNotIn(b"Content-Length", h2_response_head([(":status", "200")]))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,411 @@
+"""Tests for streamed request bodies: file objects, iterables and generators."""
+
+import io
+import os
+import socket
+import tempfile
+import threading
+import unittest
+
+from ja3requests.const import DEFAULT_UPLOAD_CHUNK_SIZE
+from ja3requests.exceptions import InvalidData
+from ja3requests.pool import ConnectionPool
+from ja3requests.protocol.h2.connection import STREAM_READ_AHEAD, H2Connection
+from ja3requests.protocol.h2.frame import (
+    FLAG_END_STREAM,
+    FRAME_DATA,
+    FRAME_HEADERS,
+    H2Frame,
+    build_window_update_frame,
+)
+from ja3requests.requests.request import Request
+from ja3requests.retry import HTTPRetry
+from ja3requests.sessions import Session
+from ja3requests.sockets.http import HttpSocket
+from ja3requests.sockets.https import HttpsSocket
+from ja3requests.utils import (
+    is_stream_body,
+    iter_stream_body,
+    stream_body_length,
+    stream_body_position,
+    without_body_headers,
+)
+
+
+def _context(data, url="https://example.com/upload", headers=None):
+    """Context of a POST built the way Session builds it."""
+    request = Request("POST", url, data=data, headers=headers).request()
+    return request.create_context()
+
+
+def _dechunk(data):
+    """Body of a chunked message body, and whatever follows the last-chunk."""
+    body = b""
+    while True:
+        size_line, data = data.split(b"\r\n", 1)
+        size = int(size_line, 16)
+        if size == 0:
+            assert data.startswith(b"\r\n"), data[:10]
+            return body, data[2:]
+        body += data[:size]
+        assert data[size:size + 2] == b"\r\n"
+        data = data[size + 2:]
+
+
+class TestStreamBodyHelpers(unittest.TestCase):
+    """Detecting, measuring and reading streamed bodies."""
+
+    def test_is_stream_body(self):
+        for data in (io.BytesIO(b"x"), iter([b"x"]), (c for c in [b"x"]), iter(range(0)), map(bytes, [b"x"])):
+            self.assertTrue(is_stream_body(data), data)
+        not_streamed = (
+            None, b"x", "x", {"a": 1}, [("a", 1)], (("a", 1),), bytearray(b"x"),
+            {b"x"}, {"a": 1}.items(), range(3), frozenset(),
+        )
+        for data in not_streamed:
+            self.assertFalse(is_stream_body(data), data)
+
+    def test_length_of_seekable_stream_from_position(self):
+        stream = io.BytesIO(b"0123456789")
+        stream.read(3)
+        self.assertEqual(stream_body_length(stream), 7)
+        self.assertEqual(stream.tell(), 3)
+
+    def test_length_of_regular_file(self):
+        with tempfile.TemporaryFile() as f:
+            f.write(b"a" * 1000)
+            f.seek(100)
+            self.assertEqual(stream_body_length(f), 900)
+
+    def test_length_unknown(self):
+        self.assertIsNone(stream_body_length(iter([b"a"])))
+        self.assertIsNone(stream_body_length(io.StringIO("text")))
+        read_end, write_end = os.pipe()
+        with os.fdopen(read_end, "rb") as pipe, os.fdopen(write_end, "wb"):
+            self.assertIsNone(stream_body_length(pipe))
+
+    def test_position_only_for_seekable_files(self):
+        stream = io.BytesIO(b"0123456789")
+        stream.read(4)
+        self.assertEqual(stream_body_position(stream), 4)
+        self.assertIsNone(stream_body_position(iter([b"a"])))
+        read_end, write_end = os.pipe()
+        with os.fdopen(read_end, "rb") as pipe, os.fdopen(write_end, "wb"):
+            self.assertIsNone(stream_body_position(pipe))
+
+    def test_without_body_headers(self):
+        headers = {"content-length": "3", "Transfer-Encoding": "chunked", "Content-Type": "a/b", "X-Id": "1"}
+        self.assertEqual(without_body_headers(headers), {"X-Id": "1"})
+        self.assertIsNone(without_body_headers(None))
+
+    def test_file_read_in_record_sized_pieces(self):
+        data = os.urandom(3 * DEFAULT_UPLOAD_CHUNK_SIZE + 5)
+        pieces = list(iter_stream_body(io.BytesIO(data)))
+        self.assertEqual([len(p) for p in pieces], [DEFAULT_UPLOAD_CHUNK_SIZE] * 3 + [5])
+        self.assertEqual(b"".join(pieces), data)
+
+    def test_large_iterable_items_are_split(self):
+        pieces = list(iter_stream_body(["é" * 10, b"x" * 40000, b""]))
+        self.assertTrue(all(0 < len(p) <= DEFAULT_UPLOAD_CHUNK_SIZE for p in pieces))
+        self.assertEqual(b"".join(pieces), "é".encode() * 10 + b"x" * 40000)
+
+    def test_chunked_pieces_fit_one_record(self):
+        data = os.urandom(50000)
+        pieces = list(iter_stream_body(io.BytesIO(data), chunked=True))
+        self.assertTrue(all(len(p) <= DEFAULT_UPLOAD_CHUNK_SIZE for p in pieces))
+        self.assertEqual(pieces[-1], b"0\r\n\r\n")
+        self.assertEqual(_dechunk(b"".join(pieces)), (data, b""))
+
+
+class TestStreamingContext(unittest.TestCase):
+    """The context sends only the head in message and frames the body."""
+
+    def test_file_body_has_content_length(self):
+        context = _context(io.BytesIO(b"file body"))
+        message = context.message
+        self.assertTrue(context.streaming)
+        self.assertIn(b"Content-Length: 9\r\n", message)
+        self.assertIn(b"Content-Type: application/octet-stream", message)
+        self.assertNotIn(b"Transfer-Encoding", message)
+        self.assertTrue(message.endswith(b"\r\n\r\n"))
+        self.assertEqual(b"".join(context.iter_body_pieces()), b"file body")
+
+    def test_generator_body_is_chunked(self):
+        context = _context(chunk for chunk in [b"abc", b"defg"])
+        message = context.message
+        self.assertIn(b"Transfer-Encoding: chunked", message)
+        self.assertNotIn(b"Content-Length", message)
+        self.assertEqual(_dechunk(b"".join(context.iter_body_pieces())), (b"abcdefg", b""))
+
+    def test_given_content_length_is_kept(self):
+        context = _context(iter([b"abc"]), headers={"Content-Length": "3", "Content-Type": "text/plain"})
+        message = context.message
+        self.assertIn(b"Content-Length: 3", message)
+        self.assertIn(b"Content-Type: text/plain", message)
+        self.assertNotIn(b"chunked", message)
+        self.assertEqual(b"".join(context.iter_body_pieces()), b"abc")
+
+    def test_other_iterables_are_rejected(self):
+        for data in ({b"x"}, range(3)):
+            with self.assertRaises(InvalidData):
+                _context(data)
+
+    def test_form_data_is_not_streamed(self):
+        context = _context({"a": "1"})
+        self.assertFalse(context.streaming)
+        self.assertTrue(context.message.endswith(b"a=1"))
+        self.assertEqual(list(context.iter_body_pieces()), [])
+
+
+class TestHttp11StreamedUpload(unittest.TestCase):
+    """Streamed bodies go out after the head, one piece at a time."""
+
+    def setUp(self):
+        self.client, self.server = socket.socketpair()
+        self.client.settimeout(10)
+        self.server.settimeout(10)
+        self.received = bytearray()
+        self.reader = threading.Thread(target=self._read, daemon=True)
+        self.reader.start()
+
+    def tearDown(self):
+        self.client.close()
+        self.server.close()
+
+    def _read(self):
+        while True:
+            chunk = self.server.recv(65536)
+            if not chunk:
+                return
+            self.received += chunk
+
+    def _finish(self):
+        self.client.shutdown(socket.SHUT_WR)
+        self.reader.join(10)
+        head, _, body = bytes(self.received).partition(b"\r\n\r\n")
+        return head, body
+
+    def test_plain_http_chunked_generator(self):
+        data = [os.urandom(1000) for _ in range(50)]
+        sock = HttpSocket(_context((chunk for chunk in data), url="http://example.com/upload"))
+        sock.conn = self.client
+        sock.send()
+        head, body = self._finish()
+        self.assertIn(b"Transfer-Encoding: chunked", head)
+        self.assertEqual(_dechunk(body), (b"".join(data), b""))
+
+    def test_tls_file_upload_in_record_sized_pieces(self):
+        data = os.urandom(300000)
+        pieces = []
+
+        class _RecordingTLS:  # pylint: disable=too-few-public-methods
+            """TLS stand-in that frames plaintext as records without encrypting it."""
+
+            @staticmethod
+            def encrypt_application_records(plaintext):
+                pieces.append(len(plaintext))
+                return [b"\x17\x03\x03" + len(plaintext).to_bytes(2, "big") + plaintext]
+
+        sock = HttpsSocket(_context(io.BytesIO(data)))
+        sock.conn = self.client
+        sock.tls = _RecordingTLS()
+        sock._send_h1()
+        _, records = self._finish()
+
+        body, offset = b"", 0
+        while offset < len(records):
+            length = int.from_bytes(records[offset + 3:offset + 5], "big")
+            body += records[offset + 5:offset + 5 + length]
+            offset += 5 + length
+        self.assertEqual(body, data)
+        self.assertTrue(all(size <= DEFAULT_UPLOAD_CHUNK_SIZE for size in pieces[1:]))
+        self.assertIn(b"Content-Length: 300000", bytes(self.received[:1000]))
+
+
+class TestH2StreamedBody(unittest.TestCase):
+    """HTTP/2 reads a streamed body only as the windows allow."""
+
+    def setUp(self):
+        self.sent = []
+        self.h2 = H2Connection(self.sent.append, lambda n: b"")
+
+    def _frames(self):
+        frames, _ = H2Frame.parse_all(b"".join(self.sent))
+        return frames
+
+    def test_generator_body_ends_stream_on_last_frame(self):
+        self.h2.send_request("POST", "example.com", "/", body=iter([b"a" * 20000, b"b" * 100]))
+        frames = self._frames()
+        self.assertEqual(frames[0].type, FRAME_HEADERS)
+        self.assertFalse(frames[0].flags & FLAG_END_STREAM)
+        data = [f for f in frames if f.type == FRAME_DATA]
+        self.assertEqual(b"".join(f.payload for f in data), b"a" * 20000 + b"b" * 100)
+        self.assertEqual([bool(f.flags & FLAG_END_STREAM) for f in data], [False] * (len(data) - 1) + [True])
+
+    def test_frames_span_chunk_boundaries(self):
+        # Frame sizes follow the windows, not the chunking of the body
+        self.h2.send_request("POST", "example.com", "/", body=(b"c" * 1000 for _ in range(40)))
+        data = [f for f in self._frames() if f.type == FRAME_DATA]
+        self.assertEqual([f.length for f in data], [16384, 16384, 7232])
+
+    def test_empty_stream_ends_with_headers(self):
+        self.h2.send_request("POST", "example.com", "/", body=iter([b"", b""]))
+        frames = self._frames()
+        self.assertEqual([f.type for f in frames], [FRAME_HEADERS])
+        self.assertTrue(frames[0].flags & FLAG_END_STREAM)
+
+    def test_read_ahead_is_bounded(self):
+        pulled = []
+
+        def body():
+            for i in range(100):
+                pulled.append(i)
+                yield b"x" * 16384
+
+        stream_id = self.h2.send_request("POST", "example.com", "/", body=body())
+        # 64 KB window sent, and up to STREAM_READ_AHEAD more read while it is closed
+        self.assertEqual(sum(f.length for f in self._frames() if f.type == FRAME_DATA), 65535)
+        self.assertEqual(len(pulled) * 16384, 65535 + STREAM_READ_AHEAD + 1)
+
+        self.h2.receive_data(
+            build_window_update_frame(0, 32768).serialize()
+            + build_window_update_frame(stream_id, 32768).serialize()
+        )
+        sent = sum(f.length for f in self._frames() if f.type == FRAME_DATA)
+        self.assertEqual(sent, 65535 + 32768)
+        self.assertLess(len(pulled) * 16384 - sent, STREAM_READ_AHEAD + 16384)
+
+    def test_body_read_outside_write_lock(self):
+        locked = []
+
+        def body():
+            for _ in range(10):
+                locked.append(self.h2._write_lock.locked())
+                yield b"x" * 16384
+
+        stream_id = self.h2.send_request("POST", "example.com", "/", body=body())
+        self.h2.receive_data(
+            build_window_update_frame(0, 65536).serialize()
+            + build_window_update_frame(stream_id, 65536).serialize()
+        )
+        self.assertGreater(len(locked), 8)
+        self.assertFalse(any(locked))
+
+    def test_window_update_sends_data_read_ahead(self):
+        # A reader thread handling WINDOW_UPDATE does not read the body, but
+        # the read-ahead lets it use all of the new credit
+        pulled = []
+
+        def body():
+            for i in range(100):
+                pulled.append(i)
+                yield b"x" * 16384
+
+        stream_id = self.h2.send_request("POST", "example.com", "/", body=body())
+        self.h2._handle_connection_frame(build_window_update_frame(0, 65536))
+        read = len(pulled)
+        self.h2._handle_stream_frame(build_window_update_frame(stream_id, 65536))
+        self.assertEqual(len(pulled), read)
+        self.assertEqual(sum(f.length for f in self._frames() if f.type == FRAME_DATA), 65535 + 65536)
+
+
+class _RecordingServer:
+    """HTTP server answering one request per connection from a script, recording what it got."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+        self.listener = socket.socket()
+        self.listener.bind(("127.0.0.1", 0))
+        self.listener.listen(8)
+        self.url = f"http://127.0.0.1:{self.listener.getsockname()[1]}/upload"
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.listener.accept()
+            except OSError:
+                return
+            with conn:
+                conn.settimeout(2)
+                try:
+                    self.requests.append(self._read_request(conn.makefile("rb")))
+                except OSError:
+                    continue
+                conn.sendall(self.responses.pop(0) if self.responses else b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\n\r\n")
+
+    @staticmethod
+    def _read_request(fp):
+        head = b""
+        while not head.endswith(b"\r\n\r\n"):
+            line = fp.readline()
+            if not line:
+                break
+            head += line
+        lower = head.lower()
+        if b"transfer-encoding: chunked" in lower:
+            body = b""
+            while True:
+                size = int(fp.readline().strip(), 16)
+                if not size:
+                    fp.readline()
+                    break
+                body += fp.read(size)
+                fp.readline()
+        else:
+            length = [int(line.split(b":")[1]) for line in lower.split(b"\r\n") if line.startswith(b"content-length:")]
+            body = fp.read(length[0]) if length else b""
+        return head, body
+
+    def close(self):
+        self.listener.close()
+
+
+class TestStreamedBodyReplay(unittest.TestCase):
+    """Retries rewind a seekable body and never resend a used-up one."""
+
+    unavailable = b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\n\r\n"
+
+    def _session(self, responses):
+        server = _RecordingServer(responses)
+        self.addCleanup(server.close)
+        pool = ConnectionPool()
+        self.addCleanup(pool.close_all)
+        return server, Session(pool=pool, retry=HTTPRetry(total=2, backoff_factor=0))
+
+    def test_retry_rewinds_file(self):
+        server, session = self._session([self.unavailable])
+        data = os.urandom(50000)
+        stream = io.BytesIO(b"skip" + data)
+        stream.read(4)
+        response = session.put(server.url, data=stream, timeout=5)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(server.requests), 2)
+        for head, body in server.requests:
+            self.assertIn(b"Content-Length: 50000", head)
+            self.assertEqual(body, data)
+
+    def test_generator_is_not_retried(self):
+        server, session = self._session([self.unavailable])
+        response = session.put(server.url, data=(chunk for chunk in [b"abc", b"def"]), timeout=5)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(len(server.requests), 1)
+        self.assertEqual(server.requests[0][1], b"abcdef")
+
+    def test_redirect_after_streamed_body_is_bodiless(self):
+        server, session = self._session([b"HTTP/1.1 302 Found\r\nLocation: /done\r\nContent-Length: 0\r\n\r\n"])
+        response = session.post(
+            server.url, data=iter([b"abc"]), headers={"Content-Type": "text/plain", "X-Id": "1"}, timeout=5
+        )
+        self.assertEqual(response.status_code, 200)
+        head, body = server.requests[1]
+        self.assertTrue(head.startswith(b"GET /done "))
+        self.assertIn(b"X-Id: 1", head)
+        for name in (b"content-length", b"content-type", b"transfer-encoding"):
+            self.assertNotIn(name, head.lower())
+        self.assertEqual(body, b"")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,251 @@
+"""Tests for the TLS 1.2 abbreviated handshake and resumption statistics."""
+
+import datetime
+import os
+import socket
+import ssl
+import struct
+import tempfile
+import threading
+import unittest
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from ja3requests.exceptions import TLSHandshakeError
+from ja3requests.protocol.tls import TLS
+from ja3requests.protocol.tls.config import TlsConfig
+from ja3requests.protocol.tls.extensions import SessionTicketExtension, SNIExtension
+from ja3requests.protocol.tls.session_cache import TLSSessionCache
+
+
+def _tls12_config(tickets=True):
+    config = TlsConfig()
+    config.tls_version = 0x0303
+    config.cipher_suites = [0xC02B, 0xC02F]
+    config.supported_groups = [23, 29]
+    config.signature_algorithms = [0x0403, 0x0804, 0x0401]
+    if tickets:
+        config.extensions = [SessionTicketExtension()]
+    return config
+
+
+def _server_hello(session_id, cipher_suite=0xC02F, version_ext=None):
+    body = b"\x03\x03" + os.urandom(32) + bytes([len(session_id)]) + session_id
+    body += struct.pack("!H", cipher_suite) + b"\x00"
+    if version_ext:
+        ext = struct.pack("!HHH", 0x002B, 2, version_ext)
+        body += struct.pack("!H", len(ext)) + ext
+    return body
+
+
+class TestSessionOffer(unittest.TestCase):
+    """Cached sessions go into the ClientHello without changing the extension list."""
+
+    def _tls(self, cache, config):
+        tls = TLS(None, session_cache=cache, server_host="a.com", server_port=443)
+        tls.set_payload(tls_config=config)
+        return tls
+
+    def test_session_id_is_offered(self):
+        cache = TLSSessionCache()
+        cache.put("a.com", 443, b"\x07" * 32, b"\x01" * 48, 0xC02F)
+        tls = self._tls(cache, _tls12_config(tickets=False))
+        self.assertEqual(tls.body.session_id, b"\x07" * 32)
+        self.assertIs(tls._resumption_entry, cache.get("a.com", 443))
+
+    def test_ticket_goes_into_session_ticket_extension(self):
+        cache = TLSSessionCache()
+        cache.put("a.com", 443, b"", b"\x01" * 48, 0xC02F, ticket=b"T" * 64)
+        config = _tls12_config()
+        tls = self._tls(cache, config)
+
+        self.assertIn(struct.pack("!HH", 0x0023, 64) + b"T" * 64, tls.body.extensions)
+        self.assertEqual(len(tls.body.session_id), 32)
+        self.assertEqual(tls._offered_session_id, tls.body.session_id)
+        self.assertEqual(config.extensions[0].ticket, b"")  # The config is not modified
+
+    def test_ticket_needs_session_ticket_extension(self):
+        cache = TLSSessionCache()
+        cache.put("a.com", 443, b"", b"\x01" * 48, 0xC02F, ticket=b"T" * 64)
+        config = _tls12_config(tickets=False)
+        config.extensions = [SNIExtension("a.com")]
+        tls = self._tls(cache, config)
+        self.assertIsNone(tls._resumption_entry)
+        self.assertEqual(tls.body.session_id, b"\x00")
+
+    def test_nothing_cached(self):
+        tls = self._tls(TLSSessionCache(), _tls12_config())
+        self.assertIsNone(tls._offered_session_id)
+
+
+class TestResumptionDetection(unittest.TestCase):
+    """The server accepts a session by echoing the offered session ID."""
+
+    def setUp(self):
+        self.cache = TLSSessionCache()
+        self.cache.put("a.com", 443, b"\x07" * 32, b"\x01" * 48, 0xC02F)
+        self.tls = TLS(None, session_cache=self.cache, server_host="a.com", server_port=443)
+        self.tls.set_payload(tls_config=_tls12_config(tickets=False))
+
+    def test_echoed_session_id_resumes(self):
+        self.tls._parse_server_hello(_server_hello(b"\x07" * 32))
+        self.assertTrue(self.tls.resumed)
+
+    def test_new_session_id_is_a_full_handshake(self):
+        self.tls._parse_server_hello(_server_hello(b"\x08" * 32))
+        self.assertFalse(self.tls.resumed)
+
+    def test_tls13_echo_is_not_resumption(self):
+        self.tls._parse_server_hello(_server_hello(b"\x07" * 32, version_ext=0x0304))
+        self.assertFalse(self.tls.resumed)
+
+    def test_cipher_suite_change_is_rejected(self):
+        with self.assertRaises(TLSHandshakeError):
+            self.tls._parse_server_hello(_server_hello(b"\x07" * 32, cipher_suite=0xC02B))
+
+    def test_ticket_is_not_stored_as_session_id(self):
+        self.tls._master_secret = b"\x02" * 48
+        self.tls._selected_cipher_suite = 0xC02F
+        self.tls._parse_new_session_ticket(struct.pack("!IH", 300, 5) + b"abcde")
+        entry = self.cache.get("a.com", 443)
+        self.assertEqual(entry.ticket, b"abcde")
+        self.assertEqual(entry.session_id, b"")
+
+
+class TestResumptionStats(unittest.TestCase):
+    def test_hit_rate_per_host(self):
+        cache = TLSSessionCache()
+        cache.record_handshake("A.com", 443, offered=False, resumed=False)
+        cache.record_handshake("a.com", 443, offered=True, resumed=True)
+        cache.record_handshake("a.com", 443, offered=True, resumed=False)
+        cache.record_handshake("b.com", 8443, offered=True, resumed=True)
+
+        stats = cache.get_stats()
+        self.assertEqual(stats["handshakes"], 4)
+        self.assertEqual(stats["resumed"], 2)
+        self.assertEqual(
+            stats["hosts"]["a.com:443"],
+            {"handshakes": 3, "offered": 2, "resumed": 1, "hit_rate": 1 / 3},
+        )
+        self.assertEqual(stats["hosts"]["b.com:8443"]["hit_rate"], 1.0)
+
+    def test_host_stats_are_bounded(self):
+        cache = TLSSessionCache(max_size=2)
+        for host in ("a.com", "b.com", "c.com"):
+            cache.record_handshake(host, 443, offered=False, resumed=False)
+        self.assertEqual(set(cache.get_stats()["hosts"]), {"b.com:443", "c.com:443"})
+
+
+def _server_context():
+    directory = tempfile.mkdtemp(prefix="ja3test")
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder().subject_name(name).issuer_name(name)
+        .public_key(key.public_key()).serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = os.path.join(directory, "cert.pem")
+    key_path = os.path.join(directory, "key.pem")
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ))
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    ctx.load_cert_chain(cert_path, key_path)
+    ctx.maximum_version = ssl.TLSVersion.TLSv1_2
+    return ctx
+
+
+class _RecordingSocket:
+    """Socket wrapper that keeps every write, one entry per sendall."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.sent = []
+
+    def sendall(self, data):
+        self.sent.append(data)
+        self.sock.sendall(data)
+
+    def recv(self, size):
+        return self.sock.recv(size)
+
+    def recv_into(self, buffer, size=0):
+        return self.sock.recv_into(buffer, size)
+
+    def settimeout(self, timeout):
+        self.sock.settimeout(timeout)
+
+
+class TestTicketResumptionAgainstOpenSSL(unittest.TestCase):
+    """A second connection resumes from an RFC 5077 ticket in one round trip."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.context = _server_context()
+        cls.listener = socket.create_server(("127.0.0.1", 0))
+        cls.port = cls.listener.getsockname()[1]
+        threading.Thread(target=cls._serve, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.listener.close()
+
+    @classmethod
+    def _serve(cls):
+        while True:
+            try:
+                conn, _ = cls.listener.accept()
+            except OSError:
+                return
+            try:
+                with cls.context.wrap_socket(conn, server_side=True) as tls_conn:
+                    tls_conn.sendall(tls_conn.recv(4))
+            except (OSError, ssl.SSLError):
+                pass
+
+    def _connect(self, cache):
+        sock = socket.create_connection(("127.0.0.1", self.port), timeout=5)
+        recorder = _RecordingSocket(sock)
+        try:
+            tls = TLS(recorder, session_cache=cache, server_host="127.0.0.1", server_port=self.port)
+            tls.set_payload(tls_config=_tls12_config())
+            self.assertTrue(tls.handshake())
+
+            sock.sendall(tls.encrypt_application_data(b"ping"))
+            header = sock.recv(5, socket.MSG_WAITALL)
+            payload = sock.recv(struct.unpack("!H", header[3:5])[0], socket.MSG_WAITALL)
+            self.assertEqual(tls.decrypt_record(header[0], header, payload), (0x17, b"ping"))
+            return tls, recorder.sent
+        finally:
+            sock.close()
+
+    def test_second_connection_is_abbreviated(self):
+        cache = TLSSessionCache()
+        first, _ = self._connect(cache)
+        self.assertFalse(first.resumed)
+        self.assertIsNotNone(cache.get("127.0.0.1", self.port).ticket)
+
+        second, sent = self._connect(cache)
+        self.assertTrue(second.resumed)
+        # ClientHello, then ChangeCipherSpec + Finished: no ClientKeyExchange
+        self.assertEqual(len(sent), 2)
+        self.assertEqual(sent[1][:6], b"\x14\x03\x03\x00\x01\x01")
+
+        stats = cache.get_stats()["hosts"][f"127.0.0.1:{self.port}"]
+        self.assertEqual((stats["handshakes"], stats["resumed"]), (2, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
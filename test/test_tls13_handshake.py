@@ -219,7 +219,8 @@ class TestNewSessionTicket(unittest.TestCase):
 
             entry = cache.get("ticket.example.com", 443)
             self.assertIsNotNone(entry)
-            self.assertEqual(entry.session_id, ticket_data)
+            self.assertEqual(entry.ticket, ticket_data)
+            self.assertEqual(entry.session_id, b"")
         finally:
             s1.close()
             s2.close()
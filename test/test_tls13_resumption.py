@@ -0,0 +1,343 @@
+"""Tests for TLS 1.3 PSK resumption with NewSessionTicket."""
+
+import datetime
+import hashlib
+import os
+import socket
+import ssl
+import struct
+import tempfile
+import threading
+import time
+import unittest
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from ja3requests.protocol.tls import TLS
+from ja3requests.protocol.tls.config import TlsConfig
+from ja3requests.protocol.tls.extensions import PreSharedKeyExtension
+from ja3requests.protocol.tls.session_cache import TLS13Ticket, TLSSessionCache
+from ja3requests.protocol.tls.tls13 import (
+    HKDF,
+    GROUP_X25519,
+    TLS13Handshake,
+    TLS13KeyExchange,
+    TLS13KeySchedule,
+)
+
+
+def _ticket(ticket=b"ticket", lifetime=7200, cipher_suite=0x1301, **kwargs):
+    return TLS13Ticket(ticket, b"\x00", lifetime, 12345, b"\x11" * 32, cipher_suite, **kwargs)
+
+
+def _new_session_ticket(ticket, nonce=b"\x01", lifetime=7200, age_add=99):
+    body = struct.pack("!II", lifetime, age_add)
+    body += struct.pack("B", len(nonce)) + nonce
+    body += struct.pack("!H", len(ticket)) + ticket + b"\x00\x00"
+    return b"\x04" + struct.pack("!I", len(body))[1:] + body
+
+
+def _tls13_config():
+    config = TlsConfig()
+    config.tls_version = 0x0304
+    config.cipher_suites = [0x1301, 0x1302, 0x1303]
+    config.supported_groups = [29]
+    config.signature_algorithms = [0x0403, 0x0804, 0x0401]
+    config.server_name = "localhost"
+    return config
+
+
+class TestResumptionKeySchedule(unittest.TestCase):
+    """Resumption secrets follow the RFC 8446 Section 7.1 derivations."""
+
+    def test_resumption_psk_is_expand_label_of_nonce(self):
+        schedule = TLS13KeySchedule()
+        psk = schedule.compute_resumption_psk(b"\x22" * 32, b"\x00")
+        self.assertEqual(psk, HKDF.expand_label(b"\x22" * 32, "resumption", b"\x00", 32))
+        self.assertNotEqual(psk, schedule.compute_resumption_psk(b"\x22" * 32, b"\x01"))
+
+    def test_resumption_psk_uses_suite_hash_length(self):
+        self.assertEqual(len(TLS13KeySchedule(hashlib.sha384).compute_resumption_psk(b"\x22" * 48, b"")), 48)
+
+    def test_binder_depends_on_psk_and_transcript(self):
+        schedule = TLS13KeySchedule()
+        schedule.compute_early_secret(b"\x01" * 32)
+        binder = schedule.compute_psk_binder(b"hello")
+        self.assertEqual(len(binder), 32)
+        self.assertNotEqual(binder, schedule.compute_psk_binder(b"hellO"))
+
+        other = TLS13KeySchedule()
+        other.compute_early_secret(b"\x02" * 32)
+        self.assertNotEqual(binder, other.compute_psk_binder(b"hello"))
+
+    def test_binder_key_requires_early_secret(self):
+        with self.assertRaises(ValueError):
+            TLS13KeySchedule().compute_binder_key()
+
+
+class TestPreSharedKeyExtension(unittest.TestCase):
+    def test_encoding(self):
+        ext = PreSharedKeyExtension([(b"tkt", 7)], [b"\xAA" * 32])
+        data = ext.encode()
+        self.assertEqual(data[:2], struct.pack("!H", 2 + 3 + 4))
+        self.assertEqual(data[2:9], b"\x00\x03tkt" + struct.pack("!I", 7)[:2])
+        self.assertEqual(data[-ext.binders_length:], b"\x00\x21\x20" + b"\xAA" * 32)
+        self.assertEqual(ext.to_bytes()[:2], b"\x00\x29")
+
+    def test_binders_length(self):
+        self.assertEqual(PreSharedKeyExtension([], [b"a" * 32, b"b" * 48]).binders_length, 2 + 33 + 49)
+
+
+class TestTicketCache(unittest.TestCase):
+    def test_get_ticket_pops_newest(self):
+        cache = TLSSessionCache()
+        first, second = _ticket(b"first"), _ticket(b"second")
+        cache.put_ticket("Example.com", 443, first)
+        cache.put_ticket("example.com", 443, second)
+        self.assertIs(cache.get_ticket("example.com", 443), second)
+        self.assertIs(cache.get_ticket("example.com", 443), first)
+        self.assertIsNone(cache.get_ticket("example.com", 443))
+
+    def test_keeps_a_bounded_number_per_host(self):
+        cache = TLSSessionCache()
+        for i in range(10):
+            cache.put_ticket("a.com", 443, _ticket(bytes([i])))
+        self.assertEqual(len(cache._tickets[("a.com", 443)]), TLSSessionCache.MAX_TICKETS_PER_HOST)
+
+    def test_max_size_evicts_oldest_host(self):
+        cache = TLSSessionCache(max_size=2)
+        cache.put_ticket("a.com", 443, _ticket(received_at=time.time() - 10))
+        cache.put_ticket("b.com", 443, _ticket())
+        cache.put_ticket("c.com", 443, _ticket())
+        self.assertIsNone(cache.get_ticket("a.com", 443))
+        self.assertIsNotNone(cache.get_ticket("c.com", 443))
+
+    def test_expired_tickets_are_skipped(self):
+        cache = TLSSessionCache()
+        cache.put_ticket("a.com", 443, _ticket(lifetime=5, received_at=time.time() - 10))
+        self.assertIsNone(cache.get_ticket("a.com", 443))
+
+    def test_zero_lifetime_is_not_stored(self):
+        cache = TLSSessionCache()
+        cache.put_ticket("a.com", 443, _ticket(lifetime=0))
+        self.assertIsNone(cache.get_ticket("a.com", 443))
+
+    def test_clear_and_remove_drop_tickets(self):
+        cache = TLSSessionCache()
+        cache.put_ticket("a.com", 443, _ticket())
+        cache.remove("a.com", 443)
+        self.assertIsNone(cache.get_ticket("a.com", 443))
+        cache.put_ticket("a.com", 443, _ticket())
+        cache.clear()
+        self.assertIsNone(cache.get_ticket("a.com", 443))
+
+    def test_obfuscated_age(self):
+        ticket = _ticket(received_at=1000.0)
+        self.assertEqual(ticket.obfuscated_age(now=1002.5), 2500 + 12345)
+        ticket.age_add = 0xFFFFFFFF
+        self.assertEqual(ticket.obfuscated_age(now=1001.0), 999)
+
+
+class TestTicketOffer(unittest.TestCase):
+    """The ClientHello carries the ticket with a binder the server can verify."""
+
+    def _tls(self, cache):
+        tls = TLS(None, session_cache=cache, server_host="a.com", server_port=443)
+        tls.set_payload(tls_config=_tls13_config())
+        return tls
+
+    def test_no_ticket_no_psk(self):
+        tls = self._tls(TLSSessionCache())
+        self.assertIsNone(tls._tls13_psk)
+        self.assertEqual(tls.body.extensions[2:], tls.body._extension_data)
+
+    def test_pre_shared_key_is_last_with_valid_binder(self):
+        cache = TLSSessionCache()
+        ticket = _ticket(b"T" * 40)
+        cache.put_ticket("a.com", 443, ticket)
+        tls = self._tls(cache)
+
+        psk = TLS13KeySchedule().compute_resumption_psk(ticket.resumption_master_secret, ticket.nonce)
+        self.assertEqual(tls._tls13_psk, psk)
+
+        hello = tls.body.handshake_message
+        binders_length = 2 + 1 + 32
+        ext_length = 2 + 2 + 40 + 4 + binders_length
+        self.assertEqual(hello[-(4 + ext_length):-ext_length], struct.pack("!HH", 0x0029, ext_length))
+        self.assertEqual(hello[-(ext_length - 4):-(ext_length - 4) + 40], b"T" * 40)
+
+        schedule = TLS13KeySchedule()
+        schedule.compute_early_secret(psk)
+        self.assertEqual(hello[-32:], schedule.compute_psk_binder(hello[:-binders_length]))
+        self.assertIsNone(cache.get_ticket("a.com", 443))
+
+    def test_ticket_for_unoffered_suite_is_not_used(self):
+        cache = TLSSessionCache()
+        cache.put_ticket("a.com", 443, _ticket(cipher_suite=0x1304))
+        self.assertIsNone(self._tls(cache)._tls13_psk)
+
+
+class TestPSKServerHello(unittest.TestCase):
+    """The PSK only enters the key schedule when the server selects it."""
+
+    def _server_hello(self, server_pub, psk_index=None):
+        key_share = struct.pack("!HH", GROUP_X25519, len(server_pub)) + server_pub
+        exts = struct.pack("!HH", 0x0033, len(key_share)) + key_share
+        exts += struct.pack("!HHH", 0x002B, 2, 0x0304)
+        if psk_index is not None:
+            exts += struct.pack("!HHH", 0x0029, 2, psk_index)
+        return (b"\x03\x03" + os.urandom(32) + b"\x00" + struct.pack("!H", 0x1301) + b"\x00"
+                + struct.pack("!H", len(exts)) + exts)
+
+    def _handshake(self, psk, psk_index):
+        client_priv, _ = TLS13KeyExchange.generate_x25519_keypair()
+        _, server_pub = TLS13KeyExchange.generate_x25519_keypair()
+        hs = TLS13Handshake(None, client_priv, GROUP_X25519, b"client_hello", psk=psk)
+        return hs, hs.process_server_hello(self._server_hello(server_pub, psk_index))
+
+    def test_accepted_psk_feeds_early_secret(self):
+        hs, ok = self._handshake(b"\x05" * 32, 0)
+        self.assertTrue(ok)
+        self.assertTrue(hs.psk_accepted)
+        expected = TLS13KeySchedule()
+        expected.compute_early_secret(b"\x05" * 32)
+        self.assertEqual(hs.key_schedule.early_secret, expected.early_secret)
+
+    def test_full_handshake_when_server_ignores_psk(self):
+        hs, ok = self._handshake(b"\x05" * 32, None)
+        self.assertTrue(ok)
+        self.assertFalse(hs.psk_accepted)
+        self.assertEqual(hs.key_schedule.early_secret, TLS13KeySchedule().compute_early_secret())
+
+    def test_psk_extension_without_offer_is_ignored(self):
+        hs, _ = self._handshake(None, 0)
+        self.assertFalse(hs.psk_accepted)
+
+    def test_psk_hash_mismatch_fails(self):
+        _, ok = self._handshake(b"\x05" * 48, 0)
+        self.assertFalse(ok)
+
+
+class TestNewSessionTicketProcessing(unittest.TestCase):
+    def setUp(self):
+        self.cache = TLSSessionCache()
+        self.tls = TLS(None, session_cache=self.cache, server_host="a.com", server_port=443)
+        self.tls._tls13_resumption_secret = b"\x33" * 32
+        self.tls._tls13_cipher_suite = 0x1301
+
+    def test_ticket_is_cached(self):
+        self.tls._process_post_handshake(_new_session_ticket(b"abc", nonce=b"\x07"))
+        ticket = self.cache.get_ticket("a.com", 443)
+        self.assertEqual(ticket.ticket, b"abc")
+        self.assertEqual(ticket.nonce, b"\x07")
+        self.assertEqual(ticket.lifetime, 7200)
+        self.assertEqual(ticket.age_add, 99)
+        self.assertEqual(ticket.resumption_master_secret, b"\x33" * 32)
+        self.assertEqual(ticket.cipher_suite, 0x1301)
+
+    def test_ticket_split_across_records(self):
+        message = _new_session_ticket(b"x" * 100) + _new_session_ticket(b"y")
+        self.tls._process_post_handshake(message[:50])
+        self.assertIsNone(self.cache.get_ticket("a.com", 443))
+        self.tls._process_post_handshake(message[50:])
+        self.assertEqual(self.cache.get_ticket("a.com", 443).ticket, b"y")
+        self.assertEqual(self.cache.get_ticket("a.com", 443).ticket, b"x" * 100)
+
+    def test_other_post_handshake_messages_are_skipped(self):
+        key_update = b"\x18\x00\x00\x01\x00"
+        self.tls._process_post_handshake(key_update + _new_session_ticket(b"abc"))
+        self.assertEqual(self.cache.get_ticket("a.com", 443).ticket, b"abc")
+
+
+def _server_context():
+    directory = tempfile.mkdtemp(prefix="ja3test")
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder().subject_name(name).issuer_name(name)
+        .public_key(key.public_key()).serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = os.path.join(directory, "cert.pem")
+    key_path = os.path.join(directory, "key.pem")
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ))
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    ctx.load_cert_chain(cert_path, key_path)
+    ctx.minimum_version = ssl.TLSVersion.TLSv1_3
+    return ctx
+
+
+class TestResumptionAgainstOpenSSL(unittest.TestCase):
+    """A second connection resumes with a ticket from the first one."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.context = _server_context()
+        cls.listener = socket.create_server(("127.0.0.1", 0))
+        cls.port = cls.listener.getsockname()[1]
+        cls.thread = threading.Thread(target=cls._serve, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.listener.close()
+
+    @classmethod
+    def _serve(cls):
+        while True:
+            try:
+                conn, _ = cls.listener.accept()
+            except OSError:
+                return
+            try:
+                with cls.context.wrap_socket(conn, server_side=True) as tls_conn:
+                    tls_conn.sendall(b"pong")
+                    tls_conn.recv(1)
+            except (OSError, ssl.SSLError):
+                pass
+
+    def _connect(self, cache):
+        sock = socket.create_connection(("127.0.0.1", self.port), timeout=5)
+        try:
+            tls = TLS(sock, session_cache=cache, server_host="127.0.0.1", server_port=self.port)
+            tls.set_payload(tls_config=_tls13_config())
+            self.assertTrue(tls.handshake())
+            data = b""
+            while b"pong" not in data:
+                header = sock.recv(5, socket.MSG_WAITALL)
+                payload = sock.recv(struct.unpack("!H", header[3:5])[0], socket.MSG_WAITALL)
+                content_type, plaintext = tls.decrypt_record(header[0], header, payload)
+                if content_type == 0x17:
+                    data += plaintext
+            return tls
+        finally:
+            sock.close()
+
+    def test_second_connection_skips_certificate(self):
+        cache = TLSSessionCache()
+        first = self._connect(cache)
+        self.assertFalse(first.resumed)
+        self.assertIn(11, first.server_handshake_types)
+
+        second = self._connect(cache)
+        self.assertTrue(second.resumed)
+        self.assertNotIn(11, second.server_handshake_types)
+        self.assertNotIn(15, second.server_handshake_types)
+        self.assertEqual(second.server_handshake_types[-1], 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
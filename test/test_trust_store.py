@@ -0,0 +1,193 @@
+"""Tests for the indexed CA trust store and chain building."""
+
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from ja3requests.protocol.tls.certificate_verify import CertificateVerifier
+from ja3requests.protocol.tls.trust_store import (
+    TrustStore,
+    default_ca_path,
+    get_trust_store,
+)
+
+NOW = datetime.datetime.now(datetime.timezone.utc)
+
+
+def _name(common_name):
+    return x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, common_name)])
+
+
+def _issue(common_name, issuer=None, ca=True, signer_name=None):
+    """A certificate and its key; self-signed when issuer is None."""
+    key = ec.generate_private_key(ec.SECP256R1())
+    issuer_cert, issuer_key = issuer if issuer else (None, key)
+    builder = (
+        x509.CertificateBuilder().subject_name(_name(common_name))
+        .issuer_name(signer_name or (issuer_cert.subject if issuer_cert else _name(common_name)))
+        .public_key(key.public_key()).serial_number(x509.random_serial_number())
+        .not_valid_before(NOW - datetime.timedelta(days=1)).not_valid_after(NOW + datetime.timedelta(days=30))
+        .add_extension(x509.BasicConstraints(ca=ca, path_length=None), critical=True)
+        .add_extension(x509.SubjectKeyIdentifier.from_public_key(key.public_key()), critical=False)
+    )
+    if issuer_cert is not None:
+        builder = builder.add_extension(
+            x509.AuthorityKeyIdentifier.from_issuer_public_key(issuer_key.public_key()), critical=False
+        )
+    if not ca:
+        builder = builder.add_extension(x509.SubjectAlternativeName([x509.DNSName(common_name)]), critical=False)
+    return builder.sign(issuer_key, hashes.SHA256()), key
+
+
+def _der(tag, content):
+    length = len(content)
+    if length < 0x80:
+        return bytes([tag, length]) + content
+    size = (length.bit_length() + 7) // 8
+    return bytes([tag, 0x80 | size]) + length.to_bytes(size, "big") + content
+
+
+def _v1(common_name, issuer=None):
+    """An X.509 v1 certificate (no version field, no extensions) and its key."""
+    key = ec.generate_private_key(ec.SECP256R1())
+    issuer_cert, issuer_key = issuer if issuer else (None, key)
+    v3 = (
+        x509.CertificateBuilder().subject_name(_name(common_name))
+        .issuer_name(issuer_cert.subject if issuer_cert else _name(common_name))
+        .public_key(key.public_key()).serial_number(x509.random_serial_number())
+        .not_valid_before(NOW - datetime.timedelta(days=1)).not_valid_after(NOW + datetime.timedelta(days=30))
+        .sign(issuer_key, hashes.SHA256())
+    )
+    tbs = v3.tbs_certificate_bytes
+    header = 2 if tbs[1] < 0x80 else 2 + (tbs[1] & 0x7F)
+    # Drop the explicit [0] version, which a v1 certificate leaves out
+    tbs = _der(0x30, tbs[header + 5:])
+    signature = issuer_key.sign(tbs, ec.ECDSA(hashes.SHA256()))
+    ecdsa_with_sha256 = bytes.fromhex("300a06082a8648ce3d040302")
+    cert = x509.load_der_x509_certificate(_der(0x30, tbs + ecdsa_with_sha256 + _der(0x03, b"\x00" + signature)))
+    return cert, key
+
+
+def _pem(*certs):
+    return b"".join(cert.public_bytes(serialization.Encoding.PEM) for cert in certs)
+
+
+class TestTrustStore(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.root = _issue("Root CA")
+        cls.mid1 = _issue("Intermediate 1", cls.root)
+        cls.mid2 = _issue("Intermediate 2", cls.mid1)
+        cls.leaf = _issue("example.com", cls.mid2, ca=False)[0]
+
+    def setUp(self):
+        self.store = TrustStore(_pem(self.root[0]))
+
+    def test_bundle_is_loaded_on_first_use(self):
+        self.assertIsNone(self.store._index)
+        self.assertEqual(len(self.store), 1)
+        self.assertIsNotNone(self.store._index)
+
+    def test_one_store_per_bundle(self):
+        self.assertIs(get_trust_store(b"x"), get_trust_store(b"x"))
+        self.assertIsNot(get_trust_store(b"x"), get_trust_store(b"y"))
+
+    def test_ordered_chain(self):
+        path = self.store.build_chain(self.leaf, [self.mid2[0], self.mid1[0]])
+        self.assertEqual(path, [self.leaf, self.mid2[0], self.mid1[0], self.root[0]])
+
+    def test_out_of_order_and_duplicate_intermediates(self):
+        unrelated = _issue("Unrelated", _issue("Other Root"))[0]
+        path = self.store.build_chain(self.leaf, [self.mid1[0], unrelated, self.mid2[0], self.mid1[0]])
+        self.assertEqual(path, [self.leaf, self.mid2[0], self.mid1[0], self.root[0]])
+
+    def test_missing_issuer_found_in_store(self):
+        store = TrustStore(_pem(self.root[0], self.mid1[0]))
+        self.assertEqual(store.build_chain(self.leaf, [self.mid2[0]])[-1], self.mid1[0])
+
+    def test_incomplete_chain_fails(self):
+        self.assertIsNone(self.store.build_chain(self.leaf, [self.mid2[0]]))
+
+    def test_untrusted_root_fails(self):
+        other = _issue("Root CA")  # Same name, different key
+        leaf = _issue("example.com", other, ca=False)[0]
+        self.assertIsNone(self.store.build_chain(leaf, [other[0]]))
+
+    def test_non_ca_issuer_rejected(self):
+        not_ca = _issue("Not a CA", self.root, ca=False)
+        leaf = _issue("example.com", not_ca, ca=False)[0]
+        self.assertIsNone(self.store.build_chain(leaf, [not_ca[0]]))
+
+    def test_v1_anchor(self):
+        root = _v1("V1 Root")
+        self.assertEqual(root[0].version, x509.Version.v1)
+        leaf = _issue("example.com", root, ca=False)[0]
+        self.assertEqual(TrustStore(_pem(root[0])).build_chain(leaf), [leaf, root[0]])
+
+    def test_v1_intermediate_rejected(self):
+        # A v1 leaf certificate cannot be used to issue others
+        v1_leaf = _v1("www.example.org", self.root)
+        leaf = _issue("example.com", v1_leaf, ca=False)[0]
+        self.assertIsNone(self.store.build_chain(leaf, [v1_leaf[0]]))
+
+    def test_intermediate_without_key_cert_sign_rejected(self):
+        key = ec.generate_private_key(ec.SECP256R1())
+        mid = (
+            x509.CertificateBuilder().subject_name(_name("No keyCertSign")).issuer_name(self.root[0].subject)
+            .public_key(key.public_key()).serial_number(x509.random_serial_number())
+            .not_valid_before(NOW - datetime.timedelta(days=1)).not_valid_after(NOW + datetime.timedelta(days=30))
+            .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+            .add_extension(x509.KeyUsage(
+                digital_signature=True, content_commitment=False, key_encipherment=False,
+                data_encipherment=False, key_agreement=False, key_cert_sign=False, crl_sign=False,
+                encipher_only=False, decipher_only=False,
+            ), critical=True)
+            .sign(self.root[1], hashes.SHA256())
+        )
+        leaf = _issue("example.com", (mid, key), ca=False)[0]
+        self.assertIsNone(self.store.build_chain(leaf, [mid]))
+
+    def test_anchor_as_leaf(self):
+        self.assertEqual(self.store.build_chain(self.root[0]), [self.root[0]])
+
+    def test_load_directory(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        for i, cert in enumerate((self.root[0], self.mid1[0])):
+            with open(os.path.join(directory, f"{i}.pem"), "wb") as f:
+                f.write(_pem(cert))
+        with open(os.path.join(directory, "README"), "wb") as f:
+            f.write(b"not a certificate")
+        self.assertEqual(len(TrustStore(directory)), 2)
+
+    @unittest.skipIf(default_ca_path() is None, "no system CA bundle")
+    def test_system_bundle(self):
+        self.assertGreater(len(TrustStore()), 0)
+
+
+class TestVerifierUsesTrustStore(unittest.TestCase):
+    def test_chain_must_reach_configured_anchor(self):
+        root = _issue("Root CA")
+        mid = _issue("Intermediate", root)
+        leaf = _issue("example.com", mid, ca=False)[0]
+        entries = b"".join(
+            len(der).to_bytes(3, "big") + der
+            for der in (leaf.public_bytes(serialization.Encoding.DER), mid[0].public_bytes(serialization.Encoding.DER))
+        )
+        chain = len(entries).to_bytes(3, "big") + entries
+
+        self.assertEqual(CertificateVerifier(ca_certs=_pem(root[0])).verify_certificate("example.com", chain), (True, None))
+        valid, error = CertificateVerifier(ca_certs=_pem(_issue("Other")[0])).verify_certificate("example.com", chain)
+        self.assertFalse(valid)
+        self.assertIn("trusted root", error)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,254 @@
+"""Tests for outbound frame coalescing and vectored record sends."""
+
+import os
+import socket
+import threading
+import unittest
+
+from ja3requests.protocol.h2.connection import OUTBOUND_FLUSH_SIZE, H2Connection
+from ja3requests.protocol.h2.frame import (
+    CONNECTION_PREFACE,
+    FLAG_ACK,
+    FRAME_DATA,
+    FRAME_HEADERS,
+    FRAME_SETTINGS,
+    FRAME_WINDOW_UPDATE,
+    H2Frame,
+    SETTINGS_INITIAL_WINDOW_SIZE,
+    build_ping_frame,
+    build_settings_frame,
+    build_window_update_frame,
+)
+from ja3requests.protocol.tls import MAX_FRAGMENT_LENGTH, TLS
+from ja3requests.protocol.tls.record_layer import (
+    SENDMSG_MAX_BUFFERS,
+    TLSRecordLayer,
+    TLSSocket,
+    send_buffers,
+)
+
+
+class _CountingSocket:
+    """Socket wrapper counting send calls; sendmsg may be cut short or missing."""
+
+    def __init__(self, sock, max_send=None, sendmsg=True):
+        self.sock = sock
+        self.max_send = max_send
+        self.sendmsg_calls = []
+        self.sendall_calls = 0
+        if not sendmsg:
+            self.sendmsg = None
+
+    def sendmsg(self, buffers):  # pylint: disable=method-hidden
+        self.sendmsg_calls.append(len(buffers))
+        if self.max_send is not None:
+            # Short write: only the first max_send bytes leave
+            data = b"".join(bytes(buf) for buf in buffers)[:self.max_send]
+            return self.sock.send(data)
+        return self.sock.sendmsg(buffers)
+
+    def sendall(self, data):
+        self.sendall_calls += 1
+        return self.sock.sendall(data)
+
+
+class _NoSendmsgSocket:
+    """Socket like ssl.SSLSocket, whose sendmsg is not implemented."""
+
+    def __init__(self):
+        self.sent = []
+
+    @staticmethod
+    def sendmsg(_buffers):
+        raise NotImplementedError
+
+    def sendall(self, data):
+        self.sent.append(bytes(data))
+
+
+def _read_all(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return bytes(data)
+
+
+@unittest.skipUnless(hasattr(socket.socket, "sendmsg"), "sendmsg not available")
+class TestSendBuffers(unittest.TestCase):
+    """send_buffers sends all buffers in order with as few calls as possible."""
+
+    def setUp(self):
+        self.client, self.server = socket.socketpair()
+
+    def tearDown(self):
+        self.client.close()
+        self.server.close()
+
+    def _send(self, sock, buffers):
+        expected = b"".join(buffers)
+        received = []
+        reader = threading.Thread(target=lambda: received.append(_read_all(self.server, len(expected))))
+        reader.start()
+        send_buffers(sock, buffers)
+        reader.join(5)
+        self.assertEqual(received, [expected])
+
+    def test_one_sendmsg_for_several_buffers(self):
+        sock = _CountingSocket(self.client)
+        self._send(sock, [os.urandom(100), os.urandom(16 * 1024), b"tail"])
+        self.assertEqual(sock.sendmsg_calls, [3])
+        self.assertEqual(sock.sendall_calls, 0)
+
+    def test_single_buffer_uses_sendall(self):
+        sock = _CountingSocket(self.client)
+        self._send(sock, [b"only"])
+        self.assertEqual(sock.sendmsg_calls, [])
+        self.assertEqual(sock.sendall_calls, 1)
+
+    def test_short_writes_are_resumed(self):
+        sock = _CountingSocket(self.client, max_send=7)
+        buffers = [b"abcde", b"fghijklmn", b"", b"opqrstuvwxyz"]
+        self._send(sock, buffers)
+        self.assertEqual(len(sock.sendmsg_calls), 4)  # 26 bytes, 7 at a time
+
+    def test_buffers_batched_per_call(self):
+        sock = _CountingSocket(self.client)
+        self._send(sock, [bytes([i % 256]) for i in range(SENDMSG_MAX_BUFFERS + 5)])
+        self.assertEqual(sock.sendmsg_calls, [SENDMSG_MAX_BUFFERS, 5])
+
+    def test_fallback_without_sendmsg(self):
+        sock = _CountingSocket(self.client, sendmsg=False)
+        self._send(sock, [b"one", b"two"])
+        self.assertEqual(sock.sendall_calls, 1)
+
+    def test_fallback_when_sendmsg_not_implemented(self):
+        sock = _NoSendmsgSocket()
+        send_buffers(sock, [b"one", b"two"])
+        self.assertEqual(sock.sent, [b"onetwo"])
+
+
+class _PlainRecordProtection:
+    """Record protection stand-in that frames plaintext without encrypting it."""
+
+    @staticmethod
+    def encrypt(content_type, data):
+        return bytes([content_type, 3, 3]) + len(data).to_bytes(2, "big") + bytes(data)
+
+
+class TestApplicationRecords(unittest.TestCase):
+    """Records are returned as a list matching encrypt_application_data."""
+
+    def test_tls_records_list(self):
+        tls = TLS.__new__(TLS)
+        tls._tls13_client_rp = _PlainRecordProtection()
+        data = os.urandom(2 * MAX_FRAGMENT_LENGTH + 10)
+        records = tls.encrypt_application_records(data)
+        self.assertEqual([len(r) - 5 for r in records], [MAX_FRAGMENT_LENGTH, MAX_FRAGMENT_LENGTH, 10])
+        self.assertEqual(b"".join(records), tls.encrypt_application_data(data))
+
+    def test_record_layer_sendall_is_one_sendmsg(self):
+        layer = TLSRecordLayer()
+        layer.set_keys(
+            os.urandom(16), os.urandom(16), client_write_mac_key=b"", server_write_mac_key=b"",
+            client_write_iv=os.urandom(4), server_write_iv=os.urandom(4), cipher_suite=0xC02F,
+        )
+        client, server = socket.socketpair()
+        self.addCleanup(client.close)
+        self.addCleanup(server.close)
+        counting = _CountingSocket(client)
+        tls_socket = TLSSocket.__new__(TLSSocket)
+        tls_socket.raw_socket = counting
+        tls_socket.record_layer = layer
+
+        data = os.urandom(3 * MAX_FRAGMENT_LENGTH)
+        received = []
+        reader = threading.Thread(target=lambda: received.append(_read_all(server, 3 * (5 + 8 + MAX_FRAGMENT_LENGTH + 16))))
+        reader.start()
+        tls_socket.sendall(data)
+        reader.join(5)
+
+        self.assertEqual(counting.sendmsg_calls, [3])
+        self.assertEqual(len(received[0]), 3 * (5 + 8 + MAX_FRAGMENT_LENGTH + 16))
+
+
+class TestH2WriteCoalescing(unittest.TestCase):
+    """H2Connection hands each logical write to send_func in one piece."""
+
+    def setUp(self):
+        self.sent = []
+        self.h2 = H2Connection(self.sent.append, lambda n: b"")
+
+    def _frames(self, data):
+        frames, rest = H2Frame.parse_all(data)
+        self.assertEqual(rest, b"")
+        return frames
+
+    def test_preface_settings_and_window_update_in_one_send(self):
+        self.h2.initiate(window_update_increment=15663105)
+        self.assertEqual(len(self.sent), 1)
+        self.assertTrue(self.sent[0].startswith(CONNECTION_PREFACE))
+        frames = self._frames(self.sent[0][len(CONNECTION_PREFACE):])
+        self.assertEqual([f.type for f in frames], [FRAME_SETTINGS, FRAME_WINDOW_UPDATE])
+
+    def test_headers_and_body_in_one_send(self):
+        self.h2.send_request("POST", "example.com", "/", body=b"a" * 1000)
+        self.assertEqual(len(self.sent), 1)
+        frames = self._frames(self.sent[0])
+        self.assertEqual([f.type for f in frames], [FRAME_HEADERS, FRAME_DATA])
+
+    def test_large_body_flushed_in_bounded_pieces(self):
+        self.h2._send_window = 1 << 20
+        self.h2._peer_settings[SETTINGS_INITIAL_WINDOW_SIZE] = 1 << 20
+        body = os.urandom(500000)
+        self.h2.send_request("POST", "example.com", "/", body=body)
+        self.assertGreater(len(self.sent), 1)
+        self.assertTrue(all(len(data) < OUTBOUND_FLUSH_SIZE + 16384 + 9 for data in self.sent))
+        frames = self._frames(b"".join(self.sent))
+        self.assertEqual(frames[0].type, FRAME_HEADERS)
+        self.assertEqual(b"".join(f.payload for f in frames[1:]), body)
+
+    def test_settings_ack_follows_released_data_in_one_send(self):
+        self.h2._peer_settings[SETTINGS_INITIAL_WINDOW_SIZE] = 10
+        self.h2.send_request("POST", "example.com", "/", body=b"a" * 30)
+        self.sent.clear()
+
+        self.h2.receive_data(build_settings_frame({SETTINGS_INITIAL_WINDOW_SIZE: 100}).serialize())
+        self.assertEqual(len(self.sent), 1)
+        frames = self._frames(self.sent[0])
+        self.assertEqual([f.type for f in frames], [FRAME_DATA, FRAME_SETTINGS])
+        self.assertTrue(frames[1].flags & FLAG_ACK)
+
+    def test_window_update_releases_data_in_one_send(self):
+        stream_id = self.h2.send_request("POST", "example.com", "/", body=b"a" * 70000)
+        self.sent.clear()
+
+        self.h2.receive_data(
+            build_window_update_frame(0, 10000).serialize()
+            + build_window_update_frame(stream_id, 10000).serialize()
+        )
+        self.assertEqual(len(self.sent), 1)
+        self.assertEqual(sum(f.length for f in self._frames(self.sent[0])), 70000 - 65535)
+
+    def test_queued_frames_go_out_before_later_writes(self):
+        with self.h2._write_lock:
+            self.h2._queue(build_window_update_frame(0, 1).serialize())
+        self.h2.receive_data(build_ping_frame(b"12345678").serialize())
+        frames = self._frames(b"".join(self.sent))
+        self.assertEqual([f.type for f in frames][0], FRAME_WINDOW_UPDATE)
+        self.assertEqual(len(self.sent), 1)
+
+    def test_flush_sends_queued_frames(self):
+        with self.h2._write_lock:
+            self.h2._queue(build_window_update_frame(0, 1).serialize())
+        self.assertEqual(self.sent, [])
+        self.h2.flush()
+        self.assertEqual(len(self.sent), 1)
+        self.h2.flush()
+        self.assertEqual(len(self.sent), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()